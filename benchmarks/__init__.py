@@ -0,0 +1,89 @@
+"""
+Offline benchmarks for the SoundHire web application.
+
+Benchmarks run against a local stand-in for the Supabase REST API
+(see standin.py), so no live Supabase project is needed.
+
+Run a benchmark from the project root, for example:
+    python -m benchmarks.bench_client_pool
+"""
+
+import os
+import time
+from typing import Dict, List
+
+
+def setup_django(supabase_url: str) -> None:
+    """
+    Point the app at a stand-in server and initialise Django.
+    
+    Must be called before importing anything from the bookings app.
+    
+    Args:
+        supabase_url: Base URL of the stand-in server
+    """
+    os.environ["SUPABASE_URL"] = supabase_url
+    os.environ.setdefault("SUPABASE_ANON_KEY", "benchmark-anon-key")
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "soundhire_web.settings")
+    
+    import django
+    django.setup()
+
+
+def time_calls(fn, calls: int) -> list:
+    """
+    Call fn repeatedly and return per-call latencies in milliseconds.
+    
+    Args:
+        fn: Zero-argument callable to time
+        calls: Number of calls
+    
+    Returns:
+        list: Latency of each call in milliseconds
+    """
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list.
+    
+    Args:
+        sorted_values: Values in ascending order
+        fraction: Percentile as a fraction, e.g. 0.95
+    
+    Returns:
+        float: The percentile, or 0.0 for an empty list
+    """
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * fraction))
+    return sorted_values[index]
+
+
+def latency_summary(latencies: List[float], elapsed: float, errors: int = 0) -> Dict[str, float]:
+    """
+    Summarise a load run.
+    
+    Args:
+        latencies: Latency of each successful request, in milliseconds
+        elapsed: Wall-clock seconds the run took
+        errors: Number of failed requests
+    
+    Returns:
+        Dict: requests, errors, rps, p50, p95 and p99 (milliseconds)
+    """
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': len(latencies) / elapsed if elapsed else 0.0,
+        'p50': percentile(latencies, 0.50),
+        'p95': percentile(latencies, 0.95),
+        'p99': percentile(latencies, 0.99),
+    }
@@ -0,0 +1,112 @@
+"""
+Benchmark: revenue analytics rollups, full build versus incremental refresh.
+
+Builds the analytics rollups (bookings/analytics.py) from generated
+bookings, then applies batches of changed bookings (status changes and
+new bookings) and reports:
+
+- full:     building the rollups from every booking (first load)
+- delta:    applying a batch of changed rows, recomputing only their days
+- scan:     a plain Python pass over every booking computing the same
+            totals, what a page without rollups would do on each view
+- payload:  building the JSON payload from the rollups (once per change)
+- cached:   reading the payload back from Django's cache (repeat views)
+
+It also checks that the incrementally refreshed rollups match a full
+rebuild from the changed table.
+
+Usage:
+    python -m benchmarks.bench_analytics [--bookings 100000] [--changes 10 100 1000]
+"""
+
+from datetime import datetime, timezone
+import argparse
+import os
+import random
+import time
+
+from benchmarks import setup_django
+from benchmarks.standin import generate_bookings
+
+
+def _scan(rows: list) -> dict:
+    """Totals per event day in one Python pass, for comparison."""
+    days = {}
+    for row in rows:
+        day = days.setdefault(row['start_date'], [0, 0.0, 0])
+        if row['status'] != 'cancelled':
+            day[0] += 1
+            day[2] += bool(row['include_dj'])
+        if row['status'] == 'confirmed':
+            day[1] += float(row['total_price'])
+    return days
+
+
+def _changes(rows: list, count: int, rng: random.Random, next_id: int) -> list:
+    """A batch of changed rows: mostly status changes, some new bookings."""
+    now = datetime.now(timezone.utc).isoformat()
+    changed = []
+    for i in range(count):
+        if i % 4 == 3:
+            row = dict(rng.choice(rows), id=next_id + i, status='pending')
+        else:
+            row = dict(rng.choice(rows), status=rng.choice(('confirmed', 'cancelled')))
+        row['updated_at'] = now
+        changed.append(row)
+    return changed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--bookings', type=int, default=100000)
+    parser.add_argument('--changes', type=int, nargs='+', default=[10, 100, 1000])
+    args = parser.parse_args()
+
+    os.environ['BOOKINGS_MIRROR'] = 'off'
+    setup_django('http://127.0.0.1:9')
+
+    from django.core.cache import cache
+    from bookings.analytics import AnalyticsRollups
+
+    rows = generate_bookings(args.bookings)
+    names = {1: 'Basic', 2: 'Standard', 3: 'Premium'}
+
+    started = time.perf_counter()
+    rollups = AnalyticsRollups(rows, '0/0', time.monotonic())
+    full_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    _scan(rows)
+    scan_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    payload = rollups.payload(names)
+    payload_ms = (time.perf_counter() - started) * 1000
+    cache.set('bench:analytics', payload, 300)
+    started = time.perf_counter()
+    for _ in range(100):
+        cache.get('bench:analytics')
+    cached_ms = (time.perf_counter() - started) * 10
+
+    print(f"{args.bookings} bookings over {len(rollups.daily)} event days")
+    print(f"full build {full_ms:.0f} ms, scan {scan_ms:.0f} ms, payload {payload_ms:.0f} ms, cached read {cached_ms:.2f} ms")
+
+    rng = random.Random(24)
+    table = {row['id']: row for row in rows}
+    next_id = args.bookings + 1
+    print(f"{'changes':>8}{'days':>7}{'delta':>10}")
+    for count in args.changes:
+        changed = _changes(rows, count, rng, next_id)
+        next_id += count
+        started = time.perf_counter()
+        days = rollups.apply_changes(changed, f"{count}/0")
+        delta_ms = (time.perf_counter() - started) * 1000
+        table.update((row['id'], row) for row in changed)
+        print(f"{count:>8}{len(days):>7}{delta_ms:>8.1f}ms")
+
+    rebuilt = AnalyticsRollups(list(table.values()), 'rebuilt', time.monotonic()).payload(names)
+    current = rollups.payload(names)
+    same = rebuilt['daily'] == current['daily'] and rebuilt['totals'] == current['totals']
+    print(f"incremental rollups match a full rebuild: {'yes' if same else 'NO'}")
+
+
+if __name__ == '__main__':
+    main()
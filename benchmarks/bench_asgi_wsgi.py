@@ -0,0 +1,183 @@
+"""
+Load test: booking submissions under WSGI (gunicorn) vs. ASGI (uvicorn).
+
+Starts the delayed stand-in server, then runs the app with one worker
+process under each server and submits bookings from many concurrent
+clients. Under WSGI each in-flight booking holds one of the worker's
+threads while it waits on Supabase; under ASGI the async views wait on
+the event loop, so one worker can keep hundreds of bookings in flight.
+
+Requires gunicorn and uvicorn (see requirements.txt).
+
+Usage:
+    python -m benchmarks.bench_asgi_wsgi [--concurrency 200] [--duration 20] [--latency 0.1]
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmarks import latency_summary
+from benchmarks.standin import StandInPostgREST, default_packages
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+BOOKING_FORM = {
+    'customer_name': 'Load Test',
+    'customer_email': 'load@example.com',
+    'customer_phone': '+256 700 000000',
+    'package_id': '2',
+}
+
+
+def _free_port() -> int:
+    """Ask the OS for an unused localhost port."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _server_command(kind: str, port: int, threads: int) -> list:
+    """Command line for one worker process of the given server kind."""
+    if kind == 'wsgi':
+        return [
+            sys.executable, '-m', 'gunicorn', 'soundhire_web.wsgi:application',
+            '--bind', f'127.0.0.1:{port}', '--workers', '1',
+            '--worker-class', 'gthread', '--threads', str(threads),
+            '--log-level', 'warning',
+        ]
+    return [
+        sys.executable, '-m', 'uvicorn', 'soundhire_web.asgi:application',
+        '--host', '127.0.0.1', '--port', str(port), '--workers', '1',
+        '--log-level', 'warning', '--no-access-log',
+    ]
+
+
+def _wait_until_up(base_url: str, timeout: float = 20.0) -> None:
+    """Poll the home page until the server answers."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(base_url + '/', timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not start")
+
+
+async def _load(base_url: str, concurrency: int, duration: float) -> dict:
+    """
+    Run `concurrency` simulated customers for `duration` seconds.
+
+    Each customer has its own cookie jar and repeats the real booking
+    flow: POST the form to /, then follow the redirect to the success page.
+    Customers share one connection pool so the load generator itself stays
+    cheap.
+    """
+    event_date = time.strftime('%Y-%m-%d', time.localtime(time.time() + 7 * 86400))
+    transport = httpx.AsyncHTTPTransport(
+        limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    )
+    clients = [
+        httpx.AsyncClient(base_url=base_url, transport=transport, timeout=60.0)
+        for _ in range(concurrency)
+    ]
+    latencies = []
+    errors = 0
+
+    async def first_visit(client):
+        # Sets the CSRF cookie, outside the measured window
+        await client.get('/')
+        return dict(BOOKING_FORM, event_date=event_date,
+                    csrfmiddlewaretoken=client.cookies.get('csrftoken'))
+
+    async def customer(client, form, stop_at):
+        nonlocal errors
+        while time.monotonic() < stop_at:
+            start = time.perf_counter()
+            try:
+                response = await client.post('/', data=form, headers={'Referer': base_url + '/'})
+                ok = response.status_code == 302
+                if ok:
+                    ok = (await client.get(response.headers['Location'])).status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append((time.perf_counter() - start) * 1000)
+            else:
+                errors += 1
+
+    try:
+        forms = await asyncio.gather(*(first_visit(client) for client in clients))
+        started = time.perf_counter()
+        stop_at = time.monotonic() + duration
+        await asyncio.gather(*(
+            customer(client, form, stop_at) for client, form in zip(clients, forms)
+        ))
+        elapsed = time.perf_counter() - started
+    finally:
+        await transport.aclose()
+
+    return latency_summary(latencies, elapsed, errors)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--duration', type=float, default=20.0)
+    parser.add_argument('--latency', type=float, default=0.1,
+                        help="Seconds of delay added by the stand-in per request")
+    parser.add_argument('--threads', type=int, default=8,
+                        help="gunicorn gthread threads for the WSGI worker")
+    args = parser.parse_args()
+
+    # Unlimited stock, so no submission is turned away as sold out
+    packages = [dict(package, stock=None) for package in default_packages()]
+
+    with StandInPostgREST(latency=args.latency, packages=packages) as standin, \
+            tempfile.TemporaryDirectory() as tmp:
+        print(
+            f"Booking submissions, {args.concurrency} concurrent clients, {args.duration:.0f}s, "
+            f"stand-in latency {args.latency * 1000:.0f} ms"
+        )
+        for kind in ('wsgi', 'asgi'):
+            port = _free_port()
+            env = dict(
+                os.environ,
+                SUPABASE_URL=standin.url,
+                SUPABASE_ANON_KEY='benchmark-anon-key',
+                DJANGO_SETTINGS_MODULE='benchmarks.settings',
+                BENCHMARK_DB=str(Path(tmp) / f'{kind}.sqlite3'),
+            )
+            # Bookings are queued in the outbox table before going to Supabase
+            subprocess.run(
+                [sys.executable, 'manage.py', 'migrate', '--verbosity', '0'],
+                cwd=PROJECT_DIR, env=env, check=True,
+            )
+            server = subprocess.Popen(_server_command(kind, port, args.threads), cwd=PROJECT_DIR, env=env)
+            try:
+                base_url = f'http://127.0.0.1:{port}'
+                _wait_until_up(base_url)
+                result = asyncio.run(_load(base_url, args.concurrency, args.duration))
+            finally:
+                server.terminate()
+                server.wait()
+
+            label = f"WSGI gunicorn ({args.threads} threads)" if kind == 'wsgi' else "ASGI uvicorn"
+            print(
+                f"{label:<28} {result['rps']:7.1f} bookings/s   p50 {result['p50']:7.1f} ms"
+                f"   p95 {result['p95']:7.1f} ms   p99 {result['p99']:7.1f} ms"
+                f"   ok {result['requests']}   errors {result['errors']}"
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark: availability check by table scan vs. the availability index.
+
+Generates active bookings spread over the next year, then times the
+question `home` asks before taking a booking ("is this package sold out
+on this date?"): once by scanning every booking, as a query without an
+index would, and once through AvailabilityIndex.
+
+Usage:
+    python -m benchmarks.bench_availability [--bookings 100000] [--checks 2000]
+"""
+
+from datetime import date, timedelta
+import argparse
+import random
+import statistics
+import time
+
+from benchmarks import setup_django, time_calls
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--bookings', type=int, default=100_000)
+    parser.add_argument('--checks', type=int, default=2000)
+    args = parser.parse_args()
+
+    setup_django("http://127.0.0.1:9")
+
+    from bookings.availability import build_index
+
+    today = date.today()
+    rng = random.Random(310)
+    bookings = []
+    for booking_id in range(1, args.bookings + 1):
+        start = today + timedelta(days=rng.randrange(365))
+        bookings.append({
+            'id': booking_id,
+            'package_id': rng.randint(1, 3),
+            'start_date': start.isoformat(),
+            'end_date': (start + timedelta(days=rng.randrange(3))).isoformat(),
+            'qty': 1,
+            'status': rng.choice(['pending', 'confirmed', 'cancelled']),
+        })
+
+    started = time.perf_counter()
+    index = build_index(bookings, today)
+    print(f"{args.bookings} bookings, index built in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    queries = [
+        (rng.randint(1, 3), (today + timedelta(days=rng.randrange(365))).isoformat())
+        for _ in range(args.checks)
+    ]
+
+    def scan():
+        package_id, day = queries[rng.randrange(len(queries))]
+        sum(
+            b['qty'] for b in bookings
+            if b['package_id'] == package_id and b['status'] != 'cancelled'
+            and b['start_date'] <= day <= b['end_date']
+        )
+
+    def indexed():
+        package_id, day = queries[rng.randrange(len(queries))]
+        day = date.fromisoformat(day)
+        index.booked(package_id, day, day)
+
+    for label, fn, calls in (("scan", scan, 20), ("index", indexed, args.checks)):
+        timings = time_calls(fn, calls)
+        print(
+            f"{label:<8} mean {statistics.mean(timings):9.4f} ms"
+            f"   p50 {statistics.median(timings):9.4f} ms"
+            f"   max {max(timings):9.4f} ms"
+        )
+
+
+if __name__ == '__main__':
+    main()
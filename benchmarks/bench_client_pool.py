@@ -0,0 +1,63 @@
+"""
+Benchmark: shared pooled Supabase client vs. a new client per call.
+
+Runs fetch_packages() repeatedly against the local stand-in server, first
+building a fresh client (and TCP connection) for every call as the app
+used to, then through the shared keep-alive pool.
+
+Usage:
+    python -m benchmarks.bench_client_pool [--calls 200] [--latency 0.0]
+"""
+
+import argparse
+import statistics
+
+from benchmarks import setup_django, time_calls
+from benchmarks.standin import StandInPostgREST
+
+
+def _report(label: str, timings: list) -> None:
+    """Print mean / p50 / p95 for one run."""
+    ordered = sorted(timings)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(
+        f"{label:<22} mean {statistics.mean(timings):7.2f} ms"
+        f"   p50 {statistics.median(timings):7.2f} ms"
+        f"   p95 {p95:7.2f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help="Seconds of delay added by the stand-in per request")
+    args = parser.parse_args()
+
+    with StandInPostgREST(latency=args.latency) as server:
+        setup_django(server.url)
+
+        from django.conf import settings
+        from supabase import create_client
+        from bookings import supabase_client
+
+        def unpooled():
+            client = create_client(settings.SUPABASE_URL, settings.SUPABASE_ANON_KEY)
+            client.table("packages").select("*").order("daily_rate").execute()
+
+        def pooled():
+            supabase_client.fetch_packages()
+
+        # Warm up both paths (imports, first connection)
+        unpooled()
+        pooled()
+
+        print(f"{args.calls} calls to the packages table, stand-in latency {args.latency * 1000:.0f} ms")
+        _report("new client per call", time_calls(unpooled, args.calls))
+        _report("shared pooled client", time_calls(pooled, args.calls))
+
+        supabase_client.reset_supabase_client()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Benchmark: sequential vs. concurrent Supabase reads for the admin dashboard.
+
+The stand-in server adds a fixed delay to every response. The dashboard's
+three independent reads (bookings, packages, DJ rate) are issued first one
+after another, as the view used to, then together through fan_out().
+
+Usage:
+    python -m benchmarks.bench_fanout [--calls 30] [--latency 0.05]
+"""
+
+import argparse
+import statistics
+
+from benchmarks import setup_django, time_calls
+from benchmarks.standin import StandInPostgREST
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--calls', type=int, default=30)
+    parser.add_argument('--latency', type=float, default=0.05,
+                        help="Seconds of delay added by the stand-in per request")
+    args = parser.parse_args()
+
+    with StandInPostgREST(latency=args.latency) as server:
+        setup_django(server.url)
+
+        from bookings.supabase_client import fan_out, list_bookings, fetch_packages, get_dj_rate
+
+        def sequential():
+            list_bookings()
+            fetch_packages()
+            get_dj_rate()
+
+        def concurrent():
+            fan_out({
+                'bookings': list_bookings,
+                'packages': fetch_packages,
+                'dj_rate': get_dj_rate,
+            })
+
+        # Warm up the connection pool
+        concurrent()
+
+        print(f"Dashboard reads x{args.calls}, stand-in latency {args.latency * 1000:.0f} ms")
+        for label, fn in (("sequential", sequential), ("fan_out", concurrent)):
+            timings = time_calls(fn, args.calls)
+            print(
+                f"{label:<12} mean {statistics.mean(timings):7.2f} ms"
+                f"   p50 {statistics.median(timings):7.2f} ms"
+                f"   max {max(timings):7.2f} ms"
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""
+Benchmark: occupancy calendar computation for the admin dashboard.
+
+Generates a year of bookings with multi-day rentals and quantities above
+one, then times turning them into units out per package per day:
+
+- numpy:  bookings/occupancy.compute_occupancy(), difference arrays and a
+          cumulative sum (what the occupancy view uses)
+- loop:   a plain Python loop adding each booking's qty to every day it
+          covers, for comparison
+
+Both must give the same counts. It also times a cached get_occupancy()
+call (the result is kept until the bookings change token changes), the
+first call for a token (reading the bookings from the bookings mirror,
+then computing) and laying the year out as a heatmap, and checks
+the computation against the 100 ms budget.
+
+Usage:
+    python -m benchmarks.bench_occupancy [--bookings 5000 20000 50000] [--repeat 20]
+"""
+
+from datetime import date, timedelta
+import argparse
+import os
+import random
+import time
+
+from benchmarks import percentile, setup_django
+from benchmarks.standin import StandInPostgREST, default_packages, generate_bookings
+
+BUDGET_MS = 100
+
+
+def _rentals(rows: list, year: int, seed: int = 23) -> list:
+    """Spread bookings over a year, 1-7 days long, 1-3 units, some cancelled."""
+    rng = random.Random(seed)
+    first = date(year, 1, 1)
+    for row in rows:
+        start = first + timedelta(days=rng.randrange(-7, 365))
+        row['start_date'] = start.isoformat()
+        row['end_date'] = (start + timedelta(days=rng.choice((0, 0, 0, 1, 1, 2, 3, 6)))).isoformat()
+        row['qty'] = rng.choice((1, 1, 1, 2, 3))
+        row['status'] = rng.choice(('pending', 'confirmed', 'confirmed', 'cancelled'))
+    return rows
+
+
+def _loop(rows: list, packages: list, first: date, last: date) -> dict:
+    """Units out per (package id, day), one booking day at a time."""
+    counts = {(pkg.id, first + timedelta(days=i)): 0 for pkg in packages for i in range((last - first).days + 1)}
+    for row in rows:
+        if row.get('status') == 'cancelled':
+            continue
+        day = max(date.fromisoformat(row['start_date']), first)
+        end = min(date.fromisoformat(row['end_date'] or row['start_date']), last)
+        while day <= end:
+            key = (row['package_id'], day)
+            if key in counts:
+                counts[key] += row.get('qty') or 1
+            day += timedelta(days=1)
+    return counts
+
+
+def _timings(fn, repeat: int) -> list:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return sorted(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--bookings', type=int, nargs='+', default=[5000, 20000, 50000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with StandInPostgREST() as standin:
+        # get_occupancy() reads the catalog from the stand-in and the
+        # bookings from a mirror loaded here (no sync thread)
+        os.environ['BOOKINGS_MIRROR'] = 'thread'
+        setup_django(standin.url)
+
+        from django.core.cache import cache
+        from bookings import mirror
+        from bookings.occupancy import compute_occupancy, get_occupancy, occupancy_heatmap
+        from bookings.supabase_client import Package
+
+        year = date.today().year
+        first, last = date(year, 1, 1), date(year, 12, 31)
+        packages = [Package.from_row(row) for row in default_packages()]
+        rows_by_id = {pkg.id: index for index, pkg in enumerate(packages)}
+
+        print(f"year {year}, {len(packages)} packages, budget {BUDGET_MS} ms")
+        print(f"{'bookings':>9}{'numpy p50':>11}{'p95':>8}{'loop':>10}{'speedup':>9}{'same':>6}"
+              f"{'first view':>12}{'cached':>9}{'heatmap':>9}{'budget':>8}")
+        for count in args.bookings:
+            rows = _rentals(generate_bookings(count), year)
+            numpy_ms = _timings(lambda: compute_occupancy(rows, packages, first, last), args.repeat)
+            started = time.perf_counter()
+            expected = _loop(rows, packages, first, last)
+            loop_ms = (time.perf_counter() - started) * 1000
+
+            result = compute_occupancy(rows, packages, first, last)
+            same = all(
+                int(result.units[rows_by_id[package_id], (day - first).days]) == units
+                for (package_id, day), units in expected.items()
+            )
+
+            # First call for a change token reads the bookings from the
+            # mirror and computes; later calls with the same token are hits
+            token = f"{count}/0"
+            mirror._mirror = mirror.BookingsMirror(rows, token, cache.get(mirror.GENERATION_CACHE_KEY), time.monotonic())
+            started = time.perf_counter()
+            get_occupancy(year, version=token)
+            first_ms = (time.perf_counter() - started) * 1000
+            cached_ms = _timings(lambda: get_occupancy(year, version=token), args.repeat)
+            heatmap_ms = _timings(lambda: occupancy_heatmap(result), max(3, args.repeat // 5))
+
+            p50 = percentile(numpy_ms, 0.5)
+            print(
+                f"{count:>9}{p50:>9.1f}ms{percentile(numpy_ms, 0.95):>6.1f}ms{loop_ms:>8.0f}ms"
+                f"{loop_ms / p50:>8.0f}x{'yes' if same else 'NO':>6}{first_ms:>10.0f}ms"
+                f"{percentile(cached_ms, 0.5):>7.2f}ms{percentile(heatmap_ms, 0.5):>7.1f}ms"
+                f"{'ok' if percentile(numpy_ms, 0.95) < BUDGET_MS else 'over':>8}"
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+"""
+Benchmark: booking rows as enriched dicts vs. Booking records.
+
+Decodes a JSON page of bookings (as PostgREST returns it), then prepares
+it for the dashboard two ways and reports the memory kept and the time
+taken per pass:
+
+- dict:   the rows enriched in place with package name, prices, DJ fee
+          and aliased contact/date keys (the dashboard before records)
+- record: each row parsed into a slotted Booking and attached to its
+          Package; derived values are properties
+
+A final "read" pass touches the fields the dashboard template shows, so
+the cost of computing properties on access is included.
+
+Usage:
+    python -m benchmarks.bench_records [--rows 100000] [--repeat 5]
+"""
+
+import argparse
+import gc
+import json
+import statistics
+import time
+import tracemalloc
+
+from benchmarks import setup_django
+
+DJ_RATE = 550000.0
+
+
+def _payload(rows: int) -> str:
+    """JSON body of a bookings response with Projection.DASHBOARD_ROW columns."""
+    return json.dumps([
+        {
+            'id': booking_id,
+            'customer_name': f"Customer {booking_id}",
+            'email': f"customer{booking_id}@example.com",
+            'phone': f"+2567{booking_id:08d}",
+            'start_date': '2026-11-20',
+            'end_date': '2026-11-20',
+            'package_id': 1 + booking_id % 3,
+            'qty': 1,
+            'include_dj': booking_id % 2 == 0,
+            'total_price': 1100000,
+            'status': ('pending', 'confirmed', 'cancelled')[booking_id % 3],
+        }
+        for booking_id in range(1, rows + 1)
+    ])
+
+
+def as_dicts(body: str, packages: dict) -> list:
+    """What admin_dashboard did before Booking: copy fields into each row."""
+    rows = json.loads(body)
+    for booking in rows:
+        package_id = booking.get('package_id')
+        if package_id and package_id in packages:
+            pkg = packages[package_id]
+            booking['package_name'] = pkg.name
+            booking['package_price'] = pkg.daily_rate
+            booking['dj_fee'] = DJ_RATE if booking.get('include_dj') else 0
+            booking['customer_email'] = booking.get('email', '')
+            booking['customer_phone'] = booking.get('phone', '')
+            booking['event_date'] = booking.get('start_date', '')
+            booking['dj_included'] = booking.get('include_dj', False)
+    return rows
+
+
+def as_records(body: str, packages: dict) -> list:
+    """Parse rows into Booking records and attach their packages."""
+    from bookings.supabase_client import Booking
+
+    return [
+        Booking.from_row(row).attach(packages.get(row.get('package_id')), DJ_RATE)
+        for row in json.loads(body)
+    ]
+
+
+def read_dicts(rows: list) -> float:
+    return sum(
+        len(b['customer_email']) + len(b['event_date']) + len(b['package_name'])
+        + b['package_price'] + b['dj_fee']
+        for b in rows
+    )
+
+
+def read_records(rows: list) -> float:
+    return sum(
+        len(b.email) + len(b.start_date) + len(b.package_name) + b.current_price
+        for b in rows
+    )
+
+
+def _retained(build, body: str, packages: dict) -> int:
+    """Bytes still allocated by build()'s result once the call has returned."""
+    gc.collect()
+    tracemalloc.start()
+    result = build(body, packages)
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def _timed(fn, *args, repeat: int) -> list:
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        fn(*args)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django("http://127.0.0.1:9")
+
+    from bookings.supabase_client import Package
+
+    packages = {
+        package_id: Package(id=package_id, name=name, daily_rate=rate)
+        for package_id, name, rate in ((1, 'Basic', 300000), (2, 'Standard', 550000), (3, 'Premium', 900000))
+    }
+    body = _payload(args.rows)
+    print(f"{args.rows} rows, {len(body) / 1e6:.1f} MB of JSON")
+
+    for label, build, read in (("dict", as_dicts, read_dicts), ("record", as_records, read_records)):
+        retained = _retained(build, body, packages)
+        build_ms = _timed(build, body, packages, repeat=args.repeat)
+        rows = build(body, packages)
+        read_ms = _timed(read, rows, repeat=args.repeat)
+        del rows
+        print(
+            f"{label:<8} retained {retained / 1e6:7.1f} MB ({retained / args.rows:5.0f} B/row)"
+            f"   build p50 {statistics.median(build_ms):7.1f} ms"
+            f"   read p50 {statistics.median(read_ms):6.1f} ms"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""
+Fault injection: timeouts, read retries and the circuit breaker.
+
+Runs the Supabase helpers against the stand-in while it injects faults,
+and checks each failure-handling policy of bookings/resilience.py:
+
+- brownout: every request stalls; calls give up after their operation
+  timeout instead of waiting for Supabase
+- flaky:    a share of reads fail with 503; retries with jittered backoff
+  recover most of them (compared with no retries), and writes are sent
+  exactly once
+- outage:   every request fails; the breaker opens after the threshold,
+  further calls fail fast without reaching Supabase, and the home page
+  still renders from the last known good catalog
+- recovery: faults cleared; after the cooldown one trial call closes the
+  breaker again
+
+Each check prints PASS or FAIL; the exit status is non-zero if any failed.
+
+Usage:
+    python -m benchmarks.bench_resilience [--calls 200] [--error-rate 0.3]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks import setup_django, time_calls
+from benchmarks.standin import StandInPostgREST
+
+_results = []
+
+
+def check(name: str, passed: bool, detail: str) -> None:
+    _results.append(passed)
+    print(f"  [{'PASS' if passed else 'FAIL'}] {name}: {detail}")
+
+
+def brownout(server, settings, calls: int) -> None:
+    from bookings.supabase_client import fetch_packages
+
+    timeout = 0.2
+    print(f"brownout (stall 1000 ms, fetch_packages timeout {timeout * 1000:.0f} ms)")
+    settings.SUPABASE_OPERATION_TIMEOUTS = {'fetch_packages': timeout}
+    server.inject_faults(stall=1.0)
+    timings = time_calls(fetch_packages, calls)
+    server.inject_faults()
+    # Each attempt is bounded by the timeout; GETs are retried up to twice
+    bound = (timeout * (1 + settings.SUPABASE_READ_RETRIES) + settings.SUPABASE_RETRY_MAX_DELAY * 2) * 1000
+    check("calls bounded by timeout and retries", max(timings) < bound,
+          f"max {max(timings):.0f} ms (bound {bound:.0f} ms)")
+
+
+def flaky(server, settings, calls: int, error_rate: float) -> None:
+    from bookings.supabase_client import get_booking_summary, update_booking_status
+
+    print(f"flaky ({error_rate:.0%} of requests answered 503)")
+    server.inject_faults(error_rate=error_rate)
+    rates = {}
+    for retries in (0, 2):
+        settings.SUPABASE_READ_RETRIES = retries
+        ok = sum(get_booking_summary() is not None for _ in range(calls))
+        rates[retries] = ok / calls
+        print(f"  reads succeeded with {retries} retries: {rates[retries]:.1%}")
+    check("retries recover failed reads", rates[2] > rates[0] and rates[2] >= 1 - error_rate ** 2 - 0.05,
+          f"{rates[0]:.1%} -> {rates[2]:.1%}")
+
+    server.inject_faults(error_rate=1.0, methods=['PATCH'])
+    before = server.request_count
+    update_booking_status(1, 'confirmed')
+    check("writes are not retried", server.request_count - before == 1,
+          f"{server.request_count - before} request(s) for one failed update")
+    server.inject_faults()
+
+
+def outage(server, settings, calls: int) -> None:
+    from django.test import Client
+    from bookings.catalog import get_catalog, invalidate_catalog
+    from bookings.resilience import breaker
+    from bookings.supabase_client import fetch_packages
+
+    print(f"outage (every request answered 503, breaker threshold {settings.SUPABASE_BREAKER_THRESHOLD})")
+    get_catalog()
+    server.inject_faults(error_rate=1.0)
+    before = server.request_count
+    while breaker.state != breaker.OPEN and server.request_count - before < 100:
+        fetch_packages()
+    check("breaker opens", breaker.state == breaker.OPEN,
+          f"{server.request_count - before} requests sent before opening")
+
+    before = server.request_count
+    timings = time_calls(fetch_packages, calls)
+    check("open breaker fails fast", server.request_count == before and max(timings) < 5,
+          f"{server.request_count - before} requests sent, max {max(timings):.2f} ms per call")
+
+    invalidate_catalog()
+    response = Client().get('/')
+    check("home page served from last known good catalog",
+          response.status_code == 200 and b'Premium' in response.content,
+          f"status {response.status_code}, {len(response.content)} bytes")
+    server.inject_faults()
+
+
+def recovery(server, settings) -> None:
+    from bookings.resilience import breaker
+    from bookings.supabase_client import fetch_packages
+
+    print(f"recovery (cooldown {settings.SUPABASE_BREAKER_COOLDOWN * 1000:.0f} ms)")
+    time.sleep(settings.SUPABASE_BREAKER_COOLDOWN)
+    packages = fetch_packages()
+    check("trial call closes the breaker", breaker.state == breaker.CLOSED and bool(packages),
+          f"state {breaker.state}, {len(packages)} packages")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--error-rate', type=float, default=0.3,
+                        help="Share of requests failing in the flaky scenario")
+    args = parser.parse_args()
+
+    workdir = tempfile.TemporaryDirectory()
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'benchmarks.settings'
+    os.environ['BENCHMARK_DB'] = os.path.join(workdir.name, 'bench.sqlite3')
+    os.environ['OUTBOX_DRAINER'] = 'off'
+
+    with StandInPostgREST(latency=0.002) as server:
+        setup_django(server.url)
+
+        from django.conf import settings
+        from django.core.management import call_command
+
+        call_command('migrate', verbosity=0)
+        # Every injected fault is logged by the helpers; keep the report readable
+        logging.getLogger('bookings').setLevel(logging.CRITICAL)
+        settings.SUPABASE_BREAKER_COOLDOWN = 0.5
+
+        # The breaker must not trip while measuring timeouts and retries
+        settings.SUPABASE_BREAKER_THRESHOLD = 10 ** 6
+        brownout(server, settings, min(args.calls, 10))
+        flaky(server, settings, args.calls, args.error_rate)
+
+        settings.SUPABASE_BREAKER_THRESHOLD = 5
+        outage(server, settings, args.calls)
+        recovery(server, settings)
+
+    workdir.cleanup()
+    print(f"{sum(_results)}/{len(_results)} checks passed")
+    sys.exit(0 if all(_results) else 1)
+
+
+if __name__ == '__main__':
+    main()
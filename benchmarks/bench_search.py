@@ -0,0 +1,150 @@
+"""
+Benchmark: dashboard search over the bookings mirror's index.
+
+Builds a bookings mirror (bookings/mirror.py) from generated bookings
+with realistic, often repeated customer names, then runs typical search
+box queries against it and reports p50/p95 latency per query for the
+first page of results:
+
+- index: BookingsMirror.search(), on the trigram index (bookings/search.py)
+- scan:  a plain substring scan over every row, for comparison (no typo
+         tolerance, so it finds nothing for the misspelt queries)
+
+It also times building the index and applying changed rows to it, and
+checks that misspelt names still find their booking.
+
+Usage:
+    python -m benchmarks.bench_search [--bookings 100000] [--repeat 50]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import time
+
+from benchmarks import percentile, setup_django
+from benchmarks.standin import generate_bookings
+
+FIRST_NAMES = [
+    'Amina', 'Brian', 'Catherine', 'Daniel', 'Esther', 'Francis', 'Grace', 'Henry',
+    'Irene', 'Joseph', 'Joan', 'Kenneth', 'Lydia', 'Moses', 'Naomi', 'Oscar',
+    'Patience', 'Quentin', 'Rebecca', 'Samuel', 'Teddy', 'Ursula', 'Victor', 'Winnie',
+    'Zoë', 'Allan', 'Brenda', 'Collins', 'Doreen', 'Emmanuel', 'Faith', 'Gerald',
+]
+LAST_NAMES = [
+    'Nakato', 'Okello', 'Mugisha', 'Namubiru', 'Ssempala', 'Achieng', 'Kato', 'Nambi',
+    'Tumusiime', 'Byaruhanga', 'Atuhaire', 'Kizito', 'Nalwoga', 'Opio', 'Wasswa', 'Babirye',
+    'Mukasa', 'Auma', 'Lubega', 'Kyomuhendo', 'Ochieng', 'Nansubuga', 'Ouma', 'Kabuye',
+]
+DOMAINS = ['gmail.com', 'yahoo.com', 'outlook.com', 'example.co.ug']
+
+
+def _customers(rows: list, seed: int = 22) -> list:
+    """Give generated bookings realistic names, emails and phone numbers."""
+    rng = random.Random(seed)
+    for row in rows:
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        row['customer_name'] = f"{first} {last}"
+        row['email'] = f"{first.lower()}.{last.lower()}{rng.randrange(100)}@{rng.choice(DOMAINS)}"
+        row['phone'] = f"+256 7{rng.randrange(10)}{rng.randrange(10)} {rng.randrange(10 ** 6):06d}"
+    return rows
+
+
+def _scan(rows: list, query: str) -> int:
+    """Substring search over every row, the way a naive filter would."""
+    words = query.lower().split()
+    found = 0
+    for row in rows:
+        text = f"{row['customer_name']} {row['email']} {row['phone']}".lower()
+        if all(word in text for word in words):
+            found += 1
+    return found
+
+
+def _latencies(fn, repeat: int) -> list:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return sorted(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--bookings', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--changes', type=int, default=1000, help="Changed rows applied incrementally")
+    args = parser.parse_args()
+
+    # The mirror only needs settings here; nothing calls Supabase
+    os.environ['BOOKINGS_MIRROR'] = 'off'
+    setup_django('http://127.0.0.1:9')
+
+    from bookings.mirror import BookingsMirror
+    from bookings.search import SearchIndex
+
+    rows = _customers(generate_bookings(args.bookings))
+    started = time.perf_counter()
+    SearchIndex(rows)
+    build_ms = (time.perf_counter() - started) * 1000
+    mirror = BookingsMirror(rows, '1/0', None, time.monotonic())
+    print(f"{args.bookings} bookings, index built in {build_ms:.0f} ms")
+
+    target = rows[len(rows) // 2]
+    first, last = target['customer_name'].split()
+    queries = [
+        ('full name', target['customer_name']),
+        ('first name', first),
+        ('name prefix', last[:3]),
+        ('email', target['email']),
+        ('email prefix', target['email'][:8]),
+        ('phone digits', target['phone'][-6:]),
+        ('full phone', target['phone']),
+        ('typo: swap', f"{first} {last[:2]}{last[3]}{last[2]}{last[4:]}"),
+        ('typo: missing', f"{first[:-1]} {last}"),
+        ('typo: extra', f"{first} {last}h"),
+        ('no match', 'zzqx'),
+    ]
+    print(f"{'query':<15}{'text':<32}{'found':>7}{'index p50':>11}{'p95':>8}{'scan p50':>10}")
+    for label, query in queries:
+        found = mirror.search(query).total
+        index = _latencies(lambda: mirror.search(query), args.repeat)
+        scan = _latencies(lambda: _scan(rows, query), max(3, args.repeat // 10))
+        print(
+            f"{label:<15}{query[:30]:<32}{found:>7}{percentile(index, 0.5):>9.2f}ms"
+            f"{percentile(index, 0.95):>6.2f}ms{percentile(scan, 0.5):>8.1f}ms"
+        )
+
+    # Misspelt names must still find the booking they were taken from
+    misses = 0
+    for label, query in queries:
+        if label.startswith('typo'):
+            page = mirror.search(query)
+            ids = set()
+            number = 1
+            while True:
+                ids.update(booking.id for booking in page.bookings)
+                if target['id'] in ids or not page.has_next:
+                    break
+                number += 1
+                page = mirror.search(query, page=number)
+            misses += target['id'] not in ids
+    print(f"typo queries finding their booking: {3 - misses}/3")
+
+    # Incremental maintenance: rows whose customer details changed
+    changed = [
+        dict(row, customer_name=f"Renamed {row['id']}", updated_at='2099-01-01T00:00:00+00:00')
+        for row in rows[:args.changes]
+    ]
+    started = time.perf_counter()
+    mirror.apply_changes(changed, '2/0')
+    per_row = (time.perf_counter() - started) * 1e6 / max(1, len(changed))
+    renamed = mirror.search(f"renamed {changed[0]['id']}").total
+    print(f"applied {len(changed)} changed rows: {per_row:.0f} us per row, renamed booking found: {bool(renamed)}")
+    print(f"median index query {statistics.median(_latencies(lambda: mirror.search(first), args.repeat)):.2f} ms after changes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+"""
+Load test: session and message storage in the public booking flow.
+
+Runs the booking round trip (POST / then GET /booking/success/) from many
+threads at once, each with its own test client, under four storage
+configurations:
+
+- db:             database sessions and session message storage (the
+                  previous defaults); every round trip writes the sessions
+                  table, and the writes queue up on SQLite's write lock
+- cache:          cache sessions (local memory here) and cookie messages
+- cached_db:      cache sessions backed by the sessions table, and cookie
+                  messages (the default; customers get no session, so
+                  nothing is written)
+- signed_cookies: signed-cookie sessions and cookie messages
+
+Each line reports round trips per second, p50/p95/p99 latency and the
+number of statements that wrote to the sessions table per round trip.
+Every round trip also queues its booking in the outbox table, a write
+the flow needs whatever the configuration; it is counted separately.
+The outbox drainer is not run, so nothing else writes to SQLite.
+
+Usage:
+    python -m benchmarks.bench_sessions [--concurrency 16] [--duration 5]
+"""
+
+from datetime import date, timedelta
+from typing import Dict, List
+import argparse
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from benchmarks import latency_summary, setup_django
+from benchmarks.standin import StandInPostgREST, default_packages
+
+BOOKING_FORM = {
+    'customer_name': 'Session Benchmark',
+    'customer_email': 'sessions@example.com',
+    'customer_phone': '+256 700 000000',
+    'package_id': '2',
+}
+
+CONFIGURATIONS = {
+    'db': (
+        'django.contrib.sessions.backends.db',
+        'django.contrib.messages.storage.session.SessionStorage',
+    ),
+    'cache': (
+        'django.contrib.sessions.backends.cache',
+        'django.contrib.messages.storage.fallback.FallbackStorage',
+    ),
+    'cached_db': (
+        'django.contrib.sessions.backends.cached_db',
+        'django.contrib.messages.storage.fallback.FallbackStorage',
+    ),
+    'signed_cookies': (
+        'django.contrib.sessions.backends.signed_cookies',
+        'django.contrib.messages.storage.fallback.FallbackStorage',
+    ),
+}
+
+
+class WriteCounter:
+    """Database execute wrapper counting statements that write each table."""
+
+    def __init__(self):
+        self.writes: Dict[str, int] = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        statement = sql.lstrip().upper()
+        if statement.startswith(('INSERT', 'UPDATE', 'DELETE')):
+            for table in ('DJANGO_SESSION', 'BOOKINGS_OUTBOXBOOKING'):
+                if table in statement:
+                    self.writes[table] = self.writes.get(table, 0) + 1
+        return execute(sql, params, many, context)
+
+
+def round_trip(client, form: Dict[str, str]) -> bool:
+    """Submit a booking and follow the redirect; True if both succeed."""
+    response = client.post('/', form)
+    if response.status_code != 302:
+        return False
+    response = client.get(response['Location'])
+    return response.status_code == 200 and form['customer_name'].encode() in response.content
+
+
+def run(concurrency: int, duration: float) -> Dict[str, float]:
+    """Run round trips from `concurrency` threads for `duration` seconds."""
+    from django.db import connection, connections
+    from django.test import Client
+
+    event_date = (date.today() + timedelta(days=14)).isoformat()
+    form = dict(BOOKING_FORM, event_date=event_date)
+    latencies: List[float] = []
+    errors = 0
+    writes: Dict[str, int] = {}
+    lock = threading.Lock()
+    window = {}
+
+    def start_clock():
+        window['started'] = time.perf_counter()
+        window['stop_at'] = time.monotonic() + duration
+
+    ready = threading.Barrier(concurrency, action=start_clock)
+
+    def worker():
+        nonlocal errors
+        client = Client()
+        round_trip(client, form)
+        counter = WriteCounter()
+        ready.wait()
+        mine, failed = [], 0
+        # The connection is per thread, so this counts this thread's writes
+        with connection.execute_wrapper(counter):
+            while time.monotonic() < window['stop_at']:
+                start = time.perf_counter()
+                try:
+                    ok = round_trip(client, form)
+                except Exception:
+                    # e.g. OperationalError: database is locked
+                    ok = False
+                if ok:
+                    mine.append((time.perf_counter() - start) * 1000)
+                else:
+                    failed += 1
+        with lock:
+            latencies.extend(mine)
+            errors += failed
+            for table, count in counter.writes.items():
+                writes[table] = writes.get(table, 0) + count
+        connections.close_all()
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    result = latency_summary(latencies, time.perf_counter() - window['started'], errors)
+    trips = max(1, result['requests'] + errors)
+    result['session_writes'] = writes.get('DJANGO_SESSION', 0) / trips
+    result['outbox_writes'] = writes.get('BOOKINGS_OUTBOXBOOKING', 0) / trips
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=5.0, help="Seconds per configuration")
+    parser.add_argument('--latency', type=float, default=0.005, help="Stand-in latency in seconds")
+    args = parser.parse_args()
+
+    # Unlimited stock, so bookings are never turned away as sold out
+    packages = [dict(package, stock=None) for package in default_packages()]
+
+    with StandInPostgREST(latency=args.latency, packages=packages) as standin, \
+            tempfile.TemporaryDirectory() as tmp:
+        os.environ['DJANGO_SETTINGS_MODULE'] = 'benchmarks.settings'
+        os.environ['BENCHMARK_DB'] = os.path.join(tmp, 'bench.sqlite3')
+        os.environ['OUTBOX_DRAINER'] = 'off'
+        setup_django(standin.url)
+
+        from django.conf import settings
+        from django.core.management import call_command
+        call_command('migrate', verbosity=0)
+        # Waiting on the write lock makes requests slow; keep the report readable
+        logging.getLogger('bookings.slow_requests').setLevel(logging.CRITICAL)
+
+        print(f"{args.concurrency} concurrent clients, {args.duration:.0f} s per configuration")
+        print(f"{'configuration':<16}{'rps':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'errors':>8}"
+              f"{'session writes':>16}{'outbox writes':>15}")
+        for name, (session_engine, message_storage) in CONFIGURATIONS.items():
+            # Read by each new test client when it loads the middleware
+            settings.SESSION_ENGINE = session_engine
+            settings.MESSAGE_STORAGE = message_storage
+            result = run(args.concurrency, args.duration)
+            print(
+                f"{name:<16}{result['rps']:>8.1f}{result['p50']:>7.1f}ms{result['p95']:>7.1f}ms"
+                f"{result['p99']:>7.1f}ms{result['errors']:>8}"
+                f"{result['session_writes']:>16.2f}{result['outbox_writes']:>15.2f}"
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark: serving the stylesheet, precompressed from memory versus
+Django's static.serve.
+
+Runs collectstatic into a temporary STATIC_ROOT (hashed names, .gz and,
+with Brotli installed, .br variants) and reports for each static file:
+
+- bytes sent plain, gzip and brotli
+- serve:   django.views.static.serve reading the file from disk per request
+           (plain bytes, Last-Modified only, no Cache-Control)
+- asset:   StaticAssetsMiddleware sending the gzip variant from memory
+- revisit: a repeat visit with If-None-Match (304); browsers skip even this
+           for hashed names until max-age runs out
+
+Usage:
+    python -m benchmarks.bench_static [--requests 2000]
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+
+from benchmarks import setup_django, time_calls
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix='bench-static-')
+    os.environ['STATIC_ROOT'] = root
+    # DEBUG=False, so {% static %} links to the hashed names
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+    setup_django('http://127.0.0.1:9')
+
+    from django.core.management import call_command
+    from django.http import HttpResponse
+    from django.templatetags.static import static
+    from django.test import RequestFactory
+    from django.views.static import serve
+    from bookings.staticfiles import StaticAssetsMiddleware, brotli
+
+    call_command('collectstatic', interactive=False, verbosity=0)
+    url = static('bookings/styles.css')
+    name = url.split('/static/', 1)[1]
+    print(f"{{% static 'bookings/styles.css' %}} -> {url} (brotli {'installed' if brotli else 'not installed'})")
+
+    middleware = StaticAssetsMiddleware(lambda request: HttpResponse(status=404))
+    factory = RequestFactory()
+    gzip_request = factory.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate, br')
+    response = middleware(gzip_request)
+    asset = middleware._assets[name]
+    sizes = ', '.join(f"{encoding or 'plain'} {len(body)} B" for encoding, body in asset.bodies.items())
+    print(f"sent: {response['Content-Encoding'] if response.has_header('Content-Encoding') else 'plain'}, "
+          f"ETag: {response['ETag']}, Cache-Control: {response['Cache-Control']}")
+    print(f"variants: {sizes}")
+
+    revisit = factory.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate, br', HTTP_IF_NONE_MATCH=response['ETag'])
+    assert middleware(revisit).status_code == 304
+    plain = factory.get(url)
+
+    def serve_from_disk():
+        b''.join(serve(plain, name, document_root=root).streaming_content)
+
+    print(f"{'':>8}{'median':>10}{'bytes':>8}")
+    for label, fn, sent in (
+        ('serve', serve_from_disk, len(asset.bodies[''])),
+        ('asset', lambda: middleware(gzip_request), len(asset.bodies.get('gzip', asset.bodies['']))),
+        ('revisit', lambda: middleware(revisit), 0),
+    ):
+        timings = time_calls(fn, args.requests)
+        print(f"{label:>8}{statistics.median(timings) * 1000:>8.0f}us{sent:>8}")
+    shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
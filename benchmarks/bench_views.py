@@ -0,0 +1,347 @@
+"""
+Benchmark suite: each page of the app, sequentially and under load.
+
+Runs the app in-process against the stand-in (standin.py), seeded with
+--bookings generated bookings and answering with --latency (+ --jitter)
+seconds of delay. Every scenario is driven through Django's test client:
+
+- sequential: one client, --requests requests back to back
+- concurrent: --concurrency clients for --duration seconds; threads each
+  with a test Client (the WSGI code path), or with --asgi, asyncio tasks
+  each with an AsyncClient and the async Supabase client
+
+Scenarios:
+    home                  GET /
+    home_revalidate       GET / with If-None-Match (expects 304)
+    booking_success       GET /booking/success/
+    dashboard             GET /admin/dashboard/ (first page)
+    dashboard_filtered    GET /admin/dashboard/?status=pending
+    dashboard_revalidate  GET /admin/dashboard/ with If-None-Match (expects 304)
+    booking               POST / then GET /booking/success/ (adds bookings, runs last)
+
+Each line reports requests per second, p50/p95/p99 latency, Supabase
+round trips per request and the stand-in's own processing time per
+request. Save a run with --json and compare a later one against it with
+--compare to spot regressions.
+
+Usage:
+    python -m benchmarks.bench_views [--bookings 5000] [--latency 0.02] [--asgi]
+    python -m benchmarks.bench_views --only dashboard --json before.json
+    python -m benchmarks.bench_views --only dashboard --compare before.json
+"""
+
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Optional
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+
+from benchmarks import latency_summary, setup_django
+from benchmarks.standin import StandInPostgREST, default_packages, generate_bookings
+
+BOOKING_FORM = {
+    'customer_name': 'Benchmark Customer',
+    'customer_email': 'bench@example.com',
+    'customer_phone': '+256 700 000000',
+    'package_id': '2',
+}
+
+
+@dataclass
+class Scenario:
+    """
+    One request (or short flow) to measure.
+
+    Attributes:
+        name: Scenario name used in reports and --only
+        path: URL to request
+        admin: Whether clients log in as admin first
+        expected: Status code of a successful final response
+        revalidate: Send the ETag from a first GET as If-None-Match
+        post: Form data to POST (the redirect is then followed)
+    """
+    name: str
+    path: str
+    admin: bool = False
+    expected: int = 200
+    revalidate: bool = False
+    post: Optional[Dict[str, str]] = None
+
+    def prepare(self, client) -> Dict[str, str]:
+        """Log in and warm up one sync client; return extra request headers."""
+        if self.admin:
+            client.post('/admin/login/', {'access_code': _access_code()})
+            client.get('/admin/dashboard/')  # shows and consumes the login message
+        headers = {}
+        if self.revalidate:
+            headers['If-None-Match'] = client.get(self.path)['ETag']
+        return headers
+
+    async def aprepare(self, client) -> Dict[str, str]:
+        """Async version of prepare()."""
+        if self.admin:
+            await client.post('/admin/login/', {'access_code': _access_code()})
+            await client.get('/admin/dashboard/')
+        headers = {}
+        if self.revalidate:
+            headers['If-None-Match'] = (await client.get(self.path))['ETag']
+        return headers
+
+    def run(self, client, headers: Dict[str, str]) -> bool:
+        """Make the request(s) once; True if the final status is as expected."""
+        if self.post is not None:
+            response = client.post(self.path, self.post, headers=headers)
+            if response.status_code != 302:
+                return False
+            response = client.get(response['Location'], headers=headers)
+        else:
+            response = client.get(self.path, headers=headers)
+        return response.status_code == self.expected
+
+    async def arun(self, client, headers: Dict[str, str]) -> bool:
+        """Async version of run()."""
+        if self.post is not None:
+            response = await client.post(self.path, self.post, headers=headers)
+            if response.status_code != 302:
+                return False
+            response = await client.get(response['Location'], headers=headers)
+        else:
+            response = await client.get(self.path, headers=headers)
+        return response.status_code == self.expected
+
+
+def _access_code() -> str:
+    """Admin access code from the app settings."""
+    from django.conf import settings
+    return settings.ADMIN_ACCESS_CODE
+
+
+def _scenarios() -> List[Scenario]:
+    """All scenarios, in run order (booking last: it adds bookings)."""
+    event_date = (date.today() + timedelta(days=7)).isoformat()
+    return [
+        Scenario('home', '/'),
+        Scenario('home_revalidate', '/', expected=304, revalidate=True),
+        Scenario('booking_success', '/booking/success/'),
+        Scenario('dashboard', '/admin/dashboard/', admin=True),
+        Scenario('dashboard_filtered', '/admin/dashboard/?status=pending', admin=True),
+        Scenario('dashboard_revalidate', '/admin/dashboard/', admin=True, expected=304, revalidate=True),
+        Scenario('booking', '/', post=dict(BOOKING_FORM, event_date=event_date)),
+    ]
+
+
+def _sequential(scenario: Scenario, requests: int, warmup: int) -> Dict[str, float]:
+    """Run a scenario back to back on one test client."""
+    from django.test import Client
+
+    client = Client()
+    headers = scenario.prepare(client)
+    for _ in range(warmup):
+        scenario.run(client, headers)
+
+    latencies, errors = [], 0
+    started = time.perf_counter()
+    for _ in range(requests):
+        start = time.perf_counter()
+        if scenario.run(client, headers):
+            latencies.append((time.perf_counter() - start) * 1000)
+        else:
+            errors += 1
+    return latency_summary(latencies, time.perf_counter() - started, errors)
+
+
+async def _asequential(scenario: Scenario, requests: int, warmup: int) -> Dict[str, float]:
+    """Async version of _sequential(), on one AsyncClient."""
+    from django.test import AsyncClient
+
+    client = AsyncClient()
+    headers = await scenario.aprepare(client)
+    for _ in range(warmup):
+        await scenario.arun(client, headers)
+
+    latencies, errors = [], 0
+    started = time.perf_counter()
+    for _ in range(requests):
+        start = time.perf_counter()
+        if await scenario.arun(client, headers):
+            latencies.append((time.perf_counter() - start) * 1000)
+        else:
+            errors += 1
+    return latency_summary(latencies, time.perf_counter() - started, errors)
+
+
+def _concurrent_threads(scenario: Scenario, concurrency: int, duration: float) -> Dict[str, float]:
+    """Run a scenario from `concurrency` threads, each with its own test client."""
+    from django.db import connections
+    from django.test import Client
+
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+    window = {}
+
+    def start_clock():
+        window['started'] = time.perf_counter()
+        window['stop_at'] = time.monotonic() + duration
+
+    # Every client logs in and warms up before the clock starts
+    ready = threading.Barrier(concurrency, action=start_clock)
+
+    def worker():
+        nonlocal errors
+        client = Client()
+        headers = scenario.prepare(client)
+        ready.wait()
+        mine, failed = [], 0
+        while time.monotonic() < window['stop_at']:
+            start = time.perf_counter()
+            if scenario.run(client, headers):
+                mine.append((time.perf_counter() - start) * 1000)
+            else:
+                failed += 1
+        with lock:
+            latencies.extend(mine)
+            errors += failed
+        connections.close_all()
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latency_summary(latencies, time.perf_counter() - window['started'], errors)
+
+
+async def _concurrent_tasks(scenario: Scenario, concurrency: int, duration: float) -> Dict[str, float]:
+    """Run a scenario from `concurrency` asyncio tasks, each with its own AsyncClient."""
+    from django.test import AsyncClient
+
+    clients = [AsyncClient() for _ in range(concurrency)]
+    headers = await asyncio.gather(*(scenario.aprepare(client) for client in clients))
+    latencies: List[float] = []
+    errors = 0
+
+    async def worker(client, extra, stop_at):
+        nonlocal errors
+        while time.monotonic() < stop_at:
+            start = time.perf_counter()
+            if await scenario.arun(client, extra):
+                latencies.append((time.perf_counter() - start) * 1000)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    stop_at = time.monotonic() + duration
+    await asyncio.gather(*(worker(c, h, stop_at) for c, h in zip(clients, headers)))
+    return latency_summary(latencies, time.perf_counter() - started, errors)
+
+
+def _measured(standin: StandInPostgREST, run: Callable[[], Dict[str, float]]) -> Dict[str, float]:
+    """Run a measurement and add the stand-in's calls and busy time per request."""
+    calls, busy = standin.request_count, standin.busy_seconds
+    result = run()
+    served = max(result['requests'] + result['errors'], 1)
+    result['supabase_calls'] = (standin.request_count - calls) / served
+    result['standin_ms'] = (standin.busy_seconds - busy) * 1000 / served
+    return result
+
+
+def _report(name: str, mode: str, result: Dict[str, float], previous: Optional[Dict] = None) -> None:
+    """Print one result line, with the change against a saved run if given."""
+    line = (
+        f"{name:<21} {mode:<10} {result['rps']:8.1f} req/s"
+        f"   p50 {result['p50']:7.1f}   p95 {result['p95']:7.1f}   p99 {result['p99']:7.1f} ms"
+        f"   ok {result['requests']:<6} err {result['errors']:<4}"
+        f" supabase {result['supabase_calls']:4.1f}/req   stand-in {result['standin_ms']:5.2f} ms/req"
+    )
+    if previous:
+        rps_change = (result['rps'] / previous['rps'] - 1) * 100 if previous['rps'] else 0.0
+        p95_change = (result['p95'] / previous['p95'] - 1) * 100 if previous['p95'] else 0.0
+        line += f"   vs. saved: rps {rps_change:+.0f}%  p95 {p95_change:+.0f}%"
+    print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--bookings', type=int, default=5000, help="Bookings in the stand-in")
+    parser.add_argument('--latency', type=float, default=0.02, help="Stand-in delay per request (s)")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Extra random delay, up to (s)")
+    parser.add_argument('--requests', type=int, default=200, help="Sequential requests per scenario")
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--duration', type=float, default=5.0, help="Seconds per concurrent run")
+    parser.add_argument('--asgi', action='store_true', help="Async client and asyncio load generator")
+    parser.add_argument('--only', nargs='*', help="Scenario names to run (default: all)")
+    parser.add_argument('--json', help="Write results to this file")
+    parser.add_argument('--compare', help="Compare with results saved by --json")
+    args = parser.parse_args()
+
+    previous = {}
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)['results']
+
+    # Unlimited stock, so booking submissions are never turned away as sold out
+    packages = [dict(package, stock=None) for package in default_packages()]
+    bookings = generate_bookings(args.bookings, packages)
+
+    with StandInPostgREST(latency=args.latency, jitter=args.jitter, packages=packages, bookings=bookings) as standin, \
+            tempfile.TemporaryDirectory() as tmp:
+        # A throwaway SQLite file for the outbox
+        os.environ['DJANGO_SETTINGS_MODULE'] = 'benchmarks.settings'
+        os.environ['BENCHMARK_DB'] = os.path.join(tmp, 'bench.sqlite3')
+        # One drainer for the whole run (as with `manage.py outbox run`),
+        # so it can be stopped before the database file is removed
+        os.environ['OUTBOX_DRAINER'] = 'off'
+        if args.asgi:
+            os.environ['SUPABASE_ASYNC_CLIENT'] = '1'
+        setup_django(standin.url)
+
+        from django.core.management import call_command
+        from bookings.outbox import run_drainer, wake_drainer
+        call_command('migrate', verbosity=0)
+        stop_drainer = threading.Event()
+        drainer = threading.Thread(target=run_drainer, args=(stop_drainer,), daemon=True)
+        drainer.start()
+
+        print(
+            f"{'ASGI' if args.asgi else 'WSGI'} code path, {args.bookings} bookings, "
+            f"stand-in latency {args.latency * 1000:.0f} ms (+{args.jitter * 1000:.0f} ms jitter), "
+            f"{args.concurrency} concurrent clients"
+        )
+        results = {}
+        for scenario in _scenarios():
+            if args.only and scenario.name not in args.only:
+                continue
+            if args.asgi:
+                runs = {
+                    'sequential': lambda: asyncio.run(_asequential(scenario, args.requests, args.warmup)),
+                    'concurrent': lambda: asyncio.run(_concurrent_tasks(scenario, args.concurrency, args.duration)),
+                }
+            else:
+                runs = {
+                    'sequential': lambda: _sequential(scenario, args.requests, args.warmup),
+                    'concurrent': lambda: _concurrent_threads(scenario, args.concurrency, args.duration),
+                }
+            for mode, run in runs.items():
+                key = f"{scenario.name}/{mode}"
+                results[key] = _measured(standin, run)
+                _report(scenario.name, mode, results[key], previous.get(key))
+
+        stop_drainer.set()
+        wake_drainer()
+        drainer.join()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'arguments': vars(args), 'results': results}, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
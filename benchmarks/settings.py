@@ -0,0 +1,24 @@
+"""
+Django settings for running the app under real servers in load tests.
+
+Same as soundhire_web.settings, except that any host name is accepted
+and the SQLite database (which holds the booking outbox) is a throwaway
+file named by BENCHMARK_DB.
+"""
+
+import os
+
+from soundhire_web.settings import *  # noqa: F401,F403
+
+DEBUG = False
+ALLOWED_HOSTS = ['*']
+
+if os.getenv('BENCHMARK_DB'):
+    DATABASES['default']['NAME'] = os.environ['BENCHMARK_DB']  # noqa: F405
+
+# Keep server output readable during load tests
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'root': {'level': 'WARNING'},
+}
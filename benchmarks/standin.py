@@ -0,0 +1,632 @@
+"""
+Local stand-in for the Supabase REST (PostgREST) API.
+
+Implements the small subset of PostgREST that the bookings app uses,
+backed by in-memory tables:
+- GET    /rest/v1/<table>   select, eq/neq/gt/gte/lt/lte/in filters, or/and trees,
+                            order, limit, offset (or a `Range: 0-24` header)
+- POST   /rest/v1/<table>   insert one row or a list of rows (on_conflict with
+                            resolution=ignore-duplicates skips existing keys)
+- PATCH  /rest/v1/<table>   update the rows matching the filters
+- GET/POST /rest/v1/rpc/<fn> call a database function (see FUNCTIONS)
+
+Inserts and updates honour `select=` (returned columns) and the
+`Prefer: return=minimal` / `count=exact` headers, like the real API.
+Booking rows get `updated_at` set on insert and update, and every write
+bumps the bookings_version row, as the triggers in supabase/migrations/
+do. Deletes are not served over HTTP (the app never deletes); tests and
+benchmarks call delete() directly.
+
+Every response can be delayed by a fixed latency, plus optional random
+jitter, to mimic the round trip to a hosted Supabase project. Faults can
+be injected with inject_faults(): error responses (e.g. 503) for a share
+of requests, or stalls that mimic a brownout. Datasets of
+any size can be generated with generate_bookings(). The server speaks
+HTTP/1.1 so clients can keep connections alive between requests.
+
+Filters are evaluated by scanning the table in Python, so with large
+datasets the stand-in itself takes measurable time; busy_seconds records
+it so benchmarks can tell it apart from the app's own time.
+"""
+
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Any, Optional
+from difflib import SequenceMatcher
+from urllib.parse import urlsplit, parse_qsl
+import json
+import random
+import re
+import threading
+import time
+
+
+def default_packages() -> List[Dict[str, Any]]:
+    """
+    Return the three SoundHire packages used by the stand-in.
+
+    Returns:
+        List[Dict]: Package rows matching the Supabase packages table
+    """
+    return [
+        {'id': 1, 'name': 'Basic', 'description': 'Two speakers and a mixer', 'daily_rate': 300000, 'stock': 5},
+        {'id': 2, 'name': 'Standard', 'description': 'Four speakers, mixer and microphones', 'daily_rate': 550000, 'stock': 3},
+        {'id': 3, 'name': 'Premium', 'description': 'Full PA system with lighting', 'daily_rate': 950000, 'stock': 2},
+    ]
+
+
+def generate_bookings(
+    count: int,
+    packages: Optional[List[Dict[str, Any]]] = None,
+    seed: int = 310,
+    days: int = 365,
+) -> List[Dict[str, Any]]:
+    """
+    Generate booking rows spread over the `days` around today.
+
+    The same seed always gives the same rows, so benchmark runs are
+    comparable.
+
+    Args:
+        count: Number of bookings
+        packages: Package rows the bookings refer to (default_packages())
+        seed: Random seed
+        days: Event dates fall within days/2 before and after today
+
+    Returns:
+        List[Dict]: Booking rows with ids 1..count
+    """
+    packages = packages or default_packages()
+    rng = random.Random(seed)
+    first_day = date.today() - timedelta(days=days // 2)
+    created = _now()
+    rows = []
+    for booking_id in range(1, count + 1):
+        package = rng.choice(packages)
+        start = first_day + timedelta(days=rng.randrange(days))
+        include_dj = rng.random() < 0.4
+        rows.append({
+            'id': booking_id,
+            'customer_name': f"Customer {booking_id}",
+            'email': f"customer{booking_id}@example.com",
+            'phone': f"+256 700 {booking_id:06d}",
+            'start_date': start.isoformat(),
+            'end_date': start.isoformat(),
+            'package_id': package['id'],
+            'qty': 1,
+            'include_dj': include_dj,
+            'total_price': package['daily_rate'] + (550000 if include_dj else 0),
+            'status': rng.choice(['pending', 'confirmed', 'confirmed', 'cancelled']),
+            'updated_at': created,
+        })
+    return rows
+
+
+def _now() -> str:
+    """Current time as PostgREST renders a timestamptz."""
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _coerce(value: str) -> Any:
+    """Convert a filter value from the query string to a Python value."""
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        # Quoted by postgrest-py (values with reserved characters, e.g. timestamps)
+        return value[1:-1]
+    if value in ('true', 'false'):
+        return value == 'true'
+    if value == 'null':
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def _comparable(value: Any) -> Any:
+    """Make numbers and strings comparable for filters and ordering."""
+    if isinstance(value, bool):
+        return int(value)
+    return value
+
+
+def _matches(row: Dict[str, Any], column: str, expression: str) -> bool:
+    """
+    Check one PostgREST filter expression (e.g. "eq.pending") against a row.
+
+    Args:
+        row: Table row
+        column: Column name the filter applies to
+        expression: Operator and operand, as sent by postgrest-py
+
+    Returns:
+        bool: True if the row satisfies the filter
+    """
+    operator, _, operand = expression.partition('.')
+    negate = False
+    if operator == 'not':
+        negate = True
+        operator, _, operand = operand.partition('.')
+
+    value = row.get(column)
+    if operator == 'in':
+        options = [_coerce(v.strip('"')) for v in operand.strip('()').split(',') if v]
+        result = value in options
+    elif operator == 'is':
+        result = value is _coerce(operand)
+    else:
+        target = _coerce(operand)
+        if operator == 'eq':
+            result = value == target
+        elif operator == 'neq':
+            result = value != target
+        elif value is None:
+            result = False
+        elif operator == 'gt':
+            result = _comparable(value) > _comparable(target)
+        elif operator == 'gte':
+            result = _comparable(value) >= _comparable(target)
+        elif operator == 'lt':
+            result = _comparable(value) < _comparable(target)
+        elif operator == 'lte':
+            result = _comparable(value) <= _comparable(target)
+        else:
+            raise ValueError(f"Unsupported filter operator: {operator}")
+    return not result if negate else result
+
+
+def _split_top_level(text: str) -> List[str]:
+    """Split "a,and(b,c),d" on the commas that are not inside parentheses."""
+    parts, depth, current = [], 0, ''
+    for char in text:
+        if char == ',' and depth == 0:
+            parts.append(current)
+            current = ''
+            continue
+        depth += (char == '(') - (char == ')')
+        current += char
+    if current:
+        parts.append(current)
+    return parts
+
+
+def _matches_tree(row: Dict[str, Any], operator: str, body: str) -> bool:
+    """
+    Evaluate a PostgREST logic tree such as or=(a.lt.1,and(b.eq.2,c.gt.3)).
+
+    Args:
+        row: Table row
+        operator: "or" or "and"
+        body: Parenthesised list of conditions
+
+    Returns:
+        bool: True if the row satisfies the tree
+    """
+    results = []
+    for condition in _split_top_level(body[1:-1]):
+        if condition.startswith(('or(', 'and(')):
+            nested, _, rest = condition.partition('(')
+            results.append(_matches_tree(row, nested, '(' + rest))
+        else:
+            column, _, expression = condition.partition('.')
+            results.append(_matches(row, column, expression))
+    return any(results) if operator == 'or' else all(results)
+
+
+def _row_matches(row: Dict[str, Any], filters: List[tuple]) -> bool:
+    """Check a row against every query-string filter (AND-ed together)."""
+    for key, value in filters:
+        if key in ('or', 'and'):
+            if not _matches_tree(row, key, value):
+                return False
+        elif not _matches(row, key, value):
+            return False
+    return True
+
+
+def _booking_summary(tables: Dict[str, List[Dict[str, Any]]], args: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Python equivalent of the booking_summary() Postgres function."""
+    bookings = tables['bookings']
+    counts = {'pending': 0, 'confirmed': 0, 'cancelled': 0}
+    revenue = 0
+    for row in bookings:
+        status = row.get('status')
+        if status in counts:
+            counts[status] += 1
+        if status == 'confirmed':
+            revenue += row.get('total_price') or 0
+    return [{'total': len(bookings), **counts, 'confirmed_revenue': revenue}]
+
+
+def _search_bookings(tables: Dict[str, List[Dict[str, Any]]], args: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Rough Python equivalent of the search_bookings() Postgres function
+    (difflib similarity stands in for pg_trgm's word similarity).
+    """
+    words = list(dict.fromkeys(re.findall(r'[a-z0-9]+', str(args.get('query', '')).lower())))[:6]
+    status = args.get('status_filter')
+    found = []
+    for row in tables['bookings']:
+        if not words or (status and row.get('status') != status):
+            continue
+        name = (row.get('customer_name') or '').lower()
+        email = (row.get('email') or '').lower()
+        digits = re.sub(r'\D', '', row.get('phone') or '')
+        score = 0.0
+        for word in words:
+            if word in name or word in email:
+                best = 1.0
+            elif word in digits:
+                best = 0.6
+            elif len(word) >= 4:
+                best = max((SequenceMatcher(None, word, part).ratio() for part in name.split()), default=0)
+                best = best if best >= 0.75 else 0
+            else:
+                best = 0
+            if not best:
+                break
+            score += best
+        else:
+            found.append((score, row.get('start_date') or '', row['id'], row))
+    found.sort(key=lambda match: match[:3], reverse=True)
+    offset = int(args.get('page_offset', 0))
+    limit = int(args.get('page_limit', 26))
+    return [dict(match[3]) for match in found[offset:offset + limit]]
+
+
+# Database functions exposed under /rest/v1/rpc/<name>, mirroring
+# supabase/migrations/. Each takes the tables and the call arguments.
+FUNCTIONS = {
+    'booking_summary': _booking_summary,
+    'search_bookings': _search_bookings,
+}
+
+
+class _Server(ThreadingHTTPServer):
+    """Threaded HTTP server with a listen backlog deep enough for load tests."""
+    request_queue_size = 1024
+
+    def handle_error(self, request, client_address):
+        # Clients hanging up mid-response (e.g. on timeout) are expected
+        pass
+
+
+class StandInPostgREST:
+    """
+    In-process HTTP server that behaves like a Supabase project's REST API.
+
+    Usage:
+        with StandInPostgREST(latency=0.02) as server:
+            setup_django(server.url)
+            ...
+
+    Attributes:
+        tables: In-memory tables keyed by name (packages, settings, bookings)
+        latency: Seconds added to every response
+        jitter: Up to this many extra seconds, chosen at random per response
+        request_count: Number of requests served so far
+        busy_seconds: Time spent handling requests, excluding injected latency
+        faults_injected: Number of requests answered with an injected error
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        packages: Optional[List[Dict[str, Any]]] = None,
+        bookings: Optional[List[Dict[str, Any]]] = None,
+        dj_rate: float = 550000,
+        jitter: float = 0.0,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.tables: Dict[str, List[Dict[str, Any]]] = {
+            'packages': packages if packages is not None else default_packages(),
+            'settings': [{'id': 1, 'dj_daily_rate': dj_rate}],
+            'bookings': bookings if bookings is not None else [],
+            'bookings_version': [{'id': 1, 'version': 0, 'deletes': 0}],
+        }
+        for row in self.tables['bookings']:
+            row.setdefault('updated_at', _now())
+        self.request_count = 0
+        self.busy_seconds = 0.0
+        self.faults_injected = 0
+        self.inject_faults()
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL to use as SUPABASE_URL."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StandInPostgREST":
+        """Start serving on a free localhost port in a background thread."""
+        self._server = _Server(('127.0.0.1', 0), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the server and wait for the serving thread to exit."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "StandInPostgREST":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def inject_faults(
+        self,
+        error_rate: float = 0.0,
+        status: int = 503,
+        stall: float = 0.0,
+        methods: Optional[List[str]] = None,
+        code: Optional[str] = None,
+    ) -> None:
+        """
+        Make requests fail or hang, until called again (no arguments clears).
+
+        A failed request is answered before it touches the tables, so an
+        injected error on an insert or update leaves no trace.
+
+        Args:
+            error_rate: Share of requests (0..1) answered with `status`
+            status: HTTP status of injected errors
+            stall: Seconds every affected request waits before being handled
+            methods: HTTP methods affected (default: all)
+            code: Error code in the body, e.g. a SQLSTATE such as "23514"
+                for a refused insert (default: the HTTP status)
+        """
+        self.fault_error_rate = error_rate
+        self.fault_status = status
+        self.fault_stall = stall
+        self.fault_methods = set(methods) if methods else None
+        self.fault_code = code or str(status)
+
+    # ------------------------------------------------------------------
+    # Table operations
+    # ------------------------------------------------------------------
+
+    def select(self, table: str, params: List[tuple]) -> List[Dict[str, Any]]:
+        """Run a filtered, ordered, paginated select against a table."""
+        return self.select_with_count(table, params)[0]
+
+    def select_with_count(self, table: str, params: List[tuple]) -> tuple:
+        """Like select(), also returning how many rows matched before limit/offset."""
+        columns = '*'
+        order = None
+        limit = None
+        offset = 0
+        filters = []
+        for key, value in params:
+            if key == 'select':
+                columns = value
+            elif key == 'order':
+                order = value
+            elif key == 'limit':
+                limit = int(value)
+            elif key == 'offset':
+                offset = int(value)
+            else:
+                filters.append((key, value))
+
+        with self._lock:
+            rows = [
+                row for row in self.tables.get(table, [])
+                if _row_matches(row, filters)
+            ]
+
+        if order:
+            # Apply sort keys right-to-left so the first key wins
+            for term in reversed(order.split(',')):
+                parts = term.split('.')
+                column = parts[0]
+                descending = 'desc' in parts[1:]
+                rows.sort(
+                    key=lambda r: (r.get(column) is None, _comparable(r.get(column) or 0)),
+                    reverse=descending,
+                )
+
+        total = len(rows)
+        rows = rows[offset:]
+        if limit is not None:
+            rows = rows[:limit]
+        return [self._project(row, columns) for row in rows], total
+
+    def insert(
+        self,
+        table: str,
+        payload: Any,
+        params: Optional[List[tuple]] = None,
+        ignore_duplicates: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """
+        Insert one row or a list of rows, assigning ids.
+
+        With ignore_duplicates, rows whose on_conflict column value already
+        exists are skipped and left out of the result (ON CONFLICT DO NOTHING).
+        """
+        new_rows = payload if isinstance(payload, list) else [payload]
+        conflict_column = dict(params or []).get('on_conflict') if ignore_duplicates else None
+        created = []
+        with self._lock:
+            rows = self.tables.setdefault(table, [])
+            next_id = max((r.get('id', 0) for r in rows), default=0) + 1
+            existing = {r.get(conflict_column) for r in rows} if conflict_column else set()
+            for row in new_rows:
+                if conflict_column:
+                    if row.get(conflict_column) in existing:
+                        continue
+                    existing.add(row.get(conflict_column))
+                row = dict(row)
+                row.setdefault('id', next_id)
+                if table == 'bookings':
+                    row.setdefault('updated_at', _now())
+                next_id = max(next_id, row['id']) + 1
+                rows.append(row)
+                created.append(dict(row))
+            if table == 'bookings':
+                self._bump_version()
+        columns = dict(params or []).get('select', '*')
+        return [self._project(row, columns) for row in created]
+
+    def update(self, table: str, params: List[tuple], changes: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Apply changes to every row matching the filters."""
+        filters = [(k, v) for k, v in params if k not in ('select', 'order', 'limit', 'offset')]
+        updated = []
+        with self._lock:
+            for row in self.tables.get(table, []):
+                if _row_matches(row, filters):
+                    row.update(changes)
+                    if table == 'bookings':
+                        row['updated_at'] = _now()
+                    updated.append(dict(row))
+            if table == 'bookings':
+                self._bump_version()
+        columns = dict(params).get('select', '*')
+        return [self._project(row, columns) for row in updated]
+
+    def delete(self, table: str, ids: List[int]) -> int:
+        """Delete rows by id, as an admin would in the Supabase dashboard."""
+        ids = set(ids)
+        with self._lock:
+            rows = self.tables.get(table, [])
+            kept = [row for row in rows if row.get('id') not in ids]
+            deleted = len(rows) - len(kept)
+            self.tables[table] = kept
+            if table == 'bookings':
+                self._bump_version(deleted=True)
+        return deleted
+
+    def _bump_version(self, deleted: bool = False) -> None:
+        # The bookings_version triggers (called with the lock held)
+        version = self.tables['bookings_version'][0]
+        version['version'] += 1
+        version['deletes'] += int(deleted)
+
+    def rpc(self, name: str, args: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Call one of the database functions in FUNCTIONS."""
+        with self._lock:
+            return FUNCTIONS[name](self.tables, args)
+
+    @staticmethod
+    def _project(row: Dict[str, Any], columns: str) -> Dict[str, Any]:
+        """Keep only the selected columns of a row."""
+        if columns == '*':
+            return dict(row)
+        return {col: row.get(col) for col in columns.split(',')}
+
+
+def _make_handler(server: StandInPostgREST):
+    """Build the request handler class bound to a stand-in server."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            # Keep benchmark output clean
+            pass
+
+        def parse_request(self) -> bool:
+            self._started = time.perf_counter()
+            return super().parse_request()
+
+        def _table_and_params(self):
+            parts = urlsplit(self.path)
+            table = parts.path.rstrip('/').rsplit('/', 1)[-1]
+            params = parse_qsl(parts.query, keep_blank_values=True)
+            # Range: 0-24 is the header form of offset=0&limit=25
+            first, _, last = self.headers.get('Range', '').partition('-')
+            if first.isdigit():
+                params.append(('offset', first))
+                if last.isdigit():
+                    params.append(('limit', str(int(last) - int(first) + 1)))
+            return table, params
+
+        def _read_body(self) -> Any:
+            length = int(self.headers.get('Content-Length') or 0)
+            return json.loads(self.rfile.read(length) or b'null')
+
+        def _respond(self, status: int, rows: List[Dict[str, Any]], total: Optional[int] = None) -> None:
+            with server._lock:
+                server.request_count += 1
+                server.busy_seconds += time.perf_counter() - self._started
+            delay = server.latency + (random.uniform(0, server.jitter) if server.jitter else 0)
+            if delay:
+                time.sleep(delay)
+
+            prefer = self.headers.get('Prefer', '')
+            if 'return=minimal' in prefer:
+                body = b''
+                status = 204 if status == 200 else status
+            else:
+                body = json.dumps(rows).encode()
+
+            self.send_response(status)
+            if 'count=exact' in prefer:
+                self.send_header('Content-Range', f"*/{len(rows) if total is None else total}")
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _fault(self) -> bool:
+            """Apply injected faults; True if an error response was sent."""
+            if server.fault_methods is not None and self.command not in server.fault_methods:
+                return False
+            if server.fault_stall:
+                time.sleep(server.fault_stall)
+            if not server.fault_error_rate or random.random() >= server.fault_error_rate:
+                return False
+            with server._lock:
+                server.request_count += 1
+                server.faults_injected += 1
+            self._read_body()
+            body = json.dumps({'message': 'Injected fault', 'code': server.fault_code, 'details': None, 'hint': None}).encode()
+            self.send_response(server.fault_status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return True
+
+        def _is_rpc(self) -> bool:
+            return '/rpc/' in urlsplit(self.path).path
+
+        def do_GET(self):
+            if self._fault():
+                return
+            table, params = self._table_and_params()
+            if self._is_rpc():
+                self._respond(200, server.rpc(table, dict(params)))
+                return
+            self._respond(200, *server.select_with_count(table, params))
+
+        def do_POST(self):
+            if self._fault():
+                return
+            table, params = self._table_and_params()
+            if self._is_rpc():
+                self._respond(200, server.rpc(table, self._read_body() or {}))
+                return
+            ignore_duplicates = 'resolution=ignore-duplicates' in self.headers.get('Prefer', '')
+            self._respond(201, server.insert(table, self._read_body(), params, ignore_duplicates))
+
+        def do_PATCH(self):
+            if self._fault():
+                return
+            table, params = self._table_and_params()
+            self._respond(200, server.update(table, params, self._read_body()))
+
+    return Handler
@@ -0,0 +1,525 @@
+"""
+Revenue analytics for the admin dashboard: daily and monthly rollups.
+
+Served at /admin/analytics/ (chart page) and /admin/analytics.json:
+
+- per event day and per month: bookings (not cancelled) and counts by
+  status, confirmed revenue, the value of pending and confirmed bookings,
+  and the DJ attach rate (share of bookings that include a DJ)
+- per package: bookings and confirmed revenue (the package mix)
+
+Each worker keeps the rollups in memory (AnalyticsRollups) and refreshes
+them incrementally, recomputing only the event days that changed bookings
+were or now are on:
+
+- when this worker's bookings mirror is fresh (bookings/mirror.py), the
+  rollups are built from its rows and then take only the rows it has
+  changed since (BookingsMirror.rows_since()), so Supabase is not read at
+  all; a mirror reloaded in full is a new mirror, and the rollups are
+  rebuilt from it
+- otherwise they follow Supabase the way the mirror does: the bookings
+  change token is fetched, and if it has changed only the bookings updated
+  since the newest updated_at seen are fetched; the whole table is read on
+  the first refresh, when the token shows that bookings were deleted, and
+  every ANALYTICS_FULL_RESYNC seconds
+
+One refresh runs at a time per worker. A request that finds one running
+serves the rollups it already has instead of waiting (only the first
+build is waited for), so a full read never holds up every analytics view.
+
+Bookings are held as NumPy columns and days are aggregated with
+np.unique (to number the days) and np.bincount (for every sum), whether
+that is every day on a full read or the handful of days a delta touches.
+
+The JSON payload built from the rollups is kept in Django's cache per
+bookings change token, so repeat views are one cache read.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from itertools import repeat
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+import numpy as np
+import logging
+
+from .catalog import get_catalog
+from .metrics import count_cache
+from .mirror import BookingsMirror, get_mirror
+from .rows import column
+from .supabase_client import (
+    get_bookings_change_token,
+    list_changed_bookings,
+    parse_change_token,
+    reads_from_supabase,
+    rewind_timestamp,
+)
+
+logger = logging.getLogger(__name__)
+
+# Prefix of the cache keys holding analytics payloads
+ANALYTICS_CACHE_KEY = 'bookings:analytics'
+
+# Booking statuses as stored in the rollups' status column
+STATUS_CODES = {'pending': 0, 'confirmed': 1, 'cancelled': 2}
+OTHER = 3
+
+# Day number of a booking without an event date (NaT as int64)
+_NAT = int(np.datetime64('NaT', 'D').astype(np.int64))
+
+
+@dataclass
+class DayRollup:
+    """
+    Totals over the bookings of one event day (or one month).
+
+    Attributes:
+        bookings: Bookings that are not cancelled
+        pending: Bookings with status "pending"
+        confirmed: Bookings with status "confirmed"
+        cancelled: Bookings with status "cancelled"
+        revenue: total_price of confirmed bookings
+        booked_value: total_price of pending and confirmed bookings
+        dj: Bookings that are not cancelled and include a DJ
+        packages: package_id -> (bookings not cancelled, confirmed revenue)
+    """
+    bookings: int = 0
+    pending: int = 0
+    confirmed: int = 0
+    cancelled: int = 0
+    revenue: float = 0.0
+    booked_value: float = 0.0
+    dj: int = 0
+    packages: Dict[int, Tuple[int, float]] = field(default_factory=dict)
+
+    @property
+    def dj_attach_rate(self) -> float:
+        """Share of bookings (not cancelled) that include a DJ."""
+        return self.dj / self.bookings if self.bookings else 0.0
+
+    def add(self, other: "DayRollup") -> None:
+        """Add another rollup's totals to this one."""
+        self.bookings += other.bookings
+        self.pending += other.pending
+        self.confirmed += other.confirmed
+        self.cancelled += other.cancelled
+        self.revenue += other.revenue
+        self.booked_value += other.booked_value
+        self.dj += other.dj
+        for package_id, (bookings, revenue) in other.packages.items():
+            count, total = self.packages.get(package_id, (0, 0.0))
+            self.packages[package_id] = (count + bookings, total + revenue)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """JSON-ready totals."""
+        return {
+            'bookings': self.bookings,
+            'pending': self.pending,
+            'confirmed': self.confirmed,
+            'cancelled': self.cancelled,
+            'revenue': round(self.revenue, 2),
+            'booked_value': round(self.booked_value, 2),
+            'dj_attach_rate': round(self.dj_attach_rate, 4),
+            'packages': {
+                str(package_id): {'bookings': bookings, 'revenue': round(revenue, 2)}
+                for package_id, (bookings, revenue) in sorted(self.packages.items())
+            },
+        }
+
+
+def _status_codes(statuses: Iterable[Optional[str]]) -> np.ndarray:
+    """STATUS_CODES of a sequence of statuses (OTHER for anything else)."""
+    return np.fromiter(map(STATUS_CODES.get, statuses, repeat(OTHER)), dtype=np.int8)
+
+
+def rollup_days(
+    day: np.ndarray,
+    package: np.ndarray,
+    status: np.ndarray,
+    dj: np.ndarray,
+    price: np.ndarray,
+) -> Dict[str, DayRollup]:
+    """
+    Aggregate bookings by event day.
+
+    Args:
+        day: Event day of each booking, as days since 1970-01-01
+        package: package_id of each booking
+        status: STATUS_CODES of each booking
+        dj: Whether each booking includes a DJ
+        price: total_price of each booking
+
+    Returns:
+        Dict: Event day (YYYY-MM-DD) -> DayRollup, for every day with a booking
+    """
+    if not len(day):
+        return {}
+    labels, day = np.unique(day, return_inverse=True)
+    count = len(labels)
+    confirmed = status == STATUS_CODES['confirmed']
+    pending = status == STATUS_CODES['pending']
+    active = status != STATUS_CODES['cancelled']
+
+    def per_day(mask: np.ndarray, weights: Optional[np.ndarray] = None) -> np.ndarray:
+        return np.bincount(day[mask], weights=None if weights is None else weights[mask], minlength=count).tolist()
+
+    bookings = per_day(active)
+    pendings = per_day(pending)
+    confirmeds = per_day(confirmed)
+    cancelled = per_day(~active)
+    revenue = per_day(confirmed, price)
+    booked_value = per_day(confirmed | pending, price)
+    djs = per_day(active & dj)
+
+    # Package mix: one bincount over (day, package) pairs
+    package_labels, package = np.unique(package, return_inverse=True)
+    cells = day * len(package_labels) + package
+    size = count * len(package_labels)
+    mix = np.bincount(cells[active], minlength=size).reshape(count, -1)
+    mix_revenue = np.bincount(cells[confirmed], weights=price[confirmed], minlength=size).reshape(count, -1)
+
+    package_ids = package_labels.tolist()
+    dates = labels.astype('datetime64[D]').astype(str).tolist()
+    rollups = {}
+    for index, label in enumerate(dates):
+        rollups[label] = DayRollup(
+            bookings=int(bookings[index]),
+            pending=int(pendings[index]),
+            confirmed=int(confirmeds[index]),
+            cancelled=int(cancelled[index]),
+            revenue=revenue[index],
+            booked_value=booked_value[index],
+            dj=int(djs[index]),
+            packages={
+                package_ids[column]: (int(mix[index, column]), float(mix_revenue[index, column]))
+                for column in np.flatnonzero(mix[index]).tolist()
+            },
+        )
+    return rollups
+
+
+class AnalyticsRollups:
+    """
+    Daily rollups of the bookings table, next to what each booking
+    contributes to them, so changed bookings only recompute their days.
+
+    Bookings are held as columns (NumPy arrays, one slot per booking), so
+    building the rollups and recomputing a set of days are both a few
+    vectorized passes. Not thread-safe on its own: callers hold the
+    module's _lock.
+
+    Attributes:
+        daily: Event day (YYYY-MM-DD) -> DayRollup
+        token: Bookings change token the rollups reflect
+        source: The BookingsMirror the rows came from, None for Supabase
+        revision: Mirror revision the rollups reflect (mirror source only)
+        watermark: Newest updated_at seen (Supabase source only)
+        loaded_at: time.monotonic() of the last full read
+    """
+
+    def __init__(
+        self,
+        rows: List[Dict[str, Any]],
+        token: str,
+        started: float,
+        source: Optional[BookingsMirror] = None,
+        revision: Optional[int] = None,
+    ):
+        count = len(rows)
+        self._slots: Dict[int, int] = dict(zip(column(rows, 'id'), range(count)))
+        # Missing dates become NaT and are left out of every day
+        self._day = np.array(column(rows, 'start_date'), dtype='datetime64[D]').astype(np.int64)
+        self._package = np.nan_to_num(np.array(column(rows, 'package_id'), dtype=float)).astype(np.int64)
+        self._status = _status_codes(column(rows, 'status'))
+        self._dj = np.array(column(rows, 'include_dj'), dtype=bool)
+        self._price = np.nan_to_num(np.array(column(rows, 'total_price'), dtype=float))
+        self._size = count
+        self.daily: Dict[str, DayRollup] = self._rollup(self._day != _NAT)
+        self.token = token
+        self.source = source
+        self.revision = revision
+        # Mirror rows are not in updated_at order, and are never re-read by it
+        self.watermark = rows[-1].get('updated_at') if rows and source is None else None
+        self.loaded_at = started
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _rollup(self, mask: np.ndarray) -> Dict[str, DayRollup]:
+        """Rollups of the days of the bookings selected by a mask over the slots."""
+        mask = mask[:self._size]
+        return rollup_days(
+            self._day[:self._size][mask],
+            self._package[:self._size][mask],
+            self._status[:self._size][mask],
+            self._dj[:self._size][mask],
+            self._price[:self._size][mask],
+        )
+
+    def _values(self, slot: int) -> Tuple[int, int, int, bool, float]:
+        """What the booking in a slot contributes, as plain Python values."""
+        return (
+            int(self._day[slot]),
+            int(self._package[slot]),
+            int(self._status[slot]),
+            bool(self._dj[slot]),
+            float(self._price[slot]),
+        )
+
+    def _slot_for(self, booking_id: int) -> int:
+        """Slot of a booking, adding one (and growing the columns) if new."""
+        slot = self._slots.get(booking_id)
+        if slot is None:
+            if self._size == len(self._day):
+                grow = max(64, self._size // 2)
+                self._day = np.concatenate([self._day, np.full(grow, _NAT)])
+                self._package = np.concatenate([self._package, np.zeros(grow, dtype=np.int64)])
+                self._status = np.concatenate([self._status, np.full(grow, OTHER, dtype=np.int8)])
+                self._dj = np.concatenate([self._dj, np.zeros(grow, dtype=bool)])
+                self._price = np.concatenate([self._price, np.zeros(grow)])
+            slot = self._slots[booking_id] = self._size
+            self._size += 1
+        return slot
+
+    def apply_changes(self, rows: List[Dict[str, Any]], token: str) -> Set[str]:
+        """
+        Apply changed rows and recompute their days.
+
+        Args:
+            rows: Rows from list_changed_bookings(), ordered by
+                (updated_at, id), or from BookingsMirror.rows_since()
+            token: Change token read before the rows were fetched
+
+        Returns:
+            Set[str]: Event days recomputed
+        """
+        touched = set()
+        for row in rows:
+            start = row.get('start_date')
+            values = (
+                int(np.datetime64(start, 'D').astype(np.int64)) if start else _NAT,
+                row.get('package_id') or 0,
+                STATUS_CODES.get(row.get('status'), OTHER),
+                bool(row.get('include_dj')),
+                float(row.get('total_price') or 0),
+            )
+            slot = self._slots.get(row['id'])
+            if slot is not None:
+                if values == self._values(slot):
+                    # Re-read in the overlap window, unchanged
+                    continue
+                touched.add(int(self._day[slot]))
+            else:
+                slot = self._slot_for(row['id'])
+            self._day[slot], self._package[slot], self._status[slot], self._dj[slot], self._price[slot] = values
+            touched.add(values[0])
+        touched.discard(_NAT)
+
+        days = set(np.array(sorted(touched), dtype='datetime64[D]').astype(str).tolist())
+        if touched:
+            recomputed = self._rollup(np.isin(self._day, list(touched)))
+            for day in days:
+                if day in recomputed:
+                    self.daily[day] = recomputed[day]
+                else:
+                    self.daily.pop(day, None)
+        if self.source is None and rows and rows[-1].get('updated_at'):
+            # Rows come oldest first, from at most a few seconds before the
+            # previous watermark, so the last one is the newest seen
+            self.watermark = rows[-1]['updated_at']
+        self.token = token
+        return days
+
+    def payload(self, package_names: Dict[int, str]) -> Dict[str, Any]:
+        """
+        JSON-ready analytics: totals, daily and monthly series, package mix.
+
+        Args:
+            package_names: package_id -> name, for the package mix
+        """
+        total = DayRollup()
+        monthly: Dict[str, DayRollup] = {}
+        daily = []
+        for day in sorted(self.daily):
+            rollup = self.daily[day]
+            total.add(rollup)
+            monthly.setdefault(day[:7], DayRollup()).add(rollup)
+            daily.append({'date': day, **rollup.as_dict()})
+        package_mix = [
+            {
+                'package_id': package_id,
+                'name': package_names.get(package_id, 'Unknown'),
+                'bookings': bookings,
+                'share': round(bookings / total.bookings, 4) if total.bookings else 0.0,
+                'revenue': round(revenue, 2),
+            }
+            for package_id, (bookings, revenue) in sorted(total.packages.items())
+        ]
+        return {
+            'token': self.token,
+            'generated_at': datetime.now(timezone.utc).isoformat(),
+            'totals': {key: value for key, value in total.as_dict().items() if key != 'packages'},
+            'package_mix': package_mix,
+            'monthly': [{'month': month, **monthly[month].as_dict()} for month in sorted(monthly)],
+            'daily': daily,
+        }
+
+
+# Per-process rollups
+_rollups: Optional[AnalyticsRollups] = None
+# Held for a whole refresh; see refresh_rollups() for who waits on it
+_lock = threading.Lock()
+_stats = {'refreshes': 0, 'unchanged': 0, 'full_loads': 0, 'days_recomputed': 0, 'failures': 0, 'busy': 0}
+
+
+def _refresh_from_mirror(mirror: BookingsMirror, full: bool) -> None:
+    """Bring the rollups up to date with this worker's bookings mirror."""
+    global _rollups
+
+    _stats['refreshes'] += 1
+    token = mirror.change_token
+    if full or _rollups is None or _rollups.source is not mirror:
+        rows, revision = mirror.rows_since(None)
+        _rollups = AnalyticsRollups(rows, token, time.monotonic(), mirror, revision)
+        _stats['full_loads'] += 1
+        logger.info(f"Built analytics rollups from the bookings mirror ({len(_rollups)} bookings, {len(_rollups.daily)} days)")
+        return
+
+    rows, revision = mirror.rows_since(_rollups.revision)
+    if not rows and token == _rollups.token:
+        _stats['unchanged'] += 1
+        return
+    _stats['days_recomputed'] += len(_rollups.apply_changes(rows, token))
+    _rollups.revision = revision
+
+
+def _reload(token: str, started: float) -> bool:
+    """Read the whole table into new rollups."""
+    global _rollups
+
+    rows = list_changed_bookings()
+    if rows is None:
+        return False
+    _rollups = AnalyticsRollups(rows, token, started)
+    _stats['full_loads'] += 1
+    logger.info(f"Built analytics rollups ({len(_rollups)} bookings, {len(_rollups.daily)} days)")
+    return True
+
+
+def _refresh_from_supabase(full: bool) -> None:
+    """Bring the rollups up to date with Supabase, by delta when possible."""
+    started = time.monotonic()
+    token = get_bookings_change_token()
+    if token is None:
+        _stats['failures'] += 1
+        return
+    _stats['refreshes'] += 1
+
+    if (
+        full
+        or _rollups is None
+        or _rollups.source is not None
+        or started - _rollups.loaded_at >= settings.ANALYTICS_FULL_RESYNC
+        # Bookings were deleted, which a delta cannot show
+        or parse_change_token(token)[1] != parse_change_token(_rollups.token)[1]
+    ):
+        if not _reload(token, started):
+            _stats['failures'] += 1
+        return
+
+    if token == _rollups.token:
+        _stats['unchanged'] += 1
+        return
+
+    rows = list_changed_bookings(rewind_timestamp(_rollups.watermark, settings.BOOKINGS_MIRROR_OVERLAP))
+    if rows is None:
+        _stats['failures'] += 1
+        return
+    _stats['days_recomputed'] += len(_rollups.apply_changes(rows, token))
+
+
+def refresh_rollups(full: bool = False) -> Optional[AnalyticsRollups]:
+    """
+    Bring this worker's rollups up to date, from the bookings mirror when
+    it is fresh, otherwise from Supabase.
+
+    Only one refresh runs at a time. If one is already running, the current
+    rollups are returned straight away; callers wait for it only when there
+    are no rollups yet, or when they asked for a full rebuild.
+
+    Args:
+        full: Rebuild from the whole table even if a delta would do
+
+    Returns:
+        AnalyticsRollups: The current rollups (possibly stale if Supabase
+        could not be read or another refresh is running), or None if they
+        were never built
+    """
+    mirror = get_mirror()
+    if not _lock.acquire(blocking=full or _rollups is None):
+        _stats['busy'] += 1
+        return _rollups
+    try:
+        if mirror is not None:
+            _refresh_from_mirror(mirror, full)
+        else:
+            # Changes are read from Supabase, so the token must come from there too
+            with reads_from_supabase():
+                _refresh_from_supabase(full)
+        return _rollups
+    finally:
+        _lock.release()
+
+
+def _analytics_key(catalog_version: str, version: Optional[str]) -> str:
+    return f"{ANALYTICS_CACHE_KEY}:{catalog_version}:{version or '-'}"
+
+
+def get_analytics(version: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Return the analytics payload, refreshing the rollups if it is not cached.
+
+    Args:
+        version: Bookings change token; a new token means fresh figures
+            (so does a new catalog version: package names are included)
+
+    Returns:
+        Dict: See AnalyticsRollups.payload(); empty series if the rollups
+        could not be built (not cached)
+    """
+    catalog = get_catalog()
+    key = _analytics_key(catalog.version, version)
+    payload: Optional[Dict[str, Any]] = cache.get(key)
+    count_cache('analytics', payload is not None)
+    if payload is not None:
+        return payload
+
+    rollups = refresh_rollups()
+    if rollups is None:
+        return {'token': None, 'generated_at': None, 'totals': {}, 'package_mix': [], 'monthly': [], 'daily': []}
+    payload = rollups.payload({package.id: package.name for package in catalog.packages})
+    # Rollups behind `version` (another refresh running, or Supabase
+    # unreachable) are served but not cached under it
+    if version is None or rollups.token == version:
+        cache.set(key, payload, settings.ANALYTICS_CACHE_TTL)
+    return payload
+
+
+async def aget_analytics(version: Optional[str] = None) -> Dict[str, Any]:
+    """Async version of get_analytics(); the work runs in a worker thread."""
+    return await sync_to_async(get_analytics, thread_sensitive=False)(version)
+
+
+def analytics_stats() -> Dict[str, Any]:
+    """Refresh counters and size of this worker's rollups, for diagnostics."""
+    rollups = _rollups
+    return {
+        **_stats,
+        'bookings': len(rollups) if rollups is not None else None,
+        'days': len(rollups.daily) if rollups is not None else None,
+    }
@@ -0,0 +1,637 @@
+"""
+Package availability index for SoundHire bookings.
+
+Each package has a limited `stock`. A booking holds `qty` units of its
+package on every day from start_date to end_date, unless it is cancelled.
+To answer "can this booking be taken?" without scanning the bookings
+table, each worker process keeps an in-memory index:
+
+- one segment tree per package over day numbers, holding the units
+  booked on each day (range add, range max, both O(log n))
+- the contribution of every active booking by ID, so confirm/cancel can
+  adjust the counts incrementally
+
+The index is loaded once from Supabase (active bookings only) and then
+kept up to date by this worker's own writes (record_booking,
+record_status). Bookings written by other workers are picked up when the
+index is reloaded, every AVAILABILITY_REFRESH_INTERVAL seconds or after
+invalidate_availability(). Bookings still waiting in the outbox (SQLite,
+shared by every worker) are read on every reload too, keyed
+"outbox-<idempotency key>", so they hold their units in all workers
+until the drainer has sent them, not only in the worker that took them:
+
+- one load runs at a time per worker; requests arriving meanwhile keep
+  using the current index, which is replaced once the new one is built,
+  with the holds taken in the meantime carried over
+- a reload first reads the bookings change token, and only reads the
+  bookings again if it moved
+- a failed load keeps the current index. Until a first load succeeds,
+  the index is marked incomplete and stock-limited packages cannot be
+  held, rather than being sold against an empty index
+
+The database trigger in supabase/migrations/ is the final guard against
+two workers selling the last unit at once.
+"""
+
+from collections import deque
+from datetime import date, timedelta
+from typing import List, Dict, Any, Optional, Set, Tuple
+import itertools
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, close_old_connections
+from django.utils import timezone
+import logging
+
+from .models import OutboxBooking
+from .supabase_client import get_bookings_change_token, list_active_bookings
+
+logger = logging.getLogger(__name__)
+
+# Cache key holding the invalidation generation shared by all workers
+GENERATION_CACHE_KEY = 'bookings:availability:generation'
+
+# Days covered by a new index (grown automatically for later bookings)
+_INITIAL_SPAN = 512
+
+# Seconds before a failed load is tried again
+RETRY_DELAY = 5.0
+
+# Key prefix of bookings queued in the outbox, not yet in Supabase
+OUTBOX_PREFIX = 'outbox-'
+
+
+class _RangeMaxTree:
+    """
+    Segment tree over day offsets supporting "add n to every day in a range"
+    and "largest value in a range".
+
+    Range adds are kept lazily in `_pending` and never pushed down, so
+    both operations touch O(log n) nodes. Values are booked unit counts
+    and never go below zero.
+    """
+
+    def __init__(self, size: int):
+        self.size = size  # Number of leaves, a power of two
+        self._max = [0] * (2 * size)
+        self._pending = [0] * (2 * size)
+
+    def add(self, lo: int, hi: int, delta: int, node: int = 1, node_lo: int = 0, node_hi: int = -1) -> None:
+        """Add delta to every position in [lo, hi]."""
+        if node_hi < 0:
+            node_hi = self.size - 1
+        if hi < node_lo or node_hi < lo:
+            return
+        if lo <= node_lo and node_hi <= hi:
+            self._max[node] += delta
+            self._pending[node] += delta
+            return
+        mid = (node_lo + node_hi) // 2
+        self.add(lo, hi, delta, 2 * node, node_lo, mid)
+        self.add(lo, hi, delta, 2 * node + 1, mid + 1, node_hi)
+        self._max[node] = max(self._max[2 * node], self._max[2 * node + 1]) + self._pending[node]
+
+    def range_max(self, lo: int, hi: int, node: int = 1, node_lo: int = 0, node_hi: int = -1) -> int:
+        """Return the largest value in [lo, hi]."""
+        if node_hi < 0:
+            node_hi = self.size - 1
+        if hi < node_lo or node_hi < lo:
+            return 0
+        if lo <= node_lo and node_hi <= hi:
+            return self._max[node]
+        mid = (node_lo + node_hi) // 2
+        return max(
+            self.range_max(lo, hi, 2 * node, node_lo, mid),
+            self.range_max(lo, hi, 2 * node + 1, mid + 1, node_hi),
+        ) + self._pending[node]
+
+    def positions_at_least(
+        self, lo: int, hi: int, threshold: int,
+        node: int = 1, node_lo: int = 0, node_hi: int = -1, carried: int = 0,
+    ) -> List[int]:
+        """Return the positions in [lo, hi] whose value is >= threshold."""
+        if node_hi < 0:
+            node_hi = self.size - 1
+        # Skip whole subtrees whose maximum is below the threshold
+        if hi < node_lo or node_hi < lo or self._max[node] + carried < threshold:
+            return []
+        if node_lo == node_hi:
+            return [node_lo]
+        mid = (node_lo + node_hi) // 2
+        carried += self._pending[node]
+        return (
+            self.positions_at_least(lo, hi, threshold, 2 * node, node_lo, mid, carried)
+            + self.positions_at_least(lo, hi, threshold, 2 * node + 1, mid + 1, node_hi, carried)
+        )
+
+
+class AvailabilityIndex:
+    """
+    Units booked per (package_id, date), for one worker process.
+
+    Every booking is stored by key (booking ID, or a hold key while a
+    booking is being created) with its contribution, so applying the same
+    booking twice never double counts.
+
+    Attributes:
+        origin: First date covered; earlier days are ignored
+        loaded_at: time.monotonic() when the index was loaded
+        generation: Shared invalidation generation the index belongs to
+        token: Bookings change token read before the load, if any
+        read_at: When the load started (wall clock), for the outbox entries
+            sent since
+        complete: False for the stand-in used while no load has succeeded,
+            which holds no bookings and so refuses stock-limited holds
+    """
+
+    def __init__(
+        self,
+        origin: date,
+        generation: Any = None,
+        span: int = _INITIAL_SPAN,
+        token: Optional[str] = None,
+        complete: bool = True,
+    ):
+        self.origin = origin
+        self.loaded_at = time.monotonic()
+        self.generation = generation
+        self.token = token
+        self.read_at = timezone.now()
+        self.complete = complete
+        self._span = span
+        self._trees: Dict[int, _RangeMaxTree] = {}
+        self._entries: Dict[Any, Tuple[int, int, int, int]] = {}
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Internal helpers (callers hold self._lock)
+    # ------------------------------------------------------------------
+
+    def _offsets(self, start: date, end: date) -> Optional[Tuple[int, int]]:
+        """Convert a date range to tree positions, clipped to the origin."""
+        lo = max((start - self.origin).days, 0)
+        hi = (end - self.origin).days
+        if hi < lo:
+            return None
+        if hi >= self._span:
+            self._grow(hi + 1)
+        return lo, hi
+
+    def _grow(self, needed: int) -> None:
+        """Double the span until it covers `needed` days and rebuild the trees."""
+        while self._span < needed:
+            self._span *= 2
+        entries = self._entries
+        self._trees = {}
+        self._entries = {}
+        for key, (package_id, lo, hi, qty) in entries.items():
+            self._tree(package_id).add(lo, hi, qty)
+            self._entries[key] = (package_id, lo, hi, qty)
+
+    def _tree(self, package_id: int) -> _RangeMaxTree:
+        tree = self._trees.get(package_id)
+        if tree is None:
+            tree = self._trees[package_id] = _RangeMaxTree(self._span)
+        return tree
+
+    def _remove(self, key: Any) -> None:
+        entry = self._entries.pop(key, None)
+        if entry:
+            package_id, lo, hi, qty = entry
+            self._trees[package_id].add(lo, hi, -qty)
+
+    def _add(self, key: Any, package_id: int, start: date, end: date, qty: int) -> None:
+        offsets = self._offsets(start, end)
+        if offsets is None:
+            return
+        lo, hi = offsets
+        self._tree(package_id).add(lo, hi, qty)
+        self._entries[key] = (package_id, lo, hi, qty)
+
+    def _booked(self, package_id: int, start: date, end: date) -> int:
+        offsets = self._offsets(start, end)  # May grow (and replace) the trees
+        tree = self._trees.get(package_id)
+        if tree is None or offsets is None:
+            return 0
+        return tree.range_max(*offsets)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def apply(self, booking: Dict[str, Any], key: Any = None) -> None:
+        """
+        Set a booking's contribution from its current row.
+
+        Cancelled bookings (and rows missing a package or dates) contribute
+        nothing. Applying an updated row replaces the previous contribution.
+
+        Args:
+            booking: Row with package_id, start_date, end_date, qty, status
+            key: Entry key, defaults to the booking ID
+        """
+        key = booking.get('id') if key is None else key
+        with self._lock:
+            self._remove(key)
+            if booking.get('status') == 'cancelled':
+                return
+            package_id = booking.get('package_id')
+            start = _as_date(booking.get('start_date'))
+            end = _as_date(booking.get('end_date')) or start
+            if package_id is None or start is None:
+                return
+            self._add(key, package_id, start, end, int(booking.get('qty') or 1))
+
+    def discard(self, key: Any) -> bool:
+        """Remove a booking or hold. Returns False if the key was not indexed."""
+        with self._lock:
+            known = key in self._entries
+            self._remove(key)
+            return known
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._entries
+
+    def retain(self, prefix: str, keys: Set[str]) -> None:
+        """Remove the entries whose key starts with prefix, except those in keys."""
+        with self._lock:
+            stale = [
+                key for key in self._entries
+                if isinstance(key, str) and key.startswith(prefix) and key not in keys
+            ]
+            for key in stale:
+                self._remove(key)
+
+    def carry_over(self, other: "AvailabilityIndex", prefix: str) -> None:
+        """
+        Copy the entries of another index whose key starts with prefix,
+        e.g. the holds taken on it while this one was being loaded.
+        """
+        with other._lock:
+            entries = [
+                (key, entry) for key, entry in other._entries.items()
+                if isinstance(key, str) and key.startswith(prefix)
+            ]
+        with self._lock:
+            for key, (package_id, lo, hi, qty) in entries:
+                self._remove(key)
+                self._add(
+                    key, package_id,
+                    other.origin + timedelta(days=lo), other.origin + timedelta(days=hi), qty,
+                )
+
+    def booked(self, package_id: int, start: date, end: date) -> int:
+        """Return the most units of a package booked on any day in [start, end]."""
+        with self._lock:
+            return self._booked(package_id, start, end)
+
+    def can_book(self, package_id: int, start: date, end: date, qty: int, stock: Optional[int]) -> bool:
+        """
+        Check whether qty more units fit on every day in [start, end].
+
+        A package without a stock figure is treated as unlimited.
+        """
+        if stock is None:
+            return True
+        return self.booked(package_id, start, end) + qty <= stock
+
+    def hold(self, package_id: int, start: date, end: date, qty: int, stock: Optional[int]) -> Optional[str]:
+        """
+        Atomically check availability and reserve the units.
+
+        The hold counts against stock until it is swapped for the real
+        booking (record_booking) or released, so two requests in this
+        worker cannot both take the last unit. An incomplete index
+        cannot tell, so it holds nothing of a stock-limited package.
+
+        Returns:
+            str: Hold key, or None if the package is sold out on any day
+            (or the index is incomplete)
+        """
+        key = f"hold-{next(_hold_ids)}"
+        with self._lock:
+            if stock is not None and (not self.complete or self._booked(package_id, start, end) + qty > stock):
+                return None
+            self._add(key, package_id, start, end, qty)
+        return key
+
+    def sold_out_dates(self, package_id: int, stock: Optional[int], start: date, end: date) -> List[date]:
+        """
+        List the days in [start, end] on which a package has no units left.
+
+        Only subtrees that contain a sold-out day are visited.
+        """
+        if stock is None:
+            return []
+        with self._lock:
+            offsets = self._offsets(start, end)
+            tree = self._trees.get(package_id)
+            if tree is None or offsets is None:
+                return []
+            positions = tree.positions_at_least(*offsets, threshold=max(stock, 1))
+        return [self.origin + timedelta(days=p) for p in positions]
+
+
+def _as_date(value: Any) -> Optional[date]:
+    """Parse an ISO date string from Supabase (dates pass through)."""
+    if value is None or isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+# Per-process index state, guarded by _lock
+_index: Optional[AvailabilityIndex] = None
+_lock = threading.Lock()
+_hold_ids = itertools.count(1)
+
+# One load at a time per process; time.monotonic() of the last failed one
+_load_lock = threading.Lock()
+_failed = {'at': None}
+
+# Bookings recorded by this worker recently, replayed onto a freshly loaded
+# index in case they were written while it was being read from Supabase
+_recent: deque = deque(maxlen=1000)
+
+
+def build_index(
+    bookings: List[Dict[str, Any]], origin: date, generation: Any = None, token: Optional[str] = None,
+) -> AvailabilityIndex:
+    """
+    Build an availability index from booking rows.
+
+    Args:
+        bookings: Rows with Projection.AVAILABILITY columns
+        origin: First date to index (usually today)
+        generation: Invalidation generation the index belongs to
+        token: Bookings change token read before the rows
+
+    Returns:
+        AvailabilityIndex: Index holding every non-cancelled booking
+    """
+    index = AvailabilityIndex(origin, generation, token=token)
+    for booking in bookings:
+        index.apply(booking)
+    return index
+
+
+def _is_fresh(index: Optional[AvailabilityIndex], generation: Any) -> bool:
+    """Check an index against the refresh interval, the date and the shared generation."""
+    if index is None:
+        return False
+    if index.generation != generation or index.origin != date.today():
+        return False
+    return time.monotonic() - index.loaded_at < settings.AVAILABILITY_REFRESH_INTERVAL
+
+
+def _failed_recently() -> bool:
+    failed_at = _failed['at']
+    return failed_at is not None and time.monotonic() - failed_at < RETRY_DELAY
+
+
+def _read_outbox(sent_since) -> Optional[Tuple[Dict[str, Dict[str, Any]], Dict[str, Dict[str, Any]]]]:
+    """
+    Read the bookings queued in the outbox by any worker.
+
+    Args:
+        sent_since: Also return the entries sent to Supabase after this time
+
+    Returns:
+        Tuple: (pending, sent) booking rows by outbox key; sent rows carry
+        their Supabase id. None if the outbox cannot be read
+    """
+    pending: Dict[str, Dict[str, Any]] = {}
+    sent: Dict[str, Dict[str, Any]] = {}
+    try:
+        entries = OutboxBooking.objects.filter(
+            status=OutboxBooking.PENDING,
+        ) | OutboxBooking.objects.filter(status=OutboxBooking.SENT, sent_at__gte=sent_since)
+        for key, payload, status, supabase_id in entries.values_list('idempotency_key', 'payload', 'status', 'supabase_id'):
+            if status == OutboxBooking.PENDING:
+                pending[f"{OUTBOX_PREFIX}{key}"] = payload
+            else:
+                sent[f"{OUTBOX_PREFIX}{key}"] = {**payload, 'id': supabase_id}
+    except DatabaseError as e:
+        logger.error(f"Cannot read the booking outbox for the availability index: {e}")
+        return None
+    return pending, sent
+
+
+def _apply_outbox(index: AvailabilityIndex, started: float, sent_since) -> Set[str]:
+    """
+    Hold the bookings queued in the outbox in an index.
+
+    Pending entries are held under their outbox key; entries sent since
+    `sent_since` are applied under their Supabase id (a no-op if the load
+    read them already), and their outbox key is dropped.
+
+    Returns:
+        Set: Outbox keys of the entries sent
+    """
+    outbox = _read_outbox(sent_since)
+    if outbox is None:
+        return set()
+    pending, sent = outbox
+    for key, booking in pending.items():
+        index.apply(booking, key=key)
+    for key, booking in sent.items():
+        index.discard(key)
+        index.apply(booking)
+    with _lock:
+        # Bookings this worker queued after the outbox was read stay held
+        recorded = {booking.get('id') for recorded_at, booking, _ in _recent if recorded_at >= started}
+    index.retain(OUTBOX_PREFIX, pending.keys() | (recorded - sent.keys()))
+    return set(sent)
+
+
+def _install(
+    bookings: List[Dict[str, Any]], origin: date, generation: Any, token: Optional[str], started: float, read_at,
+) -> AvailabilityIndex:
+    """Build an index from a load and swap it in for the current one."""
+    global _index
+
+    index = build_index(bookings, origin, generation, token)
+    index.loaded_at = started
+    index.read_at = read_at
+    # Read after the bookings: an entry sent meanwhile is applied by its id
+    sent = _apply_outbox(index, started, index.read_at)
+    with _lock:
+        if _index is not None:
+            # Holds taken while loading are still waiting for their booking
+            index.carry_over(_index, 'hold-')
+        for recorded_at, booking, hold in list(_recent):
+            if recorded_at >= started:
+                if hold:
+                    index.discard(hold)
+                if booking.get('id') not in sent:
+                    index.apply(booking)
+        _index = index
+    logger.info(f"Loaded availability index ({len(bookings)} active bookings)")
+    return index
+
+
+def _load(generation: Any) -> Optional[AvailabilityIndex]:
+    """
+    Reload the index, unless the bookings have not changed since the last load.
+
+    Callers hold _load_lock.
+
+    Returns:
+        AvailabilityIndex: The new (or renewed) index, None if Supabase
+        could not be read (the current index is kept)
+    """
+    started = time.monotonic()
+    read_at = timezone.now()
+    origin = date.today()
+    current = _index
+    token = get_bookings_change_token()
+    if (
+        current is not None
+        and token is not None
+        and current.token == token
+        and current.generation == generation
+        and current.origin == origin
+    ):
+        # Supabase has not changed, but the outbox may have
+        _apply_outbox(current, started, current.read_at)
+        current.loaded_at = started
+        current.read_at = read_at
+        _failed['at'] = None
+        return current
+
+    bookings = list_active_bookings(origin)
+    if bookings is None:
+        _failed['at'] = time.monotonic()
+        logger.warning("Could not load the availability index; keeping the current one")
+        return None
+    _failed['at'] = None
+    return _install(bookings, origin, generation, token, started, read_at)
+
+
+def _refresh(generation: Any) -> None:
+    """Reload the index in a background thread, unless a load is already running."""
+    if _failed_recently() or not _load_lock.acquire(blocking=False):
+        return
+
+    def run():
+        try:
+            _load(generation)
+        except Exception:
+            _failed['at'] = time.monotonic()
+            logger.exception("Availability index refresh failed")
+        finally:
+            _load_lock.release()
+            # This thread is outside Django's request cycle
+            close_old_connections()
+
+    threading.Thread(target=run, name="availability-refresh", daemon=True).start()
+
+
+def _first_load(generation: Any) -> AvailabilityIndex:
+    """
+    Load the first index, waiting for a load already running.
+
+    Returns:
+        AvailabilityIndex: The index, or an incomplete empty one (not
+        kept) if it cannot be loaded
+    """
+    with _load_lock:
+        index = _index
+        if index is None and not _failed_recently():
+            index = _load(generation)
+    if index is None:
+        return AvailabilityIndex(date.today(), generation, complete=False)
+    return index
+
+
+def get_availability() -> AvailabilityIndex:
+    """
+    Return this worker's availability index, loading it if needed.
+
+    A stale index is returned as it is while a background thread reloads
+    it. Only the first load is waited for; if Supabase cannot be read,
+    an incomplete index is returned but not kept, and the load is tried
+    again after RETRY_DELAY seconds.
+
+    Returns:
+        AvailabilityIndex: Current index
+    """
+    generation = cache.get(GENERATION_CACHE_KEY)
+    index = _index
+    if _is_fresh(index, generation):
+        return index
+    if index is not None:
+        _refresh(generation)
+        return index
+    return _first_load(generation)
+
+
+async def aget_availability() -> AvailabilityIndex:
+    """Async version of get_availability()."""
+    generation = await cache.aget(GENERATION_CACHE_KEY)
+    index = _index
+    if _is_fresh(index, generation):
+        return index
+    if index is not None:
+        _refresh(generation)
+        return index
+    return await sync_to_async(_first_load, thread_sensitive=False)(generation)
+
+
+def record_booking(booking: Dict[str, Any], hold: Optional[str] = None) -> None:
+    """
+    Add a booking created by this worker, replacing the hold taken for it.
+
+    Args:
+        booking: The booking as sent to Supabase, including its new id
+        hold: Key returned by AvailabilityIndex.hold(), if any
+    """
+    with _lock:
+        _recent.append((time.monotonic(), booking, hold))
+        index = _index
+    if index is not None:
+        if hold:
+            index.discard(hold)
+        index.apply(booking)
+
+
+def release_hold(hold: Optional[str]) -> None:
+    """Give back the units of a hold whose booking was not created."""
+    index = _index
+    if hold and index is not None:
+        index.discard(hold)
+
+
+def record_status(booking_id: int, new_status: str) -> None:
+    """
+    Apply a status change made by this worker.
+
+    Cancelling frees the booking's units. Confirming a pending booking
+    changes nothing (it already holds them). Re-activating a booking the
+    index does not hold (e.g. a cancelled one) needs its dates, so the
+    index is invalidated and reloaded instead.
+    """
+    index = _index
+    if index is None:
+        return
+    if new_status == 'cancelled':
+        index.discard(booking_id)
+    elif booking_id not in index:
+        invalidate_availability()
+
+
+def invalidate_availability() -> None:
+    """
+    Move to a new generation, so the next request reloads the index.
+
+    The current index is used until the reload has finished. With a
+    shared cache backend this reaches every worker.
+    """
+    cache.set(GENERATION_CACHE_KEY, time.time_ns(), None)
+    logger.info("Availability index invalidated")
@@ -0,0 +1,271 @@
+"""
+Catalog cache for SoundHire bookings.
+
+The catalog is the list of packages plus the DJ daily rate. It changes
+rarely, so instead of reading it from Supabase on every request it is
+loaded once per worker process and reused until either:
+- CATALOG_CACHE_TTL seconds have passed, or
+- invalidate_catalog() is called (e.g. by `manage.py refresh_catalog`).
+
+Invalidation is signalled through Django's cache framework, so with a
+shared cache backend (Redis, Memcached, database) one invalidation
+reaches every worker. With the default local-memory backend it only
+reaches the current process and other workers pick up changes on TTL.
+
+If a reload fails (Supabase down, or the circuit breaker in
+bookings/resilience.py open), the last catalog loaded successfully is
+served instead, and the next request tries to reload again. A reload has
+failed when either read did: no packages, or no DJ rate (read without
+get_dj_rate()'s default, so a made-up rate is never cached).
+"""
+
+from dataclasses import astuple, dataclass, field
+from typing import List, Dict, Any, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import threading
+import time
+import weakref
+
+from django.conf import settings
+from django.core.cache import cache
+import logging
+
+from .forms import BookingForm
+from .metrics import count_cache
+from .supabase_client import (
+    DEFAULT_DJ_RATE,
+    Package,
+    fetch_packages,
+    fetch_dj_rate,
+    fan_out,
+    afetch_packages,
+    afetch_dj_rate,
+    afan_out,
+)
+
+logger = logging.getLogger(__name__)
+
+# Cache key holding the invalidation generation shared by all workers
+GENERATION_CACHE_KEY = 'bookings:catalog:generation'
+
+
+@dataclass(frozen=True)
+class Catalog:
+    """
+    Immutable snapshot of the package catalog.
+
+    Attributes:
+        packages: Packages from Supabase, ordered by daily_rate
+        dj_rate: DJ daily rate in UGX
+        version: Short content hash, changes whenever packages or DJ rate change
+        package_choices: Precomputed (value, label) choices for BookingForm
+        packages_by_id: Package lookup by ID
+        loaded_at: time.monotonic() when the snapshot was loaded
+        generation: Shared invalidation generation the snapshot belongs to
+    """
+    packages: List[Package]
+    dj_rate: float
+    version: str
+    package_choices: List[Tuple[str, str]]
+    packages_by_id: Dict[int, Package] = field(repr=False)
+    loaded_at: float = 0.0
+    generation: Any = None
+
+
+# Per-process cache state, guarded by _lock
+_catalog: Optional[Catalog] = None
+# Last catalog loaded successfully, kept across invalidations
+_last_good: Optional[Catalog] = None
+_lock = threading.Lock()
+# One reload at a time per event loop, for aget_catalog()
+_async_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = (
+    weakref.WeakKeyDictionary()
+)
+# Counters, bumped from request threads, fan-out threads and event loops
+_stats = {'hits': 0, 'misses': 0, 'stale_served': 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name: str) -> None:
+    """Bump one of this worker's catalog counters (and the cache metric)."""
+    with _stats_lock:
+        _stats[name] += 1
+    if name != 'stale_served':
+        count_cache('catalog', name == 'hits')
+
+
+def _catalog_version(packages: List[Package], dj_rate: float) -> str:
+    """Hash the catalog contents so every worker derives the same version."""
+    payload = json.dumps([[astuple(pkg) for pkg in packages], dj_rate], default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()[:12]
+
+
+def _load_catalog(generation: Any) -> Tuple[Catalog, bool]:
+    """
+    Read packages and DJ rate from Supabase and build a new snapshot.
+
+    Args:
+        generation: Invalidation generation current at load time
+
+    Returns:
+        Tuple: (fresh catalog snapshot, whether both reads succeeded)
+    """
+    # Both reads are independent, so issue them at the same time
+    results = fan_out({'packages': fetch_packages, 'dj_rate': fetch_dj_rate}, defaults={'packages': []})
+    return _from_results(results, generation)
+
+
+def _from_results(results: Dict[str, Any], generation: Any) -> Tuple[Catalog, bool]:
+    """Build a snapshot from the reload reads; see _load_catalog()."""
+    dj_rate = results['dj_rate']
+    catalog = build_catalog(results['packages'], DEFAULT_DJ_RATE if dj_rate is None else dj_rate, generation)
+    return catalog, bool(catalog.packages) and dj_rate is not None
+
+
+def build_catalog(packages: List[Package], dj_rate: float, generation: Any = None) -> Catalog:
+    """
+    Build a catalog snapshot from packages and the DJ rate.
+
+    Args:
+        packages: Packages from Supabase
+        dj_rate: DJ daily rate in UGX
+        generation: Invalidation generation the snapshot belongs to
+
+    Returns:
+        Catalog: Catalog snapshot
+    """
+    return Catalog(
+        packages=packages,
+        dj_rate=dj_rate,
+        version=_catalog_version(packages, dj_rate),
+        package_choices=BookingForm.build_package_choices(packages, dj_rate),
+        packages_by_id={pkg.id: pkg for pkg in packages},
+        loaded_at=time.monotonic(),
+        generation=generation,
+    )
+
+
+def _is_fresh(catalog: Optional[Catalog], generation: Any) -> bool:
+    """Check a snapshot against the TTL and the shared invalidation generation."""
+    if catalog is None:
+        return False
+    if catalog.generation != generation:
+        return False
+    return time.monotonic() - catalog.loaded_at < settings.CATALOG_CACHE_TTL
+
+
+def get_catalog() -> Catalog:
+    """
+    Return the current catalog, loading it from Supabase if needed.
+
+    In the steady state this makes no Supabase calls. If the reload fails
+    (an empty package list, or no DJ rate), the last known good catalog is
+    returned, or what could be read if there is none yet (with the default
+    DJ rate); neither is kept as current, so the next request tries again.
+
+    Returns:
+        Catalog: Current catalog snapshot
+    """
+    global _catalog, _last_good
+
+    generation = cache.get(GENERATION_CACHE_KEY)
+    catalog = _catalog
+    if _is_fresh(catalog, generation):
+        _count('hits')
+        return catalog
+
+    with _lock:
+        # Another thread may have reloaded while we waited
+        if _is_fresh(_catalog, generation):
+            _count('hits')
+            return _catalog
+
+        _count('misses')
+        catalog, loaded = _load_catalog(generation)
+        if loaded:
+            _catalog = _last_good = catalog
+            logger.info(f"Loaded catalog version {catalog.version}")
+        elif _last_good is not None:
+            logger.warning(f"Catalog reload failed, serving last known good version {_last_good.version}")
+            _count('stale_served')
+            return _last_good
+        return catalog
+
+
+async def aget_catalog() -> Catalog:
+    """
+    Async version of get_catalog() for async views.
+
+    The cache hit path never blocks the event loop. On a miss, packages and
+    the DJ rate are read concurrently with the async Supabase helpers.
+    Concurrent misses on the same loop wait for the first one's reload
+    instead of each reading Supabase.
+
+    Returns:
+        Catalog: Current catalog snapshot
+    """
+    global _catalog, _last_good
+
+    generation = await cache.aget(GENERATION_CACHE_KEY)
+    catalog = _catalog
+    if _is_fresh(catalog, generation):
+        _count('hits')
+        return catalog
+
+    loop = asyncio.get_running_loop()
+    lock = _async_locks.get(loop)
+    if lock is None:
+        lock = _async_locks.setdefault(loop, asyncio.Lock())
+    async with lock:
+        # Another task may have reloaded while we waited
+        if _is_fresh(_catalog, generation):
+            _count('hits')
+            return _catalog
+
+        _count('misses')
+        results = await afan_out({'packages': afetch_packages, 'dj_rate': afetch_dj_rate}, defaults={'packages': []})
+        catalog, loaded = _from_results(results, generation)
+        if loaded:
+            _catalog = _last_good = catalog
+            logger.info(f"Loaded catalog version {catalog.version}")
+        elif _last_good is not None:
+            logger.warning(f"Catalog reload failed, serving last known good version {_last_good.version}")
+            _count('stale_served')
+            return _last_good
+        return catalog
+
+
+def invalidate_catalog() -> None:
+    """
+    Discard the cached catalog so the next request reloads it.
+
+    Call this after packages or the DJ rate are changed.
+    """
+    global _catalog
+
+    cache.set(GENERATION_CACHE_KEY, time.time_ns(), None)
+    with _lock:
+        _catalog = None
+    logger.info("Catalog cache invalidated")
+
+
+def catalog_cache_stats() -> Dict[str, Any]:
+    """
+    Report hit/miss counters for this worker process.
+
+    Returns:
+        Dict: hits, misses, hit_ratio, the current catalog version (or None)
+        and how often the last known good catalog was served (stale_served)
+    """
+    with _stats_lock:
+        hits, misses, stale_served = _stats['hits'], _stats['misses'], _stats['stale_served']
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / total if total else 0.0,
+        'version': _catalog.version if _catalog else None,
+        'stale_served': stale_served,
+    }
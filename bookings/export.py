@@ -0,0 +1,178 @@
+"""
+Streaming bookings export (CSV and JSON Lines).
+
+The export views hand these generators to a StreamingHttpResponse. Rows
+are read from Supabase in chunks of BOOKINGS_EXPORT_CHUNK
+(supabase_client.iter_booking_chunks) and each chunk is encoded and sent
+before the next one is requested, so memory use stays flat however many
+bookings there are. When the worker's bookings mirror is fresh
+(bookings/mirror.py), the chunks come from the mirror instead.
+
+Under ASGI the response needs an async iterator, otherwise Django would
+collect the whole export into a list before sending it; under WSGI it
+needs a sync one. stream_export() returns whichever the server uses.
+
+Customer names, emails and phones are typed in by visitors, so CSV cells
+that a spreadsheet would read as a formula (starting with =, +, -, @, tab
+or carriage return) are prefixed with a single quote. The JSON Lines
+export keeps the values as they are.
+"""
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Union
+import csv
+import io
+import json
+
+from django.conf import settings
+
+from .mirror import BookingsMirror
+from .supabase_client import iter_booking_chunks, aiter_booking_chunks
+
+# Columns of the export, in order
+EXPORT_FIELDS = [
+    'id',
+    'customer_name',
+    'email',
+    'phone',
+    'start_date',
+    'end_date',
+    'package_id',
+    'package_name',
+    'qty',
+    'include_dj',
+    'total_price',
+    'status',
+]
+
+# Leading characters that make spreadsheet apps read a cell as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+# Response content type per export format
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+
+@dataclass(frozen=True)
+class ExportFilters:
+    """
+    Which bookings to export.
+
+    Attributes:
+        status: Booking status, or None for all
+        start_from: Earliest event date, inclusive
+        start_to: Latest event date, inclusive
+    """
+    status: Optional[str] = None
+    start_from: Optional[date] = None
+    start_to: Optional[date] = None
+
+    def filename(self, fmt: str) -> str:
+        """Download file name describing the filters, e.g. bookings-confirmed-from-2026-01-01.csv"""
+        parts = ['bookings', self.status or 'all']
+        if self.start_from:
+            parts.append(f"from-{self.start_from.isoformat()}")
+        if self.start_to:
+            parts.append(f"to-{self.start_to.isoformat()}")
+        return f"{'-'.join(parts)}.{fmt}"
+
+
+def _rows(chunk: List[Dict[str, Any]], package_names: Dict[int, str]) -> Iterator[Dict[str, Any]]:
+    """Add the package name to each booking and keep only the export columns."""
+    for booking in chunk:
+        row = {field: booking.get(field) for field in EXPORT_FIELDS}
+        row['package_name'] = package_names.get(booking.get('package_id'), '')
+        yield row
+
+
+def _csv_cell(value: Any) -> Any:
+    """Quote text a spreadsheet would run as a formula (CSV injection)."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _encode_csv(chunk: List[Dict[str, Any]], package_names: Dict[int, str]) -> str:
+    """Encode one chunk of bookings as CSV lines (no header)."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    writer.writerows(
+        {field: _csv_cell(value) for field, value in row.items()}
+        for row in _rows(chunk, package_names)
+    )
+    return buffer.getvalue()
+
+
+def _encode_jsonl(chunk: List[Dict[str, Any]], package_names: Dict[int, str]) -> str:
+    """Encode one chunk of bookings as JSON Lines."""
+    return ''.join(json.dumps(row, default=str) + '\n' for row in _rows(chunk, package_names))
+
+
+def _csv_header() -> str:
+    """CSV header line."""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(EXPORT_FIELDS)
+    return buffer.getvalue()
+
+
+ENCODERS = {'csv': _encode_csv, 'jsonl': _encode_jsonl}
+
+
+def iter_export(
+    fmt: str,
+    filters: ExportFilters,
+    package_names: Dict[int, str],
+    mirror: Optional[BookingsMirror] = None,
+) -> Iterator[str]:
+    """
+    Generate the export one chunk of bookings at a time.
+
+    Args:
+        fmt: "csv" or "jsonl"
+        filters: Which bookings to include
+        package_names: Package name by package ID, from the catalog
+        mirror: Bookings mirror to read instead of Supabase, if any
+
+    Yields:
+        str: Encoded lines, one chunk per item
+    """
+    encode = ENCODERS[fmt]
+    if fmt == 'csv':
+        yield _csv_header()
+    source = mirror.iter_chunks if mirror is not None else iter_booking_chunks
+    for chunk in source(filters.status, filters.start_from, filters.start_to):
+        yield encode(chunk, package_names)
+
+
+async def aiter_export(
+    fmt: str,
+    filters: ExportFilters,
+    package_names: Dict[int, str],
+    mirror: Optional[BookingsMirror] = None,
+) -> AsyncIterator[str]:
+    """Async version of iter_export()."""
+    encode = ENCODERS[fmt]
+    if fmt == 'csv':
+        yield _csv_header()
+    if mirror is not None:
+        # Already in memory: nothing to wait for between chunks
+        for chunk in mirror.iter_chunks(filters.status, filters.start_from, filters.start_to):
+            yield encode(chunk, package_names)
+        return
+    async for chunk in aiter_booking_chunks(filters.status, filters.start_from, filters.start_to):
+        yield encode(chunk, package_names)
+
+
+def stream_export(
+    fmt: str,
+    filters: ExportFilters,
+    package_names: Dict[int, str],
+    mirror: Optional[BookingsMirror] = None,
+) -> Union[Iterator[str], AsyncIterator[str]]:
+    """Return the export generator suited to the server (async under ASGI)."""
+    if settings.SUPABASE_ASYNC_CLIENT:
+        return aiter_export(fmt, filters, package_names, mirror)
+    return iter_export(fmt, filters, package_names, mirror)
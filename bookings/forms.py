@@ -10,6 +10,8 @@ from django import forms
 from django.core.exceptions import ValidationError
 from datetime import date, timedelta
 
+from .supabase_client import Package
+
 
 class BookingForm(forms.Form):
     """
@@ -116,33 +118,26 @@ class BookingForm(forms.Form):
         
         return event_date
     
-    @classmethod
-    def from_packages(cls, packages: list[dict], dj_rate: float = 550000) -> "BookingForm":
+    @staticmethod
+    def build_package_choices(packages: list[Package], dj_rate: float = 550000) -> list[tuple[str, str]]:
         """
-        Create a BookingForm with package choices populated from Supabase data.
+        Build the package_id choices shown in the booking form.
         
         Args:
-            packages: List of package dictionaries from Supabase
-                     Each should have: id, name, daily_rate
+            packages: Packages from Supabase (supabase_client.fetch_packages)
             dj_rate: DJ daily rate (from settings table)
         
         Returns:
-            BookingForm: Form instance with package_id choices populated
-            
-        Example:
-            packages = fetch_packages()  # From supabase_client
-            dj_rate = get_dj_rate()
-            form = BookingForm.from_packages(packages, dj_rate)
+            list: (package_id, label) tuples, e.g.
+                  ("2", "Standard - UGX 550,000 (+UGX 550,000 for DJ)")
         """
-        form = cls()
-        
         # Build choices as (value, label) tuples
         # Format: (package_id, "Package Name - UGX daily_rate (+UGX dj_rate for DJ)")
         choices = []
         for pkg in packages:
-            pkg_id = pkg.get('id')
-            pkg_name = pkg.get('name', 'Unknown')
-            daily_rate = pkg.get('daily_rate', 0)
+            pkg_id = pkg.id
+            pkg_name = pkg.name
+            daily_rate = pkg.daily_rate or 0
             
             # Format price with thousands separator
             daily_rate_formatted = f"{daily_rate:,.0f}"
@@ -155,9 +150,43 @@ class BookingForm(forms.Form):
             
             choices.append((str(pkg_id), label))
         
-        # Update the package_id field choices
-        form.fields['package_id'].choices = choices
+        return choices
+    
+    @classmethod
+    def from_packages(cls, packages: list[Package], dj_rate: float = 550000) -> "BookingForm":
+        """
+        Create a BookingForm with package choices populated from Supabase data.
         
+        Args:
+            packages: Packages from Supabase (supabase_client.fetch_packages)
+            dj_rate: DJ daily rate (from settings table)
+        
+        Returns:
+            BookingForm: Form instance with package_id choices populated
+            
+        Example:
+            packages = fetch_packages()  # From supabase_client
+            dj_rate = get_dj_rate()
+            form = BookingForm.from_packages(packages, dj_rate)
+        """
+        form = cls()
+        form.fields['package_id'].choices = cls.build_package_choices(packages, dj_rate)
+        return form
+    
+    @classmethod
+    def from_catalog(cls, catalog, data=None) -> "BookingForm":
+        """
+        Create a BookingForm using the catalog's precomputed package choices.
+        
+        Args:
+            catalog: Catalog snapshot from bookings.catalog.get_catalog()
+            data: Optional POST data to bind to the form
+        
+        Returns:
+            BookingForm: Form instance with package_id choices populated
+        """
+        form = cls(data)
+        form.fields['package_id'].choices = catalog.package_choices
         return form
 
 
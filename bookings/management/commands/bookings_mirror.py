@@ -0,0 +1,66 @@
+"""
+Management command to check and resync the in-memory bookings mirror.
+
+Each web worker keeps a copy of the bookings table, synced incrementally
+by a background thread (see bookings/mirror.py):
+    python manage.py bookings_mirror            # load a mirror here and report on it
+    python manage.py bookings_mirror resync     # make every worker reload in full
+
+Run `resync` after changing bookings in a way the incremental sync cannot
+see, e.g. restoring a backup with older updated_at values. It reaches
+every worker when the cache backend is shared between them.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from bookings.mirror import force_resync, get_mirror, sync_mirror
+
+
+class Command(BaseCommand):
+    """Report on the bookings mirror or force every worker to reload it."""
+
+    help = "Check the in-memory bookings mirror, or make every worker reload it from Supabase"
+
+    def add_arguments(self, parser):
+        actions = parser.add_subparsers(dest='action')
+        actions.add_parser('status', help="Load a mirror in this process and report on it (default)")
+        actions.add_parser('resync', help="Make every worker reload its mirror in full")
+
+    def handle(self, *args, **options):
+        action = options.get('action') or 'status'
+        getattr(self, f"handle_{action}")(**options)
+
+    def handle_status(self, **options):
+        if settings.BOOKINGS_MIRROR != 'thread':
+            self.stderr.write(self.style.WARNING("The bookings mirror is disabled (BOOKINGS_MIRROR=off)"))
+            return
+        started = time.perf_counter()
+        if not sync_mirror(full=True):
+            self.stderr.write(self.style.WARNING("Could not read bookings from Supabase"))
+            return
+        loaded_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        synced = sync_mirror()
+        sync_ms = (time.perf_counter() - started) * 1000
+
+        mirror = get_mirror()
+        summary = mirror.summary()
+        self.stdout.write(
+            f"{summary.total} bookings: {summary.pending} pending, {summary.confirmed} confirmed, "
+            f"{summary.cancelled} cancelled; confirmed revenue UGX {summary.confirmed_revenue:,.0f}"
+        )
+        self.stdout.write(f"Watermark {mirror.watermark or '-'}, change token {mirror.token}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Full load {loaded_ms:.0f} ms, incremental sync "
+            f"{f'{sync_ms:.0f} ms' if synced else 'failed'}"
+        ))
+
+    def handle_resync(self, **options):
+        force_resync()
+        self.stdout.write(self.style.SUCCESS(
+            "Resync requested; each worker reads from Supabase until it has reloaded its mirror"
+        ))
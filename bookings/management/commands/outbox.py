@@ -0,0 +1,110 @@
+"""
+Management command to inspect and work the booking outbox.
+
+Bookings submitted on the home page are queued locally and sent to
+Supabase by the outbox drainer (see bookings/outbox.py):
+    python manage.py outbox                 # queue summary, failed and rejected entries
+    python manage.py outbox list --status pending
+    python manage.py outbox drain           # send everything due now
+    python manage.py outbox replay          # retry every failed entry
+    python manage.py outbox replay 12 15    # retry specific entries (also rejected ones)
+    python manage.py outbox run             # run a drainer in the foreground
+"""
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from bookings.models import OutboxBooking
+from bookings.outbox import drain, recent_rejections, replay, run_drainer
+
+
+class Command(BaseCommand):
+    """Show, drain and replay queued booking submissions."""
+
+    help = "Inspect the booking outbox, send queued bookings and replay failed ones"
+
+    def add_arguments(self, parser):
+        actions = parser.add_subparsers(dest='action')
+
+        actions.add_parser('status', help="Queue summary (default)")
+
+        list_parser = actions.add_parser('list', help="List outbox entries")
+        list_parser.add_argument(
+            '--status',
+            choices=[choice for choice, _ in OutboxBooking.STATUS_CHOICES],
+            help="Only entries with this status",
+        )
+        list_parser.add_argument('--limit', type=int, default=50)
+
+        actions.add_parser('drain', help="Send every due entry to Supabase now")
+
+        replay_parser = actions.add_parser('replay', help="Queue failed entries again")
+        replay_parser.add_argument('ids', nargs='*', type=int, help="Entry IDs (default: all failed)")
+
+        actions.add_parser('run', help="Run the outbox drainer until interrupted")
+
+    def handle(self, *args, **options):
+        action = options.get('action') or 'status'
+        getattr(self, f"handle_{action}")(**options)
+
+    def handle_status(self, **options):
+        counts = dict(
+            OutboxBooking.objects.values_list('status').annotate(total=Count('id'))
+        )
+        for status, label in OutboxBooking.STATUS_CHOICES:
+            self.stdout.write(f"{label:<8} {counts.get(status, 0)}")
+
+        oldest = OutboxBooking.objects.filter(status=OutboxBooking.PENDING).aggregate(
+            oldest=Min('created_at')
+        )['oldest']
+        if oldest:
+            age = (timezone.now() - oldest).total_seconds()
+            self.stdout.write(f"Oldest pending entry queued {age:.0f} s ago")
+
+        failed = OutboxBooking.objects.filter(status=OutboxBooking.FAILED)
+        if failed.exists():
+            self.stdout.write(self.style.WARNING("Failed entries (replay with `outbox replay`):"))
+            self._write_entries(failed[:20])
+
+        rejected = recent_rejections()
+        if rejected:
+            self.stdout.write(self.style.ERROR(
+                "Rejected by Supabase (contact these customers; replay by ID once resolved):"
+            ))
+            self._write_entries(rejected)
+
+    def handle_list(self, status=None, limit=50, **options):
+        entries = OutboxBooking.objects.all()
+        if status:
+            entries = entries.filter(status=status)
+        self._write_entries(entries.order_by('-id')[:limit])
+
+    def handle_drain(self, **options):
+        result = drain()
+        self.stdout.write(self.style.SUCCESS(
+            f"Sent {result.sent}, retrying {result.retrying}, failed {result.failed}, "
+            f"rejected {result.rejected}"
+        ))
+
+    def handle_replay(self, ids=None, **options):
+        count = replay(ids)
+        self.stdout.write(self.style.SUCCESS(f"Queued {count} entries again"))
+
+    def handle_run(self, **options):
+        self.stdout.write("Draining the booking outbox (Ctrl+C to stop)")
+        try:
+            run_drainer()
+        except KeyboardInterrupt:
+            pass
+
+    def _write_entries(self, entries):
+        for entry in entries:
+            self.stdout.write(
+                f"#{entry.pk:<6} {entry.status:<8} attempts {entry.attempts:<3} "
+                f"{entry.created_at:%Y-%m-%d %H:%M} "
+                f"{entry.payload.get('customer_name', '')} <{entry.payload.get('email', '')}> "
+                f"/ {entry.payload.get('start_date', '')}"
+                + (f" -> booking #{entry.supabase_id}" if entry.supabase_id else "")
+                + (f"  [{entry.last_error[:80]}]" if entry.last_error else "")
+            )
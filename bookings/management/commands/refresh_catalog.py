@@ -0,0 +1,31 @@
+"""
+Management command to invalidate and reload the package catalog cache.
+
+Run this after changing packages or the DJ rate in Supabase:
+    python manage.py refresh_catalog
+"""
+
+from django.core.management.base import BaseCommand
+
+from bookings.catalog import get_catalog, invalidate_catalog
+
+
+class Command(BaseCommand):
+    """Invalidate the catalog cache and load the current catalog."""
+
+    help = "Invalidate the cached package catalog so workers reload it from Supabase"
+
+    def handle(self, *args, **options):
+        invalidate_catalog()
+        catalog = get_catalog()
+
+        if not catalog.packages:
+            self.stderr.write(self.style.WARNING(
+                "No packages returned by Supabase; workers will retry on their next request"
+            ))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Catalog reloaded: {len(catalog.packages)} packages, "
+            f"DJ rate UGX {catalog.dj_rate:,.0f}, version {catalog.version}"
+        ))
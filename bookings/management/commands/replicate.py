@@ -0,0 +1,84 @@
+"""
+Management command to sync the local read replica of the Supabase tables.
+
+Copies packages, settings and the bookings changed since the last run
+into Django's database (see bookings/replica.py):
+    python manage.py replicate              # one incremental pass
+    python manage.py replicate --full       # copy bookings in full
+    python manage.py replicate --loop       # keep syncing every SUPABASE_REPLICA_INTERVAL s
+    python manage.py replicate --status     # what was synced when
+
+Reads use the replica when SUPABASE_READS=replica. Run `--loop` as its
+own process (SUPABASE_REPLICA_SYNC=off) when there are several workers.
+Only one process replicates at a time (see SUPABASE_REPLICA_LEASE); a
+pass started while another holds the lease does nothing.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from bookings.replica import replica_status, replicate, run_replicator
+
+
+class Command(BaseCommand):
+    """Sync the local read replica from Supabase."""
+
+    help = "Copy packages, settings and changed bookings from Supabase into the local read replica"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="Copy every booking, not just the changed ones")
+        parser.add_argument('--loop', action='store_true', help="Keep syncing until interrupted")
+        parser.add_argument('--status', action='store_true', help="Show the replication state and exit")
+
+    def handle(self, *args, full=False, loop=False, status=False, **options):
+        if status:
+            self._write_status()
+            return
+        if loop:
+            self.stdout.write(
+                f"Syncing the read replica every {settings.SUPABASE_REPLICA_INTERVAL:g} s (Ctrl+C to stop)"
+            )
+            try:
+                run_replicator()
+            except KeyboardInterrupt:
+                pass
+            return
+
+        started = time.perf_counter()
+        result = replicate(full=full)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if result.skipped:
+            self.stdout.write(
+                f"Another process is replicating; skipped (its lease lasts up to "
+                f"{settings.SUPABASE_REPLICA_LEASE:g} s after its last pass)"
+            )
+            return
+        summary = (
+            f"packages {result.packages}, settings {result.settings}, "
+            f"bookings {result.bookings}{' (full copy)' if result.full else ''} rows written "
+            f"in {elapsed_ms:.0f} ms"
+        )
+        if result.ok:
+            self.stdout.write(self.style.SUCCESS(f"Replica synced: {summary}"))
+        else:
+            self.stderr.write(self.style.WARNING(
+                f"Some tables could not be read from Supabase ({summary}); they keep their previous copy"
+            ))
+        if settings.SUPABASE_READS != 'replica':
+            self.stdout.write("Reads still go to Supabase; set SUPABASE_READS=replica to use the replica")
+
+    def _write_status(self):
+        states = replica_status()
+        if not states:
+            self.stdout.write("The read replica has not been synced yet")
+            return
+        now = timezone.now()
+        for state in states:
+            age = (now - state.synced_at).total_seconds() if state.synced_at else None
+            line = f"{state.table:<9} {state.rows:>8} rows, synced {age:.0f} s ago" if age is not None else f"{state.table:<9} never synced"
+            if state.watermark:
+                line += f", watermark {state.watermark}"
+            self.stdout.write(line)
@@ -0,0 +1,144 @@
+"""
+Prometheus metrics for SoundHire bookings.
+
+Exported at /metrics in the Prometheus text format:
+
+- soundhire_request_duration_seconds: request latency histogram per URL
+  name (home, admin_dashboard, confirm_booking, ...), method (standard
+  methods only; any other token a client sends is "other") and status class
+- soundhire_supabase_call_duration_seconds: Supabase latency histogram
+  per supabase_client helper and operation
+- soundhire_supabase_call_errors_total: failed Supabase calls per helper
+  and exception type
+- soundhire_booking_submissions_total: booking form outcomes (queued,
+  sold_out, unavailable, invalid_package, error)
+- soundhire_booking_creations_total: outbox deliveries to Supabase
+  (success, retry, failure, rejected)
+- soundhire_cache_requests_total: hits and misses per cache (catalog,
+  summary, page_fragment, bookings_mirror, occupancy, analytics); the hit
+  ratio is rate(...{result="hit"}) / rate(...)
+- soundhire_supabase_circuit_state: circuit breaker state per worker
+  (0 closed, 1 half-open, 2 open; see bookings/resilience.py)
+
+Metrics are prometheus_client counters and histograms: updating one is a
+lock-protected in-memory add. Under a multi-worker server (gunicorn,
+uvicorn --workers) set PROMETHEUS_MULTIPROC_DIR to an empty directory
+before the workers start; each worker then writes its values to
+memory-mapped files there and /metrics adds up every worker's values,
+whichever worker answers the scrape.
+"""
+
+from typing import Optional, Tuple
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+
+# Seconds; from a cached page (a few ms) to a Supabase timeout (10 s)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_DURATION = Histogram(
+    'soundhire_request_duration_seconds',
+    'Time to handle a request, by URL name',
+    ['view', 'method', 'status'],
+    buckets=LATENCY_BUCKETS,
+)
+SUPABASE_DURATION = Histogram(
+    'soundhire_supabase_call_duration_seconds',
+    'Duration of Supabase calls (retries included), by supabase_client helper',
+    ['helper', 'operation'],
+    buckets=LATENCY_BUCKETS,
+)
+SUPABASE_ERRORS = Counter(
+    'soundhire_supabase_call_errors_total',
+    'Failed Supabase calls, by supabase_client helper and exception type',
+    ['helper', 'error'],
+)
+BOOKING_SUBMISSIONS = Counter(
+    'soundhire_booking_submissions_total',
+    'Valid booking form submissions, by outcome',
+    ['outcome'],
+)
+BOOKING_CREATIONS = Counter(
+    'soundhire_booking_creations_total',
+    'Outbox bookings sent to Supabase, by outcome',
+    ['outcome'],
+)
+CACHE_REQUESTS = Counter(
+    'soundhire_cache_requests_total',
+    'Cache lookups, by cache and result (hit/miss)',
+    ['cache', 'result'],
+)
+
+# One series per live worker; gunicorn.conf.py removes those of exited workers
+CIRCUIT_STATE = Gauge(
+    'soundhire_supabase_circuit_state',
+    'Supabase circuit breaker state (0 closed, 1 half-open, 2 open)',
+    multiprocess_mode='liveall',
+)
+CIRCUIT_STATE_VALUES = {'closed': 0, 'half_open': 1, 'open': 2}
+
+# Methods recorded as themselves; clients may send any token as the method,
+# and each new label value would be a new series that is never freed
+REQUEST_METHODS = frozenset({'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'})
+
+
+def observe_request(view: Optional[str], method: str, status: int, seconds: float) -> None:
+    """Record one handled request; `view` is the URL name (None if unresolved)."""
+    method = method if method in REQUEST_METHODS else 'other'
+    REQUEST_DURATION.labels(view or 'unmatched', method, f"{status // 100}xx").observe(seconds)
+
+
+def observe_supabase_call(helper: str, operation: str, seconds: float, error: Optional[str]) -> None:
+    """Record one Supabase call made by a supabase_client helper."""
+    SUPABASE_DURATION.labels(helper, operation).observe(seconds)
+    if error:
+        SUPABASE_ERRORS.labels(helper, error).inc()
+
+
+def count_cache(cache: str, hit: bool) -> None:
+    """Record a cache lookup."""
+    CACHE_REQUESTS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def count_booking_submission(outcome: str) -> None:
+    """Record what happened to a valid booking form submission."""
+    BOOKING_SUBMISSIONS.labels(outcome).inc()
+
+
+def count_booking_creations(success: int = 0, retry: int = 0, failure: int = 0, rejected: int = 0) -> None:
+    """Record the outcome of one outbox batch."""
+    for outcome, count in (('success', success), ('retry', retry), ('failure', failure), ('rejected', rejected)):
+        if count:
+            BOOKING_CREATIONS.labels(outcome).inc(count)
+
+
+def set_circuit_state(state: str) -> None:
+    """Record the circuit breaker's new state."""
+    CIRCUIT_STATE.set(CIRCUIT_STATE_VALUES[state])
+
+
+def render() -> Tuple[bytes, str]:
+    """
+    Render every metric in the Prometheus text format.
+
+    In multiprocess mode (PROMETHEUS_MULTIPROC_DIR set) the values of all
+    worker processes are collected from their files and added up.
+
+    Returns:
+        Tuple: (response body, content type)
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,86 @@
+"""
+Middleware for SoundHire bookings.
+
+SupabaseTimingMiddleware traces the Supabase calls made while handling
+each request (bookings/tracing.py). With SERVER_TIMING_HEADER=1 it reports
+them to the browser in a Server-Timing header, which shows up in the
+developer tools' network timing panel (off by default, as every visitor
+would see it), and writes one structured log line for every request that
+takes longer than SLOW_REQUEST_THRESHOLD_MS. It also records each
+request's latency, by URL name, in the Prometheus metrics (bookings/metrics.py).
+"""
+
+import json
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+import logging
+
+from . import tracing
+from .metrics import observe_request
+
+# Separate logger, so slow requests can be routed on their own
+slow_logger = logging.getLogger('bookings.slow_requests')
+
+
+class SupabaseTimingMiddleware:
+    """
+    Add a Server-Timing header (if SERVER_TIMING_HEADER), log slow requests
+    with their Supabase calls and record request latency metrics.
+
+    Works under WSGI and ASGI. The slow-request line is JSON, e.g.:
+
+        Slow request {"method": "GET", "path": "/admin/dashboard/",
+        "view": "admin_dashboard", "status": 200, "ms": 812.4,
+        "supabase_calls": 3, "supabase_round_trips": 3, "supabase_ms": 790.1,
+        "calls": [{"helper": "list_bookings", "table": "bookings", ...}]}
+
+    Place it first in MIDDLEWARE so the total covers the other middleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token, trace = tracing.begin()
+        try:
+            response = self.get_response(request)
+        finally:
+            tracing.end(token)
+        return self._report(request, response, trace)
+
+    async def __acall__(self, request):
+        token, trace = tracing.begin()
+        try:
+            response = await self.get_response(request)
+        finally:
+            tracing.end(token)
+        return self._report(request, response, trace)
+
+    def _report(self, request, response, trace: tracing.RequestTrace):
+        """Record the request's latency, add Server-Timing and log it if it was slow."""
+        total_ms = trace.elapsed_ms()
+        match = getattr(request, 'resolver_match', None)
+        observe_request(match.url_name if match else None, request.method, response.status_code, total_ms / 1000)
+        if settings.SERVER_TIMING_HEADER:
+            response['Server-Timing'] = trace.server_timing(total_ms)
+        if total_ms >= settings.SLOW_REQUEST_THRESHOLD_MS:
+            entry = {
+                'method': request.method,
+                'path': request.path,
+                'view': match.view_name if match else None,
+                'status': response.status_code,
+                'ms': round(total_ms, 1),
+                'supabase_calls': len(trace.calls),
+                'supabase_round_trips': trace.round_trips,
+                'supabase_ms': round(trace.supabase_ms, 1),
+                'calls': [call.as_dict() for call in trace.calls],
+            }
+            slow_logger.warning(f"Slow request {json.dumps(entry)}")
+        return response
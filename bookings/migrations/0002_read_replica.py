@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReplicaPackage',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True)),
+                ('daily_rate', models.FloatField(default=0)),
+                ('stock', models.IntegerField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'replica_packages',
+                'ordering': ['daily_rate'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ReplicaSetting',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('dj_daily_rate', models.FloatField()),
+            ],
+            options={
+                'db_table': 'replica_settings',
+            },
+        ),
+        migrations.CreateModel(
+            name='ReplicaState',
+            fields=[
+                ('table', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('watermark', models.CharField(blank=True, max_length=40)),
+                ('token', models.CharField(blank=True, max_length=100)),
+                ('rows', models.PositiveIntegerField(default=0)),
+                ('synced_at', models.DateTimeField(blank=True, null=True)),
+                ('full_synced_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'replica_state',
+            },
+        ),
+        migrations.CreateModel(
+            name='ReplicaBooking',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('customer_name', models.CharField(blank=True, max_length=200)),
+                ('email', models.CharField(blank=True, max_length=254)),
+                ('phone', models.CharField(blank=True, max_length=50)),
+                ('start_date', models.DateField(null=True)),
+                ('end_date', models.DateField(null=True)),
+                ('package_id', models.BigIntegerField(null=True)),
+                ('qty', models.IntegerField(default=1)),
+                ('include_dj', models.BooleanField(default=False)),
+                ('total_price', models.FloatField(default=0)),
+                ('status', models.CharField(default='pending', max_length=20)),
+                ('updated_at', models.CharField(blank=True, max_length=40)),
+            ],
+            options={
+                'db_table': 'replica_bookings',
+                'indexes': [models.Index(fields=['start_date', 'id'], name='replica_bookings_start_idx'), models.Index(fields=['status', 'start_date', 'id'], name='replica_bookings_status_idx'), models.Index(fields=['package_id'], name='replica_bookings_package_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0002_read_replica'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='outboxbooking',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('failed', 'Failed'), ('rejected', 'Rejected')], default='pending', max_length=10),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0003_outbox_rejected'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReplicaLease',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('owner', models.CharField(blank=True, max_length=100)),
+                ('expires_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'replica_lease',
+            },
+        ),
+    ]
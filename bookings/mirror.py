@@ -0,0 +1,562 @@
+"""
+In-memory mirror of the bookings table, kept in sync incrementally.
+
+The admin dashboard, its summary cards and the bookings export can be
+served from a copy of the bookings table held by each worker process
+instead of querying Supabase on every request. It is off unless
+BOOKINGS_MIRROR = "thread", since every worker syncs its own copy. A background thread
+(start_mirror(), started by soundhire_web/wsgi.py and asgi.py) keeps the
+copy current:
+
+- Every BOOKINGS_MIRROR_INTERVAL seconds it fetches the bookings change
+  token (write and delete counters, one primary-key lookup). If the
+  token has not changed, that is all.
+- Otherwise it fetches only the rows whose updated_at is at or after the
+  mirror's watermark (the newest updated_at it holds), minus
+  BOOKINGS_MIRROR_OVERLAP seconds for rows committed late with an earlier
+  timestamp (supabase_client.list_changed_bookings), and applies them.
+- If the token's delete count has moved (rows were deleted), every
+  BOOKINGS_MIRROR_FULL_RESYNC seconds, and after force_resync()
+  (`manage.py bookings_mirror resync`), it reloads the whole table.
+
+Staleness is bounded: get_mirror() / aget_mirror() only return the
+mirror if its last successful sync started less than
+BOOKINGS_MIRROR_MAX_STALENESS seconds ago. Otherwise they return None and
+the caller reads from Supabase as before, so a stuck sync thread or an
+unreachable Supabase never serves old data for long. Status changes made
+by this worker (confirm, cancel, bulk) are applied straight away with
+apply_status(), so the admin who made them sees them on the next page.
+
+The mirror also keeps the search index behind the dashboard's search box
+(bookings/search.py), updated with every row it applies.
+"""
+
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+from heapq import nlargest
+from datetime import date
+from operator import itemgetter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+import logging
+
+from .metrics import count_cache
+from .rows import is_later
+from .search import SearchIndex
+from .supabase_client import (
+    Booking,
+    BookingPage,
+    BookingSummary,
+    SearchPage,
+    build_booking_page,
+    decode_cursor,
+    get_bookings_change_token,
+    list_changed_bookings,
+    parse_change_token,
+    reads_from_supabase,
+    rewind_timestamp,
+)
+
+logger = logging.getLogger(__name__)
+
+# Cache key holding the forced-resync generation shared by all workers
+GENERATION_CACHE_KEY = 'bookings:mirror:generation'
+
+# Statuses with their own ordered index (the dashboard's filters)
+STATUSES = ('pending', 'confirmed', 'cancelled')
+
+_by_id = itemgetter('id')
+
+
+def _key(row: Dict[str, Any]) -> Tuple[str, int]:
+    """Dashboard sort key of a row: (start_date, id)."""
+    return row.get('start_date') or '', row['id']
+
+
+def _discard(keys: List[Tuple[str, int]], key: Tuple[str, int]) -> None:
+    """Remove a key from a sorted list, if present."""
+    i = bisect_left(keys, key)
+    if i < len(keys) and keys[i] == key:
+        del keys[i]
+
+
+class BookingsMirror:
+    """
+    A copy of the bookings table with the indexes the dashboard needs.
+
+    Rows are kept by id, next to (start_date, id) keys sorted for every
+    booking and per status, so a keyset page is two bisections, running
+    totals for the summary cards, and a search index over customer names,
+    emails and phones. Rows are replaced, never changed in place, so rows
+    already handed out stay consistent. Every replaced or new row is
+    numbered with a revision, so other in-memory copies (the analytics
+    rollups) can take just the rows changed since they last looked.
+
+    Attributes:
+        token: Bookings change token the mirror was last synced to
+        watermark: Newest updated_at held
+        generation: Forced-resync generation the mirror was loaded under
+        synced_at: time.monotonic() when the last successful sync started
+        loaded_at: time.monotonic() when the table was last read in full
+        local_changes: Status changes applied by this worker since `token`
+        revision: Number of row changes applied since the table was loaded
+    """
+
+    def __init__(self, rows: List[Dict[str, Any]], token: str, generation: Any, started: float):
+        self._rows: Dict[int, Dict[str, Any]] = {row['id']: row for row in rows}
+        self._keys: Dict[str, List[Tuple[str, int]]] = {status: [] for status in STATUSES}
+        self._keys['all'] = sorted(_key(row) for row in self._rows.values())
+        self._revenue = 0.0
+        for key in self._keys['all']:
+            row = self._rows[key[1]]
+            keys = self._keys.get(row.get('status'))
+            if keys is not None:
+                keys.append(key)
+            if row.get('status') == 'confirmed':
+                self._revenue += float(row.get('total_price') or 0)
+        self._search = SearchIndex(self._rows.values())
+        self._lock = threading.Lock()
+        self.token = token
+        self.watermark = rows[-1].get('updated_at') if rows else None
+        self.generation = generation
+        self.synced_at = started
+        self.loaded_at = started
+        self.local_changes = 0
+        self.revision = 0
+        # id -> revision of the last change, for rows changed since loading
+        self._revisions: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    # ------------------------------------------------------------------
+    # Internal helpers (callers hold self._lock)
+    # ------------------------------------------------------------------
+
+    def _remove(self, booking_id: int) -> None:
+        row = self._rows.pop(booking_id, None)
+        if row is None:
+            return
+        key = _key(row)
+        _discard(self._keys['all'], key)
+        if row.get('status') in self._keys:
+            _discard(self._keys[row['status']], key)
+        if row.get('status') == 'confirmed':
+            self._revenue -= float(row.get('total_price') or 0)
+
+    def _put(self, row: Dict[str, Any]) -> bool:
+        """Insert or replace a row; False if the mirror already held it."""
+        current = self._rows.get(row['id'])
+        if current == row:
+            return False
+        if current is not None:
+            self._remove(row['id'])
+        self._rows[row['id']] = row
+        key = _key(row)
+        insort(self._keys['all'], key)
+        if row.get('status') in self._keys:
+            insort(self._keys[row['status']], key)
+        if row.get('status') == 'confirmed':
+            self._revenue += float(row.get('total_price') or 0)
+        self._search.add(row)
+        self.revision += 1
+        self._revisions[row['id']] = self.revision
+        return True
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def apply_changes(self, rows: List[Dict[str, Any]], token: str) -> int:
+        """
+        Apply rows from list_changed_bookings() and move to a new token.
+
+        Args:
+            rows: Changed rows, ordered by (updated_at, id)
+            token: Change token read before the rows were fetched
+
+        Returns:
+            int: Number of rows that were new or different
+        """
+        with self._lock:
+            changed = sum(self._put(row) for row in rows)
+            if rows and rows[-1].get('updated_at'):
+                latest = rows[-1]['updated_at']
+                if self.watermark is None or is_later(latest, self.watermark):
+                    self.watermark = latest
+            self.token = token
+            self.local_changes = 0
+        return changed
+
+    def apply_status(self, booking_ids: Iterable[int], new_status: str) -> None:
+        """Set the status of bookings this worker has just updated in Supabase."""
+        with self._lock:
+            for booking_id in booking_ids:
+                row = self._rows.get(booking_id)
+                if row is not None and row.get('status') != new_status:
+                    self._put({**row, 'status': new_status})
+                    self.local_changes += 1
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    @property
+    def change_token(self) -> str:
+        """
+        Token for ETags and caches: the Supabase change token the mirror is
+        synced to, plus this worker's own changes on top of it. Workers synced
+        to the same token without local changes hold the same rows, so they
+        produce the same ETags.
+        """
+        return f"{self.token}+{self.local_changes}"
+
+    def age(self) -> float:
+        """Seconds since the last successful sync started."""
+        return time.monotonic() - self.synced_at
+
+    def page(self, status_filter: Optional[str] = None, cursor: Optional[str] = None) -> BookingPage:
+        """
+        One dashboard page, with the same ordering and cursors as
+        supabase_client.list_bookings().
+
+        Args:
+            status_filter: Optional status to filter by (pending/confirmed/cancelled)
+            cursor: Opaque cursor from a previous page, or None for the first page
+
+        Returns:
+            BookingPage: Up to BOOKINGS_PAGE_SIZE bookings, newest first
+        """
+        page_size = settings.BOOKINGS_PAGE_SIZE
+        position = decode_cursor(cursor)
+        with self._lock:
+            keys = self._keys['all'] if not status_filter or status_filter == 'all' else self._keys.get(status_filter, [])
+            if position is None:
+                selected = keys[-(page_size + 1):][::-1]
+            elif position[0] == 'next':
+                end = bisect_left(keys, position[1:])
+                selected = keys[max(0, end - page_size - 1):end][::-1]
+            else:
+                start = bisect_right(keys, position[1:])
+                selected = keys[start:start + page_size + 1]
+            data = [self._rows[key[1]] for key in selected]
+        return build_booking_page(data, cursor, page_size)
+
+    def search(self, query: str, status_filter: Optional[str] = None, page: int = 1) -> SearchPage:
+        """
+        One page of bookings matching a search, with the same ordering as
+        supabase_client.search_bookings() (see bookings/search.py).
+
+        Args:
+            query: Search box text (customer name, email or phone)
+            status_filter: Optional status to filter by (pending/confirmed/cancelled)
+            page: Page number, from 1
+
+        Returns:
+            SearchPage: Up to BOOKINGS_PAGE_SIZE bookings, best match first
+        """
+        page_size = settings.BOOKINGS_PAGE_SIZE
+        with self._lock:
+            scores = self._search.search(query)
+            rows = [self._rows[booking_id] for booking_id in scores]
+        if status_filter and status_filter != 'all':
+            rows = [row for row in rows if row.get('status') == status_filter]
+        # Only the rows up to the end of the page need to be in order
+        end = page * page_size
+        ranked = nlargest(end, rows, key=lambda row: (scores[row['id']], _key(row)))
+        return SearchPage(
+            bookings=[Booking.from_row(row) for row in ranked[end - page_size:]],
+            page=page,
+            has_next=len(rows) > end,
+            total=len(rows),
+        )
+
+    def summary(self) -> BookingSummary:
+        """Counts by status and confirmed revenue over every booking."""
+        with self._lock:
+            return BookingSummary(
+                total=len(self._rows),
+                pending=len(self._keys['pending']),
+                confirmed=len(self._keys['confirmed']),
+                cancelled=len(self._keys['cancelled']),
+                confirmed_revenue=self._revenue,
+            )
+
+    def active_rows(self, since: date) -> List[Dict[str, Any]]:
+        """
+        Same as supabase_client.list_active_bookings(), from the mirror.
+
+        Args:
+            since: Bookings ending before this day are left out
+
+        Returns:
+            List[Dict]: Bookings that are not cancelled (mirror rows, not copies)
+        """
+        first = since.isoformat()
+        with self._lock:
+            rows = list(self._rows.values())
+        return [
+            row for row in rows
+            if row.get('status') != 'cancelled' and (row.get('end_date') or row.get('start_date') or '') >= first
+        ]
+
+    def rows_since(self, revision: Optional[int] = None) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Rows changed after a revision, with the revision they bring you to.
+
+        Args:
+            revision: A revision returned earlier; None for every row
+
+        Returns:
+            Tuple: (rows, in no particular order; current revision)
+        """
+        with self._lock:
+            if revision is None:
+                return list(self._rows.values()), self.revision
+            rows = [self._rows[booking_id] for booking_id, changed in self._revisions.items() if changed > revision]
+            return rows, self.revision
+
+    def iter_chunks(
+        self,
+        status_filter: Optional[str] = None,
+        start_from: Optional[date] = None,
+        start_to: Optional[date] = None,
+        chunk_size: Optional[int] = None,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Same as supabase_client.iter_booking_chunks(), from the mirror.
+
+        Yields:
+            List[Dict]: Bookings in ID order (Projection.MIRROR_ROW columns)
+        """
+        chunk_size = chunk_size or settings.BOOKINGS_EXPORT_CHUNK
+        first = start_from.isoformat() if start_from else None
+        last = start_to.isoformat() if start_to else None
+        with self._lock:
+            rows = list(self._rows.values())
+        rows = [
+            row for row in rows
+            if (not status_filter or row.get('status') == status_filter)
+            and (first is None or (row.get('start_date') or '') >= first)
+            and (last is None or (row.get('start_date') or '') <= last)
+        ]
+        rows.sort(key=_by_id)
+        for offset in range(0, len(rows), chunk_size):
+            yield rows[offset:offset + chunk_size]
+
+
+# Per-process mirror state
+_mirror: Optional[BookingsMirror] = None
+_lock = threading.Lock()
+# Held for a whole sync, so the thread and sync_mirror() callers never overlap
+_sync_lock = threading.Lock()
+_stats = {'syncs': 0, 'unchanged': 0, 'rows_applied': 0, 'full_loads': 0, 'failures': 0, 'stale_reads': 0}
+
+# Status changes made by this worker recently, replayed after a sync in
+# case Supabase was read just before they were written
+_recent: deque = deque(maxlen=1000)
+
+_thread: Optional[threading.Thread] = None
+_thread_pid: Optional[int] = None
+_thread_lock = threading.Lock()
+_wake = threading.Event()
+
+
+def _replay(mirror: BookingsMirror, started: float) -> None:
+    """Re-apply this worker's status changes made since a sync started."""
+    with _lock:
+        recent = [(ids, status) for recorded_at, ids, status in _recent if recorded_at >= started]
+    for ids, status in recent:
+        mirror.apply_status(ids, status)
+
+
+def _reload(token: str, generation: Any, started: float) -> bool:
+    """Read the whole table into a new mirror and install it."""
+    global _mirror
+
+    rows = list_changed_bookings()
+    if rows is None:
+        return False
+    mirror = BookingsMirror(rows, token, generation, started)
+    _replay(mirror, started)
+    with _lock:
+        _mirror = mirror
+    _stats['full_loads'] += 1
+    logger.info(f"Loaded bookings mirror ({len(mirror)} bookings)")
+    return True
+
+
+def sync_mirror(full: bool = False) -> bool:
+    """
+    Bring this worker's mirror up to date: one pass of the sync thread.
+
+    Args:
+        full: Reload the whole table even if a delta would do
+
+    Returns:
+        bool: True if the mirror now reflects Supabase as of the start of
+        the call, False if Supabase could not be read
+    """
+    # The mirror copies Supabase itself, even when reads go to the replica
+    with _sync_lock, reads_from_supabase():
+        started = time.monotonic()
+        generation = cache.get(GENERATION_CACHE_KEY)
+        mirror = _mirror
+        token = get_bookings_change_token()
+        if token is None:
+            _stats['failures'] += 1
+            return False
+        _stats['syncs'] += 1
+
+        if (
+            full
+            or mirror is None
+            or mirror.generation != generation
+            or started - mirror.loaded_at >= settings.BOOKINGS_MIRROR_FULL_RESYNC
+            # Rows were deleted, which a delta cannot show
+            or parse_change_token(token)[1] != parse_change_token(mirror.token)[1]
+        ):
+            if not _reload(token, generation, started):
+                _stats['failures'] += 1
+                return False
+            return True
+
+        if token == mirror.token:
+            _stats['unchanged'] += 1
+        else:
+            rows = list_changed_bookings(rewind_timestamp(mirror.watermark, settings.BOOKINGS_MIRROR_OVERLAP))
+            if rows is None:
+                _stats['failures'] += 1
+                return False
+            _stats['rows_applied'] += mirror.apply_changes(rows, token)
+            _replay(mirror, started)
+        mirror.synced_at = started
+        return True
+
+
+def _usable(mirror: Optional[BookingsMirror], generation: Any) -> Optional[BookingsMirror]:
+    """Return the mirror if it is loaded, current and fresh enough to serve."""
+    if mirror is not None and mirror.generation == generation:
+        if mirror.age() <= settings.BOOKINGS_MIRROR_MAX_STALENESS:
+            count_cache('bookings_mirror', True)
+            return mirror
+        _stats['stale_reads'] += 1
+    else:
+        # Not loaded yet, or a resync was forced: have the thread load it now
+        wake_mirror()
+    count_cache('bookings_mirror', False)
+    return None
+
+
+def get_mirror() -> Optional[BookingsMirror]:
+    """
+    Return this worker's bookings mirror, if it may be read.
+
+    Returns:
+        BookingsMirror: The mirror, or None when it is disabled, not loaded
+        yet, or staler than BOOKINGS_MIRROR_MAX_STALENESS (read Supabase)
+    """
+    if settings.BOOKINGS_MIRROR != 'thread':
+        return None
+    return _usable(_mirror, cache.get(GENERATION_CACHE_KEY))
+
+
+async def aget_mirror() -> Optional[BookingsMirror]:
+    """Async version of get_mirror()."""
+    if settings.BOOKINGS_MIRROR != 'thread':
+        return None
+    return _usable(_mirror, await cache.aget(GENERATION_CACHE_KEY))
+
+
+def apply_status(booking_ids: Iterable[int], new_status: str) -> None:
+    """
+    Apply status changes this worker has just made in Supabase.
+
+    Args:
+        booking_ids: Bookings updated
+        new_status: Their new status
+    """
+    booking_ids = list(booking_ids)
+    with _lock:
+        _recent.append((time.monotonic(), booking_ids, new_status))
+        mirror = _mirror
+    if mirror is not None:
+        mirror.apply_status(booking_ids, new_status)
+
+
+def force_resync() -> None:
+    """
+    Make every worker reload its mirror from scratch.
+
+    With a shared cache backend this reaches every worker; until a worker
+    has reloaded, it reads from Supabase.
+    """
+    cache.set(GENERATION_CACHE_KEY, time.time_ns(), None)
+    wake_mirror()
+    logger.info("Bookings mirror resync requested")
+
+
+def mirror_stats() -> Dict[str, Any]:
+    """
+    Report this worker's mirror for diagnostics.
+
+    Returns:
+        Dict: Sync counters, plus rows and age in seconds (None if not loaded)
+    """
+    mirror = _mirror
+    return {
+        **_stats,
+        'enabled': settings.BOOKINGS_MIRROR == 'thread',
+        'rows': len(mirror) if mirror is not None else None,
+        'age': round(mirror.age(), 1) if mirror is not None else None,
+    }
+
+
+def run_mirror(stop: Optional[threading.Event] = None) -> None:
+    """
+    Sync the mirror until `stop` is set, every BOOKINGS_MIRROR_INTERVAL
+    seconds or when woken (first read, forced resync).
+    """
+    while stop is None or not stop.is_set():
+        try:
+            sync_mirror()
+        except Exception:
+            logger.exception("Bookings mirror sync failed")
+        finally:
+            # This thread is outside Django's request cycle
+            close_old_connections()
+        _wake.wait(settings.BOOKINGS_MIRROR_INTERVAL)
+        _wake.clear()
+
+
+def start_mirror() -> None:
+    """
+    Start this process's mirror sync thread, if enabled and not already
+    running (safe to call repeatedly, and after a fork).
+    """
+    global _thread, _thread_pid
+
+    if settings.BOOKINGS_MIRROR != 'thread':
+        return
+    pid = os.getpid()
+    if _thread is not None and _thread_pid == pid and _thread.is_alive():
+        return
+    with _thread_lock:
+        if _thread is not None and _thread_pid == pid and _thread.is_alive():
+            return
+        _thread = threading.Thread(target=run_mirror, name="bookings-mirror", daemon=True)
+        _thread_pid = pid
+        _thread.start()
+        logger.info("Started bookings mirror sync")
+
+
+def wake_mirror() -> None:
+    """Make the sync thread sync now instead of at its next poll."""
+    start_mirror()
+    _wake.set()
@@ -1,2 +1,180 @@
-# Bookings app does not use Django models
-# All data is stored in Supabase, accessed via supabase_client.py
+# Bookings, packages and settings are stored in Supabase, accessed via
+# supabase_client.py. The local models are the booking outbox (bookings
+# accepted by the web form and waiting to be written to Supabase) and the
+# read replica of the Supabase tables (bookings/replica.py).
+
+import uuid
+
+from django.db import models
+from django.utils import timezone
+
+
+class OutboxBooking(models.Model):
+    """
+    A booking submitted through the home page, queued for Supabase.
+
+    Rows are written by views.home and sent by the outbox drainer
+    (bookings/outbox.py) in batches. The idempotency key is stored on the
+    Supabase booking too, so a batch that is sent twice (e.g. the response
+    was lost) does not create duplicate bookings.
+    """
+
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    REJECTED = 'rejected'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),  # Gave up after OUTBOX_MAX_ATTEMPTS; replay to retry
+        (REJECTED, 'Rejected'),  # Refused by Supabase (e.g. sold out); contact the customer
+    ]
+
+    idempotency_key = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    payload = models.JSONField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    claimed_by = models.CharField(max_length=64, blank=True)
+    last_error = models.TextField(blank=True)
+    supabase_id = models.BigIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            # The drainer's "what is due?" query
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"Outbox #{self.pk} ({self.status}) {self.payload.get('customer_name', '')}"
+
+
+# ----------------------------------------------------------------------
+# Read replica
+#
+# Copies of the Supabase tables, kept up to date by bookings/replica.py.
+# Primary keys are Supabase's, and package_id is a plain column rather
+# than a foreign key, so the tables can be replicated in any order. Never
+# write to these tables except through the replicator.
+# ----------------------------------------------------------------------
+
+class ReplicaPackage(models.Model):
+    """A row of the Supabase packages table."""
+
+    id = models.BigIntegerField(primary_key=True)
+    name = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    daily_rate = models.FloatField(default=0)
+    stock = models.IntegerField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'replica_packages'
+        ordering = ['daily_rate']
+
+    def __str__(self):
+        return f"Package #{self.pk} {self.name}"
+
+
+class ReplicaSetting(models.Model):
+    """A row of the Supabase settings table (id 1 holds the DJ rate)."""
+
+    id = models.BigIntegerField(primary_key=True)
+    dj_daily_rate = models.FloatField()
+
+    class Meta:
+        db_table = 'replica_settings'
+
+    def __str__(self):
+        return f"Settings #{self.pk}"
+
+
+class ReplicaBooking(models.Model):
+    """
+    A row of the Supabase bookings table (Projection.MIRROR_ROW columns).
+
+    updated_at is kept exactly as Supabase returned it, since it is used
+    as the watermark for the next incremental sync.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    customer_name = models.CharField(max_length=200, blank=True)
+    email = models.CharField(max_length=254, blank=True)
+    phone = models.CharField(max_length=50, blank=True)
+    start_date = models.DateField(null=True)
+    end_date = models.DateField(null=True)
+    package_id = models.BigIntegerField(null=True)
+    qty = models.IntegerField(default=1)
+    include_dj = models.BooleanField(default=False)
+    total_price = models.FloatField(default=0)
+    status = models.CharField(max_length=20, default='pending')
+    updated_at = models.CharField(max_length=40, blank=True)
+
+    class Meta:
+        db_table = 'replica_bookings'
+        indexes = [
+            # Dashboard keyset pages, all bookings and per status filter
+            models.Index(fields=['start_date', 'id'], name='replica_bookings_start_idx'),
+            models.Index(fields=['status', 'start_date', 'id'], name='replica_bookings_status_idx'),
+            # Availability and per-package lookups
+            models.Index(fields=['package_id'], name='replica_bookings_package_idx'),
+        ]
+
+    def __str__(self):
+        return f"Booking #{self.pk} ({self.status}) {self.customer_name}"
+
+
+class ReplicaState(models.Model):
+    """
+    Replication progress for one replicated table.
+
+    Attributes:
+        table: Supabase table name (primary key)
+        watermark: Newest updated_at replicated (bookings only)
+        token: Bookings change token the replica was last synced to
+        rows: Rows in the replica after the last sync
+        synced_at: When the last successful sync started
+        full_synced_at: When the table was last copied in full
+    """
+
+    table = models.CharField(max_length=50, primary_key=True)
+    watermark = models.CharField(max_length=40, blank=True)
+    token = models.CharField(max_length=100, blank=True)
+    rows = models.PositiveIntegerField(default=0)
+    synced_at = models.DateTimeField(null=True, blank=True)
+    full_synced_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'replica_state'
+
+    def __str__(self):
+        return f"{self.table} replicated at {self.synced_at}"
+
+
+class ReplicaLease(models.Model):
+    """
+    Lease naming the one process allowed to write the replica.
+
+    Every replicator (a `replicate --loop` process, or the thread in each
+    web worker with SUPABASE_REPLICA_SYNC = "thread") takes or renews it
+    before a pass and skips the pass while another process holds it, so
+    the workers do not compete for SQLite's write lock.
+
+    Attributes:
+        name: Lease name (primary key)
+        owner: Holder (host:pid:random), blank when never taken
+        expires_at: When another process may take it over
+    """
+
+    name = models.CharField(max_length=50, primary_key=True)
+    owner = models.CharField(max_length=100, blank=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'replica_lease'
+
+    def __str__(self):
+        return f"{self.name} leased by {self.owner or '-'} until {self.expires_at}"
@@ -0,0 +1,233 @@
+"""
+Occupancy calendar for the admin dashboard: units out per package per day.
+
+Every booking that is not cancelled holds `qty` units of its package on
+each day from start_date to end_date. compute_occupancy() turns a list of
+bookings into a (package x day) array of units out with NumPy, without a
+Python loop over days or bookings:
+
+- the booking columns are read into arrays (dates as datetime64[D])
+- each booking adds qty at its first day and removes it the day after its
+  last one, in a flattened (package, day) difference array built with
+  np.bincount
+- a cumulative sum along the days gives the units out on every day
+
+A year of bookings takes a few milliseconds once the columns are read.
+The result is kept in Django's cache per year, catalog version and
+bookings change token, so it is computed again only after the bookings
+(or packages) change, and at most OCCUPANCY_CACHE_TTL seconds apart when
+no change token is available.
+
+occupancy_heatmap() lays a year (or one month) out for the template, with
+each day's units shaded against the package's stock.
+"""
+
+from calendar import Calendar, month_abbr, month_name, monthrange
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+import numpy as np
+import logging
+
+from .catalog import get_catalog
+from .metrics import count_cache
+from .mirror import get_mirror
+from .rows import column
+from .supabase_client import Package, list_active_bookings
+
+logger = logging.getLogger(__name__)
+
+# Prefix of the cache keys holding computed occupancy
+OCCUPANCY_CACHE_KEY = 'bookings:occupancy'
+
+# Shading levels of a day: 0 nothing out, 1-4 up to a quarter, half,
+# three quarters and less than all of the stock, 5 sold out
+LEVELS = 5
+
+
+@dataclass
+class Occupancy:
+    """
+    Units out per package per day over a date range.
+
+    Attributes:
+        first: First day covered
+        packages: Packages, in row order of `units`
+        units: int array (package, day): units booked on first + day
+    """
+    first: date
+    packages: List[Package]
+    units: np.ndarray
+
+    @property
+    def days(self) -> int:
+        """Number of days covered."""
+        return self.units.shape[1]
+
+    def levels(self) -> np.ndarray:
+        """
+        Shading level (0..LEVELS) of every (package, day) against stock.
+
+        A package without a stock limit is shaded against its busiest day
+        instead, and is never shown as sold out.
+        """
+        levels = np.zeros(self.units.shape, dtype=np.int8)
+        for row, package in enumerate(self.packages):
+            units = self.units[row]
+            if package.stock:
+                ratio = units / package.stock
+            else:
+                ratio = units / max(1, int(units.max(initial=0))) * 0.99
+            levels[row] = np.digitize(ratio, [1e-9, 0.25, 0.5, 0.75, 1.0])
+        return levels
+
+
+def compute_occupancy(bookings: List[Dict[str, Any]], packages: List[Package], first: date, last: date) -> Occupancy:
+    """
+    Count the units of each package out on each day from first to last.
+
+    Args:
+        bookings: Booking rows with package_id, start_date, end_date, qty
+            and status (Projection.AVAILABILITY or more); cancelled ones,
+            and ones with a missing start date, are ignored
+        packages: Packages to count (bookings of other packages are ignored)
+        first: First day
+        last: Last day
+
+    Returns:
+        Occupancy: Units out per package per day
+    """
+    days = (last - first).days + 1
+    width = days + 1  # one extra day for the decrement after a booking's last day
+    diff = np.zeros(len(packages) * width, dtype=np.int64)
+
+    if bookings and packages:
+        ids = np.array([pkg.id for pkg in packages], dtype=np.int64)
+        order = np.argsort(ids)
+        # Missing ids and quantities become NaN, missing dates NaT
+        package_ids = np.array(column(bookings, 'package_id'), dtype=float)
+        starts = np.array(column(bookings, 'start_date'), dtype='datetime64[D]')
+        ends = np.array(column(bookings, 'end_date'), dtype='datetime64[D]')
+        quantity = np.array(column(bookings, 'qty'), dtype=float)
+        cancelled = np.fromiter(map('cancelled'.__eq__, column(bookings, 'status')), dtype=bool, count=len(bookings))
+
+        # Row of each booking's package in `packages`, -1 if unknown
+        found = np.clip(np.searchsorted(ids, np.nan_to_num(package_ids, nan=-1), sorter=order), 0, len(ids) - 1)
+        rows = np.where(ids[order[found]] == package_ids, order[found], -1)
+
+        ends = np.where(np.isnat(ends), starts, ends)
+        quantity = np.nan_to_num(quantity, nan=1).astype(np.int64)
+        origin = np.datetime64(first, 'D')
+        lo = (starts - origin).astype(np.int64)
+        hi = (ends - origin).astype(np.int64)
+
+        keep = (rows >= 0) & ~cancelled & ~np.isnat(starts) & (hi >= lo) & (hi >= 0) & (lo < days)
+        rows, lo, hi, quantity = rows[keep], np.maximum(lo[keep], 0), np.minimum(hi[keep], days - 1), quantity[keep]
+
+        size = len(diff)
+        diff += np.bincount(rows * width + lo, weights=quantity, minlength=size).astype(np.int64)
+        diff -= np.bincount(rows * width + hi + 1, weights=quantity, minlength=size).astype(np.int64)
+
+    units = np.cumsum(diff.reshape(len(packages), width), axis=1)[:, :days]
+    return Occupancy(first=first, packages=list(packages), units=units)
+
+
+def _occupancy_key(year: int, catalog_version: str, version: Optional[str]) -> str:
+    return f"{OCCUPANCY_CACHE_KEY}:{year}:{catalog_version}:{version or '-'}"
+
+
+def get_occupancy(year: int, version: Optional[str] = None) -> Occupancy:
+    """
+    Return the occupancy of every package over a calendar year.
+
+    Bookings are read from this worker's bookings mirror when it is fresh,
+    otherwise from Supabase (supabase_client.list_active_bookings). A
+    failed read gives an empty calendar, which is not cached.
+
+    Args:
+        year: Calendar year
+        version: Bookings change token; a new token means a fresh calendar
+
+    Returns:
+        Occupancy: Units out per package per day of the year
+    """
+    catalog = get_catalog()
+    key = _occupancy_key(year, catalog.version, version)
+    occupancy: Optional[Occupancy] = cache.get(key)
+    count_cache('occupancy', occupancy is not None)
+    if occupancy is not None:
+        return occupancy
+
+    first, last = date(year, 1, 1), date(year, 12, 31)
+    mirror = get_mirror()
+    bookings = mirror.active_rows(first) if mirror is not None else list_active_bookings(first)
+    occupancy = compute_occupancy(bookings or [], catalog.packages, first, last)
+    if bookings is not None:
+        cache.set(key, occupancy, settings.OCCUPANCY_CACHE_TTL)
+    return occupancy
+
+
+async def aget_occupancy(year: int, version: Optional[str] = None) -> Occupancy:
+    """Async version of get_occupancy(); the work runs in a worker thread."""
+    return await sync_to_async(get_occupancy, thread_sensitive=False)(year, version)
+
+
+def occupancy_heatmap(occupancy: Occupancy, month: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Lay occupancy out for the occupancy template, one entry per package.
+
+    Without a month, each package gets one row per month of 31 day cells
+    (empty past the month's end). With a month, it gets that month as a
+    calendar: one row per week, Monday first, with empty cells outside
+    the month.
+
+    Args:
+        occupancy: Occupancy of a calendar year (see get_occupancy)
+        month: Month to show (1-12), or None for the whole year
+
+    Returns:
+        List[Dict]: Per package: package, rows (label and cells; a cell is
+        None or a dict with day, units and level), peak units and the
+        number of sold-out days
+    """
+    year = occupancy.first.year
+    levels = occupancy.levels()
+    heatmap = []
+    for index, package in enumerate(occupancy.packages):
+        units = occupancy.units[index]
+
+        def cell(day: date) -> Dict[str, Any]:
+            offset = (day - occupancy.first).days
+            return {'day': day, 'units': int(units[offset]), 'level': int(levels[index, offset])}
+
+        if month is None:
+            rows = []
+            for number in range(1, 13):
+                start = date(year, number, 1)
+                length = monthrange(year, number)[1]
+                cells = [cell(start + timedelta(days=i)) for i in range(length)]
+                rows.append({'label': month_abbr[number], 'cells': cells + [None] * (31 - length)})
+            shown = units
+        else:
+            rows = [
+                {'label': '', 'cells': [cell(day) if day.month == month else None for day in week]}
+                for week in Calendar().monthdatescalendar(year, month)
+            ]
+            start = (date(year, month, 1) - occupancy.first).days
+            shown = units[start:start + monthrange(year, month)[1]]
+        heatmap.append({
+            'package': package,
+            'rows': rows,
+            'peak': int(shown.max(initial=0)),
+            'sold_out_days': int((shown >= package.stock).sum()) if package.stock else 0,
+        })
+    return heatmap
+
+
+def month_label(month: Optional[int]) -> str:
+    """Display name of a month number, or "" for None."""
+    return month_name[month] if month else ''
@@ -0,0 +1,397 @@
+"""
+Write-behind outbox for booking submissions.
+
+views.home does not wait for Supabase. It saves the booking to the local
+OutboxBooking table (Django's SQLite database) and answers the customer
+at once. A drainer then sends queued bookings to Supabase:
+
+- in batches of OUTBOX_BATCH_SIZE, one insert request per batch
+- with an idempotency key per booking, so a retried batch never creates
+  duplicates (bookings.idempotency_key is unique in Supabase)
+- retrying failures with exponential backoff, up to OUTBOX_MAX_ATTEMPTS,
+  after which the entry is marked failed until replayed
+- not retrying bookings Supabase refused (the stock trigger's
+  check_violation when the package sold out meanwhile, or invalid data):
+  they are marked rejected at once, emailed to ADMINS and listed on the
+  admin dashboard, since the customer was already told it was received
+
+The drainer runs as a background thread in each web worker
+(OUTBOX_DRAINER = "thread", started by the WSGI/ASGI entry points), or
+as its own process with `python manage.py outbox run` (OUTBOX_DRAINER =
+"off" for the web workers). Several drainers can run at once: entries
+are claimed with a short lease before they are sent.
+
+Inspect and replay the queue with `python manage.py outbox`.
+"""
+
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import List, Dict, Optional, Tuple
+import os
+import random
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.mail import mail_admins
+from django.db import close_old_connections
+from django.db.models import Q
+from django.utils import timezone
+from postgrest.exceptions import APIError
+import logging
+
+from .availability import record_booking, release_hold
+from .metrics import count_booking_creations
+from .models import OutboxBooking
+from .summary import invalidate_summary
+from .supabase_client import create_bookings_batch
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DrainResult:
+    """
+    Outcome of one drain pass.
+
+    Attributes:
+        claimed: Entries picked up in this pass
+        sent: Entries now stored in Supabase
+        retrying: Entries that failed and will be retried later
+        failed: Entries that failed for the last time
+        rejected: Entries Supabase refused (not retried)
+    """
+    claimed: int = 0
+    sent: int = 0
+    retrying: int = 0
+    failed: int = 0
+    rejected: int = 0
+
+
+# Drainer thread state for this process
+_drainer: Optional[threading.Thread] = None
+_drainer_pid: Optional[int] = None
+_drainer_lock = threading.Lock()
+_wake = threading.Event()
+
+# SQLSTATE codes and classes meaning Supabase refused the booking itself, so
+# sending it again cannot succeed: 22 data exception, 23 integrity constraint
+# violation (23514 check_violation is the stock trigger's "sold out"), P0001
+# raised by a trigger. Other errors (schema, permissions, PostgREST) are
+# about the deployment, not the booking, and are retried as usual.
+REJECTING_SQLSTATES = ('22', '23', 'P0001')
+
+
+def is_rejection(error: APIError) -> bool:
+    """Whether Supabase refused the row itself (see REJECTING_SQLSTATES)."""
+    # An error body postgrest-py cannot parse (e.g. a proxy's 502 page)
+    # leaves the HTTP status as an int in `code`
+    return str(error.code or '').startswith(REJECTING_SQLSTATES)
+
+
+def enqueue_booking(payload: Dict) -> OutboxBooking:
+    """
+    Queue a booking for Supabase and wake the drainer.
+
+    Args:
+        payload: Booking row as for supabase_client.create_booking()
+
+    Returns:
+        OutboxBooking: The queued entry
+    """
+    entry = OutboxBooking.objects.create(payload=payload)
+    wake_drainer()
+    return entry
+
+
+async def aenqueue_booking(payload: Dict) -> OutboxBooking:
+    """Async version of enqueue_booking()."""
+    entry = await OutboxBooking.objects.acreate(payload=payload)
+    wake_drainer()
+    return entry
+
+
+def _claimable(now) -> Q:
+    """Entries that are due and not leased by another drainer."""
+    return (
+        Q(status=OutboxBooking.PENDING, next_attempt_at__lte=now)
+        & (Q(locked_until__isnull=True) | Q(locked_until__lt=now))
+    )
+
+
+def _claim(batch_size: int) -> List[OutboxBooking]:
+    """
+    Lease up to batch_size due entries for this drainer.
+
+    The lease is taken with a conditional UPDATE, so if two drainers pick
+    the same entries only one of them gets each entry.
+    """
+    now = timezone.now()
+    ids = list(
+        OutboxBooking.objects.filter(_claimable(now))
+        .order_by('id')
+        .values_list('id', flat=True)[:batch_size]
+    )
+    if not ids:
+        return []
+
+    owner = uuid.uuid4().hex
+    OutboxBooking.objects.filter(_claimable(now), pk__in=ids).update(
+        locked_until=now + timedelta(seconds=settings.OUTBOX_LEASE),
+        claimed_by=owner,
+    )
+    return list(OutboxBooking.objects.filter(claimed_by=owner).order_by('id'))
+
+
+def _send(entries: List[OutboxBooking]) -> Tuple[Dict[int, int], Dict[int, str], Dict[int, str]]:
+    """
+    Insert entries into Supabase.
+
+    Returns:
+        Tuple: (Supabase booking ID by entry pk, error message by entry pk
+        for entries to retry, error message by entry pk for entries
+        Supabase refused)
+    """
+    rows = [
+        {**entry.payload, 'idempotency_key': str(entry.idempotency_key)}
+        for entry in entries
+    ]
+    try:
+        ids = create_bookings_batch(rows)
+    except APIError as e:
+        if len(entries) == 1:
+            if is_rejection(e):
+                return {}, {}, {entries[0].pk: str(e)}
+            return {}, {entries[0].pk: str(e)}, {}
+        # Supabase rejected the insert, and one bad row fails the whole
+        # batch; send them one by one so the rest still goes through
+        logger.warning(f"Outbox batch of {len(entries)} failed ({e}); sending individually")
+        sent, errors, rejected = {}, {}, {}
+        for entry in entries:
+            entry_sent, entry_errors, entry_rejected = _send([entry])
+            sent.update(entry_sent)
+            errors.update(entry_errors)
+            rejected.update(entry_rejected)
+        return sent, errors, rejected
+    except Exception as e:
+        # Supabase unreachable or timed out: the whole batch waits for a retry
+        return {}, {entry.pk: str(e) for entry in entries}, {}
+
+    sent, errors = {}, {}
+    for entry in entries:
+        booking_id = ids.get(str(entry.idempotency_key))
+        if booking_id is None:
+            errors[entry.pk] = "Supabase did not return the booking"
+        else:
+            sent[entry.pk] = booking_id
+    return sent, errors, {}
+
+
+def _notify_rejected(entries: List[OutboxBooking]) -> None:
+    """Email ADMINS the bookings Supabase refused, so the customers can be contacted."""
+    lines = [
+        f"#{entry.pk} {entry.payload.get('customer_name', '')} <{entry.payload.get('email', '')}> "
+        f"{entry.payload.get('phone', '')}, package {entry.payload.get('package_id')} "
+        f"on {entry.payload.get('start_date')}: {entry.last_error}"
+        for entry in entries
+    ]
+    mail_admins(
+        f"{len(entries)} booking(s) rejected by Supabase",
+        "These bookings were accepted on the website but could not be stored. "
+        "Please contact the customers.\n\n" + "\n".join(lines),
+        fail_silently=True,
+    )
+
+
+def _retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter, capped at OUTBOX_RETRY_MAX_DELAY."""
+    delay = min(settings.OUTBOX_RETRY_MAX_DELAY, settings.OUTBOX_RETRY_BASE_DELAY * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def drain_once(batch_size: Optional[int] = None) -> DrainResult:
+    """
+    Send one batch of due outbox entries to Supabase.
+
+    Args:
+        batch_size: Entries per batch (default OUTBOX_BATCH_SIZE)
+
+    Returns:
+        DrainResult: What happened to the claimed entries
+    """
+    entries = _claim(batch_size or settings.OUTBOX_BATCH_SIZE)
+    result = DrainResult(claimed=len(entries))
+    if not entries:
+        return result
+
+    sent, errors, rejected = _send(entries)
+    now = timezone.now()
+    rejected_entries = []
+    for entry in entries:
+        entry.locked_until = None
+        entry.claimed_by = ''
+        if entry.pk in sent:
+            entry.status = OutboxBooking.SENT
+            entry.supabase_id = sent[entry.pk]
+            entry.sent_at = now
+            entry.last_error = ''
+            result.sent += 1
+            # Swap the availability hold taken by views.home for the booking
+            record_booking(
+                {**entry.payload, 'id': entry.supabase_id},
+                hold=f"outbox-{entry.idempotency_key}",
+            )
+            continue
+
+        entry.attempts += 1
+        if entry.pk in rejected:
+            # Retrying cannot help; the customer has to be contacted
+            entry.status = OutboxBooking.REJECTED
+            entry.last_error = rejected[entry.pk]
+            result.rejected += 1
+            rejected_entries.append(entry)
+            release_hold(f"outbox-{entry.idempotency_key}")
+            logger.error(f"Outbox entry {entry.pk} rejected by Supabase: {entry.last_error}")
+            continue
+
+        entry.last_error = errors.get(entry.pk, '')
+        if entry.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            entry.status = OutboxBooking.FAILED
+            result.failed += 1
+            release_hold(f"outbox-{entry.idempotency_key}")
+            logger.error(f"Outbox entry {entry.pk} failed {entry.attempts} times, giving up: {entry.last_error}")
+        else:
+            entry.next_attempt_at = now + timedelta(seconds=_retry_delay(entry.attempts))
+            result.retrying += 1
+            logger.warning(f"Outbox entry {entry.pk} failed (attempt {entry.attempts}): {entry.last_error}")
+
+    OutboxBooking.objects.bulk_update(
+        entries,
+        ['status', 'supabase_id', 'sent_at', 'attempts', 'last_error',
+         'next_attempt_at', 'locked_until', 'claimed_by'],
+    )
+    count_booking_creations(result.sent, result.retrying, result.failed, result.rejected)
+    if result.sent:
+        invalidate_summary()
+    if rejected_entries:
+        _notify_rejected(rejected_entries)
+    logger.info(
+        f"Outbox drained: {result.sent} sent, {result.retrying} retrying, "
+        f"{result.failed} failed, {result.rejected} rejected"
+    )
+    return result
+
+
+def drain(batch_size: Optional[int] = None) -> DrainResult:
+    """
+    Send batches until no due entries are left.
+
+    Returns:
+        DrainResult: Totals over all batches
+    """
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    total = DrainResult()
+    while True:
+        result = drain_once(batch_size)
+        total.claimed += result.claimed
+        total.sent += result.sent
+        total.retrying += result.retrying
+        total.failed += result.failed
+        total.rejected += result.rejected
+        if result.claimed < batch_size:
+            return total
+
+
+def _rejections():
+    """Entries Supabase refused in the last OUTBOX_REJECTED_DAYS days, newest first."""
+    since = timezone.now() - timedelta(days=settings.OUTBOX_REJECTED_DAYS)
+    return OutboxBooking.objects.filter(status=OutboxBooking.REJECTED, created_at__gte=since).order_by('-id')
+
+
+def recent_rejections(limit: int = 20) -> List[OutboxBooking]:
+    """
+    Bookings Supabase refused recently, for the admin dashboard and
+    `manage.py outbox status`; their customers need to be contacted.
+
+    Args:
+        limit: Most entries returned
+
+    Returns:
+        List[OutboxBooking]: Rejected entries, newest first
+    """
+    return list(_rejections()[:limit])
+
+
+async def arecent_rejections(limit: int = 20) -> List[OutboxBooking]:
+    """Async version of recent_rejections()."""
+    return [entry async for entry in _rejections()[:limit]]
+
+
+def replay(ids: Optional[List[int]] = None) -> int:
+    """
+    Put failed entries back in the queue with a fresh attempt count.
+
+    Args:
+        ids: Entry IDs to replay (default: every failed entry)
+
+    Returns:
+        int: Number of entries queued again
+    """
+    entries = OutboxBooking.objects.exclude(status=OutboxBooking.SENT)
+    if ids:
+        entries = entries.filter(pk__in=ids)
+    else:
+        entries = entries.filter(status=OutboxBooking.FAILED)
+    count = entries.update(
+        status=OutboxBooking.PENDING,
+        attempts=0,
+        next_attempt_at=timezone.now(),
+        locked_until=None,
+        claimed_by='',
+    )
+    wake_drainer()
+    return count
+
+
+def run_drainer(stop: Optional[threading.Event] = None) -> None:
+    """
+    Drain the outbox until `stop` is set, waking on new entries or every
+    OUTBOX_POLL_INTERVAL seconds (for retries that have come due).
+    """
+    while stop is None or not stop.is_set():
+        try:
+            drain()
+        except Exception:
+            logger.exception("Outbox drainer pass failed")
+        finally:
+            # This thread is outside Django's request cycle
+            close_old_connections()
+        _wake.wait(settings.OUTBOX_POLL_INTERVAL)
+        _wake.clear()
+
+
+def start_drainer() -> None:
+    """
+    Start this process's background drainer thread, if enabled and not
+    already running (safe to call repeatedly, and after a fork).
+    """
+    global _drainer, _drainer_pid
+
+    if settings.OUTBOX_DRAINER != 'thread':
+        return
+    pid = os.getpid()
+    if _drainer is not None and _drainer_pid == pid and _drainer.is_alive():
+        return
+    with _drainer_lock:
+        if _drainer is not None and _drainer_pid == pid and _drainer.is_alive():
+            return
+        _drainer = threading.Thread(target=run_drainer, name="booking-outbox", daemon=True)
+        _drainer_pid = pid
+        _drainer.start()
+        logger.info("Started booking outbox drainer")
+
+
+def wake_drainer() -> None:
+    """Make the drainer look at the queue now instead of at its next poll."""
+    start_drainer()
+    _wake.set()
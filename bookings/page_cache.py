@@ -0,0 +1,115 @@
+"""
+Rendered-fragment cache for public pages.
+
+The home page's package grid and booking form are the same for every
+visitor except for the CSRF token. They are rendered once per content
+version (the catalog version plus sold-out dates) with a placeholder in
+place of the token, kept in Django's cache for HOME_PAGE_CACHE_TTL
+seconds, and the visitor's own token is substituted after the lookup.
+
+Because the version is part of the cache key, a catalog change (for
+example after `manage.py refresh_catalog`) produces a new key and the
+old fragment is never served again; it simply expires.
+
+Each fragment carries a digest of its markup, which views use to build
+ETags so browsers can revalidate the page with a 304 instead of
+downloading it again.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.middleware.csrf import get_token
+from django.template.loader import get_template, render_to_string
+from django.utils.safestring import SafeString, mark_safe
+import logging
+
+from .metrics import count_cache
+
+logger = logging.getLogger(__name__)
+
+# Stands in for the CSRF token inside cached markup
+CSRF_PLACEHOLDER = '__soundhire_csrf_token__'
+
+
+@dataclass(frozen=True)
+class Fragment:
+    """
+    Rendered template markup shared by every visitor.
+
+    Attributes:
+        html: Markup with CSRF_PLACEHOLDER where the token goes
+        digest: Short hash of the markup, for ETags
+    """
+    html: str
+    digest: str
+
+    def for_request(self, request) -> SafeString:
+        """Return the markup with this visitor's CSRF token filled in."""
+        return mark_safe(self.html.replace(CSRF_PLACEHOLDER, get_token(request)))
+
+
+async def aget_fragment(
+    template_name: str,
+    version: str,
+    build_context: Callable[[], Dict[str, Any]],
+) -> Fragment:
+    """
+    Return a rendered fragment from the cache, rendering it on a miss.
+
+    Args:
+        template_name: Template to render
+        version: Content version; a new version means a new cache entry
+        build_context: Called on a miss to build the template context
+
+    Returns:
+        Fragment: Cached or freshly rendered markup
+    """
+    key = f"bookings:fragment:{template_name}:{version}"
+    fragment = await cache.aget(key)
+    count_cache('page_fragment', fragment is not None)
+    if fragment is not None:
+        return fragment
+
+    context = dict(build_context(), csrf_token=CSRF_PLACEHOLDER)
+    html = render_to_string(template_name, context)
+    fragment = Fragment(html=html, digest=hashlib.sha1(html.encode()).hexdigest()[:16])
+    await cache.aset(key, fragment, settings.HOME_PAGE_CACHE_TTL)
+    logger.info(f"Rendered {template_name} for version {version}")
+    return fragment
+
+
+@lru_cache(maxsize=None)
+def template_digest(template_name: str) -> str:
+    """
+    Short hash of a template's source, computed once per process.
+
+    Pages that are revalidated without being rendered include it in their
+    ETag, so a deploy that changes the template invalidates browser copies.
+    """
+    source = get_template(template_name).template.source
+    return hashlib.sha1(source.encode()).hexdigest()[:12]
+
+
+def page_etag(request, *parts: Any) -> str:
+    """
+    Build an ETag for a page made of cached fragments.
+
+    The visitor's CSRF secret is included: a browser may reuse its copy of
+    the page only while the token in the page's form is still valid.
+
+    Args:
+        request: Current request (get_token() must have been called)
+        parts: Anything else the page depends on (fragment digests,
+            change tokens, query parameters, flags)
+
+    Returns:
+        str: Quoted weak ETag
+    """
+    secret = request.META.get('CSRF_COOKIE', '')
+    payload = '|'.join([secret, *map(str, parts)])
+    return f'W/"{hashlib.sha1(payload.encode()).hexdigest()[:20]}"'
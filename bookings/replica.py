@@ -0,0 +1,541 @@
+"""
+Local SQLite read replica of the Supabase tables.
+
+Django's database (db.sqlite3) holds copies of the packages, settings
+and bookings tables (the Replica* models in bookings/models.py), with
+bookings indexed on status, start_date and package_id. With
+SUPABASE_READS = "replica" the supabase_client read helpers (packages,
+DJ rate, dashboard pages, searches, single bookings, active bookings,
+exports, the summary and the change token) query these tables instead of
+Supabase. Searches here match parts of names, emails and phone numbers
+but, unlike the bookings mirror and Supabase, tolerate no typos.
+Writes always go to Supabase; status changes are also applied here, so
+they show up on the next page rather than after the next sync.
+
+replicate() brings the copies up to date:
+
+- packages and settings are a handful of rows: they are read in full and
+  only the rows that differ are written
+- bookings are incremental: only rows whose updated_at is at or after the
+  stored watermark, minus SUPABASE_REPLICA_OVERLAP seconds for late
+  commits (supabase_client.list_changed_bookings), are read and upserted.
+  When the change token's delete count has moved (rows were deleted), and
+  every SUPABASE_REPLICA_FULL_RESYNC seconds, the table is copied in full.
+
+It runs from `python manage.py replicate` (once, or with --loop, the
+recommended setup with several workers), or from a thread in each web
+worker (SUPABASE_REPLICA_SYNC = "thread"). Only one process writes the
+replica: a pass first takes or renews the ReplicaLease row for
+SUPABASE_REPLICA_LEASE seconds, and is skipped while another process
+holds it, so workers do not queue on SQLite's write lock copying the
+same rows. When the holder stops, another takes over once the lease
+expires. The replica is only read while every table's last successful sync is less
+than SUPABASE_REPLICA_MAX_STALENESS seconds old; otherwise reads go to
+Supabase as before.
+"""
+
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+import os
+import socket
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, close_old_connections, transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+import logging
+
+from .models import ReplicaBooking, ReplicaLease, ReplicaPackage, ReplicaSetting, ReplicaState
+from .rows import is_later
+from .search import query_words
+from .supabase_client import (
+    Booking,
+    BookingPage,
+    BookingSummary,
+    Package,
+    Projection,
+    SearchPage,
+    build_booking_page,
+    decode_cursor,
+    fetch_packages as fetch_supabase_packages,
+    fetch_settings,
+    get_bookings_change_token as get_supabase_change_token,
+    list_changed_bookings,
+    parse_change_token,
+    reads_from_supabase,
+    rewind_timestamp,
+)
+
+logger = logging.getLogger(__name__)
+
+# Replicated Supabase tables; the replica is read only when all are fresh
+TABLES = ('packages', 'settings', 'bookings')
+
+# Columns copied for each table
+PACKAGE_COLUMNS = Projection.CATALOG_ENTRY.split(',')
+BOOKING_COLUMNS = Projection.MIRROR_ROW.split(',')
+AVAILABILITY_COLUMNS = Projection.AVAILABILITY.split(',')
+
+# Rows per INSERT when copying bookings
+WRITE_BATCH = 500
+
+
+@dataclass
+class ReplicationResult:
+    """
+    Outcome of one replicate() pass.
+
+    Attributes:
+        packages: Package rows written or deleted, None if Supabase could not be read
+        settings: Settings rows written, None if Supabase could not be read
+        bookings: Booking rows written, None if Supabase could not be read
+        full: Whether bookings were copied in full
+        skipped: Whether the pass was skipped because another process holds the lease
+    """
+    packages: Optional[int] = 0
+    settings: Optional[int] = 0
+    bookings: Optional[int] = 0
+    full: bool = False
+    skipped: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return None not in (self.packages, self.settings, self.bookings)
+
+
+# ----------------------------------------------------------------------
+# Replication
+# ----------------------------------------------------------------------
+
+# One replicate() at a time per process
+_replicate_lock = threading.Lock()
+
+
+# Name of the ReplicaLease row held by the replicating process
+LEASE_NAME = 'replica'
+
+# This process's lease owner name, per pid (a forked worker is a new owner)
+_owner = {'pid': None, 'name': ''}
+
+
+def _lease_owner() -> str:
+    """This process's name in ReplicaLease.owner."""
+    pid = os.getpid()
+    if _owner['pid'] != pid:
+        _owner.update(pid=pid, name=f"{socket.gethostname()}:{pid}:{uuid.uuid4().hex[:8]}")
+    return _owner['name']
+
+
+def _take_lease(now: datetime) -> bool:
+    """
+    Take or renew the replication lease.
+
+    The lease is taken with a conditional UPDATE (held by us, or
+    expired), so of two processes racing for it only one succeeds.
+    A lease held by another process is only read, not written.
+
+    Args:
+        now: Current time
+
+    Returns:
+        bool: Whether this process holds the lease until
+        now + SUPABASE_REPLICA_LEASE
+    """
+    owner = _lease_owner()
+    lease = ReplicaLease.objects.filter(name=LEASE_NAME).first()
+    if lease is not None and lease.owner != owner and lease.expires_at > now:
+        return False
+    if lease is None:
+        try:
+            ReplicaLease.objects.create(name=LEASE_NAME, owner='', expires_at=now)
+        except IntegrityError:
+            pass  # another process created it first; the UPDATE decides
+    expires_at = now + timedelta(seconds=settings.SUPABASE_REPLICA_LEASE)
+    taken = ReplicaLease.objects.filter(
+        Q(owner=owner) | Q(expires_at__lte=now), name=LEASE_NAME,
+    ).update(owner=owner, expires_at=expires_at)
+    if taken and (lease is None or lease.owner != owner):
+        logger.info(f"Took the read replica lease as {owner}")
+    return bool(taken)
+
+
+def _now_iso() -> str:
+    """Current time formatted like a Supabase timestamptz."""
+    return datetime.now(dt_timezone.utc).isoformat()
+
+
+def _mark(table: str, started: datetime, **fields: Any) -> None:
+    """Record a successful sync of one table."""
+    ReplicaState.objects.update_or_create(table=table, defaults={'synced_at': started, **fields})
+
+
+def _replicate_packages(started: datetime) -> Optional[int]:
+    """Copy the packages that differ; returns rows written or deleted."""
+    packages = fetch_supabase_packages(Projection.CATALOG_ENTRY)
+    if not packages:
+        # Cannot tell "no packages" from a failed read: keep the current copy
+        return None
+    incoming = {package.id: {column: getattr(package, column) for column in PACKAGE_COLUMNS} for package in packages}
+    current = {row['id']: row for row in ReplicaPackage.objects.values(*PACKAGE_COLUMNS)}
+    changed = [ReplicaPackage(**row) for package_id, row in incoming.items() if current.get(package_id) != row]
+    removed = current.keys() - incoming.keys()
+    with transaction.atomic():
+        if changed:
+            ReplicaPackage.objects.bulk_create(
+                changed,
+                update_conflicts=True,
+                unique_fields=['id'],
+                update_fields=[column for column in PACKAGE_COLUMNS if column != 'id'],
+            )
+        if removed:
+            ReplicaPackage.objects.filter(id__in=removed).delete()
+        _mark('packages', started, rows=len(incoming))
+    return len(changed) + len(removed)
+
+
+def _replicate_settings(started: datetime) -> Optional[int]:
+    """Copy the settings row if it differs; returns rows written."""
+    row = fetch_settings()
+    if row is None:
+        return None
+    rate = float(row['dj_daily_rate'])
+    with transaction.atomic():
+        written = ReplicaSetting.objects.exclude(dj_daily_rate=rate).filter(id=1).update(dj_daily_rate=rate)
+        if not written and not ReplicaSetting.objects.filter(id=1).exists():
+            ReplicaSetting.objects.create(id=1, dj_daily_rate=rate)
+            written = 1
+        _mark('settings', started, rows=1)
+    return written
+
+
+def _booking(row: Dict[str, Any]) -> ReplicaBooking:
+    return ReplicaBooking(**{column: row.get(column) for column in BOOKING_COLUMNS})
+
+
+def _copy_bookings(token: str, started: datetime) -> Optional[int]:
+    """Replace the replicated bookings with a full copy."""
+    rows = list_changed_bookings()
+    if rows is None:
+        return None
+    with transaction.atomic():
+        ReplicaBooking.objects.all().delete()
+        ReplicaBooking.objects.bulk_create([_booking(row) for row in rows], batch_size=WRITE_BATCH)
+        _mark(
+            'bookings', started,
+            watermark=rows[-1]['updated_at'] if rows else '',
+            token=token,
+            rows=len(rows),
+            full_synced_at=started,
+        )
+    logger.info(f"Copied {len(rows)} bookings to the read replica")
+    return len(rows)
+
+
+def _replicate_bookings(started: datetime, full: bool, result: ReplicationResult) -> Optional[int]:
+    """Apply the bookings changed since the watermark; returns rows written."""
+    token = get_supabase_change_token()
+    if token is None:
+        return None
+    state = ReplicaState.objects.filter(table='bookings').first()
+    if (
+        full
+        or state is None
+        or state.full_synced_at is None
+        or (started - state.full_synced_at).total_seconds() >= settings.SUPABASE_REPLICA_FULL_RESYNC
+    ):
+        result.full = True
+        return _copy_bookings(token, started)
+
+    if token == state.token:
+        _mark('bookings', started)
+        return 0
+
+    if not state.token or parse_change_token(token)[1] != parse_change_token(state.token)[1]:
+        # Rows were deleted in Supabase since the last sync
+        logger.info("Bookings were deleted in Supabase; copying the read replica in full")
+        result.full = True
+        return _copy_bookings(token, started)
+
+    rows = list_changed_bookings(rewind_timestamp(state.watermark or None, settings.SUPABASE_REPLICA_OVERLAP))
+    if rows is None:
+        return None
+    with transaction.atomic():
+        ReplicaBooking.objects.bulk_create(
+            [_booking(row) for row in rows],
+            batch_size=WRITE_BATCH,
+            update_conflicts=True,
+            unique_fields=['id'],
+            update_fields=[column for column in BOOKING_COLUMNS if column != 'id'],
+        )
+        watermark = state.watermark
+        if rows and (not watermark or is_later(rows[-1]['updated_at'], watermark)):
+            watermark = rows[-1]['updated_at']
+        _mark('bookings', started, watermark=watermark, token=token, rows=ReplicaBooking.objects.count())
+    return len(rows)
+
+
+def replicate(full: bool = False) -> ReplicationResult:
+    """
+    Bring the replica up to date with Supabase.
+
+    Each table is synced in its own transaction; a table that could not
+    be read from Supabase keeps its previous copy (and its sync time, so
+    it goes stale and reads fall back to Supabase). The pass is skipped
+    while another process holds the replication lease.
+
+    Args:
+        full: Copy the bookings table in full even if a delta would do
+
+    Returns:
+        ReplicationResult: Rows written per table
+    """
+    with _replicate_lock, reads_from_supabase():
+        started = timezone.now()
+        result = ReplicationResult()
+        if not _take_lease(started):
+            result.skipped = True
+            return result
+        result.packages = _replicate_packages(started)
+        result.settings = _replicate_settings(started)
+        result.bookings = _replicate_bookings(started, full, result)
+        _readiness['checked'] = 0.0
+        if not result.ok:
+            logger.warning(f"Read replica sync incomplete: {result}")
+        return result
+
+
+def replica_status() -> List[ReplicaState]:
+    """Replication state of every table synced so far."""
+    return list(ReplicaState.objects.order_by('table'))
+
+
+def run_replicator(stop: Optional[threading.Event] = None) -> None:
+    """Replicate every SUPABASE_REPLICA_INTERVAL seconds until `stop` is set."""
+    while stop is None or not stop.is_set():
+        try:
+            replicate()
+        except Exception:
+            logger.exception("Read replica sync failed")
+        finally:
+            # This thread is outside Django's request cycle
+            close_old_connections()
+        if stop is None:
+            time.sleep(settings.SUPABASE_REPLICA_INTERVAL)
+        else:
+            stop.wait(settings.SUPABASE_REPLICA_INTERVAL)
+
+
+_replicator: Optional[threading.Thread] = None
+_replicator_pid: Optional[int] = None
+_replicator_lock = threading.Lock()
+
+
+def start_replicator() -> None:
+    """
+    Start this process's replication thread, if enabled and not already
+    running (safe to call repeatedly, and after a fork).
+    """
+    global _replicator, _replicator_pid
+
+    if settings.SUPABASE_REPLICA_SYNC != 'thread':
+        return
+    pid = os.getpid()
+    if _replicator is not None and _replicator_pid == pid and _replicator.is_alive():
+        return
+    with _replicator_lock:
+        if _replicator is not None and _replicator_pid == pid and _replicator.is_alive():
+            return
+        _replicator = threading.Thread(target=run_replicator, name="read-replica", daemon=True)
+        _replicator_pid = pid
+        _replicator.start()
+        logger.info("Started read replica sync")
+
+
+# ----------------------------------------------------------------------
+# Reads (called by the supabase_client helpers when routed here)
+# ----------------------------------------------------------------------
+
+# Whether every table is fresh, re-checked at most once a second
+_readiness = {'checked': 0.0, 'ready': False}
+
+
+def is_ready() -> bool:
+    """Whether every table was synced less than SUPABASE_REPLICA_MAX_STALENESS seconds ago."""
+    now = time.monotonic()
+    if now - _readiness['checked'] < 1.0:
+        return _readiness['ready']
+    cutoff = timezone.now() - timedelta(seconds=settings.SUPABASE_REPLICA_MAX_STALENESS)
+    try:
+        ready = ReplicaState.objects.filter(table__in=TABLES, synced_at__gte=cutoff).count() == len(TABLES)
+    except DatabaseError as e:
+        # e.g. migrations not applied yet
+        logger.error(f"Cannot read the read replica state: {e}")
+        ready = False
+    if not ready and _readiness['ready']:
+        logger.warning("Read replica is stale; reading from Supabase")
+    _readiness.update(checked=now, ready=ready)
+    return ready
+
+
+def _row(values: Dict[str, Any]) -> Dict[str, Any]:
+    """A replica row as Supabase returns it (dates as YYYY-MM-DD strings)."""
+    for column in ('start_date', 'end_date'):
+        if isinstance(values.get(column), date):
+            values[column] = values[column].isoformat()
+    return values
+
+
+def fetch_packages(projection: str = Projection.CATALOG_ENTRY) -> List[Package]:
+    """Replica version of supabase_client.fetch_packages() (every column is local)."""
+    return [Package.from_row(row) for row in ReplicaPackage.objects.order_by('daily_rate').values(*PACKAGE_COLUMNS)]
+
+
+def fetch_dj_rate() -> Optional[float]:
+    """Replica version of supabase_client.fetch_dj_rate()."""
+    rate = ReplicaSetting.objects.filter(id=1).values_list('dj_daily_rate', flat=True).first()
+    if rate is None:
+        logger.warning("No DJ rate in the read replica")
+        return None
+    return float(rate)
+
+
+def list_bookings(status_filter: Optional[str], cursor: Optional[str], page_size: int) -> BookingPage:
+    """Replica version of supabase_client.list_bookings(), same ordering and cursors."""
+    rows = ReplicaBooking.objects.all()
+    if status_filter and status_filter != 'all':
+        rows = rows.filter(status=status_filter)
+    position = decode_cursor(cursor)
+    if position is None:
+        rows = rows.order_by('-start_date', '-id')
+    elif position[0] == 'next':
+        _, start_date, booking_id = position
+        rows = rows.filter(
+            Q(start_date__lt=start_date) | Q(start_date=start_date, id__lt=booking_id)
+        ).order_by('-start_date', '-id')
+    else:
+        _, start_date, booking_id = position
+        rows = rows.filter(
+            Q(start_date__gt=start_date) | Q(start_date=start_date, id__gt=booking_id)
+        ).order_by('start_date', 'id')
+    data = [_row(values) for values in rows.values(*BOOKING_COLUMNS)[:page_size + 1]]
+    return build_booking_page(data, cursor, page_size)
+
+
+def search_bookings(query: str, status_filter: Optional[str], page: int, page_size: int) -> SearchPage:
+    """
+    Replica version of supabase_client.search_bookings(): every word of the
+    query is part of the name, email or phone; newest event first.
+    """
+    words = query_words(query)
+    if not words:
+        return SearchPage(page=page)
+    rows = ReplicaBooking.objects.all()
+    if status_filter and status_filter != 'all':
+        rows = rows.filter(status=status_filter)
+    for word in words:
+        rows = rows.filter(
+            Q(customer_name__icontains=word) | Q(email__icontains=word) | Q(phone__icontains=word)
+        )
+    offset = (page - 1) * page_size
+    data = list(rows.order_by('-start_date', '-id').values(*BOOKING_COLUMNS)[offset:offset + page_size + 1])
+    return SearchPage(
+        bookings=[Booking.from_row(_row(values)) for values in data[:page_size]],
+        page=page,
+        has_next=len(data) > page_size,
+    )
+
+
+def get_booking_by_id(booking_id: int) -> Optional[Booking]:
+    """Replica version of supabase_client.get_booking_by_id()."""
+    values = ReplicaBooking.objects.filter(id=booking_id).values(*BOOKING_COLUMNS).first()
+    return Booking.from_row(_row(values)) if values else None
+
+
+def list_active_bookings(since: date) -> List[Dict[str, Any]]:
+    """Replica version of supabase_client.list_active_bookings()."""
+    rows = (
+        ReplicaBooking.objects.exclude(status='cancelled')
+        .filter(end_date__gte=since)
+        .order_by('id')
+        .values(*AVAILABILITY_COLUMNS)
+    )
+    return [_row(values) for values in rows]
+
+
+def iter_booking_chunks(
+    status_filter: Optional[str],
+    start_from: Optional[date],
+    start_to: Optional[date],
+    chunk_size: int,
+) -> Iterator[List[Dict[str, Any]]]:
+    """Replica version of supabase_client.iter_booking_chunks(), keyed on id."""
+    rows = ReplicaBooking.objects.all()
+    if status_filter and status_filter != 'all':
+        rows = rows.filter(status=status_filter)
+    if start_from:
+        rows = rows.filter(start_date__gte=start_from)
+    if start_to:
+        rows = rows.filter(start_date__lte=start_to)
+    after_id = 0
+    while True:
+        chunk = [_row(values) for values in rows.filter(id__gt=after_id).order_by('id').values(*BOOKING_COLUMNS)[:chunk_size]]
+        if chunk:
+            yield chunk
+        if len(chunk) < chunk_size:
+            return
+        after_id = chunk[-1]['id']
+
+
+def get_booking_summary() -> BookingSummary:
+    """Replica version of supabase_client.get_booking_summary()."""
+    totals = ReplicaBooking.objects.aggregate(
+        total=Count('id'),
+        pending=Count('id', filter=Q(status='pending')),
+        confirmed=Count('id', filter=Q(status='confirmed')),
+        cancelled=Count('id', filter=Q(status='cancelled')),
+        confirmed_revenue=Sum('total_price', filter=Q(status='confirmed')),
+    )
+    return BookingSummary(
+        total=totals['total'],
+        pending=totals['pending'],
+        confirmed=totals['confirmed'],
+        cancelled=totals['cancelled'],
+        confirmed_revenue=float(totals['confirmed_revenue'] or 0),
+    )
+
+
+def get_bookings_change_token() -> Optional[str]:
+    """
+    Replica version of supabase_client.get_bookings_change_token(): the
+    token the replica was last synced to, moved on by record_status().
+    """
+    return ReplicaState.objects.filter(table='bookings').values_list('token', flat=True).first() or None
+
+
+def record_status(booking_ids: Iterable[int], new_status: str) -> None:
+    """
+    Apply status changes just written to Supabase.
+
+    The rows get the current time as updated_at, as the trigger in
+    Supabase does, and the change token a local suffix so it changes
+    (pages revalidate); the next sync overwrites both with
+    Supabase's values.
+    """
+    booking_ids = list(booking_ids)
+    if not booking_ids:
+        return
+    now = _now_iso()
+    try:
+        with transaction.atomic():
+            updated = ReplicaBooking.objects.filter(id__in=booking_ids).update(status=new_status, updated_at=now)
+            state = ReplicaState.objects.select_for_update().filter(table='bookings').first()
+            if updated and state is not None and state.token:
+                version, deletes = parse_change_token(state.token)
+                state.token = f"{version.partition('+')[0]}+{now}/{deletes}"
+                state.save(update_fields=['token'])
+    except DatabaseError as e:
+        logger.error(f"Error applying booking status changes to the read replica: {e}")
@@ -0,0 +1,233 @@
+"""
+Timeouts, retries and a circuit breaker for Supabase calls.
+
+Every query sent by bookings/supabase_client.py goes through its
+_execute() / _aexecute(), which apply the policies defined here:
+
+- Per-operation timeouts: each helper has its own read timeout
+  (SUPABASE_OPERATION_TIMEOUTS, default SUPABASE_READ_TIMEOUT), applied to
+  the HTTP request by an httpx request hook, so a brownout cannot hold a
+  worker for longer than the operation is worth.
+- Retries for idempotent reads only: GET/HEAD requests that fail with a
+  transient error (connection error, timeout, 429 or 5xx) are retried up to
+  SUPABASE_READ_RETRIES times after a random ("full jitter") exponential
+  backoff. Writes are never retried here; the booking outbox retries its
+  inserts itself, with idempotency keys. postgrest-py's own retry loop
+  (GET/HEAD on 503/520, sleeping 1s, 2s, 4s...) is switched off.
+- Circuit breaker: after SUPABASE_BREAKER_THRESHOLD consecutive transient
+  failures the breaker opens and calls fail immediately with
+  CircuitOpenError for SUPABASE_BREAKER_COOLDOWN seconds, instead of each
+  waiting for its timeout. Then one trial call is let through (half-open):
+  success closes the breaker, failure opens it again. While it is open the
+  helpers return their usual fallbacks and the catalog cache serves the
+  last catalog it loaded successfully.
+
+The breaker is per worker process. Its state is shown at the bottom of
+the admin dashboard and exported as the soundhire_supabase_circuit_state
+metric.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+import random
+import threading
+import time
+
+import httpx
+from django.conf import settings
+from postgrest.exceptions import APIError
+import logging
+
+from .metrics import set_circuit_state
+
+logger = logging.getLogger(__name__)
+
+# HTTP methods that are safe to send twice
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD'})
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling Supabase while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker (closed -> open -> half-open).
+
+    Thread-safe; the async helpers use it from the event loop too, which
+    is fine because the lock is only held for a few attribute updates.
+    Threshold and cooldown are read from settings on each use, so they
+    can be changed at runtime (e.g. in tests or benchmarks).
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._probing = False
+        self._probe_started = 0.0
+        set_circuit_state(self.state)
+
+    def before_call(self) -> None:
+        """
+        Let a call through, or raise CircuitOpenError.
+
+        Once the cooldown has passed, exactly one call is let through as a
+        trial; others keep failing fast until it has finished (or, if it
+        never reports back, e.g. a cancelled task, for another cooldown).
+
+        Raises:
+            CircuitOpenError: If the breaker is open
+        """
+        if self.state == self.CLOSED:
+            return
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < settings.SUPABASE_BREAKER_COOLDOWN:
+                    raise CircuitOpenError("Supabase circuit breaker is open")
+                self._set_state(self.HALF_OPEN)
+            now = time.monotonic()
+            if self._probing and now - self._probe_started < settings.SUPABASE_BREAKER_COOLDOWN:
+                raise CircuitOpenError("Supabase circuit breaker is half-open, trial call in flight")
+            self._probing = True
+            self._probe_started = now
+
+    def record_success(self) -> None:
+        """Supabase answered (even with a client error): close the breaker."""
+        if self.state == self.CLOSED and not self.failures:
+            return
+        with self._lock:
+            self.failures = 0
+            self._probing = False
+            if self.state != self.CLOSED:
+                self._set_state(self.CLOSED)
+                logger.info("Supabase circuit breaker closed")
+
+    def record_failure(self) -> None:
+        """Count a transient failure; open the breaker at the threshold."""
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == self.HALF_OPEN or (
+                self.state == self.CLOSED and self.failures >= settings.SUPABASE_BREAKER_THRESHOLD
+            ):
+                self.opened_at = time.monotonic()
+                self.times_opened += 1
+                self._set_state(self.OPEN)
+                logger.error(
+                    f"Supabase circuit breaker opened after {self.failures} failures; "
+                    f"failing fast for {settings.SUPABASE_BREAKER_COOLDOWN}s"
+                )
+
+    def reset(self) -> None:
+        """Close the breaker and forget all failures."""
+        with self._lock:
+            self.failures = 0
+            self._probing = False
+            self._set_state(self.CLOSED)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Report the breaker's state for diagnostics.
+
+        Returns:
+            Dict: state, consecutive failures, times opened, and seconds
+            until the next trial call (0 unless open)
+        """
+        retry_in = 0.0
+        if self.state == self.OPEN:
+            retry_in = max(0.0, settings.SUPABASE_BREAKER_COOLDOWN - (time.monotonic() - self.opened_at))
+        return {
+            'state': self.state,
+            'failures': self.failures,
+            'times_opened': self.times_opened,
+            'retry_in': round(retry_in, 1),
+        }
+
+    def _set_state(self, state: str) -> None:
+        # Called with the lock held
+        self.state = state
+        set_circuit_state(state)
+
+
+# The breaker shared by every Supabase call in this process
+breaker = CircuitBreaker()
+
+
+def is_transient(error: BaseException, status: Optional[int]) -> bool:
+    """
+    Whether a failed call means Supabase is unhealthy (retry, count against
+    the breaker) rather than that the request itself was wrong.
+
+    Args:
+        error: Exception raised by execute()
+        status: HTTP status of the last response, None if there was none
+    """
+    if isinstance(error, httpx.TransportError):
+        return True
+    if isinstance(error, APIError):
+        return status is None or status == 429 or status >= 500
+    return False
+
+
+def attempts_for(method: str) -> int:
+    """Number of attempts for a request: retries only for idempotent methods."""
+    if method in IDEMPOTENT_METHODS:
+        return 1 + settings.SUPABASE_READ_RETRIES
+    return 1
+
+
+def backoff_delay(attempt: int) -> float:
+    """Seconds to wait before retry number `attempt` + 1 (full jitter)."""
+    ceiling = min(settings.SUPABASE_RETRY_MAX_DELAY, settings.SUPABASE_RETRY_BASE_DELAY * 2 ** attempt)
+    return random.uniform(0, ceiling)
+
+
+# ----------------------------------------------------------------------
+# Per-operation timeouts
+# ----------------------------------------------------------------------
+
+# Read timeout of the operation waiting on Supabase, if any
+_timeout: ContextVar[Optional[float]] = ContextVar('supabase_timeout', default=None)
+
+
+def operation_timeout(helper: str) -> float:
+    """Read timeout in seconds for a supabase_client helper."""
+    return settings.SUPABASE_OPERATION_TIMEOUTS.get(helper, settings.SUPABASE_READ_TIMEOUT)
+
+
+@contextmanager
+def timeout_for(helper: str) -> Iterator[float]:
+    """Apply `helper`'s timeout to the HTTP requests sent inside the block."""
+    seconds = operation_timeout(helper)
+    token = _timeout.set(seconds)
+    try:
+        yield seconds
+    finally:
+        _timeout.reset(token)
+
+
+def _apply_timeout(request: httpx.Request) -> None:
+    seconds = _timeout.get()
+    if seconds is not None:
+        request.extensions['timeout'] = httpx.Timeout(
+            seconds, connect=min(seconds, settings.SUPABASE_CONNECT_TIMEOUT)
+        ).as_dict()
+
+
+def on_request(request: httpx.Request) -> None:
+    """httpx request hook (sync client): set the current operation's timeout."""
+    _apply_timeout(request)
+
+
+async def aon_request(request: httpx.Request) -> None:
+    """httpx request hook (async client): set the current operation's timeout."""
+    _apply_timeout(request)
@@ -0,0 +1,25 @@
+"""
+Helpers shared by the copies of the bookings table each worker keeps.
+
+The bookings mirror (bookings/mirror.py), the read replica
+(bookings/replica.py), the analytics rollups (bookings/analytics.py) and
+the occupancy calendar (bookings/occupancy.py) all work on lists of rows
+as returned by PostgREST; the helpers they have in common live here.
+"""
+
+from datetime import datetime
+from operator import itemgetter
+from typing import Any, Dict, List
+
+
+def column(rows: List[Dict[str, Any]], name: str) -> List[Any]:
+    """One column of a list of rows (map + itemgetter: no Python loop)."""
+    return list(map(itemgetter(name), rows))
+
+
+def is_later(first: str, second: str) -> bool:
+    """Whether timestamp `first` is later than `second`."""
+    try:
+        return datetime.fromisoformat(first) > datetime.fromisoformat(second)
+    except ValueError:
+        return first > second
@@ -0,0 +1,348 @@
+"""
+Typo-tolerant search over bookings by customer name, email and phone.
+
+The admin dashboard's search box is served from an inverted index kept by
+each worker's bookings mirror (bookings/mirror.py) and updated with it,
+row by row, so a query over 100k+ bookings takes a few milliseconds.
+
+Each booking is indexed under its terms: the words of the customer name
+(lowercased, accents removed), the words of the email address and the
+digits of the phone number. Every distinct term is
+indexed once more by its trigrams (as pg_trgm pads them: "  j", " jo",
+"joh", "ohn", "hn "), and the terms are kept sorted for prefix lookups.
+
+Every word of a query must match one of a booking's terms, scored as:
+- the whole term:                       1.0
+- the start of a term ("jo" -> "john"): 0.8
+- inside a term ("0001" in the phone):  0.6
+- names only, a term within one typo (two for words of 8 letters or
+  more) of the word ("jonh" -> "john"): 0.5, less for each typo. The
+  trigrams narrow the candidates before edit distances are computed.
+A booking's score is the sum over the query's words of its best match.
+Results are ordered by score, then newest event first. The bookings
+matching the most selective word are found through the index; only those
+are checked against the other words.
+
+When the mirror is not available, supabase_client.search_bookings() runs
+the search in Postgres instead (the search_bookings() function, on pg_trgm
+indexes; see supabase/migrations/).
+"""
+
+from bisect import bisect_left, insort
+from collections import Counter
+from itertools import chain
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import re
+import unicodedata
+
+# Match scores (see module docstring)
+EXACT = 1.0
+PREFIX = 0.8
+INFIX = 0.6
+TYPO = 0.5
+
+# Query words beyond this are ignored
+MAX_QUERY_WORDS = 6
+
+_WORD = re.compile(r'[a-z0-9]+')
+_NOT_DIGIT = re.compile(r'\D')
+
+
+def normalize(text: str) -> str:
+    """Lowercase text and strip accents ("Zoë" -> "zoe")."""
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch)).lower()
+
+
+def query_words(query: str) -> List[str]:
+    """The distinct words of a search query, in order."""
+    return list(dict.fromkeys(_WORD.findall(normalize(query))))[:MAX_QUERY_WORDS]
+
+
+def booking_terms(row: Dict[str, Any]) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """
+    Terms a booking is found by.
+
+    Returns:
+        Tuple: (name words, other terms: email words and phone digits)
+    """
+    names = tuple(dict.fromkeys(_WORD.findall(normalize(row.get('customer_name') or ''))))
+    others = dict.fromkeys(_WORD.findall(normalize(row.get('email') or '')))
+    digits = _NOT_DIGIT.sub('', row.get('phone') or '')
+    if digits:
+        others[digits] = None
+    return names, tuple(term for term in others if term not in names)
+
+
+def trigrams(term: str) -> Set[str]:
+    """Trigrams of a term, padded like pg_trgm (two spaces before, one after)."""
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def max_typos(word: str) -> int:
+    """Typos tolerated in a query word: none below 4 letters, 2 from 8."""
+    if len(word) < 4 or not word.isalpha():
+        return 0
+    return 1 if len(word) < 8 else 2
+
+
+def edit_distance(first: str, second: str, limit: int) -> int:
+    """
+    Optimal string alignment distance (insertions, deletions,
+    substitutions and swaps of neighbouring letters each count once).
+
+    Returns:
+        int: The distance, or limit + 1 as soon as it is known to exceed limit
+    """
+    if abs(len(first) - len(second)) > limit:
+        return limit + 1
+    before = None
+    previous = list(range(len(second) + 1))
+    for i in range(1, len(first) + 1):
+        current = [i] + [0] * len(second)
+        for j in range(1, len(second) + 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (first[i - 1] != second[j - 1]),
+            )
+            if i > 1 and j > 1 and first[i - 1] == second[j - 2] and first[i - 2] == second[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+
+class SearchIndex:
+    """
+    Inverted index from terms to booking ids, with a trigram index and a
+    sorted list over the distinct terms.
+
+    Not thread-safe on its own: BookingsMirror calls it with its lock held.
+    """
+
+    def __init__(self, rows: Iterable[Dict[str, Any]] = ()):
+        # term -> ids of the bookings it belongs to
+        self._postings: Dict[str, Set[int]] = {}
+        # name term -> number of bookings using it as a name (typo matching)
+        self._names: Counter = Counter()
+        # trigram -> terms containing it
+        self._trigrams: Dict[str, Set[str]] = {}
+        # booking id -> its terms, as booking_terms() returned them
+        self._docs: Dict[int, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {}
+        # Distinct terms, sorted for prefix lookups
+        self._terms: List[str] = []
+
+        # Bulk load: postings first, then each distinct term's trigrams once
+        for row in rows:
+            terms = self._docs[row['id']] = booking_terms(row)
+            names, others = terms
+            for term in chain(names, others):
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = set()
+                postings.add(row['id'])
+            self._names.update(names)
+        for term in self._postings:
+            for gram in trigrams(term):
+                self._trigrams.setdefault(gram, set()).add(term)
+        self._terms = sorted(self._postings)
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    @property
+    def term_count(self) -> int:
+        """Number of distinct terms indexed."""
+        return len(self._postings)
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def add(self, row: Dict[str, Any]) -> None:
+        """Index a booking, replacing its previous terms if they changed."""
+        booking_id = row['id']
+        terms = booking_terms(row)
+        if self._docs.get(booking_id) == terms:
+            return
+        self.remove(booking_id)
+        self._docs[booking_id] = terms
+        names, others = terms
+        for term in chain(names, others):
+            self._add_term(term, booking_id)
+        self._names.update(names)
+
+    def remove(self, booking_id: int) -> None:
+        """Drop a booking from the index, if present."""
+        terms = self._docs.pop(booking_id, None)
+        if terms is None:
+            return
+        names, others = terms
+        for term in names:
+            self._names[term] -= 1
+            if self._names[term] <= 0:
+                del self._names[term]
+        for term in chain(names, others):
+            self._remove_term(term, booking_id)
+
+    def _add_term(self, term: str, booking_id: int) -> None:
+        postings = self._postings.get(term)
+        if postings is None:
+            postings = self._postings[term] = set()
+            for gram in trigrams(term):
+                self._trigrams.setdefault(gram, set()).add(term)
+            insort(self._terms, term)
+        postings.add(booking_id)
+
+    def _remove_term(self, term: str, booking_id: int) -> None:
+        postings = self._postings.get(term)
+        if postings is None:
+            return
+        postings.discard(booking_id)
+        if postings:
+            return
+        del self._postings[term]
+        for gram in trigrams(term):
+            terms = self._trigrams.get(gram)
+            if terms is not None:
+                terms.discard(term)
+                if not terms:
+                    del self._trigrams[gram]
+        i = bisect_left(self._terms, term)
+        if i < len(self._terms) and self._terms[i] == term:
+            del self._terms[i]
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def match_terms(self, word: str) -> Dict[str, float]:
+        """
+        Indexed terms matching one query word, with their scores.
+
+        Args:
+            word: A word from query_words()
+
+        Returns:
+            Dict: term -> score (see module docstring)
+        """
+        found: Dict[str, float] = {}
+
+        # Whole terms and prefixes: a range of the sorted terms
+        i = bisect_left(self._terms, word)
+        while i < len(self._terms) and self._terms[i].startswith(word):
+            term = self._terms[i]
+            found[term] = EXACT if term == word else PREFIX
+            i += 1
+        if len(word) < 3:
+            return found
+
+        # Inside a term: terms holding every trigram of the word, checked
+        grams = trigrams(word)
+        inner = sorted(
+            (gram for gram in grams if ' ' not in gram),
+            key=lambda gram: len(self._trigrams.get(gram, ())),
+        )
+        candidates: Optional[Set[str]] = None
+        for gram in inner:
+            terms = self._trigrams.get(gram)
+            if not terms:
+                candidates = set()
+                break
+            candidates = set(terms) if candidates is None else candidates & terms
+            if not candidates:
+                break
+        for term in candidates or ():
+            if term not in found and word in term:
+                found[term] = INFIX
+
+        # Typos in names. A typo changes at most 4 of a term's trigrams (a
+        # swap of neighbouring letters), so terms within `limit` typos share
+        # at least len(grams) - 4 * limit of them with the word.
+        limit = max_typos(word)
+        if limit:
+            shared = Counter()
+            for gram in grams:
+                shared.update(self._trigrams.get(gram, ()))
+            needed = max(1, len(grams) - 4 * limit)
+            for term, count in shared.items():
+                if count < needed or term in found or term not in self._names:
+                    continue
+                distance = edit_distance(word, term, limit)
+                if distance <= limit:
+                    found[term] = TYPO * (1 - distance / (limit + 1))
+        return found
+
+    def score(self, word: str, term: str, limit: int) -> float:
+        """
+        Score of one term for one query word, as match_terms() gives it.
+
+        Args:
+            word: A word from query_words()
+            term: An indexed term
+            limit: max_typos(word)
+        """
+        if term == word:
+            return EXACT
+        if term.startswith(word):
+            return PREFIX
+        if len(word) >= 3 and word in term:
+            return INFIX
+        if limit and term in self._names:
+            distance = edit_distance(word, term, limit)
+            if distance <= limit:
+                return TYPO * (1 - distance / (limit + 1))
+        return 0.0
+
+    def _selectivity(self, word: str) -> int:
+        """Rough number of terms a word matches: fewer is more selective."""
+        inner = [gram for gram in trigrams(word) if ' ' not in gram]
+        if not inner:
+            return len(self._postings)
+        return min(len(self._trigrams.get(gram, ())) for gram in inner)
+
+    def search(self, query: str) -> Dict[int, float]:
+        """
+        Find the bookings matching every word of a query.
+
+        Args:
+            query: Search box text
+
+        Returns:
+            Dict: booking id -> score, for every matching booking
+        """
+        words = query_words(query)
+        if not words:
+            return {}
+        words.sort(key=self._selectivity)
+
+        scores: Dict[int, float] = {}
+        for term, score in self.match_terms(words[0]).items():
+            for booking_id in self._postings[term]:
+                if scores.get(booking_id, 0) < score:
+                    scores[booking_id] = score
+        for word in words[1:]:
+            if not scores:
+                break
+            # Bookings share most of their terms (names, email domains),
+            # so each term is scored once per word
+            term_scores: Dict[str, float] = {}
+            limit = max_typos(word)
+            narrowed = {}
+            for booking_id, total in scores.items():
+                best = 0.0
+                for term in chain(*self._docs[booking_id]):
+                    score = term_scores.get(term)
+                    if score is None:
+                        score = term_scores[term] = self.score(word, term, limit)
+                    if score > best:
+                        best = score
+                if best:
+                    narrowed[booking_id] = total + best
+            scores = narrowed
+        return scores
@@ -0,0 +1,298 @@
+"""
+Hashed, precompressed static files, served by the app itself.
+
+`python manage.py collectstatic` builds STATIC_ROOT with
+CompressedManifestStaticFilesStorage (the STORAGES["staticfiles"] backend):
+
+- every file is copied under a content-hashed name as well
+  (styles.css -> styles.1a2b3c4d5e6f.css), and {% static %} links to the
+  hashed name through staticfiles.json, as ManifestStaticFilesStorage does
+- text files (CSS, JS, SVG, JSON, ...) also get a gzip variant
+  (styles.1a2b3c4d5e6f.css.gz) and, when the optional Brotli package is
+  installed, a brotli one (.br); a variant is kept only if it is smaller
+
+StaticAssetsMiddleware serves STATIC_ROOT from memory, without a web
+server or CDN in front:
+
+- the smallest variant the browser accepts (Accept-Encoding: br, gzip)
+  is sent, with Vary: Accept-Encoding
+- hashed names never change content, so they are sent with
+  Cache-Control: public, max-age=STATIC_IMMUTABLE_MAX_AGE, immutable and
+  browsers do not ask again until the next deploy changes the name
+- other names (e.g. linked without {% static %}) get STATIC_MAX_AGE
+  seconds and revalidate by ETag; each variant has its own strong ETag
+  (the content's MD5, plus "-gz" or "-br" for a compressed variant), since
+  the bytes differ, and If-None-Match may list several
+
+The files are read once, when the first worker request arrives, so run
+collectstatic before starting (or restarting) the server. When STATIC_ROOT
+has not been built (development), requests fall through to Django, and
+runserver serves the source files as usual.
+"""
+
+from dataclasses import dataclass, field
+from email.utils import formatdate
+from typing import Dict, Iterator, Optional, Tuple
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import threading
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.http import HttpRequest, HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Extensions worth compressing (images and fonts are compressed already)
+COMPRESSIBLE = {'.css', '.js', '.mjs', '.map', '.svg', '.json', '.txt', '.html', '.xml', '.ico'}
+
+# Files smaller than this are not worth a compressed variant
+MIN_COMPRESS_SIZE = 256
+
+# Content-Encoding -> file suffix, in order of preference
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def compress_file(path: str) -> Dict[str, str]:
+    """
+    Write the gzip (and, with Brotli installed, brotli) variants of a file.
+
+    Variants that would not be smaller than the file are not written.
+    gzip output has no timestamp, so repeated builds give the same bytes.
+
+    Args:
+        path: Absolute path of the file
+
+    Returns:
+        Dict: Content-Encoding -> path of each variant written
+    """
+    with open(path, 'rb') as source:
+        data = source.read()
+    variants: Dict[str, str] = {}
+    if len(data) < MIN_COMPRESS_SIZE:
+        return variants
+    candidates = {'gzip': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        candidates['br'] = brotli.compress(data, quality=11)
+    for encoding, suffix in ENCODINGS:
+        compressed = candidates.get(encoding)
+        if compressed is not None and len(compressed) < len(data):
+            with open(path + suffix, 'wb') as target:
+                target.write(compressed)
+            variants[encoding] = path + suffix
+    return variants
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    ManifestStaticFilesStorage that also writes compressed variants of
+    each text file at collectstatic time.
+
+    Until collectstatic has written the manifest, {% static %} links to the
+    plain name instead of failing, so development and tests need no build.
+    With DEBUG on, Django links to plain names regardless (runserver then
+    serves the source files).
+    """
+
+    def post_process(self, paths, dry_run=False, **options) -> Iterator[Tuple[str, str, bool]]:
+        compressed = 0
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            yield name, hashed_name, processed
+            if dry_run or isinstance(processed, Exception):
+                continue
+            for output in (name, hashed_name):
+                if output and os.path.splitext(output)[1].lower() in COMPRESSIBLE:
+                    compressed += bool(compress_file(self.path(output)))
+        if compressed:
+            logger.info(f"Compressed {compressed} static files ({'gzip, brotli' if brotli else 'gzip'})")
+
+    def __init__(self, *args, **kwargs):
+        self._manifest_exists: Optional[bool] = None
+        super().__init__(*args, **kwargs)
+
+    def save_manifest(self) -> None:
+        super().save_manifest()
+        self._manifest_exists = True
+
+    def stored_name(self, name: str) -> str:
+        if not self.manifest_exists():
+            return name
+        return super().stored_name(name)
+
+    def manifest_exists(self) -> bool:
+        """Whether collectstatic has written the manifest (looked up once, not per {% static %})."""
+        if self._manifest_exists is None:
+            self._manifest_exists = bool(self.location) and self.exists(self.manifest_name)
+        return self._manifest_exists
+
+
+@dataclass
+class StaticAsset:
+    """
+    One file under STATIC_ROOT, held in memory with its variants.
+
+    Attributes:
+        content_type: Content-Type header value
+        etag: Quoted strong ETag of the uncompressed content (see etag_for())
+        last_modified: Last-Modified header value
+        cache_control: Cache-Control header value
+        bodies: Content-Encoding ("" for none) -> bytes
+    """
+    content_type: str
+    etag: str
+    last_modified: str
+    cache_control: str
+    bodies: Dict[str, bytes] = field(default_factory=dict)
+
+    def etag_for(self, encoding: str) -> str:
+        """Strong ETag of one variant: etag, with "-gz" or "-br" for compressed bytes."""
+        if not encoding:
+            return self.etag
+        return f'{self.etag[:-1]}-{dict(ENCODINGS)[encoding][1:]}"'
+
+    def body_for(self, accept_encoding: str) -> Tuple[str, bytes]:
+        """The smallest variant the client accepts: (Content-Encoding, bytes)."""
+        accepted = _accepted_encodings(accept_encoding)
+        for encoding, _ in ENCODINGS:
+            if encoding in accepted and encoding in self.bodies:
+                return encoding, self.bodies[encoding]
+        return '', self.bodies['']
+
+
+def _accepted_encodings(header: str) -> set:
+    """Encodings in an Accept-Encoding header, minus those with q=0."""
+    accepted = set()
+    for part in header.split(','):
+        encoding, _, params = part.strip().partition(';')
+        params = params.replace(' ', '')
+        if encoding and params not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            accepted.add(encoding.lower())
+    return accepted
+
+
+def load_assets(root: str) -> Dict[str, StaticAsset]:
+    """
+    Read a collectstatic output directory into memory.
+
+    Args:
+        root: STATIC_ROOT
+
+    Returns:
+        Dict: Path relative to root (forward slashes) -> StaticAsset
+    """
+    hashed = set()
+    manifest_path = os.path.join(root, CompressedManifestStaticFilesStorage.manifest_name)
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as manifest:
+            hashed = set(json.load(manifest).get('paths', {}).values())
+
+    immutable = f"public, max-age={settings.STATIC_IMMUTABLE_MAX_AGE}, immutable"
+    short = f"public, max-age={settings.STATIC_MAX_AGE}"
+    suffixes = tuple(suffix for _, suffix in ENCODINGS)
+    assets: Dict[str, StaticAsset] = {}
+    for directory, _, files in os.walk(root):
+        for filename in files:
+            if filename.endswith(suffixes):
+                continue
+            path = os.path.join(directory, filename)
+            name = os.path.relpath(path, root).replace(os.sep, '/')
+            if name == CompressedManifestStaticFilesStorage.manifest_name:
+                # Lists every file; nothing links to it
+                continue
+            with open(path, 'rb') as source:
+                data = source.read()
+            content_type, _ = mimetypes.guess_type(filename)
+            if content_type and (content_type.startswith('text/') or content_type in ('application/javascript', 'application/json')):
+                content_type += '; charset=utf-8'
+            asset = StaticAsset(
+                content_type=content_type or 'application/octet-stream',
+                etag=f'"{hashlib.md5(data).hexdigest()}"',
+                last_modified=formatdate(os.path.getmtime(path), usegmt=True),
+                cache_control=immutable if name in hashed else short,
+                bodies={'': data},
+            )
+            for encoding, suffix in ENCODINGS:
+                if os.path.exists(path + suffix):
+                    with open(path + suffix, 'rb') as variant:
+                        asset.bodies[encoding] = variant.read()
+            assets[name] = asset
+    return assets
+
+
+class StaticAssetsMiddleware:
+    """
+    Serve collectstatic's output (STATIC_ROOT) under STATIC_URL, with
+    compressed variants and long cache lifetimes for hashed names.
+
+    Place it first in MIDDLEWARE: static requests need no session, CSRF
+    check or tracing. Disabled by STATIC_SERVE=0 (e.g. behind a CDN or a
+    web server that serves STATIC_ROOT itself).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        self.prefix = '/' + settings.STATIC_URL.strip('/') + '/'
+        self.enabled = settings.STATIC_SERVE and bool(settings.STATIC_ROOT)
+        self._assets: Optional[Dict[str, StaticAsset]] = None
+        self._lock = threading.Lock()
+
+    def _asset(self, request: HttpRequest) -> Optional[StaticAsset]:
+        """The asset a request asks for, if this middleware serves it."""
+        if not self.enabled or request.method not in ('GET', 'HEAD') or not request.path.startswith(self.prefix):
+            return None
+        if self._assets is None:
+            with self._lock:
+                if self._assets is None:
+                    root = str(settings.STATIC_ROOT)
+                    self._assets = load_assets(root) if os.path.isdir(root) else {}
+                    logger.info(f"Serving {len(self._assets)} static files from {root}")
+        return self._assets.get(request.path[len(self.prefix):])
+
+    def _respond(self, request: HttpRequest, asset: StaticAsset) -> HttpResponse:
+        encoding, body = asset.body_for(request.headers.get('Accept-Encoding', ''))
+        etag = asset.etag_for(encoding)
+        # If-None-Match uses the weak comparison: W/"x" matches "x"
+        if_none_match = {tag.removeprefix('W/') for tag in parse_etags(request.headers.get('If-None-Match', ''))}
+        if '*' in if_none_match or etag in if_none_match:
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(b'' if request.method == 'HEAD' else body, content_type=asset.content_type)
+            response['Content-Length'] = str(len(body))
+            if encoding:
+                response['Content-Encoding'] = encoding
+        response['ETag'] = etag
+        response['Last-Modified'] = asset.last_modified
+        response['Cache-Control'] = asset.cache_control
+        if len(asset.bodies) > 1:
+            patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        asset = self._asset(request)
+        if asset is not None:
+            return self._respond(request, asset)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        asset = self._asset(request)
+        if asset is not None:
+            return self._respond(request, asset)
+        return await self.get_response(request)
@@ -0,0 +1,91 @@
+"""
+Booking summary cache for the admin dashboard.
+
+The summary cards (total, pending, confirmed, revenue) come from one
+aggregate query in Supabase (supabase_client.get_booking_summary). The
+result is kept in Django's cache for BOOKING_SUMMARY_CACHE_TTL seconds,
+so refreshing or paging through the dashboard does not re-run it.
+
+Booking writes made through this app (new bookings, confirm, cancel)
+call invalidate_summary(), so the figures update straight away for the
+admin who made the change. Changes made elsewhere show up within the TTL,
+or at once when the caller passes the bookings change token as `version`
+(the dashboard does, since it fetches the token for its ETag anyway).
+"""
+
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+import logging
+
+from .metrics import count_cache
+from .supabase_client import (
+    BookingSummary,
+    get_booking_summary,
+    aget_booking_summary,
+)
+
+logger = logging.getLogger(__name__)
+
+# Cache key holding the latest BookingSummary
+SUMMARY_CACHE_KEY = 'bookings:summary'
+
+
+def _summary_key(version: Optional[str]) -> str:
+    """Cache key for the summary, optionally tied to a bookings change token."""
+    return f"{SUMMARY_CACHE_KEY}:{version}" if version else SUMMARY_CACHE_KEY
+
+
+def get_summary(version: Optional[str] = None) -> BookingSummary:
+    """
+    Return the booking summary, querying Supabase if the cached one expired.
+
+    A failed query returns an all-zero summary, which is not cached so the
+    next request tries again.
+
+    Args:
+        version: Bookings change token (supabase_client.get_bookings_change_token);
+            a new token means a fresh summary
+
+    Returns:
+        BookingSummary: Counts by status and confirmed revenue
+    """
+    key = _summary_key(version)
+    summary: Optional[BookingSummary] = cache.get(key)
+    count_cache('summary', summary is not None)
+    if summary is not None:
+        return summary
+
+    summary = get_booking_summary()
+    if summary is None:
+        return BookingSummary()
+    cache.set(key, summary, settings.BOOKING_SUMMARY_CACHE_TTL)
+    return summary
+
+
+async def aget_summary(version: Optional[str] = None) -> BookingSummary:
+    """Async version of get_summary()."""
+    key = _summary_key(version)
+    summary: Optional[BookingSummary] = await cache.aget(key)
+    count_cache('summary', summary is not None)
+    if summary is not None:
+        return summary
+
+    summary = await aget_booking_summary()
+    if summary is None:
+        return BookingSummary()
+    await cache.aset(key, summary, settings.BOOKING_SUMMARY_CACHE_TTL)
+    return summary
+
+
+def invalidate_summary() -> None:
+    """Drop the cached summary after a booking is created or changes status."""
+    cache.delete(SUMMARY_CACHE_KEY)
+    logger.info("Booking summary cache invalidated")
+
+
+async def ainvalidate_summary() -> None:
+    """Async version of invalidate_summary()."""
+    await cache.adelete(SUMMARY_CACHE_KEY)
+    logger.info("Booking summary cache invalidated")
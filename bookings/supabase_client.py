@@ -6,42 +6,1190 @@ the Supabase database tables: packages and bookings.
 
 All business data lives in Supabase (Module 1).
 Django only handles web presentation and user interaction.
+
+A single Supabase client is shared by every request in a worker process.
+It is backed by one httpx connection pool, so repeated calls reuse
+keep-alive connections instead of opening a new TCP/TLS session each time.
+Independent reads can be issued at the same time with fan_out().
+Every query is timed and recorded in the current request's trace
+(bookings/tracing.py), which feeds the Server-Timing header and the
+slow-request log, and runs with a per-operation timeout, retries for
+idempotent reads and a circuit breaker (bookings/resilience.py).
+
+Every helper has an async counterpart (afetch_packages, alist_bookings,
+...) for the async views; under ASGI those use one supabase-py async
+client per event loop.
+
+With SUPABASE_READS = "replica", listings, filters and summaries are
+read from the local SQLite read replica (bookings/replica.py) instead,
+while writes still go to Supabase; reads fall back to Supabase whenever
+the replica has not been synced recently enough.
+
+Packages and bookings are returned as Package and Booking records
+(slotted dataclasses, see "Record types" below). Bulk reads that feed
+other structures directly, namely the availability index and the
+streamed export, keep the plain row dictionaries.
 """
 
-from typing import List, Dict, Any, Optional
-from supabase import create_client, Client
-from django.conf import settings
-import logging
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from dataclasses import dataclass, field, fields
+from datetime import date, datetime, timedelta
+from typing import List, Dict, Any, AsyncIterator, Awaitable, Callable, Iterator, Optional, Tuple
+import asyncio
+import base64
+import contextvars
+import json
+import os
+from operator import itemgetter
+import threading
+import time
+import weakref
+
+import httpx
+from asgiref.sync import sync_to_async
+from postgrest.types import CountMethod, ReturnMethod
+from supabase import (
+    create_client,
+    acreate_client,
+    Client,
+    AsyncClient,
+    ClientOptions,
+    AsyncClientOptions,
+)
+from django.conf import settings
+import logging
+
+from .resilience import (
+    aon_request,
+    attempts_for,
+    backoff_delay,
+    breaker,
+    is_transient,
+    on_request,
+    timeout_for,
+)
+from .tracing import aon_response, count_rows, on_response, supabase_call
+
+logger = logging.getLogger(__name__)
+
+# Process-wide client state, guarded by _client_lock
+_client: Optional[Client] = None
+_http_client: Optional[httpx.Client] = None
+_client_pid: Optional[int] = None
+_client_lock = threading.Lock()
+
+# Set by reads_from_supabase(): reads that must see Supabase itself
+_supabase_only: contextvars.ContextVar[bool] = contextvars.ContextVar('supabase_only', default=False)
+
+# Bounded thread pool for fan_out(), created on first use
+_executor: Optional[ThreadPoolExecutor] = None
+# Marks fan-out worker threads so nested fan-outs run inline
+_fanout_local = threading.local()
+
+# One async client per event loop (async connection pools are loop-bound)
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _pool_limits(max_connections: int) -> httpx.Limits:
+    """Connection pool limits shared by the sync and async HTTP clients."""
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_connections,
+        keepalive_expiry=settings.SUPABASE_POOL_KEEPALIVE,
+    )
+
+
+def _pool_timeout() -> httpx.Timeout:
+    """Connect/read timeouts shared by the sync and async HTTP clients."""
+    # Waiting for a free pooled connection is bounded like a read
+    return httpx.Timeout(
+        settings.SUPABASE_READ_TIMEOUT,
+        connect=settings.SUPABASE_CONNECT_TIMEOUT,
+    )
+
+
+def _build_http_client() -> httpx.Client:
+    """
+    Build the pooled httpx client used by the shared Supabase client.
+    
+    Pool size and timeouts come from Django settings:
+    - SUPABASE_POOL_SIZE: Maximum open connections to Supabase
+    - SUPABASE_POOL_KEEPALIVE: Seconds an idle connection is kept open
+    - SUPABASE_CONNECT_TIMEOUT / SUPABASE_READ_TIMEOUT: Timeouts in seconds
+    
+    A request hook applies the calling operation's timeout
+    (bookings/resilience.py) and a response hook adds each response's
+    status and size to the Supabase call being traced (bookings/tracing.py).
+    
+    Returns:
+        httpx.Client: Thread-safe HTTP client with keep-alive enabled
+    """
+    return httpx.Client(
+        limits=_pool_limits(settings.SUPABASE_POOL_SIZE),
+        timeout=_pool_timeout(),
+        follow_redirects=True,
+        event_hooks={'request': [on_request], 'response': [on_response]},
+    )
+
+
+def _check_credentials() -> tuple:
+    """
+    Return (SUPABASE_URL, SUPABASE_ANON_KEY) from Django settings.
+    
+    Raises:
+        ValueError: If Supabase credentials are not configured
+    """
+    url = settings.SUPABASE_URL
+    key = settings.SUPABASE_ANON_KEY
+    
+    if not url or not key:
+        raise ValueError(
+            "Supabase credentials not configured. "
+            "Please set SUPABASE_URL and SUPABASE_ANON_KEY in .env file."
+        )
+    
+    return url, key
+
+
+def get_supabase_client() -> Client:
+    """
+    Return the shared Supabase client for this worker process.
+    
+    The client is created lazily on first use and then reused by every
+    helper in this module. Uses SUPABASE_URL and SUPABASE_ANON_KEY from
+    Django settings, which are loaded from the .env file.
+    
+    If the process has forked since the client was created (e.g. gunicorn
+    pre-loading the app), the inherited client is discarded and a fresh
+    one is built so workers never share sockets with their parent.
+    
+    Returns:
+        Client: Configured Supabase client instance
+        
+    Raises:
+        ValueError: If Supabase credentials are not configured
+    """
+    global _client, _http_client, _client_pid
+    
+    pid = os.getpid()
+    client = _client
+    if client is not None and _client_pid == pid:
+        return client
+    
+    url, key = _check_credentials()
+    
+    with _client_lock:
+        # Another thread may have built the client while we waited
+        if _client is not None and _client_pid == pid:
+            return _client
+        
+        if _client_pid != pid:
+            # Inherited from the parent process: drop without closing,
+            # the parent still owns those sockets
+            _client = None
+            _http_client = None
+        
+        _http_client = _build_http_client()
+        _client = create_client(url, key, options=ClientOptions(httpx_client=_http_client))
+        _client_pid = pid
+        logger.info(
+            f"Created shared Supabase client (pool size {settings.SUPABASE_POOL_SIZE})"
+        )
+        return _client
+
+
+async def aget_supabase_client() -> AsyncClient:
+    """
+    Return the async Supabase client for the running event loop.
+    
+    Under ASGI there is one long-lived event loop per worker, so this is
+    effectively one client (and one async keep-alive pool) per worker.
+    The pool holds up to SUPABASE_ASYNC_POOL_SIZE connections, since a
+    single loop can have many requests waiting on Supabase at once.
+    
+    Returns:
+        AsyncClient: Configured async Supabase client instance
+        
+    Raises:
+        ValueError: If Supabase credentials are not configured
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is not None:
+        return client
+    
+    url, key = _check_credentials()
+    http_client = httpx.AsyncClient(
+        limits=_pool_limits(settings.SUPABASE_ASYNC_POOL_SIZE),
+        timeout=_pool_timeout(),
+        follow_redirects=True,
+        event_hooks={'request': [aon_request], 'response': [aon_response]},
+    )
+    client = await acreate_client(url, key, options=AsyncClientOptions(httpx_client=http_client))
+    
+    # Another task may have created a client while we were awaiting
+    existing = _async_clients.get(loop)
+    if existing is not None:
+        await http_client.aclose()
+        return existing
+    
+    _async_clients[loop] = client
+    logger.info(
+        f"Created async Supabase client (pool size {settings.SUPABASE_ASYNC_POOL_SIZE})"
+    )
+    return client
+
+
+def reset_supabase_client() -> None:
+    """
+    Close the shared connection pool and forget the shared client.
+    
+    The next call to get_supabase_client() builds a new one. Called
+    automatically in a child process after fork, and useful in tests or
+    after changing Supabase settings at runtime.
+    """
+    global _client, _http_client, _client_pid
+    
+    with _client_lock:
+        http_client = _http_client
+        owned = _client_pid == os.getpid()
+        _client = None
+        _http_client = None
+        _client_pid = None
+    
+    if http_client is not None and owned:
+        http_client.close()
+
+
+def _reset_after_fork() -> None:
+    """Drop the parent's client in a freshly forked child process."""
+    global _client, _http_client, _client_pid, _client_lock, _executor, _async_clients
+    
+    # The lock may have been held by another thread at fork time
+    _client_lock = threading.Lock()
+    _client = None
+    _http_client = None
+    _client_pid = None
+    # Pool threads and event loops do not survive fork
+    _executor = None
+    _async_clients = weakref.WeakKeyDictionary()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Return the shared fan-out thread pool, creating it on first use."""
+    global _executor
+    
+    if _executor is None:
+        with _client_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.SUPABASE_FANOUT_WORKERS,
+                    thread_name_prefix="supabase-fanout",
+                )
+    return _executor
+
+
+def _run_in_pool(fn: Callable[[], Any]) -> Any:
+    """Run one fan-out call on a pool thread, flagging the thread as such."""
+    _fanout_local.active = True
+    try:
+        return fn()
+    finally:
+        _fanout_local.active = False
+
+
+def fan_out(
+    calls: Dict[str, Callable[[], Any]],
+    timeout: Optional[float] = None,
+    timeouts: Optional[Dict[str, float]] = None,
+    defaults: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Run independent Supabase reads at the same time and collect the results.
+    
+    Each call runs on a bounded, process-wide thread pool, so the total
+    latency is roughly that of the slowest call instead of the sum of all
+    of them. Calls are isolated: if one raises or exceeds its timeout, its
+    default value is returned and the others are unaffected.
+    
+    When called from inside another fan-out call (e.g. a catalog reload
+    triggered by the dashboard's fan-out), the calls run one after another
+    on the current thread instead, so the bounded pool can never deadlock
+    waiting on itself.
+    
+    Args:
+        calls: Mapping of result name to a zero-argument callable
+        timeout: Seconds to wait for each call (default: SUPABASE_FANOUT_TIMEOUT)
+        timeouts: Optional per-call timeout overrides, keyed like `calls`
+        defaults: Optional per-call fallback values, keyed like `calls`
+                  (None is used for calls without a default)
+    
+    Returns:
+        Dict: Result (or fallback) for every name in `calls`
+        
+    Example:
+        results = fan_out(
+            {'bookings': lambda: list_bookings('pending'), 'packages': fetch_packages},
+            defaults={'bookings': BookingPage(), 'packages': []},
+        )
+    """
+    if timeout is None:
+        timeout = settings.SUPABASE_FANOUT_TIMEOUT
+    timeouts = timeouts or {}
+    defaults = defaults or {}
+    
+    if getattr(_fanout_local, 'active', False):
+        results = {}
+        for name, fn in calls.items():
+            try:
+                results[name] = fn()
+            except Exception as e:
+                logger.error(f"Supabase call '{name}' failed: {e}")
+                results[name] = defaults.get(name)
+        return results
+    
+    executor = _get_executor()
+    started = time.monotonic()
+    # Each call runs in a copy of this context, so it joins the request's trace
+    futures = {
+        name: executor.submit(contextvars.copy_context().run, _run_in_pool, fn)
+        for name, fn in calls.items()
+    }
+    
+    results = {}
+    for name, future in futures.items():
+        # Each call's deadline is measured from when the fan-out started
+        deadline = started + timeouts.get(name, timeout)
+        try:
+            results[name] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            logger.error(f"Supabase call '{name}' timed out after {timeouts.get(name, timeout)}s")
+            results[name] = defaults.get(name)
+        except Exception as e:
+            logger.error(f"Supabase call '{name}' failed: {e}")
+            results[name] = defaults.get(name)
+    
+    return results
+
+
+async def afan_out(
+    calls: Dict[str, Callable[[], Awaitable[Any]]],
+    timeout: Optional[float] = None,
+    timeouts: Optional[Dict[str, float]] = None,
+    defaults: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Async version of fan_out() for async views.
+    
+    Awaits all calls concurrently on the running event loop, with the same
+    per-call timeouts and fallback values as fan_out().
+    
+    Args:
+        calls: Mapping of result name to a zero-argument coroutine function
+        timeout: Seconds to wait for each call (default: SUPABASE_FANOUT_TIMEOUT)
+        timeouts: Optional per-call timeout overrides, keyed like `calls`
+        defaults: Optional per-call fallback values, keyed like `calls`
+    
+    Returns:
+        Dict: Result (or fallback) for every name in `calls`
+    """
+    if timeout is None:
+        timeout = settings.SUPABASE_FANOUT_TIMEOUT
+    timeouts = timeouts or {}
+    defaults = defaults or {}
+    
+    async def run(name: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            return await asyncio.wait_for(fn(), timeouts.get(name, timeout))
+        except asyncio.TimeoutError:
+            logger.error(f"Supabase call '{name}' timed out after {timeouts.get(name, timeout)}s")
+        except Exception as e:
+            logger.error(f"Supabase call '{name}' failed: {e}")
+        return defaults.get(name)
+    
+    values = await asyncio.gather(*(run(name, fn) for name, fn in calls.items()))
+    return dict(zip(calls, values))
+
+
+class Projection:
+    """
+    Named column lists for select() calls.
+    
+    Helpers take one of these instead of always selecting "*", so only the
+    columns a page actually shows are transferred and decoded.
+    """
+    # Every column (single-booking lookups)
+    ALL = "*"
+    # One row of the admin dashboard bookings table
+    DASHBOARD_ROW = (
+        "id,customer_name,email,phone,start_date,end_date,"
+        "package_id,qty,include_dj,total_price,status"
+    )
+    # Package card, booking form choice and price lookups
+    CATALOG_ENTRY = "id,name,description,daily_rate,stock"
+    # Confirm/cancel and booking creation acknowledgements
+    STATUS_ONLY = "id,status"
+    # What the availability index needs to count a booking against stock
+    AVAILABILITY = "id,package_id,start_date,end_date,qty,status"
+    # One row of the bookings export (CSV / JSON Lines)
+    EXPORT_ROW = (
+        "id,customer_name,email,phone,start_date,end_date,"
+        "package_id,qty,include_dj,total_price,status"
+    )
+    # One row of the in-memory bookings mirror (bookings/mirror.py)
+    MIRROR_ROW = (
+        "id,customer_name,email,phone,start_date,end_date,"
+        "package_id,qty,include_dj,total_price,status,updated_at"
+    )
+
+
+# ----------------------------------------------------------------------
+# Record types
+#
+# Rows are parsed once, when they arrive from Supabase, into slotted
+# dataclasses: no per-row __dict__, and values derived for display
+# (package name, DJ fee, ...) are properties rather than extra keys.
+# Columns a class does not know about (e.g. with Projection.ALL) are
+# dropped; columns missing from a projection keep the field default.
+# ----------------------------------------------------------------------
+
+@dataclass(frozen=True, slots=True)
+class Package:
+    """
+    A rentable sound equipment package.
+    
+    Attributes:
+        id: Package ID
+        name: Display name
+        description: Card description
+        daily_rate: Price per day, in UGX
+        stock: Units available per day, or None for unlimited
+    """
+    id: int
+    name: str = 'Unknown'
+    description: str = ''
+    daily_rate: float = 0
+    stock: Optional[int] = None
+    
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "Package":
+        """Build a Package from a packages row."""
+        return cls(**{name: row[name] for name in _PACKAGE_FIELDS if name in row})
+
+
+@dataclass(slots=True)
+class Booking:
+    """
+    A customer booking.
+    
+    The column fields mirror the bookings table. `package` and `dj_rate`
+    are not columns: attach() sets them from the catalog so the dashboard
+    can show package and DJ prices through the properties below.
+    
+    Attributes:
+        id: Booking ID
+        customer_name: Customer's full name
+        email: Customer's email address
+        phone: Customer's phone number
+        start_date: First event day (YYYY-MM-DD)
+        end_date: Last event day (YYYY-MM-DD)
+        package_id: Booked package
+        qty: Units of the package
+        include_dj: Whether a DJ was requested
+        total_price: Price charged at booking time, in UGX
+        status: pending, confirmed or cancelled
+    """
+    id: Optional[int] = None
+    customer_name: str = ''
+    email: str = ''
+    phone: str = ''
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    package_id: Optional[int] = None
+    qty: int = 1
+    include_dj: bool = False
+    total_price: float = 0
+    status: str = 'pending'
+    package: Optional[Package] = field(default=None, compare=False, repr=False)
+    dj_rate: float = field(default=0.0, compare=False, repr=False)
+    
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "Booking":
+        """Build a Booking from a bookings row."""
+        try:
+            # Fast path: the row has every column (e.g. Projection.DASHBOARD_ROW)
+            return cls(*_booking_columns(row))
+        except KeyError:
+            return cls(**{name: row[name] for name in _BOOKING_COLUMNS if name in row})
+    
+    def attach(self, package: Optional[Package], dj_rate: float) -> "Booking":
+        """Attach the booked package and the current DJ rate from the catalog."""
+        self.package = package
+        self.dj_rate = dj_rate
+        return self
+    
+    @property
+    def package_name(self) -> str:
+        """Name of the booked package (empty if not attached or unknown)."""
+        return self.package.name if self.package else ''
+    
+    @property
+    def package_price(self) -> float:
+        """Current daily rate of the booked package."""
+        return self.package.daily_rate if self.package else 0
+    
+    @property
+    def dj_fee(self) -> float:
+        """Current DJ rate if a DJ was requested, else 0."""
+        return self.dj_rate if self.include_dj else 0
+    
+    @property
+    def current_price(self) -> float:
+        """Package price plus DJ fee at today's rates."""
+        return self.package_price + self.dj_fee
+
+
+# Row keys copied into each record (everything else in the row is ignored)
+_PACKAGE_FIELDS = tuple(f.name for f in fields(Package))
+_BOOKING_COLUMNS = tuple(f.name for f in fields(Booking) if f.name not in ('package', 'dj_rate'))
+_booking_columns = itemgetter(*_BOOKING_COLUMNS)
+
+
+# ----------------------------------------------------------------------
+# Query builders and response handlers
+#
+# Shared by the sync helpers and their async counterparts below, so both
+# issue exactly the same queries. The builders work with either a sync or
+# an async Supabase client; only execution differs (awaited or not).
+# Queries are always run through _execute() / _aexecute(), which record
+# them in the current request's trace (bookings/tracing.py) and apply the
+# timeout, retry and circuit breaker policies (bookings/resilience.py).
+# ----------------------------------------------------------------------
+
+def _execute(query, helper: str):
+    """
+    Execute a built query on the sync client as operation `helper`.
+    
+    Uses the helper's timeout, retries idempotent reads that fail with a
+    transient error, and fails fast while the circuit breaker is open.
+    
+    Raises:
+        CircuitOpenError: If the circuit breaker is open
+        Exception: The last error, if every attempt failed
+    """
+    request = query.request
+    # Retried below instead, with jitter and only for idempotent methods
+    request.retry_enabled = False
+    attempts = attempts_for(request.http_method)
+    with supabase_call(helper, request) as call, timeout_for(helper):
+        for attempt in range(attempts):
+            breaker.before_call()
+            call.status = None
+            try:
+                response = query.execute()
+            except Exception as e:
+                if not is_transient(e, call.status):
+                    breaker.record_success()
+                    raise
+                breaker.record_failure()
+                if attempt + 1 == attempts:
+                    raise
+                logger.warning(f"Supabase call {helper} failed ({e!r}), retrying")
+                time.sleep(backoff_delay(attempt))
+                continue
+            breaker.record_success()
+            call.rows = count_rows(response)
+            return response
+
+
+async def _aexecute(query, helper: str):
+    """Async version of _execute(), for the async client."""
+    request = query.request
+    request.retry_enabled = False
+    attempts = attempts_for(request.http_method)
+    with supabase_call(helper, request) as call, timeout_for(helper):
+        for attempt in range(attempts):
+            breaker.before_call()
+            call.status = None
+            try:
+                response = await query.execute()
+            except Exception as e:
+                if not is_transient(e, call.status):
+                    breaker.record_success()
+                    raise
+                breaker.record_failure()
+                if attempt + 1 == attempts:
+                    raise
+                logger.warning(f"Supabase call {helper} failed ({e!r}), retrying")
+                await asyncio.sleep(backoff_delay(attempt))
+                continue
+            breaker.record_success()
+            call.rows = count_rows(response)
+            return response
+
+
+def _packages_query(client, projection: str):
+    """Build the query used by fetch_packages()."""
+    return client.table("packages").select(projection).order("daily_rate")
+
+
+def _packages_result(response) -> List[Package]:
+    """Turn the packages response into a list (empty if no rows)."""
+    if response.data:
+        logger.info(f"Fetched {len(response.data)} packages from Supabase")
+        return [Package.from_row(row) for row in response.data]
+    else:
+        logger.warning("No packages found in Supabase")
+        return []
+
+
+# DJ daily rate used when the settings row cannot be read (UGX)
+DEFAULT_DJ_RATE = 550000.0
+
+
+def _dj_rate_query(client):
+    """Build the query used by get_dj_rate()."""
+    return client.table("settings").select("dj_daily_rate").eq("id", 1)
+
+
+def _dj_rate_result(response) -> Optional[float]:
+    """Extract the DJ rate from the settings response (None if there is no row)."""
+    if response.data and len(response.data) > 0:
+        rate = float(response.data[0]['dj_daily_rate'])
+        logger.info(f"Fetched DJ rate from Supabase: UGX {rate:,.0f}")
+        return rate
+    else:
+        logger.warning("No DJ rate found in settings")
+        return None
+
+
+def _create_booking_query(client, data: Dict[str, Any], projection: str):
+    """Build the insert used by create_booking()."""
+    return client.table("bookings").insert(data).select(projection)
+
+
+def _create_bookings_batch_query(client, rows: List[Dict[str, Any]]):
+    """
+    Build the insert used by create_bookings_batch().
+    
+    Rows whose idempotency_key already exists are skipped (ON CONFLICT DO
+    NOTHING), and only id and idempotency_key of new rows come back.
+    """
+    return (
+        client.table("bookings")
+        .upsert(rows, on_conflict="idempotency_key", ignore_duplicates=True)
+        .select("id,idempotency_key")
+    )
+
+
+def _create_booking_result(response, data: Dict[str, Any]) -> Optional[Booking]:
+    """Return the created booking, or None if nothing came back."""
+    if response.data:
+        booking = Booking.from_row(response.data[0])
+        logger.info(f"Created booking {booking.id} for {data.get('customer_name')}")
+        return booking
+    else:
+        logger.error("Failed to create booking: No data returned")
+        return None
+
+
+@dataclass
+class BookingPage:
+    """
+    One page of bookings from list_bookings().
+    
+    Attributes:
+        bookings: Bookings, ordered by start_date then id, newest first
+        next_cursor: Opaque cursor for the following (older) page, or None
+        prev_cursor: Opaque cursor for the preceding (newer) page, or None
+    """
+    bookings: List[Booking] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+
+@dataclass
+class SearchPage:
+    """
+    One page of results from search_bookings().
+    
+    Search results are ranked by how well they match, so they are paged by
+    number rather than by keyset cursor.
+    
+    Attributes:
+        bookings: Matching bookings, best match first, then newest event first
+        page: Page number, from 1
+        has_next: Whether another page follows
+        total: Number of matches, when known (the bookings mirror counts
+               them; Supabase and the replica do not)
+    """
+    bookings: List[Booking] = field(default_factory=list)
+    page: int = 1
+    has_next: bool = False
+    total: Optional[int] = None
+
+
+def encode_cursor(direction: str, booking: Booking) -> str:
+    """
+    Encode a keyset cursor pointing before/after a booking.
+    
+    Args:
+        direction: "next" (rows after the booking) or "prev" (rows before it)
+        booking: Booking with start_date and id
+    
+    Returns:
+        str: URL-safe opaque cursor
+    """
+    payload = json.dumps([direction, booking.start_date, booking.id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[str, str, int]]:
+    """
+    Decode a cursor produced by encode_cursor().
+    
+    Args:
+        cursor: Opaque cursor from a query string (may be None or garbage)
+    
+    Returns:
+        Tuple: (direction, start_date, id), or None if missing or invalid
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        direction, start_date, booking_id = json.loads(base64.urlsafe_b64decode(padded))
+        if direction not in ('next', 'prev'):
+            return None
+        # The date ends up inside a PostgREST filter, so only accept real dates
+        start_date = date.fromisoformat(str(start_date)).isoformat()
+        return direction, start_date, int(booking_id)
+    except (ValueError, TypeError):
+        return None
+
+
+def _page_size(page_size: Optional[int]) -> int:
+    """Clamp a requested page size to 1..BOOKINGS_PAGE_SIZE_MAX."""
+    if not page_size:
+        page_size = settings.BOOKINGS_PAGE_SIZE
+    return max(1, min(int(page_size), settings.BOOKINGS_PAGE_SIZE_MAX))
+
+
+def _keyset_projection(projection: str) -> str:
+    """Make sure a bookings projection includes the keyset columns."""
+    if projection == Projection.ALL:
+        return projection
+    columns = projection.split(',')
+    for required in ('id', 'start_date'):
+        if required not in columns:
+            columns.append(required)
+    return ','.join(columns)
+
+
+def _list_bookings_query(
+    client,
+    status_filter: Optional[str],
+    cursor: Optional[str],
+    page_size: int,
+    projection: str,
+):
+    """
+    Build the keyset-paginated query used by list_bookings().
+    
+    Rows are ordered by (start_date, id) descending. Instead of an OFFSET,
+    the cursor's (start_date, id) pair becomes a range condition, so every
+    page costs one index range scan however deep it is. One extra row is
+    requested to find out whether another page follows.
+    """
+    query = client.table("bookings").select(_keyset_projection(projection))
+    
+    # Apply status filter if provided
+    if status_filter and status_filter != "all":
+        query = query.eq("status", status_filter)
+    
+    position = decode_cursor(cursor)
+    if position is None:
+        # First page: most recent first
+        return query.order("start_date", desc=True).order("id", desc=True).limit(page_size + 1)
+    
+    direction, start_date, booking_id = position
+    if direction == 'next':
+        # Older rows: (start_date, id) < cursor
+        query = query.or_(
+            f"start_date.lt.{start_date},and(start_date.eq.{start_date},id.lt.{booking_id})"
+        )
+        return query.order("start_date", desc=True).order("id", desc=True).limit(page_size + 1)
+    
+    # Newer rows: (start_date, id) > cursor, read nearest-first then reversed
+    query = query.or_(
+        f"start_date.gt.{start_date},and(start_date.eq.{start_date},id.gt.{booking_id})"
+    )
+    return query.order("start_date").order("id").limit(page_size + 1)
+
+
+def build_booking_page(data: List[Dict[str, Any]], cursor: Optional[str], page_size: int) -> BookingPage:
+    """
+    Turn the rows read for one keyset page into a BookingPage with neighbour cursors.
+    
+    Args:
+        data: Up to page_size + 1 rows, in the order the page was read
+            (descending, or ascending for a "prev" cursor)
+        cursor: Cursor the page was read with
+        page_size: Rows per page
+    
+    Returns:
+        BookingPage: The page, newest first
+    """
+    has_more = len(data) > page_size
+    rows = [Booking.from_row(row) for row in data[:page_size]]
+    
+    position = decode_cursor(cursor)
+    if position is not None and position[0] == 'prev':
+        rows.reverse()
+        # We came back from an older page, so one always follows
+        page = BookingPage(
+            bookings=rows,
+            next_cursor=encode_cursor('next', rows[-1]) if rows else None,
+            prev_cursor=encode_cursor('prev', rows[0]) if rows and has_more else None,
+        )
+    else:
+        page = BookingPage(
+            bookings=rows,
+            next_cursor=encode_cursor('next', rows[-1]) if rows and has_more else None,
+            prev_cursor=encode_cursor('prev', rows[0]) if rows and position is not None else None,
+        )
+    return page
+
+
+def _list_bookings_result(response, cursor: Optional[str], page_size: int) -> BookingPage:
+    """Turn the bookings response into a BookingPage with neighbour cursors."""
+    page = build_booking_page(response.data or [], cursor, page_size)
+    rows = page.bookings
+    if rows:
+        logger.info(f"Fetched {len(rows)} bookings from Supabase")
+    else:
+        logger.info("No bookings found")
+    return page
+
+
+def _update_status_query(client, booking_id: int, new_status: str, projection: Optional[str]):
+    """
+    Build the update used by update_booking_status().
+    
+    With no projection, ask for no response body at all (return=minimal)
+    and only an exact count of updated rows to confirm the update matched.
+    """
+    if projection is None:
+        return (
+            client.table("bookings")
+            .update({"status": new_status}, count=CountMethod.exact, returning=ReturnMethod.minimal)
+            .eq("id", booking_id)
+        )
+    return (
+        client.table("bookings")
+        .update({"status": new_status})
+        .eq("id", booking_id)
+        .select(projection)
+    )
+
+
+def _update_status_result(
+    response, booking_id: int, new_status: str, projection: Optional[str]
+) -> Optional[Booking]:
+    """Return the updated booking (or just its ID and status), or None if nothing was updated."""
+    if projection is None:
+        if response.count:
+            logger.info(f"Updated booking {booking_id} status to {new_status}")
+            return Booking(id=booking_id, status=new_status)
+        logger.error(f"Failed to update booking {booking_id}: No rows matched")
+        return None
+    
+    if response.data:
+        booking = Booking.from_row(response.data[0])
+        logger.info(f"Updated booking {booking_id} status to {new_status}")
+        return booking
+    else:
+        logger.error(f"Failed to update booking {booking_id}: No data returned")
+        return None
+
+
+def _update_status_bulk_query(client, booking_ids: List[int], new_status: str):
+    """
+    Build the update used by update_booking_status_bulk().
+    
+    One PATCH with an `id=in.(...)` filter; only the IDs of the updated
+    rows are sent back.
+    """
+    return (
+        client.table("bookings")
+        .update({"status": new_status})
+        .in_("id", booking_ids)
+        .select("id")
+    )
+
+
+def _update_status_bulk_result(response, booking_ids: List[int], new_status: str) -> Dict[int, bool]:
+    """Map every requested ID to whether it was updated."""
+    updated = {row['id'] for row in response.data or []}
+    logger.info(f"Updated {len(updated)} of {len(booking_ids)} bookings to {new_status}")
+    return {booking_id: booking_id in updated for booking_id in booking_ids}
+
+
+def _booking_by_id_query(client, booking_id: int, projection: str):
+    """Build the query used by get_booking_by_id()."""
+    return (
+        client.table("bookings")
+        .select(projection)
+        .eq("id", booking_id)
+    )
+
+
+def _booking_by_id_result(response, booking_id: int) -> Optional[Booking]:
+    """Return the single booking, or None if not found."""
+    if response.data and len(response.data) > 0:
+        logger.info(f"Fetched booking {booking_id} from Supabase")
+        return Booking.from_row(response.data[0])
+    else:
+        logger.warning(f"Booking {booking_id} not found")
+        return None
+
+
+# Rows per request when reading every active booking (PostgREST caps
+# responses at 1000 rows by default)
+ACTIVE_BOOKINGS_BATCH = 1000
+
+
+def _search_query(client, query: str, status_filter: Optional[str], page: int, page_size: int):
+    """
+    Build the call used by search_bookings().
+    
+    search_bookings() is a Postgres function (see supabase/migrations/)
+    that matches on pg_trgm indexes and ranks the results. One row more
+    than the page is asked for, to tell whether another page follows.
+    """
+    params = {
+        'query': query,
+        'page_limit': page_size + 1,
+        'page_offset': (page - 1) * page_size,
+    }
+    if status_filter and status_filter != 'all':
+        params['status_filter'] = status_filter
+    return client.rpc("search_bookings", params, get=True).select(Projection.DASHBOARD_ROW)
+
+
+def _search_result(response, page: int, page_size: int) -> SearchPage:
+    """Turn the search_bookings() rows into a SearchPage."""
+    data = response.data or []
+    return SearchPage(
+        bookings=[Booking.from_row(row) for row in data[:page_size]],
+        page=page,
+        has_next=len(data) > page_size,
+    )
+
+
+def _active_bookings_query(client, since: date, after_id: int):
+    """
+    Build one batch of the query used by list_active_bookings().
+    
+    Batches are keyed on id (WHERE id > after_id ORDER BY id), so each one
+    is an index range scan no matter how far through the table it is.
+    """
+    return (
+        client.table("bookings")
+        .select(Projection.AVAILABILITY)
+        .neq("status", "cancelled")
+        .gte("end_date", since.isoformat())
+        .gt("id", after_id)
+        .order("id")
+        .limit(ACTIVE_BOOKINGS_BATCH)
+    )
+
+
+# Rows per request when syncing the bookings mirror
+MIRROR_SYNC_BATCH = 1000
+
+
+def _changed_bookings_query(client, since: Optional[str], position: Optional[Tuple[str, int]]):
+    """
+    Build one batch of the query used by list_changed_bookings().
+    
+    Rows are read in (updated_at, id) order, served by
+    bookings_updated_at_id_idx. The first batch starts at `since`; later
+    ones continue after `position`, the (updated_at, id) of the previous
+    batch's last row, so rows sharing a timestamp are neither skipped nor
+    read twice.
+    """
+    query = client.table("bookings").select(Projection.MIRROR_ROW)
+    if position is not None:
+        updated_at, booking_id = position
+        query = query.or_(
+            f'updated_at.gt."{updated_at}",and(updated_at.eq."{updated_at}",id.gt.{booking_id})'
+        )
+    elif since is not None:
+        query = query.gte("updated_at", since)
+    return query.order("updated_at").order("id").limit(MIRROR_SYNC_BATCH)
+
+
+@dataclass
+class BookingSummary:
+    """
+    Booking counts and revenue across the whole bookings table.
+    
+    Attributes:
+        total: Number of bookings
+        pending: Bookings with status "pending"
+        confirmed: Bookings with status "confirmed"
+        cancelled: Bookings with status "cancelled"
+        confirmed_revenue: Sum of total_price over confirmed bookings, in UGX
+    """
+    total: int = 0
+    pending: int = 0
+    confirmed: int = 0
+    cancelled: int = 0
+    confirmed_revenue: float = 0.0
+
+
+def _summary_query(client):
+    """
+    Build the call used by get_booking_summary().
+    
+    booking_summary() is a Postgres function (see supabase/migrations/)
+    that aggregates in the database. It is read-only, so it is called
+    with GET.
+    """
+    return client.rpc("booking_summary", {}, get=True)
+
+
+def _summary_result(response) -> Optional[BookingSummary]:
+    """Convert the booking_summary() row into a BookingSummary."""
+    rows = response.data
+    if isinstance(rows, list):
+        rows = rows[0] if rows else None
+    if not rows:
+        logger.error("Failed to fetch booking summary: No data returned")
+        return None
+    return BookingSummary(
+        total=int(rows.get('total') or 0),
+        pending=int(rows.get('pending') or 0),
+        confirmed=int(rows.get('confirmed') or 0),
+        cancelled=int(rows.get('cancelled') or 0),
+        confirmed_revenue=float(rows.get('confirmed_revenue') or 0),
+    )
+
+
+def _export_chunk_query(
+    client,
+    status_filter: Optional[str],
+    start_from: Optional[date],
+    start_to: Optional[date],
+    after_id: int,
+    chunk_size: int,
+):
+    """
+    Build one chunk of the query used by iter_booking_chunks().
+    
+    The table is walked in primary-key order with `id > after_id`, so each
+    chunk is an index range scan however far into the export it is, and
+    bookings added during the export simply come last.
+    """
+    query = client.table("bookings").select(Projection.EXPORT_ROW)
+    if status_filter and status_filter != "all":
+        query = query.eq("status", status_filter)
+    if start_from:
+        query = query.gte("start_date", start_from.isoformat())
+    if start_to:
+        query = query.lte("start_date", start_to.isoformat())
+    return query.gt("id", after_id).order("id").limit(chunk_size)
+
 
-logger = logging.getLogger(__name__)
+def _change_token_query(client):
+    """
+    Build the query used by get_bookings_change_token().
+    
+    Reads the one-row bookings_version table (a primary-key lookup), whose
+    counters triggers bump on every write and every delete.
+    """
+    return client.table("bookings_version").select("version,deletes").eq("id", 1)
 
 
-def get_supabase_client() -> Client:
+def _change_token_result(response) -> Optional[str]:
+    """Combine the write and delete counters into a token."""
+    if not response.data:
+        logger.error("Failed to fetch bookings change token: bookings_version has no row")
+        return None
+    row = response.data[0]
+    return f"{row['version']}/{row['deletes']}"
+
+
+def parse_change_token(token: str) -> Tuple[str, int]:
     """
-    Create and return a Supabase client instance.
-    
-    Uses SUPABASE_URL and SUPABASE_ANON_KEY from Django settings,
-    which are loaded from the .env file.
+    Split a token from get_bookings_change_token().
     
     Returns:
-        Client: Configured Supabase client instance
-        
-    Raises:
-        ValueError: If Supabase credentials are not configured
+        Tuple: (write version, number of delete statements so far); a sync
+        holding a token with a different delete count has missed deletes
+        and must copy the table in full, otherwise a delta is enough
     """
-    url = settings.SUPABASE_URL
-    key = settings.SUPABASE_ANON_KEY
-    
-    if not url or not key:
-        raise ValueError(
-            "Supabase credentials not configured. "
-            "Please set SUPABASE_URL and SUPABASE_ANON_KEY in .env file."
-        )
+    version, _, deletes = token.rpartition('/')
+    return version, int(deletes)
+
+
+def rewind_timestamp(timestamp: Optional[str], seconds: float) -> Optional[str]:
+    """
+    An updated_at value `seconds` earlier, as a since= for list_changed_bookings().
     
-    return create_client(url, key)
+    updated_at is the start of the writing transaction, so a row can be
+    committed after rows with later timestamps; incremental syncs re-read
+    a few seconds before their watermark to pick such rows up.
+    """
+    if timestamp is None:
+        return None
+    try:
+        moment = datetime.fromisoformat(timestamp)
+    except ValueError:
+        return timestamp
+    return (moment - timedelta(seconds=seconds)).isoformat()
+
+
+# ----------------------------------------------------------------------
+# Read routing
+# ----------------------------------------------------------------------
+
+@contextmanager
+def reads_from_supabase() -> Iterator[None]:
+    """
+    Send the reads made inside the block to Supabase whatever SUPABASE_READS
+    says, e.g. for the replicator and the bookings mirror, which copy from it.
+    """
+    token = _supabase_only.set(True)
+    try:
+        yield
+    finally:
+        _supabase_only.reset(token)
+
+
+def _replica_reads() -> bool:
+    """Whether reads are routed to the local replica (if it is fresh enough)."""
+    return settings.SUPABASE_READS == 'replica' and not _supabase_only.get()
+
+
+def _read_replica() -> bool:
+    """Whether this read should be served by the local replica."""
+    return _replica_reads() and replica.is_ready()
+
 
+# ----------------------------------------------------------------------
+# Sync data access
+# ----------------------------------------------------------------------
 
-def fetch_packages() -> List[Dict[str, Any]]:
+def fetch_packages(projection: str = Projection.CATALOG_ENTRY) -> List[Package]:
     """
     Fetch all sound equipment packages from Supabase.
     
@@ -52,19 +1200,17 @@ def fetch_packages() -> List[Dict[str, Any]]:
     - daily_rate: Daily rental rate in UGX
     - stock: Available inventory count
     
+    Args:
+        projection: Columns to select (default Projection.CATALOG_ENTRY)
+    
     Returns:
-        List[Dict]: List of package dictionaries, empty list on error
+        List[Package]: Packages ordered by daily_rate, empty list on error
     """
+    if _read_replica():
+        return replica.fetch_packages(projection)
     try:
-        supabase = get_supabase_client()
-        response = supabase.table("packages").select("*").order("daily_rate").execute()
-        
-        if response.data:
-            logger.info(f"Fetched {len(response.data)} packages from Supabase")
-            return response.data
-        else:
-            logger.warning("No packages found in Supabase")
-            return []
+        response = _execute(_packages_query(get_supabase_client(), projection), "fetch_packages")
+        return _packages_result(response)
             
     except Exception as e:
         logger.error(f"Error fetching packages from Supabase: {e}")
@@ -78,24 +1224,55 @@ def get_dj_rate() -> float:
     Returns:
         float: DJ daily rate in UGX, defaults to 550000 if not found
     """
+    rate = fetch_dj_rate()
+    if rate is None:
+        logger.warning(f"Using the default DJ rate: UGX {DEFAULT_DJ_RATE:,.0f}")
+        return DEFAULT_DJ_RATE
+    return rate
+
+
+def fetch_dj_rate() -> Optional[float]:
+    """
+    Fetch the DJ daily rate from the settings table, without a default.
+    
+    Used by the catalog cache (bookings/catalog.py), which treats a failed
+    read as a failed reload and keeps serving the last rate it loaded,
+    rather than caching 550000 as if Supabase had returned it.
+    
+    Returns:
+        float: DJ daily rate in UGX, or None if missing or on error
+    """
+    if _read_replica():
+        return replica.fetch_dj_rate()
     try:
-        supabase = get_supabase_client()
-        response = supabase.table("settings").select("dj_daily_rate").eq("id", 1).execute()
-        
-        if response.data and len(response.data) > 0:
-            rate = float(response.data[0]['dj_daily_rate'])
-            logger.info(f"Fetched DJ rate from Supabase: UGX {rate:,.0f}")
-            return rate
-        else:
-            logger.warning("No DJ rate found in settings, using default: UGX 550,000")
-            return 550000.0
+        response = _execute(_dj_rate_query(get_supabase_client()), "get_dj_rate")
+        return _dj_rate_result(response)
             
     except Exception as e:
         logger.error(f"Error fetching DJ rate from Supabase: {e}")
-        return 550000.0
+        return None
+
+
+def fetch_settings() -> Optional[Dict[str, Any]]:
+    """
+    Fetch the settings row (id 1) as stored in Supabase.
+    
+    Unlike get_dj_rate() there is no default: used by the read replica,
+    which must not copy a fallback value as if Supabase had returned it.
+    
+    Returns:
+        Dict: The settings row, or None if missing or on error
+    """
+    try:
+        response = _execute(_dj_rate_query(get_supabase_client()), "fetch_settings")
+        return response.data[0] if response.data else None
+    
+    except Exception as e:
+        logger.error(f"Error fetching settings from Supabase: {e}")
+        return None
 
 
-def create_booking(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+def create_booking(data: Dict[str, Any], projection: str = Projection.ALL) -> Optional[Booking]:
     """
     Create a new booking in Supabase (matches original schema).
     
@@ -111,39 +1288,89 @@ def create_booking(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
             - include_dj: Boolean indicating if DJ service is included
             - total_price: Total booking price in UGX
             - status: Booking status (default: "pending")
+        projection: Columns of the created row to send back
+                    (e.g. Projection.STATUS_ONLY when only the ID is needed)
     
     Returns:
-        Dict: Created booking data with ID, or None on error
+        Booking: Created booking with ID, or None on error
     """
     try:
-        supabase = get_supabase_client()
-        
         # Insert the booking
-        response = supabase.table("bookings").insert(data).execute()
-        
-        if response.data:
-            booking = response.data[0]
-            logger.info(f"Created booking {booking.get('id')} for {data.get('customer_name')}")
-            return booking
-        else:
-            logger.error("Failed to create booking: No data returned")
-            return None
+        response = _execute(
+            _create_booking_query(get_supabase_client(), data, projection),
+            "create_booking",
+        )
+        return _create_booking_result(response, data)
             
     except Exception as e:
         logger.error(f"Error creating booking in Supabase: {e}")
         return None
 
 
-def list_bookings(status_filter: Optional[str] = None) -> List[Dict[str, Any]]:
+def create_bookings_batch(rows: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Insert many bookings in one request, at most once per idempotency key.
+    
+    Used by the booking outbox (bookings/outbox.py). Every row must carry
+    an `idempotency_key`; sending the same key again never creates a
+    second booking, so a batch can safely be retried after a timeout.
+    
+    Unlike the other helpers this raises on failure, so the caller can
+    schedule a retry.
+    
+    Args:
+        rows: Booking rows as for create_booking(), plus idempotency_key
+    
+    Returns:
+        Dict[str, int]: Supabase booking ID for each idempotency key
+    
+    Raises:
+        Exception: If Supabase could not be reached or rejected the insert
+    """
+    if not rows:
+        return {}
+    client = get_supabase_client()
+    response = _execute(_create_bookings_batch_query(client, rows), "create_bookings_batch")
+    ids = {str(row['idempotency_key']): row['id'] for row in response.data or []}
+    
+    # Keys already present (sent by an earlier attempt) are not returned by
+    # the insert, so look their booking IDs up
+    missing = [row['idempotency_key'] for row in rows if str(row['idempotency_key']) not in ids]
+    if missing:
+        response = _execute(
+            client.table("bookings").select("id,idempotency_key").in_("idempotency_key", missing),
+            "create_bookings_batch",
+        )
+        ids.update({str(row['idempotency_key']): row['id'] for row in response.data or []})
+    
+    logger.info(f"Inserted {len(rows) - len(missing)} bookings ({len(missing)} already present)")
+    return ids
+
+
+def list_bookings(
+    status_filter: Optional[str] = None,
+    cursor: Optional[str] = None,
+    page_size: Optional[int] = None,
+    projection: str = Projection.DASHBOARD_ROW,
+) -> BookingPage:
     """
-    Fetch bookings from Supabase, optionally filtered by status.
+    Fetch one page of bookings from Supabase, optionally filtered by status.
+    
+    Uses keyset pagination on (start_date, id), so fetching any page costs
+    the same no matter how many bookings exist.
     
     Args:
         status_filter: Optional status to filter by (e.g., "pending", "confirmed", "cancelled")
                       If None, returns all bookings
+        cursor: Opaque cursor from a previous page's next_cursor/prev_cursor,
+                or None for the first (most recent) page
+        page_size: Rows per page (default BOOKINGS_PAGE_SIZE, capped at
+                   BOOKINGS_PAGE_SIZE_MAX)
+        projection: Columns to select (default Projection.DASHBOARD_ROW);
+                    id and start_date are always included for the cursors
     
     Returns:
-        List[Dict]: List of booking dictionaries, ordered by start_date descending
+        BookingPage: Bookings ordered by start_date descending, plus cursors
         
     Each booking contains:
         - id: Booking ID
@@ -158,93 +1385,586 @@ def list_bookings(status_filter: Optional[str] = None) -> List[Dict[str, Any]]:
         - total_price: Total price in UGX
         - status: Booking status
     """
+    if _read_replica():
+        return replica.list_bookings(status_filter, cursor, _page_size(page_size))
+    page_size = _page_size(page_size)
     try:
-        supabase = get_supabase_client()
-        
-        # Build query
-        query = supabase.table("bookings").select("*")
-        
-        # Apply status filter if provided
-        if status_filter and status_filter != "all":
-            query = query.eq("status", status_filter)
-        
-        # Order by start date (most recent first)
-        response = query.order("start_date", desc=True).execute()
-        
-        if response.data:
-            logger.info(f"Fetched {len(response.data)} bookings from Supabase")
-            return response.data
-        else:
-            logger.info("No bookings found")
-            return []
+        response = _execute(
+            _list_bookings_query(get_supabase_client(), status_filter, cursor, page_size, projection),
+            "list_bookings",
+        )
+        return _list_bookings_result(response, cursor, page_size)
             
     except Exception as e:
         logger.error(f"Error fetching bookings from Supabase: {e}")
-        return []
+        return BookingPage()
 
 
-def update_booking_status(booking_id: int, new_status: str) -> Optional[Dict[str, Any]]:
+def update_booking_status(
+    booking_id: int,
+    new_status: str,
+    projection: Optional[str] = Projection.ALL,
+) -> Optional[Booking]:
     """
     Update the status of a booking in Supabase.
     
     Args:
         booking_id: ID of the booking to update
         new_status: New status value (e.g., "confirmed", "cancelled")
+        projection: Columns of the updated row to send back, e.g.
+                    Projection.STATUS_ONLY. None sends back no row at all;
+                    the result then only has id and status set
     
     Returns:
-        Dict: Updated booking data, or None on error
+        Booking: Updated booking, or None on error or if no booking matched
     """
     try:
-        supabase = get_supabase_client()
-        
         # Update the booking status
-        response = (
-            supabase.table("bookings")
-            .update({"status": new_status})
-            .eq("id", booking_id)
-            .execute()
+        response = _execute(
+            _update_status_query(get_supabase_client(), booking_id, new_status, projection),
+            "update_booking_status",
         )
-        
-        if response.data:
-            booking = response.data[0]
-            logger.info(f"Updated booking {booking_id} status to {new_status}")
-            return booking
-        else:
-            logger.error(f"Failed to update booking {booking_id}: No data returned")
-            return None
+        booking = _update_status_result(response, booking_id, new_status, projection)
+        if booking is not None and _replica_reads():
+            # Show the change on the next page instead of after the next sync
+            replica.record_status([booking_id], new_status)
+        return booking
             
     except Exception as e:
         logger.error(f"Error updating booking {booking_id} in Supabase: {e}")
         return None
 
 
-def get_booking_by_id(booking_id: int) -> Optional[Dict[str, Any]]:
+def update_booking_status_bulk(booking_ids: List[int], new_status: str) -> Dict[int, bool]:
+    """
+    Set the same status on many bookings in a single Supabase request.
+    
+    Args:
+        booking_ids: IDs of the bookings to update
+        new_status: New status value (e.g., "confirmed", "cancelled")
+    
+    Returns:
+        Dict[int, bool]: For each requested ID, whether it was updated
+                         (False for IDs that do not exist, or all False on error)
+    """
+    if not booking_ids:
+        return {}
+    try:
+        response = _execute(
+            _update_status_bulk_query(get_supabase_client(), booking_ids, new_status),
+            "update_booking_status_bulk",
+        )
+        results = _update_status_bulk_result(response, booking_ids, new_status)
+        if _replica_reads():
+            replica.record_status([booking_id for booking_id, ok in results.items() if ok], new_status)
+        return results
+    
+    except Exception as e:
+        logger.error(f"Error updating {len(booking_ids)} bookings in Supabase: {e}")
+        return {booking_id: False for booking_id in booking_ids}
+
+
+def get_booking_by_id(booking_id: int, projection: str = Projection.ALL) -> Optional[Booking]:
     """
     Fetch a single booking by ID from Supabase.
     
     Args:
         booking_id: ID of the booking to fetch
+        projection: Columns to select (default: all)
     
     Returns:
-        Dict: Booking data, or None if not found or on error
+        Booking: The booking, or None if not found or on error
     """
+    if _read_replica():
+        return replica.get_booking_by_id(booking_id)
     try:
-        supabase = get_supabase_client()
-        
-        response = (
-            supabase.table("bookings")
-            .select("*")
-            .eq("id", booking_id)
-            .execute()
+        response = _execute(
+            _booking_by_id_query(get_supabase_client(), booking_id, projection),
+            "get_booking_by_id",
         )
-        
-        if response.data and len(response.data) > 0:
-            logger.info(f"Fetched booking {booking_id} from Supabase")
-            return response.data[0]
-        else:
-            logger.warning(f"Booking {booking_id} not found")
-            return None
+        return _booking_by_id_result(response, booking_id)
             
     except Exception as e:
         logger.error(f"Error fetching booking {booking_id} from Supabase: {e}")
         return None
+
+
+def search_bookings(
+    query: str,
+    status_filter: Optional[str] = None,
+    page: int = 1,
+    page_size: Optional[int] = None,
+) -> SearchPage:
+    """
+    Search bookings by customer name, email or phone in Supabase.
+    
+    Every word of the query must match the start or a part of the name,
+    email or phone number, or a word of the name give or take a typo
+    (pg_trgm word similarity). The bookings mirror answers the same search
+    from memory (bookings/search.py); this is for when it is unavailable.
+    
+    Args:
+        query: Search box text
+        status_filter: Optional status to filter by (pending/confirmed/cancelled)
+        page: Page number, from 1
+        page_size: Rows per page (default BOOKINGS_PAGE_SIZE, capped at
+                   BOOKINGS_PAGE_SIZE_MAX)
+    
+    Returns:
+        SearchPage: Matching bookings, best match first (empty on error)
+    """
+    if _read_replica():
+        return replica.search_bookings(query, status_filter, page, _page_size(page_size))
+    page_size = _page_size(page_size)
+    try:
+        response = _execute(
+            _search_query(get_supabase_client(), query, status_filter, page, page_size),
+            "search_bookings",
+        )
+        return _search_result(response, page, page_size)
+    
+    except Exception as e:
+        logger.error(f"Error searching bookings in Supabase: {e}")
+        return SearchPage(page=page)
+
+
+def list_active_bookings(since: date) -> Optional[List[Dict[str, Any]]]:
+    """
+    Fetch every booking that still holds stock on or after a date.
+    
+    "Active" means not cancelled and ending on or after `since`. Only the
+    columns in Projection.AVAILABILITY are read. Used to build the
+    availability index (bookings/availability.py).
+    
+    Args:
+        since: First date of interest (usually today)
+    
+    Returns:
+        List[Dict]: Booking rows ordered by id, or None on error
+    """
+    if _read_replica():
+        return replica.list_active_bookings(since)
+    try:
+        client = get_supabase_client()
+        bookings: List[Dict[str, Any]] = []
+        after_id = 0
+        while True:
+            response = _execute(
+                _active_bookings_query(client, since, after_id),
+                "list_active_bookings",
+            )
+            batch = response.data or []
+            bookings.extend(batch)
+            if len(batch) < ACTIVE_BOOKINGS_BATCH:
+                break
+            after_id = batch[-1]['id']
+        logger.info(f"Fetched {len(bookings)} active bookings from Supabase")
+        return bookings
+    
+    except Exception as e:
+        logger.error(f"Error fetching active bookings from Supabase: {e}")
+        return None
+
+
+def list_changed_bookings(since: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+    """
+    Fetch the bookings inserted or updated at or after a point in time.
+    
+    updated_at is set on insert and bumped by a trigger on every update
+    (see supabase/migrations/), so this is every row that changed since
+    `since`. Used to keep the bookings mirror (bookings/mirror.py) in sync
+    without reading the whole table; with `since` None it reads them all.
+    Deleted rows cannot be seen this way; the delete count in
+    get_bookings_change_token() tells when there were any.
+    
+    Args:
+        since: updated_at timestamp (inclusive), or None for every booking
+    
+    Returns:
+        List[Dict]: Rows with Projection.MIRROR_ROW columns, ordered by
+        (updated_at, id), or None on error
+    """
+    try:
+        client = get_supabase_client()
+        bookings: List[Dict[str, Any]] = []
+        position = None
+        while True:
+            response = _execute(
+                _changed_bookings_query(client, since, position),
+                "list_changed_bookings",
+            )
+            batch = response.data or []
+            bookings.extend(batch)
+            if len(batch) < MIRROR_SYNC_BATCH:
+                break
+            position = (batch[-1]['updated_at'], batch[-1]['id'])
+        logger.info(f"Fetched {len(bookings)} changed bookings from Supabase")
+        return bookings
+    
+    except Exception as e:
+        logger.error(f"Error fetching changed bookings from Supabase: {e}")
+        return None
+
+
+def iter_booking_chunks(
+    status_filter: Optional[str] = None,
+    start_from: Optional[date] = None,
+    start_to: Optional[date] = None,
+    chunk_size: Optional[int] = None,
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Yield every matching booking from Supabase, one chunk at a time.
+    
+    Only one chunk is held in memory at once, so this is suitable for
+    streaming exports of the whole table. Unlike the other helpers it
+    raises on error: a caller that has already sent part of the data
+    cannot fall back to an empty result.
+    
+    Args:
+        status_filter: Optional status to filter by (pending/confirmed/cancelled)
+        start_from: Optional earliest event (start) date
+        start_to: Optional latest event (start) date
+        chunk_size: Rows per Supabase request (default BOOKINGS_EXPORT_CHUNK)
+    
+    Yields:
+        List[Dict]: Bookings in ID order, with Projection.EXPORT_ROW columns
+    
+    Raises:
+        Exception: If a Supabase request fails
+    """
+    chunk_size = chunk_size or settings.BOOKINGS_EXPORT_CHUNK
+    if _read_replica():
+        yield from replica.iter_booking_chunks(status_filter, start_from, start_to, chunk_size)
+        return
+    client = get_supabase_client()
+    after_id = 0
+    while True:
+        try:
+            response = _execute(
+                _export_chunk_query(client, status_filter, start_from, start_to, after_id, chunk_size),
+                "iter_booking_chunks",
+            )
+        except Exception as e:
+            logger.error(f"Error exporting bookings from Supabase after #{after_id}: {e}")
+            raise
+        rows = response.data or []
+        if rows:
+            yield rows
+        if len(rows) < chunk_size:
+            return
+        after_id = rows[-1]['id']
+
+
+def get_booking_summary() -> Optional[BookingSummary]:
+    """
+    Fetch booking counts by status and confirmed revenue from Supabase.
+    
+    The aggregation runs in Postgres (the booking_summary() function), so
+    this is one small response however many bookings exist. It always
+    covers every booking, independent of dashboard filters and paging.
+    
+    Returns:
+        BookingSummary: Summary figures, or None on error
+    """
+    if _read_replica():
+        return replica.get_booking_summary()
+    try:
+        response = _execute(_summary_query(get_supabase_client()), "get_booking_summary")
+        return _summary_result(response)
+    
+    except Exception as e:
+        logger.error(f"Error fetching booking summary from Supabase: {e}")
+        return None
+
+
+def get_bookings_change_token() -> Optional[str]:
+    """
+    Fetch a token that changes whenever the bookings table changes.
+    
+    The token is the bookings_version row: a counter bumped by a trigger
+    on every insert, update and delete, and a count of deletes (see
+    supabase/migrations/20261017100000_bookings_version.sql). It is one
+    primary-key lookup whatever the size of the table, much cheaper than
+    loading a dashboard page, so it is used to answer conditional requests.
+    
+    Returns:
+        str: Opaque change token, or None on error
+    """
+    if _read_replica():
+        return replica.get_bookings_change_token()
+    try:
+        response = _execute(_change_token_query(get_supabase_client()), "get_bookings_change_token")
+        return _change_token_result(response)
+    
+    except Exception as e:
+        logger.error(f"Error fetching bookings change token from Supabase: {e}")
+        return None
+
+
+# ----------------------------------------------------------------------
+# Async data access
+#
+# Same behaviour as the sync helpers above, for async views. Under ASGI
+# (SUPABASE_ASYNC_CLIENT=True, set by soundhire_web/asgi.py) they use
+# supabase-py's async client, so a request waiting on Supabase does not
+# hold a thread. Under WSGI there is no long-lived event loop to keep an
+# async connection pool on, so they run the sync helpers in a worker
+# thread and keep using the shared keep-alive pool.
+#
+# Reads routed to the local replica (SUPABASE_READS="replica") also run
+# the sync helpers in a worker thread, since the ORM must not be used
+# from the event loop.
+# ----------------------------------------------------------------------
+
+async def afetch_packages(projection: str = Projection.CATALOG_ENTRY) -> List[Package]:
+    """Async version of fetch_packages()."""
+    if not settings.SUPABASE_ASYNC_CLIENT or _replica_reads():
+        return await sync_to_async(fetch_packages, thread_sensitive=False)(projection)
+    try:
+        client = await aget_supabase_client()
+        response = await _aexecute(_packages_query(client, projection), "fetch_packages")
+        return _packages_result(response)
+    except Exception as e:
+        logger.error(f"Error fetching packages from Supabase: {e}")
+        return []
+
+
+async def aget_dj_rate() -> float:
+    """Async version of get_dj_rate()."""
+    rate = await afetch_dj_rate()
+    if rate is None:
+        logger.warning(f"Using the default DJ rate: UGX {DEFAULT_DJ_RATE:,.0f}")
+        return DEFAULT_DJ_RATE
+    return rate
+
+
+async def afetch_dj_rate() -> Optional[float]:
+    """Async version of fetch_dj_rate()."""
+    if not settings.SUPABASE_ASYNC_CLIENT or _replica_reads():
+        return await sync_to_async(fetch_dj_rate, thread_sensitive=False)()
+    try:
+        client = await aget_supabase_client()
+        response = await _aexecute(_dj_rate_query(client), "get_dj_rate")
+        return _dj_rate_result(response)
+    except Exception as e:
+        logger.error(f"Error fetching DJ rate from Supabase: {e}")
+        return None
+
+
+async def acreate_booking(data: Dict[str, Any], projection: str = Projection.ALL) -> Optional[Booking]:
+    """Async version of create_booking()."""
+    if not settings.SUPABASE_ASYNC_CLIENT:
+        return await sync_to_async(create_booking, thread_sensitive=False)(data, projection)
+    try:
+        client = await aget_supabase_client()
+        response = await _aexecute(
+            _create_booking_query(client, data, projection),
+            "create_booking",
+        )
+        return _create_booking_result(response, data)
+    except Exception as e:
+        logger.error(f"Error creating booking in Supabase: {e}")
+        return None
+
+
+async def alist_bookings(
+    status_filter: Optional[str] = None,
+    cursor: Optional[str] = None,
+    page_size: Optional[int] = None,
+    projection: str = Projection.DASHBOARD_ROW,
+) -> BookingPage:
+    """Async version of list_bookings()."""
+    if not settings.SUPABASE_ASYNC_CLIENT or _replica_reads():
+        return await sync_to_async(list_bookings, thread_sensitive=False)(
+            status_filter, cursor, page_size, projection
+        )
+    page_size = _page_size(page_size)
+    try:
+        client = await aget_supabase_client()
+        response = await _aexecute(
+            _list_bookings_query(client, status_filter, cursor, page_size, projection),
+            "list_bookings",
+        )
+        return _list_bookings_result(response, cursor, page_size)
+    except Exception as e:
+        logger.error(f"Error fetching bookings from Supabase: {e}")
+        return BookingPage()
+
+
+async def aupdate_booking_status(
+    booking_id: int,
+    new_status: str,
+    projection: Optional[str] = Projection.ALL,
+) -> Optional[Booking]:
+    """Async version of update_booking_status()."""
+    if not settings.SUPABASE_ASYNC_CLIENT or _replica_reads():
+        return await sync_to_async(update_booking_status, thread_sensitive=False)(
+            booking_id, new_status, projection
+        )
+    try:
+        client = await aget_supabase_client()
+        response = await _aexecute(
+            _update_status_query(client, booking_id, new_status, projection),
+            "update_booking_status",
+        )
+        return _update_status_result(response, booking_id, new_status, projection)
+    except Exception as e:
+        logger.error(f"Error updating booking {booking_id} in Supabase: {e}")
+        return None
+
+
+async def aupdate_booking_status_bulk(booking_ids: List[int], new_status: str) -> Dict[int, bool]:
+    """Async version of update_booking_status_bulk()."""
+    if not settings.SUPABASE_ASYNC_CLIENT or _replica_reads():
+        return await sync_to_async(update_booking_status_bulk, thread_sensitive=False)(booking_ids, new_status)
+    if not booking_ids:
+        return {}
+    try:
+        client = await aget_supabase_client()
+        response = await _aexecute(
+            _update_status_bulk_query(client, booking_ids, new_status),
+            "update_booking_status_bulk",
+        )
+        return _update_status_bulk_result(response, booking_ids, new_status)
+    except Exception as e:
+        logger.error(f"Error updating {len(booking_ids)} bookings in Supabase: {e}")
+        return {booking_id: False for booking_id in booking_ids}
+
+
+async def aget_booking_by_id(booking_id: int, projection: str = Projection.ALL) -> Optional[Booking]:
+    """Async version of get_booking_by_id()."""
+    if not settings.SUPABASE_ASYNC_CLIENT or _replica_reads():
+        return await sync_to_async(get_booking_by_id, thread_sensitive=False)(booking_id, projection)
+    try:
+        client = await aget_supabase_client()
+        response = await _aexecute(
+            _booking_by_id_query(client, booking_id, projection),
+            "get_booking_by_id",
+        )
+        return _booking_by_id_result(response, booking_id)
+    except Exception as e:
+        logger.error(f"Error fetching booking {booking_id} from Supabase: {e}")
+        return None
+
+
+async def asearch_bookings(
+    query: str,
+    status_filter: Optional[str] = None,
+    page: int = 1,
+    page_size: Optional[int] = None,
+) -> SearchPage:
+    """Async version of search_bookings()."""
+    if not settings.SUPABASE_ASYNC_CLIENT or _replica_reads():
+        return await sync_to_async(search_bookings, thread_sensitive=False)(
+            query, status_filter, page, page_size
+        )
+    page_size = _page_size(page_size)
+    try:
+        client = await aget_supabase_client()
+        response = await _aexecute(
+            _search_query(client, query, status_filter, page, page_size),
+            "search_bookings",
+        )
+        return _search_result(response, page, page_size)
+    except Exception as e:
+        logger.error(f"Error searching bookings in Supabase: {e}")
+        return SearchPage(page=page)
+
+
+async def alist_active_bookings(since: date) -> Optional[List[Dict[str, Any]]]:
+    """Async version of list_active_bookings()."""
+    if not settings.SUPABASE_ASYNC_CLIENT or _replica_reads():
+        return await sync_to_async(list_active_bookings, thread_sensitive=False)(since)
+    try:
+        client = await aget_supabase_client()
+        bookings: List[Dict[str, Any]] = []
+        after_id = 0
+        while True:
+            response = await _aexecute(
+                _active_bookings_query(client, since, after_id),
+                "list_active_bookings",
+            )
+            batch = response.data or []
+            bookings.extend(batch)
+            if len(batch) < ACTIVE_BOOKINGS_BATCH:
+                break
+            after_id = batch[-1]['id']
+        logger.info(f"Fetched {len(bookings)} active bookings from Supabase")
+        return bookings
+    except Exception as e:
+        logger.error(f"Error fetching active bookings from Supabase: {e}")
+        return None
+
+
+async def aiter_booking_chunks(
+    status_filter: Optional[str] = None,
+    start_from: Optional[date] = None,
+    start_to: Optional[date] = None,
+    chunk_size: Optional[int] = None,
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Async version of iter_booking_chunks()."""
+    chunk_size = chunk_size or settings.BOOKINGS_EXPORT_CHUNK
+    if _replica_reads():
+        # The replica is read through the ORM, which must not run on the event loop
+        chunks = iter_booking_chunks(status_filter, start_from, start_to, chunk_size)
+        next_chunk = sync_to_async(next, thread_sensitive=False)
+        while True:
+            chunk = await next_chunk(chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+    after_id = 0
+    while True:
+        try:
+            if settings.SUPABASE_ASYNC_CLIENT:
+                client = await aget_supabase_client()
+                response = await _aexecute(
+                    _export_chunk_query(client, status_filter, start_from, start_to, after_id, chunk_size),
+                    "iter_booking_chunks",
+                )
+            else:
+                query = _export_chunk_query(
+                    get_supabase_client(), status_filter, start_from, start_to, after_id, chunk_size
+                )
+                response = await sync_to_async(_execute, thread_sensitive=False)(
+                    query, "iter_booking_chunks"
+                )
+        except Exception as e:
+            logger.error(f"Error exporting bookings from Supabase after #{after_id}: {e}")
+            raise
+        rows = response.data or []
+        if rows:
+            yield rows
+        if len(rows) < chunk_size:
+            return
+        after_id = rows[-1]['id']
+
+
+async def aget_booking_summary() -> Optional[BookingSummary]:
+    """Async version of get_booking_summary()."""
+    if not settings.SUPABASE_ASYNC_CLIENT or _replica_reads():
+        return await sync_to_async(get_booking_summary, thread_sensitive=False)()
+    try:
+        client = await aget_supabase_client()
+        response = await _aexecute(_summary_query(client), "get_booking_summary")
+        return _summary_result(response)
+    except Exception as e:
+        logger.error(f"Error fetching booking summary from Supabase: {e}")
+        return None
+
+
+async def aget_bookings_change_token() -> Optional[str]:
+    """Async version of get_bookings_change_token()."""
+    if not settings.SUPABASE_ASYNC_CLIENT or _replica_reads():
+        return await sync_to_async(get_bookings_change_token, thread_sensitive=False)()
+    try:
+        client = await aget_supabase_client()
+        response = await _aexecute(_change_token_query(client), "get_bookings_change_token")
+        return _change_token_result(response)
+    except Exception as e:
+        logger.error(f"Error fetching bookings change token from Supabase: {e}")
+        return None
+
+
+# Imported last: the replica's read functions use the record types above
+from . import replica  # noqa: E402
@@ -0,0 +1,586 @@
+"""
+Tests for the bookings app:
+
+- Supabase failure handling (bookings/resilience.py) and the catalog
+  cache's fallback to its last good snapshot (bookings/catalog.py)
+- the booking outbox: retries, rejections and leases (bookings/outbox.py)
+- units held by queued bookings (bookings/availability.py)
+- analytics rollups built from the bookings mirror (bookings/analytics.py)
+- keyset paging of the dashboard listing, from Supabase and from the
+  read replica (bookings/supabase_client.py, bookings/replica.py)
+- search: prefix and typo matching and paging in the mirror's index,
+  substring-only matching in the replica (bookings/search.py)
+- the CSV export's formula escaping (bookings/export.py)
+- static files: hashed links, per-encoding ETags (bookings/staticfiles.py)
+- request metric labels (bookings/metrics.py)
+
+The helpers run against the PostgREST stand-in from benchmarks/standin.py,
+which answers on a local port and injects errors on request, so no
+Supabase project is needed:
+    python manage.py test bookings
+"""
+
+from datetime import date, timedelta
+import csv
+import io
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from benchmarks.standin import StandInPostgREST, generate_bookings
+
+from . import analytics, availability, catalog, mirror, outbox, replica
+from .export import EXPORT_FIELDS, _encode_csv
+from .metrics import REQUEST_DURATION
+from .models import OutboxBooking
+from .resilience import CircuitBreaker, breaker
+from .search import EXACT, PREFIX, SearchIndex
+from .staticfiles import StaticAsset, StaticAssetsMiddleware
+from .supabase_client import (
+    create_bookings_batch,
+    fetch_packages,
+    list_bookings,
+    reset_supabase_client,
+    search_bookings,
+    update_booking_status,
+)
+
+COOLDOWN = 0.2
+
+
+class StandInTestCase(TestCase):
+    """Point the Supabase client at a stand-in server, with a fresh breaker per test."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = StandInPostgREST().start()
+        cls.overrides = override_settings(
+            SUPABASE_URL=cls.server.url,
+            SUPABASE_ANON_KEY='test-anon-key',
+            SUPABASE_READS='supabase',
+            SUPABASE_ASYNC_CLIENT=False,
+            SUPABASE_READ_RETRIES=2,
+            SUPABASE_RETRY_BASE_DELAY=0,
+            SUPABASE_RETRY_MAX_DELAY=0,
+            SUPABASE_BREAKER_THRESHOLD=3,
+            SUPABASE_BREAKER_COOLDOWN=COOLDOWN,
+        )
+        cls.overrides.enable()
+        reset_supabase_client()
+
+    @classmethod
+    def tearDownClass(cls):
+        reset_supabase_client()
+        cls.overrides.disable()
+        cls.server.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.inject_faults()
+        breaker.reset()
+        cache.clear()
+        catalog._catalog = catalog._last_good = None
+
+    def tearDown(self):
+        self.server.inject_faults()
+        breaker.reset()
+
+    def requests_for(self, fn):
+        """Call fn and return how many requests reached the stand-in."""
+        before = self.server.request_count
+        fn()
+        return self.server.request_count - before
+
+
+class CircuitBreakerTests(StandInTestCase):
+    """The breaker opens on repeated failures, then lets one trial call through."""
+
+    def open_breaker(self):
+        self.server.inject_faults(error_rate=1.0)
+        # 3 attempts per read, each a failure: the first read reaches the threshold
+        self.assertEqual(fetch_packages(), [])
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+    def test_opens_after_threshold_and_fails_fast(self):
+        self.open_breaker()
+        self.assertEqual(self.requests_for(fetch_packages), 0)
+
+    def test_half_open_trial_success_closes(self):
+        self.open_breaker()
+        self.server.inject_faults()
+        time.sleep(COOLDOWN * 1.5)
+        self.assertEqual(self.requests_for(fetch_packages), 1)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        self.assertTrue(fetch_packages())
+
+    def test_half_open_trial_failure_reopens(self):
+        self.open_breaker()
+        time.sleep(COOLDOWN * 1.5)
+        # One trial request, not a retried one: the breaker opens again at once
+        self.assertEqual(self.requests_for(fetch_packages), 1)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(self.requests_for(fetch_packages), 0)
+
+
+class RetryTests(StandInTestCase):
+    """Reads are retried on transient errors; writes are sent once."""
+
+    def test_reads_are_retried(self):
+        self.server.inject_faults(error_rate=1.0, methods=['GET'])
+        self.assertEqual(self.requests_for(fetch_packages), 3)
+
+    def test_updates_are_not_retried(self):
+        self.server.inject_faults(error_rate=1.0, methods=['PATCH'])
+        self.assertEqual(self.requests_for(lambda: update_booking_status(1, 'confirmed')), 1)
+
+    def test_inserts_are_not_retried(self):
+        self.server.inject_faults(error_rate=1.0, methods=['POST'])
+        row = {
+            'customer_name': 'Test', 'email': 'test@example.com', 'phone': '0700000000',
+            'start_date': '2030-01-01', 'end_date': '2030-01-01', 'package_id': 1, 'qty': 1,
+            'include_dj': False, 'total_price': 1, 'status': 'pending',
+            'idempotency_key': str(uuid.uuid4()),
+        }
+        before = self.server.request_count
+        with self.assertRaises(Exception):
+            create_bookings_batch([row])
+        self.assertEqual(self.server.request_count - before, 1)
+
+
+class CatalogFallbackTests(StandInTestCase):
+    """A failed reload serves the last catalog loaded successfully."""
+
+    def test_outage_serves_last_good_catalog(self):
+        loaded = catalog.get_catalog()
+        self.assertTrue(loaded.packages)
+        catalog.invalidate_catalog()
+        self.server.inject_faults(error_rate=1.0)
+        self.assertIs(catalog.get_catalog(), loaded)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        # Served from memory while the breaker is open
+        self.assertEqual(self.requests_for(catalog.get_catalog), 0)
+        self.assertGreaterEqual(catalog.catalog_cache_stats()['stale_served'], 2)
+
+    def test_missing_dj_rate_is_a_failed_reload(self):
+        loaded = catalog.get_catalog()
+        settings_rows = self.server.tables['settings']
+        self.server.tables['settings'] = []
+        try:
+            catalog.invalidate_catalog()
+            served = catalog.get_catalog()
+        finally:
+            self.server.tables['settings'] = settings_rows
+        self.assertIs(served, loaded)
+        self.assertEqual(served.dj_rate, settings_rows[0]['dj_daily_rate'])
+
+    def test_recovers_after_outage(self):
+        catalog.get_catalog()
+        catalog.invalidate_catalog()
+        self.server.inject_faults(error_rate=1.0)
+        catalog.get_catalog()
+        self.server.inject_faults()
+        self.server.tables['settings'] = [{'id': 1, 'dj_daily_rate': 600000}]
+        time.sleep(COOLDOWN * 1.5)
+        # The half-open breaker lets one of the two reads through as its trial
+        self.assertEqual(catalog.get_catalog().dj_rate, 550000)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(catalog.get_catalog().dj_rate, 600000)
+
+
+@override_settings(BOOKINGS_MIRROR='thread')
+class AnalyticsFromMirrorTests(StandInTestCase):
+    """With a fresh bookings mirror, the rollups follow it without reading Supabase."""
+
+    def setUp(self):
+        super().setUp()
+        analytics._rollups = None
+        self.server.tables['bookings'] = generate_bookings(200)
+        self.assertTrue(mirror.sync_mirror(full=True))
+        self.mirror = mirror.get_mirror()
+
+    def tearDown(self):
+        analytics._rollups = mirror._mirror = None
+        self.server.tables['bookings'] = []
+        super().tearDown()
+
+    def cancel(self, count):
+        """Cancel some bookings through the mirror, as confirm/cancel views do."""
+        booking_ids = [booking_id for booking_id, row in self.mirror._rows.items() if row['status'] != 'cancelled']
+        mirror.apply_status(booking_ids[:count], 'cancelled')
+
+    def test_rollups_follow_mirror_changes(self):
+        self.assertEqual(self.requests_for(analytics.refresh_rollups), 0)
+        self.cancel(3)
+        self.assertEqual(self.requests_for(analytics.refresh_rollups), 0)
+        rebuilt = analytics.AnalyticsRollups(self.mirror.rows_since()[0], 'rebuilt', time.monotonic())
+        self.assertEqual(analytics._rollups.payload({})['daily'], rebuilt.payload({})['daily'])
+        self.assertEqual(analytics._rollups.token, self.mirror.change_token)
+
+    def test_running_refresh_serves_current_rollups(self):
+        current = analytics.refresh_rollups()
+        self.cancel(1)
+        with analytics._lock:
+            self.assertIs(analytics.refresh_rollups(), current)
+        self.assertNotEqual(current.token, self.mirror.change_token)
+
+
+class ExportCsvTests(SimpleTestCase):
+    """CSV cells a spreadsheet would run as formulas are quoted."""
+
+    def test_formula_cells_are_prefixed(self):
+        booking = {
+            'id': 7, 'customer_name': '=HYPERLINK("http://example.com")', 'email': '@SUM(A1)',
+            'phone': '+256 700 000007', 'package_id': 1, 'qty': 1, 'total_price': -5, 'status': 'pending',
+        }
+        row = next(csv.DictReader(io.StringIO(_encode_csv([booking], {1: '-Basic'})), fieldnames=EXPORT_FIELDS))
+        self.assertEqual(row['customer_name'], '\'=HYPERLINK("http://example.com")')
+        self.assertEqual(row['email'], "'@SUM(A1)")
+        self.assertEqual(row['phone'], "'+256 700 000007")
+        self.assertEqual(row['package_name'], "'-Basic")
+        # Numbers are not text a spreadsheet parses as a formula
+        self.assertEqual(row['total_price'], '-5')
+        self.assertEqual(row['status'], 'pending')
+
+
+class StaticETagTests(SimpleTestCase):
+    """Each encoding of a static file has its own ETag."""
+
+    def setUp(self):
+        self.asset = StaticAsset(
+            content_type='text/css', etag='"abc"', last_modified='', cache_control='public',
+            bodies={'': b'body { }', 'gzip': b'gzipped'},
+        )
+        self.middleware = StaticAssetsMiddleware(lambda request: HttpResponse(status=404))
+
+    def respond(self, accept_encoding='', if_none_match=None):
+        headers = {'HTTP_ACCEPT_ENCODING': accept_encoding}
+        if if_none_match is not None:
+            headers['HTTP_IF_NONE_MATCH'] = if_none_match
+        return self.middleware._respond(RequestFactory().get('/static/styles.css', **headers), self.asset)
+
+    def test_variants_have_their_own_etag(self):
+        self.assertEqual(self.respond('gzip')['ETag'], '"abc-gz"')
+        self.assertEqual(self.respond()['ETag'], '"abc"')
+        # A cached gzip body is not a match for a client that cannot decode it
+        self.assertEqual(self.respond('', '"abc-gz"').status_code, 200)
+        self.assertEqual(self.respond('gzip', '"abc"').status_code, 200)
+
+    def test_if_none_match_lists(self):
+        self.assertEqual(self.respond('gzip', '"other", W/"abc-gz"').status_code, 304)
+        self.assertEqual(self.respond('', '*').status_code, 304)
+
+
+class StaticBuildTests(StandInTestCase):
+    """After collectstatic, pages link to hashed names served as immutable."""
+
+    def setUp(self):
+        super().setUp()
+        self.root = tempfile.mkdtemp(prefix='static-test-')
+        self.static = override_settings(STATIC_ROOT=self.root, ALLOWED_HOSTS=['testserver'])
+        self.static.enable()
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    def tearDown(self):
+        self.static.disable()
+        shutil.rmtree(self.root)
+        super().tearDown()
+
+    def test_home_page_links_hashed_stylesheet(self):
+        html = self.client.get('/').content.decode()
+        match = re.search(r'/static/bookings/styles\.[0-9a-f]{12}\.css', html)
+        self.assertIsNotNone(match, 'home page does not link a hashed stylesheet')
+        response = self.client.get(match.group(0), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('immutable', response['Cache-Control'])
+
+    def test_debug_is_off_by_default(self):
+        # The test runner turns DEBUG off itself, and with DEBUG on Django
+        # links to plain names: check what the settings module defaults to
+        env = {key: value for key, value in os.environ.items() if key != 'DJANGO_DEBUG'}
+        output = subprocess.run(
+            [sys.executable, '-c', 'import soundhire_web.settings as s; print(s.DEBUG)'],
+            env=env, capture_output=True, text=True, check=True,
+        ).stdout
+        self.assertEqual(output.strip(), 'False')
+
+    def test_manifest_is_not_served(self):
+        self.assertEqual(self.client.get('/static/staticfiles.json').status_code, 404)
+
+
+class RequestMetricsTests(SimpleTestCase):
+    """Arbitrary request methods do not create new metric series."""
+
+    def methods(self):
+        return {sample.labels['method'] for metric in REQUEST_DURATION.collect() for sample in metric.samples}
+
+    def test_unknown_methods_are_other(self):
+        for method in ('FOO', 'BAR1', 'get'):
+            self.client.generic(method, '/no-such-page/')
+        self.client.get('/no-such-page/')
+        methods = self.methods()
+        self.assertIn('other', methods)
+        self.assertIn('GET', methods)
+        self.assertFalse({'FOO', 'BAR1', 'get'} & methods)
+
+
+def booking_payload(package_id=1, day=None, qty=1):
+    """A booking row as views.home queues it."""
+    day = (day or date.today() + timedelta(days=30)).isoformat()
+    return {
+        'customer_name': 'Test Customer', 'email': 'test@example.com', 'phone': '0700000000',
+        'start_date': day, 'end_date': day, 'package_id': package_id, 'qty': qty,
+        'include_dj': False, 'total_price': 300000 * qty, 'status': 'pending',
+    }
+
+
+@override_settings(OUTBOX_DRAINER='off', OUTBOX_RETRY_BASE_DELAY=0, OUTBOX_RETRY_MAX_DELAY=0)
+class OutboxTests(StandInTestCase):
+    """Queued bookings reach Supabase exactly once, or are marked rejected."""
+
+    def setUp(self):
+        super().setUp()
+        self.server.tables['bookings'] = []
+
+    def stored(self, entry):
+        """Supabase rows carrying an entry's idempotency key."""
+        return [row for row in self.server.tables['bookings'] if row.get('idempotency_key') == str(entry.idempotency_key)]
+
+    def test_transient_failure_is_retried_once_delivered(self):
+        entry = outbox.enqueue_booking(booking_payload())
+        self.server.inject_faults(error_rate=1.0, methods=['POST'])
+        self.assertEqual(outbox.drain_once().retrying, 1)
+        entry.refresh_from_db()
+        self.assertEqual((entry.status, entry.attempts), (OutboxBooking.PENDING, 1))
+        self.assertEqual(self.stored(entry), [])
+
+        self.server.inject_faults()
+        breaker.reset()
+        self.assertEqual(outbox.drain_once().sent, 1)
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, OutboxBooking.SENT)
+        self.assertEqual([row['id'] for row in self.stored(entry)], [entry.supabase_id])
+
+    def test_lost_response_does_not_duplicate(self):
+        # The insert reached Supabase but the drainer never heard back
+        entry = outbox.enqueue_booking(booking_payload())
+        self.server.insert('bookings', {**entry.payload, 'idempotency_key': str(entry.idempotency_key)})
+        self.assertEqual(outbox.drain_once().sent, 1)
+        entry.refresh_from_db()
+        self.assertEqual(len(self.stored(entry)), 1)
+        self.assertEqual(entry.supabase_id, self.stored(entry)[0]['id'])
+
+    def test_refused_booking_is_rejected_not_retried(self):
+        for code in ('23514', 'P0001'):
+            entry = outbox.enqueue_booking(booking_payload())
+            self.server.inject_faults(error_rate=1.0, status=400, code=code, methods=['POST'])
+            self.assertEqual(outbox.drain_once().rejected, 1)
+            entry.refresh_from_db()
+            self.assertEqual(entry.status, OutboxBooking.REJECTED)
+            self.assertEqual(self.requests_for(outbox.drain_once), 0)
+
+    def test_expired_lease_is_reclaimed(self):
+        entry = outbox.enqueue_booking(booking_payload())
+        self.assertEqual([claimed.pk for claimed in outbox._claim(10)], [entry.pk])
+        # Leased: a second drainer gets nothing
+        self.assertEqual(outbox._claim(10), [])
+        first_owner = OutboxBooking.objects.get(pk=entry.pk).claimed_by
+        OutboxBooking.objects.filter(pk=entry.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual([claimed.pk for claimed in outbox._claim(10)], [entry.pk])
+        self.assertNotEqual(OutboxBooking.objects.get(pk=entry.pk).claimed_by, first_owner)
+
+
+@override_settings(OUTBOX_DRAINER='off')
+class OutboxHoldTests(StandInTestCase):
+    """A queued booking holds its units, in this worker and after a reload."""
+
+    PACKAGE = 3  # Premium, stock 2
+
+    def setUp(self):
+        super().setUp()
+        self.server.tables['bookings'] = []
+        availability._index = None
+        availability._recent.clear()
+        availability._failed['at'] = None
+        self.day = date.today() + timedelta(days=30)
+
+    def tearDown(self):
+        availability._index = None
+        availability._recent.clear()
+        super().tearDown()
+
+    def hold(self, index=None):
+        """Try to hold one unit on a day overlapping the queued booking."""
+        index = index or availability.get_availability()
+        return index.hold(self.PACKAGE, self.day, self.day + timedelta(days=1), 1, 2)
+
+    def queue_last_units(self):
+        """Hold both units and queue the booking, as views.home does."""
+        index = availability.get_availability()
+        hold = index.hold(self.PACKAGE, self.day, self.day, 2, 2)
+        self.assertIsNotNone(hold)
+        entry = outbox.enqueue_booking(booking_payload(self.PACKAGE, self.day, qty=2))
+        availability.record_booking({**entry.payload, 'id': f"outbox-{entry.idempotency_key}"}, hold)
+        return entry
+
+    def reload(self):
+        """Load a new index, as another worker would."""
+        availability.invalidate_availability()
+        return availability._load(cache.get(availability.GENERATION_CACHE_KEY))
+
+    def test_queued_booking_blocks_overlapping_hold(self):
+        self.queue_last_units()
+        self.assertIsNone(self.hold())
+        # Supabase has no row for it yet: the outbox keeps it held
+        self.assertIsNone(self.hold(self.reload()))
+
+    def test_sent_booking_is_held_once(self):
+        self.queue_last_units()
+        self.assertEqual(outbox.drain_once().sent, 1)
+        self.assertIsNone(self.hold())
+        index = self.reload()
+        self.assertEqual(index.booked(self.PACKAGE, self.day, self.day), 2)
+        self.assertIsNone(self.hold(index))
+
+    def test_rejected_booking_releases_units(self):
+        self.queue_last_units()
+        self.server.inject_faults(error_rate=1.0, status=400, code='23514', methods=['POST'])
+        self.assertEqual(outbox.drain_once().rejected, 1)
+        self.assertIsNotNone(self.hold())
+        self.assertIsNotNone(self.hold(self.reload()))
+
+
+class KeysetPagingTests(StandInTestCase):
+    """Every page forward and back, from Supabase and from the replica."""
+
+    PAGE_SIZE = 4
+
+    def setUp(self):
+        super().setUp()
+        rows = generate_bookings(30)
+        first = date.today()
+        for row in rows:
+            # Six dates for 30 bookings: pages split runs of equal start_date
+            row['start_date'] = row['end_date'] = (first + timedelta(days=row['id'] % 6)).isoformat()
+        self.server.tables['bookings'] = rows
+
+    def tearDown(self):
+        self.server.tables['bookings'] = []
+        replica._readiness.update(checked=0.0, ready=False)
+        super().tearDown()
+
+    def expected(self, status=None):
+        rows = [row for row in self.server.tables['bookings'] if status is None or row['status'] == status]
+        rows.sort(key=lambda row: (row['start_date'], row['id']), reverse=True)
+        return [row['id'] for row in rows]
+
+    def walk(self, status=None):
+        """Page to the end and back; returns the ids forward and the pages each way."""
+        forward, page = [], list_bookings(status, None, self.PAGE_SIZE)
+        forward.append([booking.id for booking in page.bookings])
+        while page.next_cursor:
+            page = list_bookings(status, page.next_cursor, self.PAGE_SIZE)
+            forward.append([booking.id for booking in page.bookings])
+        backward = [forward[-1]]
+        while page.prev_cursor:
+            page = list_bookings(status, page.prev_cursor, self.PAGE_SIZE)
+            backward.append([booking.id for booking in page.bookings])
+        return forward, backward
+
+    def assert_pages(self):
+        for status in (None, 'confirmed'):
+            forward, backward = self.walk(status)
+            ids = [booking_id for page in forward for booking_id in page]
+            self.assertEqual(ids, self.expected(status))
+            self.assertTrue(all(len(page) == self.PAGE_SIZE for page in forward[:-1]))
+            self.assertEqual(backward, forward[::-1])
+
+    def test_supabase_pages(self):
+        self.assert_pages()
+
+    def test_replica_pages(self):
+        replica.replicate(full=True)
+        replica._readiness.update(checked=0.0)
+        with override_settings(SUPABASE_READS='replica'):
+            self.assertEqual(self.requests_for(self.assert_pages), 0)
+
+
+def named_bookings(count):
+    """Generated bookings, the first three with names to search for."""
+    rows = generate_bookings(count)
+    for row, name in zip(rows, ('John Smith', 'Johnny Walker', 'Zoë Adams')):
+        row['customer_name'] = name
+    return rows
+
+
+class SearchIndexTests(SimpleTestCase):
+    """The mirror's search index: whole, prefix, accent and typo matches."""
+
+    def setUp(self):
+        self.index = SearchIndex(named_bookings(20))
+
+    def test_whole_word_ranks_before_prefix(self):
+        scores = self.index.search('john')
+        self.assertEqual(scores[1], EXACT)
+        self.assertEqual(scores[2], PREFIX)
+        self.assertEqual(self.index.search('walk'), {2: PREFIX})
+
+    def test_one_typo_in_a_name_matches(self):
+        # A substitution, and a swap of neighbouring letters
+        self.assertIn(1, self.index.search('smyth'))
+        self.assertIn(1, self.index.search('jonh smith'))
+        # Short words get no typo allowance
+        self.assertNotIn(1, self.index.search('jhn'))
+
+    def test_accents_and_phone_digits(self):
+        self.assertIn(3, self.index.search('zoe'))
+        self.assertEqual(list(self.index.search('700 000003')), [3])
+
+
+@override_settings(BOOKINGS_MIRROR='thread', BOOKINGS_PAGE_SIZE=10)
+class SearchPagingTests(StandInTestCase):
+    """Search pages from the mirror, and the replica's narrower matching."""
+
+    def setUp(self):
+        super().setUp()
+        self.server.tables['bookings'] = named_bookings(25)
+
+    def tearDown(self):
+        self.server.tables['bookings'] = []
+        mirror._mirror = None
+        replica._readiness.update(checked=0.0, ready=False)
+        super().tearDown()
+
+    def test_mirror_pages(self):
+        self.assertTrue(mirror.sync_mirror(full=True))
+        pages = [mirror.get_mirror().search('customer', page=page) for page in (1, 2, 3)]
+        self.assertEqual([page.has_next for page in pages], [True, True, False])
+        # Every email is customer<id>@example.com
+        self.assertEqual({page.total for page in pages}, {25})
+        ids = [booking.id for page in pages for booking in page.bookings]
+        self.assertEqual(sorted(ids), list(range(1, 26)))
+
+    def test_replica_matches_substrings_only(self):
+        replica.replicate(full=True)
+        replica._readiness.update(checked=0.0)
+        with override_settings(SUPABASE_READS='replica'):
+            self.assertEqual({booking.id for booking in search_bookings('ohn').bookings}, {1, 2})
+            # Documented in bookings/replica.py: no typo tolerance there,
+            # unlike the mirror's index (SearchIndexTests)
+            self.assertEqual(search_bookings('smyth').bookings, [])
+            self.assertEqual(search_bookings('jonh').bookings, [])
+            first, second = search_bookings('customer', page=1), search_bookings('customer', page=3)
+        self.assertTrue(first.has_next)
+        self.assertFalse(second.has_next)
+        self.assertEqual(len(second.bookings), 5)
@@ -0,0 +1,219 @@
+"""
+Per-request tracing of Supabase calls.
+
+Every query sent by bookings/supabase_client.py goes through
+supabase_call(), which times it and records the helper that issued it,
+the table (or RPC function), the operation, the number of rows returned
+and the size of the response body. While a request is being handled
+(see bookings/middleware.py) those calls are collected in a RequestTrace,
+which the middleware turns into a Server-Timing header and, for slow
+requests, a structured log line.
+
+The current trace lives in a context variable, so it follows the request
+into sync_to_async() threads, asyncio tasks and fan_out() pool threads
+without being passed around. Calls made outside a request (management
+commands, the outbox drainer) are timed but not collected.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import threading
+import time
+
+import httpx
+
+from .metrics import observe_supabase_call
+
+# Operation name per HTTP method PostgREST is called with
+_OPERATIONS = {
+    'GET': 'select',
+    'HEAD': 'count',
+    'POST': 'insert',
+    'PATCH': 'update',
+    'DELETE': 'delete',
+}
+
+
+@dataclass(slots=True)
+class SupabaseCall:
+    """
+    One Supabase query, as issued by a supabase_client helper.
+
+    Attributes:
+        helper: Name of the supabase_client function that sent it
+        table: Table queried, or "rpc/<function>" for RPC calls
+        operation: select, count, insert, upsert, update, delete or rpc
+        rows: Rows in the response body (rows changed for minimal updates)
+        bytes: Size of the response body(ies)
+        round_trips: HTTP requests sent, including retries
+        duration_ms: Wall time of the call, retries included
+        error: Exception class name if the call failed
+        status: HTTP status of the latest response
+    """
+    helper: str
+    table: str
+    operation: str
+    rows: int = 0
+    bytes: int = 0
+    round_trips: int = 0
+    duration_ms: float = 0.0
+    error: Optional[str] = None
+    status: Optional[int] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'helper': self.helper,
+            'table': self.table,
+            'op': self.operation,
+            'rows': self.rows,
+            'bytes': self.bytes,
+            'ms': round(self.duration_ms, 2),
+            'error': self.error,
+            'status': self.status,
+        }
+
+
+class RequestTrace:
+    """
+    Supabase calls made while handling one request.
+
+    Calls may be added from several threads at once (fan_out), hence the
+    lock. Read the totals once the request has been handled.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.calls: List[SupabaseCall] = []
+        self._lock = threading.Lock()
+
+    def add(self, call: SupabaseCall) -> None:
+        with self._lock:
+            self.calls.append(call)
+
+    def elapsed_ms(self) -> float:
+        """Milliseconds since the trace was started."""
+        return (time.perf_counter() - self.started) * 1000
+
+    @property
+    def round_trips(self) -> int:
+        return sum(call.round_trips for call in self.calls)
+
+    @property
+    def supabase_ms(self) -> float:
+        """
+        Summed duration of all calls. Calls made concurrently (fan_out)
+        overlap, so this can exceed the request's wall time.
+        """
+        return sum(call.duration_ms for call in self.calls)
+
+    def server_timing(self, total_ms: float) -> str:
+        """Server-Timing header value: Supabase time and call count, and the total."""
+        return (
+            f'supabase;dur={self.supabase_ms:.1f};desc="{len(self.calls)} calls, '
+            f'{self.round_trips} round trips", total;dur={total_ms:.1f}'
+        )
+
+
+# Trace of the request being handled, if any
+_trace: ContextVar[Optional[RequestTrace]] = ContextVar('supabase_trace', default=None)
+# Call currently waiting on Supabase, so the HTTP hooks can add to it
+_call: ContextVar[Optional[SupabaseCall]] = ContextVar('supabase_call', default=None)
+
+
+def begin() -> Tuple[Any, RequestTrace]:
+    """
+    Start collecting Supabase calls for the current request.
+
+    Returns:
+        Tuple: (token for end(), the new RequestTrace)
+    """
+    trace = RequestTrace()
+    return _trace.set(trace), trace
+
+
+def end(token: Any) -> None:
+    """Stop collecting calls; pass the token returned by begin()."""
+    _trace.reset(token)
+
+
+def current() -> Optional[RequestTrace]:
+    """Return the current request's trace, or None outside a request."""
+    return _trace.get()
+
+
+def _describe(request_config) -> Tuple[str, str]:
+    """(table, operation) of a postgrest RequestConfig."""
+    parts = request_config.path.path.rstrip('/').split('/')
+    if len(parts) >= 2 and parts[-2] == 'rpc':
+        return f"rpc/{parts[-1]}", 'rpc'
+    operation = _OPERATIONS.get(request_config.http_method, request_config.http_method.lower())
+    if operation == 'insert' and 'resolution=' in request_config.headers.get('Prefer', ''):
+        operation = 'upsert'
+    return parts[-1], operation
+
+
+def count_rows(response) -> int:
+    """Rows in a postgrest APIResponse; rows changed when no body was asked for."""
+    data = response.data
+    if isinstance(data, list):
+        return len(data) or (response.count or 0)
+    return 1 if data else 0
+
+
+@contextmanager
+def supabase_call(helper: str, request_config) -> Iterator[SupabaseCall]:
+    """
+    Time one Supabase query and add it to the current request's trace.
+
+    The call is also counted in the per-helper metrics (bookings/metrics.py),
+    inside a request or not.
+
+    Wrap the query's execute(); the HTTP client hooks below fill in bytes
+    and round trips, the caller sets `rows` from the response.
+
+    Args:
+        helper: Name of the calling supabase_client function
+        request_config: The query builder's `.request`
+
+    Yields:
+        SupabaseCall: The call being recorded
+    """
+    table, operation = _describe(request_config)
+    call = SupabaseCall(helper, table, operation)
+    token = _call.set(call)
+    started = time.perf_counter()
+    try:
+        yield call
+    except BaseException as e:
+        call.error = type(e).__name__
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        call.duration_ms = elapsed * 1000
+        _call.reset(token)
+        observe_supabase_call(helper, operation, elapsed, call.error)
+        trace = _trace.get()
+        if trace is not None:
+            trace.add(call)
+
+
+def on_response(response: httpx.Response) -> None:
+    """httpx response hook (sync client): record status, round trip and body size."""
+    call = _call.get()
+    if call is not None:
+        response.read()
+        call.status = response.status_code
+        call.round_trips += 1
+        call.bytes += len(response.content)
+
+
+async def aon_response(response: httpx.Response) -> None:
+    """httpx response hook (async client): record status, round trip and body size."""
+    call = _call.get()
+    if call is not None:
+        await response.aread()
+        call.status = response.status_code
+        call.round_trips += 1
+        call.bytes += len(response.content)
@@ -7,8 +7,13 @@ Routes:
 - /admin/login/ : Admin login
 - /admin/logout/ : Admin logout
 - /admin/dashboard/ : Admin booking management
+- /admin/occupancy/ : Units booked per package per day (heatmap)
+- /admin/analytics/, /admin/analytics.json : Revenue analytics (chart page, JSON)
 - /admin/bookings/<id>/cancel/ : Cancel a booking
 - /admin/bookings/<id>/confirm/ : Confirm a booking
+- /admin/bookings/bulk/ : Confirm or cancel the selected bookings
+- /admin/bookings/export.csv, /admin/bookings/export.jsonl : Download bookings
+- /metrics : Prometheus metrics
 """
 
 from django.urls import path
@@ -25,8 +30,19 @@ urlpatterns = [
     
     # Admin dashboard
     path('admin/dashboard/', views.admin_dashboard, name='admin_dashboard'),
+    path('admin/occupancy/', views.occupancy, name='occupancy'),
+    path('admin/analytics/', views.analytics, name='analytics'),
+    path('admin/analytics.json', views.analytics_json, name='analytics_json'),
     
     # Admin actions on bookings
     path('admin/bookings/<int:booking_id>/cancel/', views.cancel_booking, name='cancel_booking'),
     path('admin/bookings/<int:booking_id>/confirm/', views.confirm_booking, name='confirm_booking'),
+    path('admin/bookings/bulk/', views.bulk_update_bookings, name='bulk_update_bookings'),
+    
+    # Bookings export (streamed)
+    path('admin/bookings/export.csv', views.export_bookings, {'fmt': 'csv'}, name='export_bookings_csv'),
+    path('admin/bookings/export.jsonl', views.export_bookings, {'fmt': 'jsonl'}, name='export_bookings_jsonl'),
+    
+    # Monitoring
+    path('metrics', views.metrics, name='metrics'),
 ]
@@ -4,30 +4,117 @@ Views for SoundHire bookings web application.
 Handles:
 - Public booking form and submission
 - Admin authentication
-- Admin dashboard for managing bookings
+- Admin dashboard for managing bookings (single and bulk confirm/cancel)
+- Occupancy calendar (units booked per package per day)
+- Revenue analytics (page and JSON)
+- Streaming CSV/JSON Lines export of bookings
+- Prometheus metrics endpoint
+
+The views that talk to Supabase (home, admin_dashboard, occupancy, analytics, confirm_booking,
+cancel_booking, bulk_update_bookings, export_bookings) are async, so under ASGI a request
+waiting on the network does not hold a worker thread. Session access in those views goes through
+the async session API (aget/aset) for the same reason.
 """
 
 from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.conf import settings
-from django.http import HttpRequest, HttpResponse
+from django.core import signing
+from django.http import HttpRequest, HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+from django.db import DatabaseError
+from django.urls import reverse
+from django.utils.http import urlencode
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.middleware.csrf import get_token
+from django.utils.safestring import mark_safe
+from django.template.loader import render_to_string
+from datetime import date, timedelta
+from typing import Optional, Tuple
+import hashlib
+import hmac
+import ipaddress
+import logging
+import re
 
 from .forms import BookingForm, AdminLoginForm
+from .catalog import aget_catalog, build_catalog, catalog_cache_stats, Catalog, DEFAULT_DJ_RATE
+from .summary import aget_summary, ainvalidate_summary
+from .analytics import aget_analytics, analytics_stats
+from .availability import aget_availability, record_booking, record_status, release_hold
+from .mirror import aget_mirror, apply_status, mirror_stats
+from .occupancy import aget_occupancy, month_label, occupancy_heatmap
+from .outbox import aenqueue_booking, arecent_rejections
+from .export import CONTENT_TYPES, ExportFilters, stream_export
+from .page_cache import aget_fragment, page_etag, template_digest
+from .metrics import count_booking_submission, render as render_metrics
+from .resilience import breaker
 from .supabase_client import (
-    fetch_packages,
-    create_booking,
-    list_bookings,
-    update_booking_status,
-    get_dj_rate
+    alist_bookings,
+    asearch_bookings,
+    aget_bookings_change_token,
+    aupdate_booking_status,
+    aupdate_booking_status_bulk,
+    afan_out,
+    BookingPage,
+    BookingSummary,
+    Projection,
+    SearchPage,
 )
 
+logger = logging.getLogger(__name__)
+
+# Longest dashboard search query accepted (longer ones are cut)
+SEARCH_QUERY_MAX_LENGTH = 100
+
+# Most recent months drawn on the analytics page (the JSON has them all)
+ANALYTICS_CHART_MONTHS = 24
+
+# Years before and after this one the occupancy calendar can show
+OCCUPANCY_YEARS = 5
 
-def home(request: HttpRequest) -> HttpResponse:
+# Cookie carrying the last booking's details to the success page
+LAST_BOOKING_COOKIE = 'soundhire_last_booking'
+
+
+async def _ais_admin(request: HttpRequest) -> bool:
+    """
+    Check the admin session flag without blocking the event loop.
+    
+    This also loads the session, so templates can read it afterwards
+    (e.g. the navbar's request.session.is_soundhire_admin check).
+    """
+    return bool(await request.session.aget('is_soundhire_admin'))
+
+
+def _set_last_booking(request: HttpRequest, response: HttpResponse, customer_name: str, package_name: str) -> None:
+    """
+    Hand the booking details to the success page in a signed cookie.
+    
+    Keeping them out of the session means a booking never writes a
+    session, so the public booking flow does not touch the sessions
+    table (or any other shared store) at all. The cookie is signed with
+    SECRET_KEY, expires after LAST_BOOKING_COOKIE_AGE seconds and is
+    deleted by booking_success once shown.
+    """
+    response.set_cookie(
+        LAST_BOOKING_COOKIE,
+        signing.dumps({'name': customer_name, 'package': package_name}, salt=LAST_BOOKING_COOKIE),
+        max_age=settings.LAST_BOOKING_COOKIE_AGE,
+        secure=request.is_secure(),
+        httponly=True,
+        samesite='Lax',
+    )
+
+
+async def home(request: HttpRequest) -> HttpResponse:
     """
     Public home page with package information and booking form.
     
-    GET: Display packages and empty booking form
-    POST: Process booking submission and redirect to success page
+    GET: Display packages (with sold-out dates) and empty booking form;
+         the markup is cached per catalog version and revalidated by ETag
+    POST: Queue the booking for Supabase (bookings/outbox.py) and redirect
+          to success page; rejected if the package has no stock left on
+          the event date
     
     Args:
         request: HTTP request object
@@ -35,40 +122,41 @@ def home(request: HttpRequest) -> HttpResponse:
     Returns:
         HttpResponse: Rendered home.html template
     """
-    # Fetch available packages and DJ rate from Supabase
-    packages = fetch_packages()
-    dj_rate = get_dj_rate()
+    # Load the session up front; the navbar reads it during rendering
+    is_admin = await _ais_admin(request)
+    
+    # Packages and DJ rate come from the cached catalog (no Supabase read
+    # unless the cache has expired or been invalidated)
+    catalog = await aget_catalog()
+    packages = catalog.packages
+    dj_rate = catalog.dj_rate
     
     if request.method == 'POST':
         # Create form with POST data and package choices
-        form = BookingForm(request.POST)
-        form.fields['package_id'].choices = [
-            (str(pkg['id']), pkg['name']) for pkg in packages
-        ]
+        form = BookingForm.from_catalog(catalog, request.POST)
         
         if form.is_valid():
             # Extract form data
             customer_name = form.cleaned_data['customer_name']
             customer_email = form.cleaned_data['customer_email']
             customer_phone = form.cleaned_data['customer_phone']
-            event_date = form.cleaned_data['event_date'].isoformat()
+            event_day = form.cleaned_data['event_date']
+            event_date = event_day.isoformat()
             package_id = int(form.cleaned_data['package_id'])
             include_dj = form.cleaned_data['include_dj']
             notes = form.cleaned_data.get('notes', '')
             
             # Find the selected package to get pricing details
-            selected_package = next(
-                (pkg for pkg in packages if pkg['id'] == package_id),
-                None
-            )
+            selected_package = catalog.packages_by_id.get(package_id)
             
             if not selected_package:
+                count_booking_submission('invalid_package')
                 messages.error(request, "Invalid package selected. Please try again.")
-                form = BookingForm.from_packages(packages, dj_rate)
+                form = BookingForm.from_catalog(catalog)
             else:
                 # Calculate pricing
-                package_name = selected_package['name']
-                package_price = selected_package['daily_rate']
+                package_name = selected_package.name
+                package_price = selected_package.daily_rate
                 dj_fee = dj_rate if include_dj else 0
                 total_price = package_price + dj_fee
                 
@@ -86,46 +174,125 @@ def home(request: HttpRequest) -> HttpResponse:
                     'status': 'pending'  # New bookings start as pending
                 }
                 
-                # Create booking in Supabase
-                result = create_booking(booking_data)
+                # Take the units in this worker's availability index first,
+                # so the package cannot be over-booked for that date
+                availability = await aget_availability()
+                hold = availability.hold(
+                    package_id,
+                    event_day,
+                    event_day,
+                    booking_data['qty'],
+                    selected_package.stock,
+                )
                 
-                if result:
-                    # Success - store booking ID and redirect
-                    request.session['last_booking_name'] = customer_name
-                    request.session['last_booking_package'] = package_name
-                    messages.success(
-                        request,
-                        f"Booking submitted successfully! We'll contact you at {customer_email}"
+                if hold is None and not availability.complete:
+                    # Bookings could not be read yet: do not sell stock blind
+                    count_booking_submission('unavailable')
+                    form.add_error(
+                        'event_date',
+                        f"Sorry, we cannot check availability of the {package_name} package "
+                        f"right now. Please try again in a minute."
                     )
-                    return redirect('booking_success')
-                else:
-                    # Error creating booking
-                    messages.error(
-                        request,
-                        "Sorry, there was an error processing your booking. Please try again."
+                elif hold is None:
+                    count_booking_submission('sold_out')
+                    form.add_error(
+                        'event_date',
+                        f"Sorry, the {package_name} package is fully booked on "
+                        f"{event_day.strftime('%d %b %Y')}. Please choose another date or package."
                     )
-                    form = BookingForm.from_packages(packages, dj_rate)
+                else:
+                    # Queue the booking in the local outbox; the outbox
+                    # drainer writes it to Supabase, so a slow or
+                    # unavailable Supabase does not lose it
+                    try:
+                        entry = await aenqueue_booking(booking_data)
+                    except DatabaseError:
+                        entry = None
+                    
+                    if entry:
+                        # Success - keep the units held until the drainer
+                        # has stored the booking, then redirect
+                        count_booking_submission('queued')
+                        record_booking({**booking_data, 'id': f"outbox-{entry.idempotency_key}"}, hold)
+                        messages.success(
+                            request,
+                            f"Booking submitted successfully! We'll contact you at {customer_email}"
+                        )
+                        response = redirect('booking_success')
+                        _set_last_booking(request, response, customer_name, package_name)
+                        return response
+                    else:
+                        # Error creating booking
+                        count_booking_submission('error')
+                        release_hold(hold)
+                        messages.error(
+                            request,
+                            "Sorry, there was an error processing your booking. Please try again."
+                        )
+                        form = BookingForm.from_catalog(catalog)
         else:
             # Form validation failed - errors will be displayed in template
             pass
-    else:
-        # GET request - display empty form
-        form = BookingForm.from_packages(packages, dj_rate)
     
-    context = {
-        'packages': packages,
-        'form': form,
-        'dj_rate': dj_rate
+    # Sold-out dates per package for the next AVAILABILITY_HORIZON_DAYS,
+    # read from the availability index rather than the bookings table
+    availability = await aget_availability()
+    today = date.today()
+    horizon = today + timedelta(days=settings.AVAILABILITY_HORIZON_DAYS)
+    sold_out = {
+        pkg.id: availability.sold_out_dates(pkg.id, pkg.stock, today, horizon)
+        for pkg in packages
     }
+    # (package, sold-out dates) pairs for the package cards
+    package_cards = [(pkg, sold_out[pkg.id]) for pkg in packages]
+    
+    if request.method == 'POST':
+        # Bound form (with errors): render the fragment for this request only
+        home_content = mark_safe(render_to_string(
+            'bookings/home_content.html',
+            {'package_cards': package_cards, 'form': form, 'dj_rate': dj_rate},
+            request=request,
+        ))
+        return render(request, 'bookings/home.html', {'home_content': home_content})
     
-    return render(request, 'bookings/home.html', context)
+    # GET: the package grid and empty form are the same for every visitor,
+    # so they are rendered once per catalog version and sold-out dates
+    sold_out_version = hashlib.sha1(repr(sorted(sold_out.items())).encode()).hexdigest()[:12]
+    fragment = await aget_fragment(
+        'bookings/home_content.html',
+        f"{catalog.version}:{sold_out_version}",
+        lambda: {
+            'package_cards': package_cards,
+            'form': BookingForm.from_catalog(catalog),
+            'dj_rate': dj_rate,
+        },
+    )
+    home_content = fragment.for_request(request)
+    
+    # Let the browser revalidate its copy instead of downloading the page.
+    # Flash messages are one-off, so pages showing them get no ETag.
+    has_messages = len(messages.get_messages(request)) > 0
+    etag = None if has_messages else page_etag(request, fragment.digest, is_admin)
+    if etag:
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+    
+    response = render(request, 'bookings/home.html', {'home_content': home_content})
+    if etag:
+        response['ETag'] = etag
+    # Private: the page carries this visitor's CSRF token, so shared caches
+    # must not hand it to anyone else
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
 
 
 def booking_success(request: HttpRequest) -> HttpResponse:
     """
     Success page displayed after booking submission.
     
-    Shows a thank you message with booking details from session.
+    Shows a thank you message with the booking details carried by the
+    signed last-booking cookie (see _set_last_booking).
     
     Args:
         request: HTTP request object
@@ -133,22 +300,26 @@ def booking_success(request: HttpRequest) -> HttpResponse:
     Returns:
         HttpResponse: Rendered booking_success.html template
     """
-    # Retrieve booking details from session (if available)
-    customer_name = request.session.get('last_booking_name', 'Customer')
-    package_name = request.session.get('last_booking_package', 'your selected package')
-    
-    # Clear session data after displaying (one-time use)
-    if 'last_booking_name' in request.session:
-        del request.session['last_booking_name']
-    if 'last_booking_package' in request.session:
-        del request.session['last_booking_package']
+    # Retrieve booking details from the cookie (if present and valid)
+    try:
+        details = signing.loads(
+            request.COOKIES.get(LAST_BOOKING_COOKIE, ''),
+            salt=LAST_BOOKING_COOKIE,
+            max_age=settings.LAST_BOOKING_COOKIE_AGE,
+        )
+    except signing.BadSignature:
+        details = {}
     
     context = {
-        'customer_name': customer_name,
-        'package_name': package_name
+        'customer_name': details.get('name') or 'Customer',
+        'package_name': details.get('package') or 'your selected package'
     }
     
-    return render(request, 'bookings/booking_success.html', context)
+    response = render(request, 'bookings/booking_success.html', context)
+    # Clear the details after displaying them (one-time use)
+    if LAST_BOOKING_COOKIE in request.COOKIES:
+        response.delete_cookie(LAST_BOOKING_COOKIE, samesite='Lax')
+    return response
 
 
 def admin_login(request: HttpRequest) -> HttpResponse:
@@ -176,7 +347,8 @@ def admin_login(request: HttpRequest) -> HttpResponse:
             
             # Check if access code matches the configured admin code
             if access_code == settings.ADMIN_ACCESS_CODE:
-                # Set session flag for admin access
+                # New session key (no fixation), then set the admin flag
+                request.session.cycle_key()
                 request.session['is_soundhire_admin'] = True
                 messages.success(request, "Successfully logged in as admin")
                 return redirect('admin_dashboard')
@@ -194,7 +366,10 @@ def admin_login(request: HttpRequest) -> HttpResponse:
 
 def admin_logout(request: HttpRequest) -> HttpResponse:
     """
-    Log out admin user by clearing session flag.
+    Log out admin user by deleting the session.
+    
+    The session is removed from the server, so a copy of its cookie no
+    longer logs anyone in.
     
     Args:
         request: HTTP request object
@@ -202,19 +377,47 @@ def admin_logout(request: HttpRequest) -> HttpResponse:
     Returns:
         HttpResponse: Redirect to home page
     """
-    if 'is_soundhire_admin' in request.session:
-        del request.session['is_soundhire_admin']
+    request.session.flush()
     
     messages.success(request, "Successfully logged out")
     return redirect('home')
 
 
-def admin_dashboard(request: HttpRequest) -> HttpResponse:
+def _redirect_to_dashboard(request: HttpRequest) -> HttpResponse:
+    """
+    Redirect to the admin dashboard, keeping the status filter, search and page.
+    
+    Action forms on the dashboard post to URLs carrying the dashboard's
+    query string, so `status`, `q`, `cursor` and `page` are read from
+    request.GET.
+    """
+    params = {'status': request.GET.get('status', 'all')}
+    for name in ('q', 'cursor', 'page'):
+        if request.GET.get(name):
+            params[name] = request.GET[name]
+    return redirect(f"{reverse('admin_dashboard')}?{urlencode(params)}")
+
+
+async def admin_dashboard(request: HttpRequest) -> HttpResponse:
     """
     Admin dashboard for viewing and managing bookings.
     
     Requires admin authentication (session flag).
-    Supports filtering by booking status via query parameter.
+    Supports filtering by booking status via query parameter, and
+    paginates with an opaque `cursor` query parameter (keyset pagination).
+    With a search query (`q`: customer name, email or phone, typos in names
+    tolerated) the page lists the matching bookings instead, best match
+    first, paged by number (`page`). The summary cards always cover all
+    bookings (see bookings/summary.py).
+    
+    When this worker's bookings mirror is fresh (bookings/mirror.py), the
+    page, search results and summary are read from it without calling
+    Supabase; otherwise they are fetched from Supabase.
+    
+    The page is revalidated by ETag: a cheap change token for the bookings
+    table is fetched first (or taken from the mirror), and if the browser's
+    copy was built from the same token, filter and page it gets a 304
+    without the page being fetched or rendered.
     
     Args:
         request: HTTP request object
@@ -223,7 +426,7 @@ def admin_dashboard(request: HttpRequest) -> HttpResponse:
         HttpResponse: Rendered admin_dashboard.html template or redirect
     """
     # Check if user is logged in as admin
-    if not request.session.get('is_soundhire_admin'):
+    if not await _ais_admin(request):
         messages.warning(request, "Please log in to access the admin dashboard")
         return redirect('admin_login')
     
@@ -235,55 +438,122 @@ def admin_dashboard(request: HttpRequest) -> HttpResponse:
     if status_filter not in valid_statuses:
         status_filter = 'all'
     
-    # Fetch bookings and packages from Supabase
+    # Fetch one page of bookings and the catalog from Supabase
     filter_param = None if status_filter == 'all' else status_filter
-    bookings = list_bookings(status_filter=filter_param)
-    packages = fetch_packages()
-    dj_rate = get_dj_rate()
+    cursor = request.GET.get('cursor')
+    
+    # Search box: customer name, email or phone (see bookings/search.py)
+    search_query = request.GET.get('q', '').strip()[:SEARCH_QUERY_MAX_LENGTH]
+    try:
+        page_number = max(1, int(request.GET.get('page', 1)))
+    except ValueError:
+        page_number = 1
+    
+    # The change token and the catalog decide whether the browser's copy is
+    # still current; fetch them before the (much larger) page of bookings
+    mirror = await aget_mirror()
+    if mirror is not None:
+        token = mirror.change_token
+        catalog = await aget_catalog()
+    else:
+        head = await afan_out(
+            {'token': aget_bookings_change_token, 'catalog': aget_catalog},
+            defaults={'token': None, 'catalog': build_catalog([], DEFAULT_DJ_RATE)},
+        )
+        token = head['token']
+        catalog = head['catalog']
+    dj_rate = catalog.dj_rate
+    
+    # Bookings Supabase refused after the customer was told they were
+    # received (bookings/outbox.py); read from the local outbox table
+    rejected_bookings = await arecent_rejections()
     
-    # Create package lookup for enriching booking data
-    package_lookup = {pkg['id']: pkg for pkg in packages}
+    # Flash messages are one-off, and without a token there is nothing to
+    # compare, so those pages get no ETag. The token is read before the
+    # page, so a change in between only makes the next request re-render.
+    has_messages = len(messages.get_messages(request)) > 0
+    etag = None
+    if token and not has_messages:
+        get_token(request)  # the page's forms need a CSRF token; see page_etag()
+        etag = page_etag(
+            request,
+            token,
+            catalog.version,
+            status_filter,
+            cursor or '',
+            search_query,
+            page_number if search_query else '',
+            ','.join(str(entry.pk) for entry in rejected_bookings),
+            template_digest('bookings/admin_dashboard.html'),
+        )
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+    
+    if mirror is not None:
+        results = {
+            'page': (
+                mirror.search(search_query, filter_param, page_number)
+                if search_query else mirror.page(filter_param, cursor)
+            ),
+            'summary': mirror.summary(),
+        }
+    else:
+        # Bookings and the summary are independent, so fetch them concurrently.
+        # The summary is cached per change token, so it matches the page.
+        results = await afan_out(
+            {
+                'page': (lambda: asearch_bookings(search_query, filter_param, page_number))
+                if search_query else (lambda: alist_bookings(
+                    status_filter=filter_param,
+                    cursor=cursor,
+                    projection=Projection.DASHBOARD_ROW,
+                )),
+                'summary': lambda: aget_summary(version=token),
+            },
+            defaults={
+                'page': SearchPage(page=page_number) if search_query else BookingPage(),
+                'summary': BookingSummary(),
+            },
+        )
+    page = results['page']
+    bookings = page.bookings
     
-    # Enrich bookings with package info and computed fields
+    # Attach packages and the DJ rate; the template reads package name,
+    # prices and DJ fee through Booking's properties
     for booking in bookings:
-        package_id = booking.get('package_id')
-        if package_id and package_id in package_lookup:
-            pkg = package_lookup[package_id]
-            booking['package_name'] = pkg['name']
-            booking['package_price'] = pkg['daily_rate']
-            booking['dj_fee'] = dj_rate if booking.get('include_dj') else 0
-            booking['customer_email'] = booking.get('email', '')
-            booking['customer_phone'] = booking.get('phone', '')
-            booking['event_date'] = booking.get('start_date', '')
-            booking['dj_included'] = booking.get('include_dj', False)
-    
-    # Calculate summary statistics
-    total_bookings = len(bookings)
-    pending_count = sum(1 for b in bookings if b.get('status') == 'pending')
-    confirmed_count = sum(1 for b in bookings if b.get('status') == 'confirmed')
-    cancelled_count = sum(1 for b in bookings if b.get('status') == 'cancelled')
-    
-    # Calculate total revenue from confirmed bookings
-    total_revenue = sum(
-        b.get('total_price', 0)
-        for b in bookings
-        if b.get('status') == 'confirmed'
-    )
+        booking.attach(catalog.packages_by_id.get(booking.package_id), dj_rate)
+    
+    # Summary statistics cover all bookings, whatever the filter or page
+    summary = results['summary']
     
     context = {
         'bookings': bookings,
+        'next_cursor': None if search_query else page.next_cursor,
+        'prev_cursor': None if search_query else page.prev_cursor,
+        'search_query': search_query,
+        'search_page': page if search_query else None,
         'current_filter': status_filter,
-        'total_bookings': total_bookings,
-        'pending_count': pending_count,
-        'confirmed_count': confirmed_count,
-        'cancelled_count': cancelled_count,
-        'total_revenue': total_revenue
+        'total_bookings': summary.total,
+        'pending_count': summary.pending,
+        'confirmed_count': summary.confirmed,
+        'cancelled_count': summary.cancelled,
+        'total_revenue': summary.confirmed_revenue,
+        'catalog_stats': catalog_cache_stats(),
+        'supabase_circuit': breaker.snapshot(),
+        'mirror_stats': mirror_stats(),
+        'rejected_bookings': rejected_bookings,
     }
     
-    return render(request, 'bookings/admin_dashboard.html', context)
+    response = render(request, 'bookings/admin_dashboard.html', context)
+    if etag:
+        response['ETag'] = etag
+    # Always revalidate; private because it is an admin page with a CSRF token
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
 
 
-def cancel_booking(request: HttpRequest, booking_id: int) -> HttpResponse:
+async def cancel_booking(request: HttpRequest, booking_id: int) -> HttpResponse:
     """
     Cancel a booking by updating its status to 'cancelled'.
     
@@ -297,7 +567,7 @@ def cancel_booking(request: HttpRequest, booking_id: int) -> HttpResponse:
         HttpResponse: Redirect to admin dashboard
     """
     # Check if user is logged in as admin
-    if not request.session.get('is_soundhire_admin'):
+    if not await _ais_admin(request):
         messages.error(request, "Unauthorized access")
         return redirect('admin_login')
     
@@ -306,10 +576,13 @@ def cancel_booking(request: HttpRequest, booking_id: int) -> HttpResponse:
         messages.error(request, "Invalid request method")
         return redirect('admin_dashboard')
     
-    # Update booking status in Supabase
-    result = update_booking_status(booking_id, 'cancelled')
+    # Update booking status in Supabase; the row itself is not needed back
+    result = await aupdate_booking_status(booking_id, 'cancelled', projection=None)
     
     if result:
+        record_status(booking_id, 'cancelled')
+        apply_status([booking_id], 'cancelled')
+        await ainvalidate_summary()
         messages.success(
             request,
             f"Booking #{booking_id} has been cancelled successfully"
@@ -320,12 +593,11 @@ def cancel_booking(request: HttpRequest, booking_id: int) -> HttpResponse:
             f"Failed to cancel booking #{booking_id}. Please try again."
         )
     
-    # Redirect back to dashboard, preserving status filter if present
-    status_filter = request.GET.get('status', 'all')
-    return redirect(f"/admin/dashboard/?status={status_filter}")
+    # Redirect back to the same dashboard page and filter
+    return _redirect_to_dashboard(request)
 
 
-def confirm_booking(request: HttpRequest, booking_id: int) -> HttpResponse:
+async def confirm_booking(request: HttpRequest, booking_id: int) -> HttpResponse:
     """
     Confirm a booking by updating its status to 'confirmed'.
     
@@ -339,7 +611,7 @@ def confirm_booking(request: HttpRequest, booking_id: int) -> HttpResponse:
         HttpResponse: Redirect to admin dashboard
     """
     # Check if user is logged in as admin
-    if not request.session.get('is_soundhire_admin'):
+    if not await _ais_admin(request):
         messages.error(request, "Unauthorized access")
         return redirect('admin_login')
     
@@ -348,10 +620,13 @@ def confirm_booking(request: HttpRequest, booking_id: int) -> HttpResponse:
         messages.error(request, "Invalid request method")
         return redirect('admin_dashboard')
     
-    # Update booking status in Supabase
-    result = update_booking_status(booking_id, 'confirmed')
+    # Update booking status in Supabase; the row itself is not needed back
+    result = await aupdate_booking_status(booking_id, 'confirmed', projection=None)
     
     if result:
+        record_status(booking_id, 'confirmed')
+        apply_status([booking_id], 'confirmed')
+        await ainvalidate_summary()
         messages.success(
             request,
             f"Booking #{booking_id} has been confirmed successfully"
@@ -362,6 +637,395 @@ def confirm_booking(request: HttpRequest, booking_id: int) -> HttpResponse:
             f"Failed to confirm booking #{booking_id}. Please try again."
         )
     
-    # Redirect back to dashboard, preserving status filter if present
+    # Redirect back to the same dashboard page and filter
+    return _redirect_to_dashboard(request)
+
+
+# Bulk action names posted by the dashboard, and the status each one sets
+BULK_ACTIONS = {
+    'confirm': 'confirmed',
+    'cancel': 'cancelled',
+}
+
+# A booking ID as posted by the dashboard: ASCII digits only (str.isdigit()
+# also accepts e.g. superscripts, which int() rejects), at most 18 of them
+# so it fits a Postgres bigint
+BOOKING_ID_PATTERN = re.compile(r'[0-9]{1,18}')
+
+
+async def bulk_update_bookings(request: HttpRequest) -> HttpResponse:
+    """
+    Confirm or cancel every booking selected on the dashboard.
+    
+    Admin-only action. Requires POST request for security. All selected
+    bookings are updated with one Supabase request, and the result for
+    each booking is reported back through messages.
+    
+    POST fields:
+        action: "confirm" or "cancel"
+        booking_ids: One value per selected booking
+    
+    Args:
+        request: HTTP request object
+        
+    Returns:
+        HttpResponse: Redirect to admin dashboard
+    """
+    # Check if user is logged in as admin
+    if not await _ais_admin(request):
+        messages.error(request, "Unauthorized access")
+        return redirect('admin_login')
+    
+    # Only allow POST requests for this action
+    if request.method != 'POST':
+        messages.error(request, "Invalid request method")
+        return redirect('admin_dashboard')
+    
+    action = request.POST.get('action')
+    new_status = BULK_ACTIONS.get(action)
+    if new_status is None:
+        messages.error(request, "Unknown bulk action")
+        return _redirect_to_dashboard(request)
+    
+    # Parse the selected IDs, ignoring duplicates and anything non-numeric
+    booking_ids = []
+    seen = set()
+    for value in request.POST.getlist('booking_ids'):
+        if BOOKING_ID_PATTERN.fullmatch(value) and int(value) not in seen:
+            seen.add(int(value))
+            booking_ids.append(int(value))
+    
+    if not booking_ids:
+        messages.warning(request, "No bookings selected")
+        return _redirect_to_dashboard(request)
+    
+    if len(booking_ids) > settings.BOOKINGS_BULK_MAX:
+        messages.error(
+            request,
+            f"Too many bookings selected ({len(booking_ids)}); the limit is {settings.BOOKINGS_BULK_MAX}."
+        )
+        return _redirect_to_dashboard(request)
+    
+    # Update every selected booking in one Supabase request
+    results = await aupdate_booking_status_bulk(booking_ids, new_status)
+    updated = [booking_id for booking_id, ok in results.items() if ok]
+    failed = [booking_id for booking_id, ok in results.items() if not ok]
+    
+    if updated:
+        for booking_id in updated:
+            record_status(booking_id, new_status)
+        apply_status(updated, new_status)
+        await ainvalidate_summary()
+        messages.success(
+            request,
+            f"{len(updated)} booking(s) {new_status}: "
+            + ", ".join(f"#{booking_id}" for booking_id in updated)
+        )
+    if failed:
+        messages.error(
+            request,
+            f"Failed to {action} booking(s) "
+            + ", ".join(f"#{booking_id}" for booking_id in failed)
+            + ". Please try again."
+        )
+    
+    # Redirect back to the same dashboard page and filter
+    return _redirect_to_dashboard(request)
+
+
+async def _change_token_and_catalog() -> Tuple[Optional[str], Catalog]:
+    """
+    Bookings change token and catalog for an admin page's ETag.
+    
+    Taken from this worker's bookings mirror when it is fresh, otherwise
+    fetched from Supabase concurrently. The token is None if it could not
+    be fetched.
+    
+    Returns:
+        Tuple: (change token or None, Catalog)
+    """
+    mirror = await aget_mirror()
+    if mirror is not None:
+        return mirror.change_token, await aget_catalog()
+    head = await afan_out(
+        {'token': aget_bookings_change_token, 'catalog': aget_catalog},
+        defaults={'token': None, 'catalog': build_catalog([], DEFAULT_DJ_RATE)},
+    )
+    return head['token'], head['catalog']
+
+
+async def occupancy(request: HttpRequest) -> HttpResponse:
+    """
+    Occupancy calendar: units of each package out per day, against stock.
+    
+    Admin-only. Shows a year as a heatmap of months by days, or one month
+    as a calendar, shaded by the share of each package's stock that is
+    booked (see bookings/occupancy.py). The counts are computed from all
+    bookings that are not cancelled and cached until the bookings change.
+    
+    Query parameters:
+        year: Year to show (default: this year; at most 5 years away)
+        month: Optional month (1-12) to show as a calendar
+    
+    Args:
+        request: HTTP request object
+    
+    Returns:
+        HttpResponse: Rendered occupancy.html template or redirect
+    """
+    # Check if user is logged in as admin
+    if not await _ais_admin(request):
+        messages.warning(request, "Please log in to access the admin dashboard")
+        return redirect('admin_login')
+    
+    today = date.today()
+    try:
+        year = int(request.GET.get('year', today.year))
+    except ValueError:
+        year = today.year
+    year = min(max(year, today.year - OCCUPANCY_YEARS), today.year + OCCUPANCY_YEARS)
+    try:
+        month = int(request.GET.get('month', ''))
+    except ValueError:
+        month = None
+    if month is not None and not 1 <= month <= 12:
+        month = None
+    
+    # Same revalidation as the dashboard: change token and catalog first
+    token, catalog = await _change_token_and_catalog()
+    
+    etag = None
+    if token:
+        etag = page_etag(
+            request,
+            token,
+            catalog.version,
+            year,
+            month or '',
+            template_digest('bookings/occupancy.html'),
+        )
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+    
+    occupancy_data = await aget_occupancy(year, version=token)
+    context = {
+        'year': year,
+        'month': month,
+        'month_name': month_label(month),
+        'months': [(number, month_label(number)) for number in range(1, 13)],
+        'previous_year': year - 1 if year > today.year - OCCUPANCY_YEARS else None,
+        'next_year': year + 1 if year < today.year + OCCUPANCY_YEARS else None,
+        'heatmap': occupancy_heatmap(occupancy_data, month),
+        'weekdays': ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'],
+        'days': range(1, 32),
+    }
+    
+    response = render(request, 'bookings/occupancy.html', context)
+    if etag:
+        response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+async def analytics(request: HttpRequest) -> HttpResponse:
+    """
+    Revenue analytics page: monthly revenue and bookings, DJ attach rate
+    and package mix, drawn as bars.
+    
+    Admin-only. The figures come from the incrementally refreshed rollups
+    in bookings/analytics.py, cached per bookings change token; the same
+    data, with daily series, is at /admin/analytics.json.
+    
+    Args:
+        request: HTTP request object
+        
+    Returns:
+        HttpResponse: Rendered analytics.html template or redirect
+    """
+    # Check if user is logged in as admin
+    if not await _ais_admin(request):
+        messages.warning(request, "Please log in to access the admin dashboard")
+        return redirect('admin_login')
+    
+    token, catalog = await _change_token_and_catalog()
+    etag = None
+    if token:
+        etag = page_etag(request, token, catalog.version, template_digest('bookings/analytics.html'))
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+    
+    data = await aget_analytics(version=token)
+    
+    # Bar lengths, as a percentage of the largest month
+    months = data['monthly'][-ANALYTICS_CHART_MONTHS:]
+    top_revenue = max((month['revenue'] for month in months), default=0) or 1
+    top_bookings = max((month['bookings'] for month in months), default=0) or 1
+    chart = [
+        {
+            **month,
+            'revenue_pct': round(100 * month['revenue'] / top_revenue, 1),
+            'bookings_pct': round(100 * month['bookings'] / top_bookings, 1),
+            'dj_pct': round(100 * month['dj_attach_rate'], 1),
+        }
+        for month in months
+    ]
+    package_mix = [dict(entry, share_pct=round(100 * entry['share'], 1)) for entry in data['package_mix']]
+    
+    context = {
+        'totals': data['totals'],
+        'dj_pct': round(100 * data['totals'].get('dj_attach_rate', 0), 1),
+        'months': chart,
+        'package_mix': package_mix,
+        'generated_at': data['generated_at'],
+        'rollup_stats': analytics_stats(),
+    }
+    response = render(request, 'bookings/analytics.html', context)
+    if etag:
+        response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+async def analytics_json(request: HttpRequest) -> HttpResponse:
+    """
+    Revenue analytics as JSON: totals, package mix, monthly and daily series.
+    
+    Admin-only. See bookings/analytics.py for the figures; the payload is
+    cached per bookings change token and revalidated by ETag.
+    
+    Args:
+        request: HTTP request object
+        
+    Returns:
+        JsonResponse: The analytics payload, or a redirect
+    """
+    # Check if user is logged in as admin
+    if not await _ais_admin(request):
+        messages.error(request, "Unauthorized access")
+        return redirect('admin_login')
+    
+    token, catalog = await _change_token_and_catalog()
+    etag = None
+    if token:
+        etag = page_etag(request, token, catalog.version, 'analytics.json')
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+    
+    response = JsonResponse(await aget_analytics(version=token))
+    if etag:
+        response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def _parse_date(value: str):
+    """Parse a YYYY-MM-DD query parameter; None if empty, ValueError if invalid."""
+    return date.fromisoformat(value) if value else None
+
+
+async def export_bookings(request: HttpRequest, fmt: str) -> HttpResponse:
+    """
+    Download bookings as CSV or JSON Lines.
+    
+    Admin-only. The file is streamed: bookings are read from Supabase in
+    chunks of BOOKINGS_EXPORT_CHUNK and sent as they arrive (see
+    bookings/export.py), so the whole table is never held in memory.
+    When this worker's bookings mirror is fresh, it is read from the
+    mirror instead.
+    
+    Query parameters:
+        status: all/pending/confirmed/cancelled, as on the dashboard
+        from, to: Optional event date range (YYYY-MM-DD, inclusive)
+    
+    Args:
+        request: HTTP request object
+        fmt: "csv" or "jsonl" (set by the URL)
+        
+    Returns:
+        StreamingHttpResponse: The export, or a redirect
+    """
+    # Check if user is logged in as admin
+    if not await _ais_admin(request):
+        messages.error(request, "Unauthorized access")
+        return redirect('admin_login')
+    
+    # Same status filter as the dashboard
     status_filter = request.GET.get('status', 'all')
-    return redirect(f"/admin/dashboard/?status={status_filter}")
+    if status_filter not in ['all', 'pending', 'confirmed', 'cancelled']:
+        status_filter = 'all'
+    
+    try:
+        start_from = _parse_date(request.GET.get('from', ''))
+        start_to = _parse_date(request.GET.get('to', ''))
+    except ValueError:
+        messages.error(request, "Export dates must be in YYYY-MM-DD format")
+        return _redirect_to_dashboard(request)
+    
+    filters = ExportFilters(
+        status=None if status_filter == 'all' else status_filter,
+        start_from=start_from,
+        start_to=start_to,
+    )
+    
+    # Package names come from the cached catalog, not a join per chunk
+    catalog = await aget_catalog()
+    package_names = {package_id: pkg.name for package_id, pkg in catalog.packages_by_id.items()}
+    
+    response = StreamingHttpResponse(
+        stream_export(fmt, filters, package_names, await aget_mirror()),
+        content_type=CONTENT_TYPES[fmt],
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filters.filename(fmt)}"'
+    # Customer contact details: never store in any cache
+    patch_cache_control(response, private=True, no_store=True)
+    return response
+
+
+def _may_scrape(request: HttpRequest) -> bool:
+    """
+    Check whether a request may read /metrics.
+    
+    Allowed are clients in METRICS_ALLOWED_IPS and, when METRICS_TOKEN is
+    set, requests carrying it as a bearer token.
+    """
+    token = settings.METRICS_TOKEN
+    authorization = request.headers.get('Authorization', '')
+    if token and hmac.compare_digest(authorization.encode(), f"Bearer {token}".encode()):
+        return True
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    for allowed in settings.METRICS_ALLOWED_IPS:
+        try:
+            if address in ipaddress.ip_network(allowed, strict=False):
+                return True
+        except ValueError:
+            logger.warning(f"Ignoring invalid METRICS_ALLOWED_IPS entry: {allowed!r}")
+    return False
+
+
+def metrics(request: HttpRequest) -> HttpResponse:
+    """
+    Prometheus metrics in the text exposition format (bookings/metrics.py).
+    
+    Under a multi-worker server with PROMETHEUS_MULTIPROC_DIR set, the
+    values of every worker are included, whichever worker answers.
+    Booking volumes, outcomes and timings are business data, so only
+    clients allowed by METRICS_ALLOWED_IPS or METRICS_TOKEN get them.
+    
+    Args:
+        request: HTTP request object
+        
+    Returns:
+        HttpResponse: Metrics for the Prometheus scraper, or 403
+    """
+    if not _may_scrape(request):
+        return HttpResponseForbidden("Metrics are not available to this client")
+    body, content_type = render_metrics()
+    response = HttpResponse(body, content_type=content_type)
+    patch_cache_control(response, no_store=True)
+    return response
@@ -0,0 +1,13 @@
+"""
+gunicorn settings read automatically when gunicorn is started from the
+project root (see README: "Run in production").
+"""
+
+import os
+
+
+def child_exit(server, worker):
+    """Drop an exited worker's per-process metrics (bookings/metrics.py)."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
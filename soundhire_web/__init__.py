@@ -1,16 +1,6 @@
 """
-ASGI config for soundhire_web project.
+Django project package for the SoundHire web application.
 
-It exposes the ASGI callable as a module-level variable named ``application``.
-
-For more information on this file, see
-https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
+Entry points: wsgi.py (WSGI servers such as gunicorn) and asgi.py
+(ASGI servers such as uvicorn).
 """
-
-import os
-
-from django.core.asgi import get_asgi_application
-
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'soundhire_web.settings')
-
-application = get_asgi_application()
@@ -13,4 +13,24 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'soundhire_web.settings')
 
+# Async views talk to Supabase through the native async client under ASGI
+os.environ.setdefault('SUPABASE_ASYNC_CLIENT', '1')
+
 application = get_asgi_application()
+
+# Send bookings queued by the home page to Supabase in the background
+# (no-op when OUTBOX_DRAINER is "off")
+from bookings.outbox import start_drainer  # noqa: E402
+
+start_drainer()
+
+# Keep this worker's in-memory copy of the bookings table in sync
+# (no-op when BOOKINGS_MIRROR is "off")
+from bookings.mirror import start_mirror  # noqa: E402
+
+start_mirror()
+
+# Keep the local read replica in sync (no-op unless SUPABASE_REPLICA_SYNC is "thread")
+from bookings.replica import start_replicator  # noqa: E402
+
+start_replicator()
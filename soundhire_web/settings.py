@@ -20,11 +20,155 @@ SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
 ADMIN_ACCESS_CODE = os.getenv("ADMIN_ACCESS_CODE", "soundhire-admin-2025")
 
+# Supabase HTTP connection pool (shared by every request in a worker process)
+SUPABASE_POOL_SIZE = int(os.getenv("SUPABASE_POOL_SIZE", "10"))
+SUPABASE_POOL_KEEPALIVE = float(os.getenv("SUPABASE_POOL_KEEPALIVE", "30"))
+SUPABASE_CONNECT_TIMEOUT = float(os.getenv("SUPABASE_CONNECT_TIMEOUT", "3"))
+SUPABASE_READ_TIMEOUT = float(os.getenv("SUPABASE_READ_TIMEOUT", "10"))
+
+# Async Supabase client for async views. Enabled by soundhire_web/asgi.py;
+# under WSGI the async helpers reuse the sync pool from a worker thread.
+SUPABASE_ASYNC_CLIENT = os.getenv("SUPABASE_ASYNC_CLIENT", "0") == "1"
+SUPABASE_ASYNC_POOL_SIZE = int(os.getenv("SUPABASE_ASYNC_POOL_SIZE", "100"))
+
+# Failure handling for Supabase calls (bookings/resilience.py).
+# Read timeout per supabase_client helper (others use SUPABASE_READ_TIMEOUT)
+SUPABASE_OPERATION_TIMEOUTS = {
+    'get_bookings_change_token': 2.0,
+    'get_dj_rate': 3.0,
+    'fetch_settings': 3.0,
+    'fetch_packages': 3.0,
+    'get_booking_summary': 3.0,
+    'get_booking_by_id': 3.0,
+    'list_bookings': 5.0,
+    'search_bookings': 5.0,
+    'create_booking': 5.0,
+    'update_booking_status': 5.0,
+    'update_booking_status_bulk': 10.0,
+    'create_bookings_batch': 15.0,
+    'list_active_bookings': 15.0,
+    'list_changed_bookings': 15.0,
+    'iter_booking_chunks': 30.0,
+}
+# Retries of idempotent reads (GET/HEAD) after a transient error, with
+# random exponential backoff between SUPABASE_RETRY_BASE_DELAY and
+# SUPABASE_RETRY_MAX_DELAY seconds
+SUPABASE_READ_RETRIES = int(os.getenv("SUPABASE_READ_RETRIES", "2"))
+SUPABASE_RETRY_BASE_DELAY = float(os.getenv("SUPABASE_RETRY_BASE_DELAY", "0.1"))
+SUPABASE_RETRY_MAX_DELAY = float(os.getenv("SUPABASE_RETRY_MAX_DELAY", "1"))
+# Circuit breaker: consecutive failures before failing fast, and seconds
+# before a trial call is let through again
+SUPABASE_BREAKER_THRESHOLD = int(os.getenv("SUPABASE_BREAKER_THRESHOLD", "5"))
+SUPABASE_BREAKER_COOLDOWN = float(os.getenv("SUPABASE_BREAKER_COOLDOWN", "30"))
+
+# Concurrent Supabase reads within one request (supabase_client.fan_out)
+SUPABASE_FANOUT_WORKERS = int(os.getenv("SUPABASE_FANOUT_WORKERS", "8"))
+SUPABASE_FANOUT_TIMEOUT = float(os.getenv("SUPABASE_FANOUT_TIMEOUT", "10"))
+
+# Admin dashboard bookings pagination
+BOOKINGS_PAGE_SIZE = int(os.getenv("BOOKINGS_PAGE_SIZE", "25"))
+BOOKINGS_PAGE_SIZE_MAX = 100
+
+# Most bookings one bulk confirm/cancel may change (one Supabase request)
+BOOKINGS_BULK_MAX = int(os.getenv("BOOKINGS_BULK_MAX", "500"))
+
+# Bookings fetched per Supabase request by the streaming CSV/JSONL export.
+# At most 1000: PostgREST caps responses at max-rows (1000 on Supabase), and
+# a capped chunk would look like the last one and end the export early.
+BOOKINGS_EXPORT_CHUNK = min(int(os.getenv("BOOKINGS_EXPORT_CHUNK", "1000")), 1000)
+
+# Request tracing (bookings/middleware.py): with SERVER_TIMING_HEADER=1, send
+# a Server-Timing header with the time spent waiting on Supabase (off by
+# default: it tells any visitor how long the backend took, which helps
+# timing attacks), and log requests slower than this many milliseconds, with
+# their Supabase calls, to the bookings.slow_requests logger
+SERVER_TIMING_HEADER = os.getenv("SERVER_TIMING_HEADER", "0") == "1"
+SLOW_REQUEST_THRESHOLD_MS = float(os.getenv("SLOW_REQUEST_THRESHOLD_MS", "500"))
+
+# Who may scrape /metrics: clients whose address is in METRICS_ALLOWED_IPS
+# (comma-separated addresses or networks, e.g. 10.0.0.0/8), or any client
+# sending "Authorization: Bearer <METRICS_TOKEN>" when a token is set.
+# Behind a reverse proxy every client has the proxy's address, so use the token.
+METRICS_ALLOWED_IPS = [net.strip() for net in os.getenv("METRICS_ALLOWED_IPS", "127.0.0.1,::1").split(",") if net.strip()]
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Seconds the package catalog (packages + DJ rate) is cached per worker
+CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", "300"))
+
+# Seconds the admin dashboard's booking summary (counts, revenue) is cached
+BOOKING_SUMMARY_CACHE_TTL = float(os.getenv("BOOKING_SUMMARY_CACHE_TTL", "30"))
+
+# Seconds the admin occupancy calendar (bookings/occupancy.py) is cached per
+# year; it is recomputed sooner whenever the bookings change token changes
+OCCUPANCY_CACHE_TTL = float(os.getenv("OCCUPANCY_CACHE_TTL", "600"))
+
+# Revenue analytics (bookings/analytics.py): seconds a payload is cached per
+# bookings change token, and seconds between full rebuilds of the rollups
+ANALYTICS_CACHE_TTL = float(os.getenv("ANALYTICS_CACHE_TTL", "300"))
+ANALYTICS_FULL_RESYNC = float(os.getenv("ANALYTICS_FULL_RESYNC", "3600"))
+
+# Seconds the home page's rendered package grid and form are cached
+HOME_PAGE_CACHE_TTL = float(os.getenv("HOME_PAGE_CACHE_TTL", "600"))
+
+# Package availability index (bookings/availability.py): seconds between
+# reloads from Supabase, and how many days ahead sold-out dates are listed
+AVAILABILITY_REFRESH_INTERVAL = float(os.getenv("AVAILABILITY_REFRESH_INTERVAL", "60"))
+AVAILABILITY_HORIZON_DAYS = int(os.getenv("AVAILABILITY_HORIZON_DAYS", "90"))
+
+# Booking outbox (bookings/outbox.py). OUTBOX_DRAINER is "thread" to send
+# queued bookings from a thread in each web worker, or "off" when
+# `manage.py outbox run` does it in a separate process.
+OUTBOX_DRAINER = os.getenv("OUTBOX_DRAINER", "thread")
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "5"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "10"))
+OUTBOX_RETRY_BASE_DELAY = float(os.getenv("OUTBOX_RETRY_BASE_DELAY", "2"))
+OUTBOX_RETRY_MAX_DELAY = float(os.getenv("OUTBOX_RETRY_MAX_DELAY", "300"))
+OUTBOX_LEASE = float(os.getenv("OUTBOX_LEASE", "60"))
+# Bookings Supabase refused (e.g. sold out) are listed on the admin dashboard
+# for this many days, and emailed to ADMINS (comma-separated ADMIN_EMAILS)
+OUTBOX_REJECTED_DAYS = int(os.getenv("OUTBOX_REJECTED_DAYS", "14"))
+ADMINS = [('SoundHire admin', email.strip()) for email in os.getenv("ADMIN_EMAILS", "").split(",") if email.strip()]
+
+# In-memory bookings mirror (bookings/mirror.py). BOOKINGS_MIRROR is "thread"
+# to keep a copy of the bookings table in each web worker, synced by a
+# background thread, or "off" (default) to read the dashboard and exports from
+# Supabase. Every worker polls on its own, so turn it on for a few workers
+# with a large table, not for many small ones.
+# The sync thread polls every BOOKINGS_MIRROR_INTERVAL seconds; a mirror whose
+# last sync is older than BOOKINGS_MIRROR_MAX_STALENESS seconds is not used.
+BOOKINGS_MIRROR = os.getenv("BOOKINGS_MIRROR", "off")
+BOOKINGS_MIRROR_INTERVAL = float(os.getenv("BOOKINGS_MIRROR_INTERVAL", "2"))
+BOOKINGS_MIRROR_MAX_STALENESS = float(os.getenv("BOOKINGS_MIRROR_MAX_STALENESS", "10"))
+# Seconds re-read before the watermark (rows committed late), and between full reloads
+BOOKINGS_MIRROR_OVERLAP = float(os.getenv("BOOKINGS_MIRROR_OVERLAP", "5"))
+BOOKINGS_MIRROR_FULL_RESYNC = float(os.getenv("BOOKINGS_MIRROR_FULL_RESYNC", "3600"))
+
+# Local SQLite read replica of packages, settings and bookings (bookings/replica.py).
+# SUPABASE_READS is "replica" to serve listings, filters and summaries from it
+# (writes always go to Supabase), or "supabase". SUPABASE_REPLICA_SYNC is
+# "thread" to replicate every SUPABASE_REPLICA_INTERVAL seconds from a thread
+# in each web worker, or "off" when `manage.py replicate --loop` does it in a
+# separate process (recommended with several workers). Only one process
+# replicates at a time: it holds a lease for SUPABASE_REPLICA_LEASE seconds,
+# renewed on every pass, and the others skip their passes meanwhile. Reads fall
+# back to Supabase when the replica is older than SUPABASE_REPLICA_MAX_STALENESS seconds.
+SUPABASE_READS = os.getenv("SUPABASE_READS", "supabase")
+SUPABASE_REPLICA_SYNC = os.getenv("SUPABASE_REPLICA_SYNC", "off")
+SUPABASE_REPLICA_INTERVAL = float(os.getenv("SUPABASE_REPLICA_INTERVAL", "5"))
+SUPABASE_REPLICA_MAX_STALENESS = float(os.getenv("SUPABASE_REPLICA_MAX_STALENESS", "60"))
+SUPABASE_REPLICA_OVERLAP = float(os.getenv("SUPABASE_REPLICA_OVERLAP", "5"))
+SUPABASE_REPLICA_FULL_RESYNC = float(os.getenv("SUPABASE_REPLICA_FULL_RESYNC", "86400"))
+SUPABASE_REPLICA_LEASE = float(os.getenv("SUPABASE_REPLICA_LEASE", "30"))
+
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = os.getenv("DJANGO_SECRET_KEY", 'django-insecure-dev-key-change-in-production')
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# DJANGO_DEBUG=1 for development: runserver then serves the source static
+# files, and {% static %} links to their plain names instead of the hashed
+# ones collectstatic writes (bookings/staticfiles.py)
+DEBUG = os.getenv("DJANGO_DEBUG", "0") == "1"
 
 ALLOWED_HOSTS = ['localhost', '127.0.0.1']
 
@@ -42,6 +186,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Answers static file requests before anything else runs (they make no
+    # Supabase calls and need no session); see bookings/staticfiles.py
+    'bookings.staticfiles.StaticAssetsMiddleware',
+    # Next, so its timings cover the rest of the request
+    'bookings.middleware.SupabaseTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -74,12 +223,18 @@ WSGI_APPLICATION = 'soundhire_web.wsgi.application'
 
 # Database
 # Using Django's default SQLite for Django internals (sessions, admin, etc.)
-# Business data (bookings, packages) lives in Supabase and is accessed via supabase-py
+# and the booking outbox. Business data (bookings, packages) lives in
+# Supabase and is accessed via supabase-py
 
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Web requests and the outbox drainer write concurrently; wait
+            # for the lock instead of failing with "database is locked"
+            'timeout': 20,
+        },
     }
 }
 
@@ -120,11 +275,42 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 STATICFILES_DIRS = []
+# collectstatic output: content-hashed copies plus .gz (and, with Brotli
+# installed, .br) variants, served by bookings.staticfiles.StaticAssetsMiddleware
+STATIC_ROOT = Path(os.getenv("STATIC_ROOT", str(BASE_DIR / 'staticfiles')))
+
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'bookings.staticfiles.CompressedManifestStaticFilesStorage'},
+}
+
+# Serve STATIC_ROOT from the app (off when a web server or CDN does it)
+STATIC_SERVE = os.getenv("STATIC_SERVE", "1") == "1"
+# Browser cache lifetime (seconds) of hashed names, which never change,
+# and of files requested by their plain name
+STATIC_IMMUTABLE_MAX_AGE = int(os.getenv("STATIC_IMMUTABLE_MAX_AGE", "31536000"))
+STATIC_MAX_AGE = int(os.getenv("STATIC_MAX_AGE", "60"))
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
-# Messages framework (for flash messages)
-MESSAGE_STORAGE = 'django.contrib.messages.storage.session.SessionStorage'
+# Sessions only hold the admin login flag. They are kept on the server, so
+# logging out (or deleting the row) revokes one before it expires, which a
+# signed-cookie session cannot do. cached_db reads them from the cache and
+# falls back to the django_session table; only admin logins and logouts
+# write it, since customers get no session (messages and the booking
+# success details travel in their own cookies). With several workers, use
+# a CACHES backend shared by all of them (e.g. Redis or Memcached), or
+# SESSION_ENGINE=django.contrib.sessions.backends.db: a per-process cache
+# can keep serving a revoked session until its cached copy expires.
+SESSION_ENGINE = os.getenv("SESSION_ENGINE", "django.contrib.sessions.backends.cached_db")
+
+# Messages framework (for flash messages). Messages go in a cookie and
+# only fall back to the session if they do not fit in it.
+MESSAGE_STORAGE = 'django.contrib.messages.storage.fallback.FallbackStorage'
+
+# Seconds the signed cookie carrying a booking's details to the success
+# page stays valid (see bookings.views.booking_success)
+LAST_BOOKING_COOKIE_AGE = int(os.getenv("LAST_BOOKING_COOKIE_AGE", "300"))
@@ -14,3 +14,20 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'soundhire_web.settings')
 
 application = get_wsgi_application()
+
+# Send bookings queued by the home page to Supabase in the background
+# (no-op when OUTBOX_DRAINER is "off")
+from bookings.outbox import start_drainer  # noqa: E402
+
+start_drainer()
+
+# Keep this worker's in-memory copy of the bookings table in sync
+# (no-op when BOOKINGS_MIRROR is "off")
+from bookings.mirror import start_mirror  # noqa: E402
+
+start_mirror()
+
+# Keep the local read replica in sync (no-op unless SUPABASE_REPLICA_SYNC is "thread")
+from bookings.replica import start_replicator  # noqa: E402
+
+start_replicator()
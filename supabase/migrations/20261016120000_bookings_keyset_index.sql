@@ -0,0 +1,9 @@
+-- Keyset pagination for the admin dashboard (bookings.supabase_client.list_bookings).
+-- Pages are read with ORDER BY start_date DESC, id DESC and a (start_date, id)
+-- range condition, which this index serves with a single range scan.
+create index if not exists bookings_start_date_id_idx
+    on public.bookings (start_date desc, id desc);
+
+-- Same ordering within one status, for the dashboard's status filter.
+create index if not exists bookings_status_start_date_id_idx
+    on public.bookings (status, start_date desc, id desc);
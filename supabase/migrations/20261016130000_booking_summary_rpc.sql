@@ -0,0 +1,25 @@
+-- Admin dashboard summary (bookings.supabase_client.get_booking_summary).
+-- Counts every booking by status and sums confirmed revenue in one pass,
+-- so the dashboard gets one small row instead of downloading the table.
+-- Called as POST/GET /rest/v1/rpc/booking_summary.
+create or replace function public.booking_summary()
+returns table (
+    total bigint,
+    pending bigint,
+    confirmed bigint,
+    cancelled bigint,
+    confirmed_revenue numeric
+)
+language sql
+stable
+as $$
+    select
+        count(*),
+        count(*) filter (where status = 'pending'),
+        count(*) filter (where status = 'confirmed'),
+        count(*) filter (where status = 'cancelled'),
+        coalesce(sum(total_price) filter (where status = 'confirmed'), 0)
+    from public.bookings;
+$$;
+
+grant execute on function public.booking_summary() to anon, authenticated;
@@ -0,0 +1,58 @@
+-- Package stock guard (see bookings/availability.py).
+-- Each web worker checks stock against its own in-memory availability
+-- index before inserting a booking. This trigger is the authoritative
+-- check for the case two workers take the last unit at the same moment.
+
+-- Serves the overlap lookup below and the index load
+-- (active bookings ending on or after today).
+create index if not exists bookings_package_dates_idx
+    on public.bookings (package_id, start_date, end_date)
+    where status <> 'cancelled';
+
+create or replace function public.bookings_enforce_stock()
+returns trigger
+language plpgsql
+as $$
+declare
+    package_stock integer;
+    busiest_day bigint;
+begin
+    if new.status = 'cancelled' then
+        return new;
+    end if;
+
+    select stock into package_stock from public.packages where id = new.package_id;
+    if package_stock is null then
+        return new;
+    end if;
+
+    -- Serialise bookings of the same package so concurrent inserts see each other
+    perform pg_advisory_xact_lock(new.package_id);
+
+    select coalesce(max(booked), 0) into busiest_day
+    from (
+        select day, sum(b.qty) as booked
+        from generate_series(new.start_date, coalesce(new.end_date, new.start_date), interval '1 day') as day
+        join public.bookings b
+          on b.package_id = new.package_id
+         and b.status <> 'cancelled'
+         and b.id is distinct from new.id
+         and b.start_date <= day
+         and coalesce(b.end_date, b.start_date) >= day
+        group by day
+    ) per_day;
+
+    if busiest_day + coalesce(new.qty, 1) > package_stock then
+        raise exception 'Package % is sold out for % to %',
+            new.package_id, new.start_date, coalesce(new.end_date, new.start_date)
+            using errcode = 'check_violation';
+    end if;
+    return new;
+end;
+$$;
+
+drop trigger if exists bookings_enforce_stock on public.bookings;
+create trigger bookings_enforce_stock
+    before insert or update of status, package_id, start_date, end_date, qty
+    on public.bookings
+    for each row execute function public.bookings_enforce_stock();
@@ -0,0 +1,9 @@
+-- Idempotent booking inserts from the web app's outbox (bookings/outbox.py).
+-- Each queued booking carries a UUID; inserting the same key twice is a
+-- no-op (INSERT ... ON CONFLICT (idempotency_key) DO NOTHING), so a batch
+-- can be retried after a timeout without creating duplicate bookings.
+alter table public.bookings
+    add column if not exists idempotency_key uuid;
+
+create unique index if not exists bookings_idempotency_key_idx
+    on public.bookings (idempotency_key);
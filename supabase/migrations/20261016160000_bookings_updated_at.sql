@@ -0,0 +1,25 @@
+-- Change tracking for bookings.
+-- updated_at is set on insert and bumped by a trigger on every update, so
+-- max(updated_at) plus count(*) is a cheap "has anything changed?" token
+-- for the admin dashboard's ETag (bookings.supabase_client.get_bookings_change_token).
+alter table public.bookings
+    add column if not exists updated_at timestamptz not null default now();
+
+create or replace function public.bookings_touch_updated_at()
+returns trigger
+language plpgsql
+as $$
+begin
+    new.updated_at := now();
+    return new;
+end;
+$$;
+
+drop trigger if exists bookings_touch_updated_at on public.bookings;
+create trigger bookings_touch_updated_at
+    before update on public.bookings
+    for each row execute function public.bookings_touch_updated_at();
+
+-- Serves ORDER BY updated_at DESC LIMIT 1
+create index if not exists bookings_updated_at_idx
+    on public.bookings (updated_at desc);
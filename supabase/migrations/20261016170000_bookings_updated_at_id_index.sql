@@ -0,0 +1,10 @@
+-- Incremental sync of the bookings mirror (bookings/mirror.py).
+-- bookings.supabase_client.list_changed_bookings reads the rows changed since
+-- a watermark in (updated_at, id) order, a batch at a time; this index
+-- serves each batch as one range scan.
+--
+-- updated_at is now() of the writing transaction, i.e. when it started, so a
+-- row can commit after rows with later timestamps. The mirror re-reads a few
+-- seconds before its watermark (BOOKINGS_MIRROR_OVERLAP) to catch those.
+create index if not exists bookings_updated_at_id_idx
+    on public.bookings (updated_at, id);
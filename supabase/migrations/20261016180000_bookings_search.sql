@@ -0,0 +1,75 @@
+-- Search box of the admin dashboard (bookings.supabase_client.search_bookings),
+-- used when the worker's in-memory bookings mirror is not available.
+-- Trigram indexes let "part of the name / email / phone" conditions (LIKE
+-- '%word%') and typo-tolerant name matches (word <% name) use an index
+-- instead of scanning the table.
+create extension if not exists pg_trgm;
+
+create index if not exists bookings_customer_name_trgm_idx
+    on public.bookings using gin (lower(customer_name) gin_trgm_ops);
+
+create index if not exists bookings_email_trgm_idx
+    on public.bookings using gin (lower(email) gin_trgm_ops);
+
+create index if not exists bookings_phone_digits_trgm_idx
+    on public.bookings using gin ((regexp_replace(phone, '\D', '', 'g')) gin_trgm_ops);
+
+-- Every word of the query (letters and digits, at most 6 words) must be part
+-- of the name, email or phone digits, or be similar to a word of the name.
+-- Candidates are found through the indexes with the longest word; results
+-- are ranked by word similarity, then newest event first.
+-- Called as GET /rest/v1/rpc/search_bookings?query=...&page_limit=...
+create or replace function public.search_bookings(
+    query text,
+    status_filter text default null,
+    page_limit integer default 26,
+    page_offset integer default 0
+)
+returns setof public.bookings
+language sql
+stable
+set pg_trgm.word_similarity_threshold = 0.5
+as $$
+    with words as (
+        select distinct word
+        from regexp_split_to_table(lower(query), '[^a-z0-9]+') as word
+        where word <> ''
+        limit 6
+    ),
+    longest as (
+        select word from words order by length(word) desc limit 1
+    )
+    select b.*
+    from public.bookings b, longest
+    where (status_filter is null or b.status = status_filter)
+      and (
+          lower(b.customer_name) like '%' || longest.word || '%'
+          or lower(b.email) like '%' || longest.word || '%'
+          or regexp_replace(b.phone, '\D', '', 'g') like '%' || longest.word || '%'
+          or (length(longest.word) >= 4 and longest.word <% lower(b.customer_name))
+      )
+      and not exists (
+          select 1 from words w
+          where not (
+              lower(b.customer_name) like '%' || w.word || '%'
+              or lower(b.email) like '%' || w.word || '%'
+              or regexp_replace(b.phone, '\D', '', 'g') like '%' || w.word || '%'
+              or (length(w.word) >= 4 and w.word <% lower(b.customer_name))
+          )
+      )
+    order by
+        (
+            select sum(greatest(
+                word_similarity(w.word, lower(b.customer_name)),
+                word_similarity(w.word, lower(b.email)),
+                case when regexp_replace(b.phone, '\D', '', 'g') like '%' || w.word || '%' then 0.6 else 0 end
+            ))
+            from words w
+        ) desc,
+        b.start_date desc,
+        b.id desc
+    limit page_limit
+    offset page_offset;
+$$;
+
+grant execute on function public.search_bookings(text, text, integer, integer) to anon, authenticated;
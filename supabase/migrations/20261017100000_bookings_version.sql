@@ -0,0 +1,46 @@
+-- Bookings change token (bookings.supabase_client.get_bookings_change_token).
+-- The token used to be max(updated_at) plus count(*), and count(*) scans
+-- the whole table on every dashboard, occupancy and analytics request and
+-- every mirror poll. Instead, statement-level triggers bump a one-row
+-- version counter on every insert, update, delete and truncate, and a
+-- separate counter on deletes, so:
+-- - the token is a primary-key lookup of this row, whatever the table size
+-- - it changes on every committed write, even one whose updated_at is
+--   older than the newest row (a transaction that started earlier)
+-- - incremental syncs (mirror, replica, analytics, availability) copy the
+--   table in full only when `deletes` changed, not on a racing insert
+create table if not exists public.bookings_version (
+    id smallint primary key default 1 check (id = 1),
+    version bigint not null default 0,
+    deletes bigint not null default 0
+);
+
+insert into public.bookings_version (id) values (1) on conflict (id) do nothing;
+
+grant select on public.bookings_version to anon, authenticated;
+
+-- Security definer: the roles writing bookings cannot update this table
+create or replace function public.bookings_bump_version()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    update public.bookings_version
+       set version = version + 1,
+           deletes = deletes + case when tg_op in ('DELETE', 'TRUNCATE') then 1 else 0 end
+     where id = 1;
+    return null;
+end;
+$$;
+
+drop trigger if exists bookings_bump_version on public.bookings;
+create trigger bookings_bump_version
+    after insert or update or delete on public.bookings
+    for each statement execute function public.bookings_bump_version();
+
+drop trigger if exists bookings_bump_version_truncate on public.bookings;
+create trigger bookings_bump_version_truncate
+    after truncate on public.bookings
+    for each statement execute function public.bookings_bump_version();